@@ -0,0 +1,34 @@
+"""Document upload metadata and per-tenant sha256 uniqueness
+
+Revision ID: 0006_document_upload_columns
+Revises: 0112867f060a
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006_document_upload_columns'
+down_revision = '0112867f060a'
+
+
+def upgrade():
+    # 0003 created documents(name, sha256); the model stores filename/path plus upload metadata
+    op.execute("ALTER TABLE documents ALTER COLUMN name DROP NOT NULL")
+    op.execute("ALTER TABLE documents ADD COLUMN IF NOT EXISTS filename VARCHAR")
+    op.execute("ALTER TABLE documents ADD COLUMN IF NOT EXISTS path VARCHAR")
+    op.add_column('documents', sa.Column('size_bytes', sa.BigInteger(), nullable=True))
+    op.add_column('documents', sa.Column('content_type', sa.String(), nullable=True))
+    op.add_column('documents', sa.Column('status', sa.String(), nullable=False, server_default='uploaded'))
+    # Dedup lookup (tenant_id, sha256) is an index-only probe and races resolve on the constraint
+    op.create_unique_constraint('uq_documents_tenant_sha256', 'documents', ['tenant_id', 'sha256'])
+
+
+def downgrade():
+    op.drop_constraint('uq_documents_tenant_sha256', 'documents', type_='unique')
+    op.drop_column('documents', 'status')
+    op.drop_column('documents', 'content_type')
+    op.drop_column('documents', 'size_bytes')
+    # Documents uploaded since the upgrade only have a filename; 0003's name is NOT NULL
+    op.execute("UPDATE documents SET name = COALESCE(filename, path, sha256, 'document-' || id) WHERE name IS NULL")
+    op.execute("ALTER TABLE documents ALTER COLUMN name SET NOT NULL")
+    op.drop_column('documents', 'path')
+    op.drop_column('documents', 'filename')
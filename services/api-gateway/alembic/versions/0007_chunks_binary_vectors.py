@@ -0,0 +1,38 @@
+"""Chunks table with packed binary embeddings
+
+Revision ID: 0007_chunks_binary_vectors
+Revises: 0006_document_upload_columns
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007_chunks_binary_vectors'
+down_revision = '0006_document_upload_columns'
+
+
+def upgrade():
+    op.create_table('chunks',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('document_id', sa.Integer, sa.ForeignKey('documents.id', ondelete='CASCADE')),
+        sa.Column('tenant_id', sa.Integer, sa.ForeignKey('tenants.id'), nullable=False),
+        sa.Column('embedding_id', sa.String),
+        sa.Column('vector', sa.LargeBinary),
+        sa.Column('vector_dim', sa.Integer),
+        sa.Column('vector_dtype', sa.String(8), nullable=False, server_default='float32'),
+        sa.Column('vector_scale', sa.Float, nullable=False, server_default='1.0'),
+    )
+    op.create_index('ix_chunks_tenant_id', 'chunks', ['tenant_id'])
+    op.create_index('ix_chunks_document_id', 'chunks', ['document_id'])
+    # Tenant isolation for direct SQL access (app.current_tenant is bound per request)
+    op.execute("ALTER TABLE chunks ENABLE ROW LEVEL SECURITY")
+    op.execute(
+        "CREATE POLICY chunks_tenant_isolation ON chunks "
+        "USING (tenant_id = current_setting('app.current_tenant', true)::int)"
+    )
+
+
+def downgrade():
+    op.execute("DROP POLICY IF EXISTS chunks_tenant_isolation ON chunks")
+    op.drop_index('ix_chunks_document_id', 'chunks')
+    op.drop_index('ix_chunks_tenant_id', 'chunks')
+    op.drop_table('chunks')
@@ -0,0 +1,18 @@
+"""Chunk text for lexical (BM25) search
+
+Revision ID: 0008_chunks_text
+Revises: 0007_chunks_binary_vectors
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0008_chunks_text'
+down_revision = '0007_chunks_binary_vectors'
+
+
+def upgrade():
+    op.add_column('chunks', sa.Column('text', sa.Text))
+
+
+def downgrade():
+    op.drop_column('chunks', 'text')
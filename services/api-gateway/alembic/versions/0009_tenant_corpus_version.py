@@ -0,0 +1,18 @@
+"""Per-tenant corpus version for search cache invalidation
+
+Revision ID: 0009_tenant_corpus_version
+Revises: 0008_chunks_text
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0009_tenant_corpus_version'
+down_revision = '0008_chunks_text'
+
+
+def upgrade():
+    op.add_column('tenants', sa.Column('corpus_version', sa.BigInteger, nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('tenants', 'corpus_version')
@@ -0,0 +1,34 @@
+"""Transactional outbox for document/tenant events
+
+Revision ID: 0010_outbox_events
+Revises: 0009_tenant_corpus_version
+
+No RLS: the table is internal and the relay reads across tenants.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0010_outbox_events'
+down_revision = '0009_tenant_corpus_version'
+
+
+def upgrade():
+    op.create_table('outbox_events',
+        sa.Column('id', sa.BigInteger, primary_key=True),
+        sa.Column('tenant_id', sa.Integer),
+        sa.Column('event_type', sa.String(64), nullable=False),
+        sa.Column('payload', sa.JSON, nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('published_at', sa.DateTime(timezone=True)),
+        sa.Column('attempts', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text),
+    )
+    op.create_index('ix_outbox_events_tenant_id', 'outbox_events', ['tenant_id'])
+    # The relay only ever scans pending rows in id order
+    op.create_index('ix_outbox_events_pending', 'outbox_events', ['id'], postgresql_where=sa.text('published_at IS NULL'))
+
+
+def downgrade():
+    op.drop_index('ix_outbox_events_pending', 'outbox_events')
+    op.drop_index('ix_outbox_events_tenant_id', 'outbox_events')
+    op.drop_table('outbox_events')
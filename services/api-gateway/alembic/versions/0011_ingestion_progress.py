@@ -0,0 +1,32 @@
+"""Ingestion progress on documents, chunk position/pages on chunks
+
+Revision ID: 0011_ingestion_progress
+Revises: 0010_outbox_events
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0011_ingestion_progress'
+down_revision = '0010_outbox_events'
+
+
+def upgrade():
+    op.add_column('documents', sa.Column('pages_total', sa.Integer))
+    op.add_column('documents', sa.Column('pages_processed', sa.Integer, nullable=False, server_default='0'))
+    op.add_column('documents', sa.Column('chunk_count', sa.Integer, nullable=False, server_default='0'))
+    op.add_column('documents', sa.Column('error', sa.Text))
+    op.add_column('chunks', sa.Column('chunk_index', sa.Integer))
+    op.add_column('chunks', sa.Column('page_start', sa.Integer))
+    op.add_column('chunks', sa.Column('page_end', sa.Integer))
+    op.create_index('ix_chunks_document_chunk_index', 'chunks', ['document_id', 'chunk_index'])
+    # Startup resume scans for documents still waiting for ingestion
+    op.create_index('ix_documents_pending', 'documents', ['id'], postgresql_where=sa.text("status = 'uploaded'"))
+
+
+def downgrade():
+    op.drop_index('ix_documents_pending', 'documents')
+    op.drop_index('ix_chunks_document_chunk_index', 'chunks')
+    for column in ('page_end', 'page_start', 'chunk_index'):
+        op.drop_column('chunks', column)
+    for column in ('error', 'chunk_count', 'pages_processed', 'pages_total'):
+        op.drop_column('documents', column)
@@ -0,0 +1,41 @@
+"""Composite indexes for keyset pagination; documents/api_keys.created_at, api_keys.tenant_id
+
+Revision ID: 0012_keyset_pagination_indexes
+Revises: 0011_ingestion_progress
+
+Every index ends in `id` (the cursor tiebreaker) and starts with `tenant_id` where lists
+are tenant-scoped, so `WHERE tenant_id = :t AND (k, id) > (:k, :id) ORDER BY k, id LIMIT n`
+is a single index range scan at any depth. api_keys gets no RLS policy: keys are resolved
+by hash before the tenant is known.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0012_keyset_pagination_indexes'
+down_revision = '0011_ingestion_progress'
+
+INDEXES = [
+    ('ix_users_tenant_id_id', 'users', ['tenant_id', 'id']),
+    ('ix_users_tenant_email_id', 'users', ['tenant_id', 'email', 'id']),
+    ('ix_users_tenant_name_id', 'users', ['tenant_id', 'last_name', 'first_name', 'id']),
+    ('ix_tenants_name_id', 'tenants', ['name', 'id']),
+    ('ix_api_keys_tenant_created_id', 'api_keys', ['tenant_id', 'created_at', 'id']),
+    ('ix_documents_tenant_created_id', 'documents', ['tenant_id', 'created_at', 'id']),
+    ('ix_documents_tenant_filename_id', 'documents', ['tenant_id', 'filename', 'id']),
+]
+
+
+def upgrade():
+    op.add_column('documents', sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()))
+    op.add_column('api_keys', sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()))
+    op.add_column('api_keys', sa.Column('tenant_id', sa.Integer, sa.ForeignKey('tenants.id')))
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table)
+    op.drop_column('api_keys', 'tenant_id')
+    op.drop_column('api_keys', 'created_at')
+    op.drop_column('documents', 'created_at')
@@ -0,0 +1,32 @@
+"""Make the chunks RLS policy safe for transaction-scoped tenant binding
+
+Revision ID: 0013_rls_transaction_scoped_tenant
+Revises: 0012_keyset_pagination_indexes
+
+The tenant is now bound with `set_config('app.current_tenant', :t, true)`. Once such a
+transaction ends, the setting reads back as '' (not NULL) on that pooled connection, and
+`''::int` raises. `nullif` makes an unbound transaction see no rows instead of failing.
+The policy also gains WITH CHECK, so writes can't target another tenant.
+"""
+from alembic import op
+
+revision = '0013_rls_transaction_scoped_tenant'
+down_revision = '0012_keyset_pagination_indexes'
+
+TENANT_EXPR = "nullif(current_setting('app.current_tenant', true), '')::int"
+
+
+def upgrade():
+    op.execute("DROP POLICY IF EXISTS chunks_tenant_isolation ON chunks")
+    op.execute(
+        "CREATE POLICY chunks_tenant_isolation ON chunks "
+        f"USING (tenant_id = {TENANT_EXPR}) WITH CHECK (tenant_id = {TENANT_EXPR})"
+    )
+
+
+def downgrade():
+    op.execute("DROP POLICY IF EXISTS chunks_tenant_isolation ON chunks")
+    op.execute(
+        "CREATE POLICY chunks_tenant_isolation ON chunks "
+        "USING (tenant_id = current_setting('app.current_tenant', true)::int)"
+    )
@@ -0,0 +1,47 @@
+"""Hash-chained audit log and Merkle checkpoints
+
+Revision ID: 0014_audit_hash_chain
+Revises: 0013_rls_transaction_scoped_tenant
+
+audit_logs is rebuilt around the chain position `seq`. The old table had no chain
+and no writer, so there is nothing to migrate. No RLS on either table: the writer
+appends for every tenant, and verification reads the whole chain.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0014_audit_hash_chain'
+down_revision = '0013_rls_transaction_scoped_tenant'
+
+
+def upgrade():
+    op.execute("DROP TABLE IF EXISTS audit_logs")
+    op.create_table('audit_logs',
+        sa.Column('seq', sa.BigInteger, primary_key=True, autoincrement=False),
+        sa.Column('tenant_id', sa.Integer),
+        sa.Column('actor_id', sa.Integer),
+        sa.Column('event_type', sa.String(64), nullable=False),
+        sa.Column('payload', sa.JSON, nullable=False),
+        sa.Column('payload_hash', sa.String(64), nullable=False),
+        sa.Column('prev_hash', sa.String(64), nullable=False),
+        sa.Column('entry_hash', sa.String(64), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index('ix_audit_logs_tenant_id', 'audit_logs', ['tenant_id'])
+    op.create_table('audit_checkpoints',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('first_seq', sa.BigInteger, nullable=False),
+        sa.Column('last_seq', sa.BigInteger, nullable=False, unique=True),
+        sa.Column('merkle_root', sa.String(64), nullable=False),
+        sa.Column('prev_checkpoint_hash', sa.String(64), nullable=False),
+        sa.Column('checkpoint_hash', sa.String(64), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    # Append-only at the database level too
+    op.execute("REVOKE UPDATE, DELETE, TRUNCATE ON audit_logs, audit_checkpoints FROM PUBLIC")
+
+
+def downgrade():
+    op.drop_table('audit_checkpoints')
+    op.drop_index('ix_audit_logs_tenant_id', 'audit_logs')
+    op.drop_table('audit_logs')
@@ -0,0 +1,27 @@
+"""Unique index on api_keys.key_hash; api_keys.scopes and api_keys.disabled
+
+Revision ID: 0015_api_key_hash_index
+Revises: 0014_audit_hash_chain
+
+API keys are resolved by the SHA-256 of the presented key on every cache miss; the
+index makes that a single probe, and uniqueness keeps the digest -> key mapping total.
+The resolver reads, and the key manager writes, `scopes` and `disabled`, which 0002
+never created.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0015_api_key_hash_index'
+down_revision = '0014_audit_hash_chain'
+
+
+def upgrade():
+    op.add_column('api_keys', sa.Column('scopes', sa.String()))
+    op.add_column('api_keys', sa.Column('disabled', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.create_index('ix_api_keys_key_hash', 'api_keys', ['key_hash'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_api_keys_key_hash', 'api_keys')
+    op.drop_column('api_keys', 'disabled')
+    op.drop_column('api_keys', 'scopes')
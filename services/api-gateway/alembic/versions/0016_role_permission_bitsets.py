@@ -0,0 +1,33 @@
+"""Tenant roles and tenants.roles_version
+
+Revision ID: 0016_role_permission_bitsets
+Revises: 0015_api_key_hash_index
+
+`roles` holds per-tenant roles over the permission catalog in app/core/authz.py. Workers
+compile them into bitsets and recompile only when `tenants.roles_version` moves; the ORM
+bumps it in the same transaction as any role change. No RLS: roles are read by the
+authorization layer, which filters by tenant explicitly.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0016_role_permission_bitsets'
+down_revision = '0015_api_key_hash_index'
+
+
+def upgrade():
+    op.add_column('tenants', sa.Column('roles_version', sa.BigInteger, nullable=False, server_default='0'))
+    op.create_table('roles',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('tenant_id', sa.Integer, sa.ForeignKey('tenants.id'), nullable=False),
+        sa.Column('name', sa.String, nullable=False),
+        sa.Column('permissions', sa.String),
+        sa.UniqueConstraint('tenant_id', 'name', name='uq_roles_tenant_name'),
+    )
+    op.create_index('ix_roles_tenant_id', 'roles', ['tenant_id'])
+
+
+def downgrade():
+    op.drop_index('ix_roles_tenant_id', 'roles')
+    op.drop_table('roles')
+    op.drop_column('tenants', 'roles_version')
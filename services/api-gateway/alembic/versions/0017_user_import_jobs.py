@@ -0,0 +1,60 @@
+"""Bulk user import jobs and staged rows
+
+Revision ID: 0017_user_import_jobs
+Revises: 0016_role_permission_bitsets
+
+A job's rows are staged on upload and updated batch by batch, so an interrupted import
+resumes from its first pending row. No RLS: the importer works across tenants, and the
+routes filter jobs by tenant explicitly.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0017_user_import_jobs'
+down_revision = '0016_role_permission_bitsets'
+
+
+def upgrade():
+    op.create_table('user_import_jobs',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('tenant_id', sa.Integer, sa.ForeignKey('tenants.id'), nullable=False),
+        sa.Column('created_by', sa.Integer),
+        sa.Column('status', sa.String, nullable=False, server_default='pending'),
+        sa.Column('total_rows', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('processed_rows', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('created_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('failed_count', sa.Integer, nullable=False, server_default='0'),
+        sa.Column('error', sa.Text),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True)),
+        sa.Column('finished_at', sa.DateTime(timezone=True)),
+    )
+    op.create_index('ix_user_import_jobs_tenant_id', 'user_import_jobs', ['tenant_id'])
+    # Startup resume only scans unfinished jobs
+    op.create_index('ix_user_import_jobs_unfinished', 'user_import_jobs', ['id'],
+                    postgresql_where=sa.text("status IN ('pending', 'running')"))
+    op.create_table('user_import_rows',
+        sa.Column('id', sa.BigInteger, primary_key=True),
+        sa.Column('job_id', sa.Integer, sa.ForeignKey('user_import_jobs.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('row_number', sa.Integer, nullable=False),
+        sa.Column('email', sa.String),
+        sa.Column('first_name', sa.String),
+        sa.Column('last_name', sa.String),
+        sa.Column('role', sa.String),
+        sa.Column('password', sa.LargeBinary),
+        sa.Column('status', sa.String, nullable=False, server_default='pending'),
+        sa.Column('user_id', sa.Integer),
+        sa.Column('error', sa.String),
+    )
+    # Batches are read as (job_id, status = 'pending') in id order; results are paged by id
+    op.create_index('ix_user_import_rows_job_status_id', 'user_import_rows', ['job_id', 'status', 'id'])
+    op.create_index('ix_user_import_rows_job_id_id', 'user_import_rows', ['job_id', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_user_import_rows_job_id_id', 'user_import_rows')
+    op.drop_index('ix_user_import_rows_job_status_id', 'user_import_rows')
+    op.drop_table('user_import_rows')
+    op.drop_index('ix_user_import_jobs_unfinished', 'user_import_jobs')
+    op.drop_index('ix_user_import_jobs_tenant_id', 'user_import_jobs')
+    op.drop_table('user_import_jobs')
@@ -0,0 +1,27 @@
+"""Ingestion lease on documents
+
+Revision ID: 0018_document_ingestion_lease
+Revises: 0017_user_import_jobs
+
+`heartbeat_at` is written when a worker claims a document and on every committed window.
+A `processing` row whose heartbeat is older than the lease belongs to a worker that died,
+and startup resume takes it over, so the pending index now covers both states.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0018_document_ingestion_lease'
+down_revision = '0017_user_import_jobs'
+
+
+def upgrade():
+    op.add_column('documents', sa.Column('heartbeat_at', sa.DateTime(timezone=True)))
+    op.drop_index('ix_documents_pending', 'documents')
+    op.create_index('ix_documents_pending', 'documents', ['id'],
+                    postgresql_where=sa.text("status IN ('uploaded', 'processing')"))
+
+
+def downgrade():
+    op.drop_index('ix_documents_pending', 'documents')
+    op.create_index('ix_documents_pending', 'documents', ['id'], postgresql_where=sa.text("status = 'uploaded'"))
+    op.drop_column('documents', 'heartbeat_at')
@@ -0,0 +1,26 @@
+"""Dead-letter state for outbox events
+
+Revision ID: 0019_outbox_dead_letter
+Revises: 0018_document_ingestion_lease
+
+An event that fails `max_attempts` deliveries gets `failed_at` and leaves the pending set,
+so it no longer blocks its tenant's later events. The pending index excludes it too.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0019_outbox_dead_letter'
+down_revision = '0018_document_ingestion_lease'
+
+
+def upgrade():
+    op.add_column('outbox_events', sa.Column('failed_at', sa.DateTime(timezone=True)))
+    op.drop_index('ix_outbox_events_pending', 'outbox_events')
+    op.create_index('ix_outbox_events_pending', 'outbox_events', ['id'],
+                    postgresql_where=sa.text('published_at IS NULL AND failed_at IS NULL'))
+
+
+def downgrade():
+    op.drop_index('ix_outbox_events_pending', 'outbox_events')
+    op.create_index('ix_outbox_events_pending', 'outbox_events', ['id'], postgresql_where=sa.text('published_at IS NULL'))
+    op.drop_column('outbox_events', 'failed_at')
@@ -0,0 +1,25 @@
+"""Keyset sort keys are never NULL: index documents.filename as coalesce(filename, '')
+
+Revision ID: 0020_non_null_sort_keys
+Revises: 0019_outbox_dead_letter
+
+A NULL sort key makes the `(k, id) > (:k, :id)` seek unknown, so a listing stops at the
+first such row. documents.filename stays nullable and is sorted as `coalesce(filename, '')`,
+so its index is rebuilt on that expression.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0020_non_null_sort_keys'
+down_revision = '0019_outbox_dead_letter'
+
+
+def upgrade():
+    op.drop_index('ix_documents_tenant_filename_id', 'documents')
+    op.create_index('ix_documents_tenant_filename_id', 'documents',
+                    ['tenant_id', sa.text("coalesce(filename, '')"), 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_documents_tenant_filename_id', 'documents')
+    op.create_index('ix_documents_tenant_filename_id', 'documents', ['tenant_id', 'filename', 'id'])
@@ -0,0 +1,21 @@
+"""Tenant plan
+
+Revision ID: 0021_tenant_plan
+Revises: 0020_non_null_sort_keys
+
+The plan selects the tenant's rate-limit tier. Login puts it in the access token and the
+API key resolver reads it with the key, so requests never look it up separately.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0021_tenant_plan'
+down_revision = '0020_non_null_sort_keys'
+
+
+def upgrade():
+    op.add_column('tenants', sa.Column('plan', sa.String(16), nullable=False, server_default='free'))
+
+
+def downgrade():
+    op.drop_column('tenants', 'plan')
@@ -0,0 +1,22 @@
+"""Claim lease for outbox events
+
+Revision ID: 0022_outbox_claim_lease
+Revises: 0021_tenant_plan
+
+The relay commits its claim before publishing, so the claim is a lease on the row rather
+than a lock held by an open transaction. Rows of a relay that dies mid-send are claimable
+again once `claimed_until` has passed.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0022_outbox_claim_lease'
+down_revision = '0021_tenant_plan'
+
+
+def upgrade():
+    op.add_column('outbox_events', sa.Column('claimed_until', sa.DateTime(timezone=True)))
+
+
+def downgrade():
+    op.drop_column('outbox_events', 'claimed_until')
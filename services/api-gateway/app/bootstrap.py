@@ -1,12 +1,63 @@
 """Application assembly: middleware, routes and docs registration."""
 from fastapi import FastAPI
+from app.core.audit import AuditBusyError
+from app.core.observability import router as observability_router
+from app.core.profiling import ProfiledJSONResponse
+from app.core.security import HashingBusyError
+from app.middleware.api_key_middleware import APIKeyMiddleware
+from app.middleware.error_handler import (
+    audit_busy_handler,
+    hashing_busy_handler,
+    invalid_page_handler,
+    policy_unavailable_handler,
+)
+from app.middleware.idempotency_mw import IdempotencyMiddleware
+from app.middleware.logging_middleware import LoggingMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.rbac_middleware import RBACMiddleware
+from app.middleware.request_id import RequestIDMiddleware
+from app.middleware.rls_bind import RLSBindMiddleware
+from app.middleware.tenant_ctx import TenantCtxMiddleware
 from app.routes.v1 import router as v1_router
+from app.security.policy.opa_client import PolicyUnavailableError
+from app.utils.pagination import InvalidCursor, InvalidSort
 from app.routes.v1.auth import router as auth_router
 
+# Pure-ASGI middleware, outermost first. They share one RequestContext per request
+# (app/middleware/context.py), so later layers rely on what earlier ones resolved:
+# request id -> metrics -> logging -> API key auth -> tenant extraction -> profiling -> RLS binding -> rate limiting -> idempotency -> RBAC
+MIDDLEWARE_STACK = [
+    RequestIDMiddleware,
+    MetricsMiddleware,
+    LoggingMiddleware,
+    APIKeyMiddleware,
+    TenantCtxMiddleware,
+    ProfilingMiddleware,
+    RLSBindMiddleware,
+    RateLimitMiddleware,
+    IdempotencyMiddleware,
+    RBACMiddleware,
+]
+
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="API Gateway")
-    
+    app = FastAPI(title="API Gateway", default_response_class=ProfiledJSONResponse)
+
+    app.add_exception_handler(HashingBusyError, hashing_busy_handler)
+    app.add_exception_handler(AuditBusyError, audit_busy_handler)
+    app.add_exception_handler(PolicyUnavailableError, policy_unavailable_handler)
+    app.add_exception_handler(InvalidCursor, invalid_page_handler)
+    app.add_exception_handler(InvalidSort, invalid_page_handler)
+
+    # Starlette wraps in reverse registration order: add innermost first
+    for middleware in reversed(MIDDLEWARE_STACK):
+        app.add_middleware(middleware)
+
+    # Unversioned operational endpoints: /healthz, /metrics
+    app.include_router(observability_router)
+
     # Register v1 grouped routers
     app.include_router(v1_router)
     
@@ -1,4 +1,4 @@
 """Core utilities and exported helpers."""
-from .config import Settings
+from .config import Settings, get_settings
 
-__all__ = ["Settings"]
+__all__ = ["Settings", "get_settings"]
@@ -0,0 +1,390 @@
+"""Batched, hash-chained audit log with Merkle checkpoints.
+
+Handlers `record()` security events into a bounded in-memory buffer and carry on; the
+request never waits for an INSERT. One background task per worker drains the buffer and
+writes each batch in a single transaction:
+
+1. take the chain lock (`pg_advisory_xact_lock` on PostgreSQL) so workers append to the one
+   chain in turn, and read its tail `(seq, entry_hash)`;
+2. compute `payload_hash` / `entry_hash` for the whole batch in memory and bulk-insert it;
+3. once `checkpoint_every` entries are uncovered (or `checkpoint_interval` seconds have
+   passed), write a checkpoint: the Merkle root of those entry hashes, chained to the
+   previous checkpoint.
+
+Checking one entry then needs only `inclusion_proof()`: about log2(checkpoint_every)
+sibling hashes up to a checkpoint root. It does not rehash the table.
+`verify_chain()` still does the full rehash, for periodic offline audits.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select, text
+
+from app.core import db as db_module
+from app.middleware.context import current_context
+from app.models.audit_log_model import AuditCheckpoint, AuditLog
+
+logger = logging.getLogger(__name__)
+
+GENESIS_HASH = "0" * 64
+ADVISORY_NAMESPACE = 0x0A0D  # pg_advisory_xact_lock(int, int) key of the chain lock
+CHAIN_LOCK_SQL = text("SELECT pg_advisory_xact_lock(:ns, 0)")
+
+
+class AuditBusyError(Exception):
+    pass
+
+
+# -- hashing -------------------------------------------------------------------
+def canonical_json(value) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str).encode()
+
+
+def _timestamp(value: datetime) -> str:
+    # SQLite hands back naive datetimes; both sides hash the same UTC wall-clock string
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat(timespec="microseconds")
+
+
+def payload_digest(payload) -> str:
+    return hashlib.sha256(canonical_json(payload)).hexdigest()
+
+
+def entry_digest(prev_hash: str, seq: int, created_at: datetime, tenant_id, actor_id, event_type: str,
+                 payload_hash: str) -> str:
+    header = canonical_json([seq, _timestamp(created_at), tenant_id, actor_id, event_type, payload_hash])
+    return hashlib.sha256(bytes.fromhex(prev_hash) + header).hexdigest()
+
+
+def checkpoint_digest(prev_hash: str, first_seq: int, last_seq: int, merkle_root: str, created_at: datetime) -> str:
+    header = canonical_json([first_seq, last_seq, merkle_root, _timestamp(created_at)])
+    return hashlib.sha256(bytes.fromhex(prev_hash) + header).hexdigest()
+
+
+def _leaf(entry_hash: str) -> bytes:
+    return hashlib.sha256(b"\x00" + bytes.fromhex(entry_hash)).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def _parent_level(level: list[bytes]) -> list[bytes]:
+    # An odd last node is promoted unchanged
+    return [_node(level[i], level[i + 1]) if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)]
+
+
+def merkle_root(entry_hashes: list[str]) -> str:
+    if not entry_hashes:
+        raise ValueError("Merkle root of an empty range")
+    level = [_leaf(h) for h in entry_hashes]
+    while len(level) > 1:
+        level = _parent_level(level)
+    return level[0].hex()
+
+
+def merkle_proof(entry_hashes: list[str], index: int) -> list[tuple[str, str]]:
+    """Sibling path from leaf `index` to the root: [("L" | "R", hash), ...]."""
+    level = [_leaf(h) for h in entry_hashes]
+    path = []
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append(("L" if sibling < index else "R", level[sibling].hex()))
+        level = _parent_level(level)
+        index //= 2
+    return path
+
+
+def verify_proof(entry_hash: str, path, root: str) -> bool:
+    node = _leaf(entry_hash)
+    for side, sibling in path:
+        node = _node(bytes.fromhex(sibling), node) if side == "L" else _node(node, bytes.fromhex(sibling))
+    return hmac.compare_digest(node.hex(), root)
+
+
+def verify_entry(row: AuditLog) -> bool:
+    """Recompute one row's hashes from its own columns."""
+    payload_hash = payload_digest(row.payload)
+    expected = entry_digest(row.prev_hash, row.seq, row.created_at, row.tenant_id, row.actor_id, row.event_type, payload_hash)
+    return hmac.compare_digest(payload_hash, row.payload_hash) and hmac.compare_digest(expected, row.entry_hash)
+
+
+# -- writer --------------------------------------------------------------------
+class AuditMetrics:
+    def __init__(self):
+        self.written = 0
+        self.batches = 0
+        self.checkpoints = 0
+        self.retries = 0
+        self.rejected = 0
+
+    def snapshot(self) -> dict:
+        return dict(vars(self))
+
+
+class AuditWriter:
+    def __init__(self, session_factory=None, max_batch: int = 500, flush_interval: float = 0.2, max_buffer: int = 10000,
+                 put_timeout: float = 0.5, checkpoint_every: int = 1024, checkpoint_interval: float = 300.0,
+                 retry_backoff: float = 0.5, max_backoff: float = 30.0):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.metrics = AuditMetrics()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffer)
+        self._task: asyncio.Task | None = None
+        self._batch: list[dict] = []  # dequeued, not yet committed
+        self._checkpointed_at = time.monotonic()
+
+    def _session(self):
+        return (self.session_factory or db_module.AsyncSessionLocal)()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() + len(self._batch)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def record(self, event_type: str, payload: dict | None = None, tenant_id: int | None = None,
+                     actor_id: int | None = None):
+        entry = {
+            "event_type": event_type,
+            # Store exactly what gets hashed (JSON round-trip normalises tuples, datetimes, ...)
+            "payload": json.loads(canonical_json(payload or {})),
+            "tenant_id": tenant_id,
+            "actor_id": actor_id,
+            "created_at": datetime.now(timezone.utc),
+        }
+        try:
+            self._queue.put_nowait(entry)
+            return
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(self._queue.put(entry), self.put_timeout)
+        except asyncio.TimeoutError:
+            self.metrics.rejected += 1
+            raise AuditBusyError(f"Audit buffer full ({self._queue.maxsize} events)") from None
+
+    async def write(self, entries: list[dict]) -> int:
+        """Append `entries` to the chain (and checkpoint if due) in one transaction; returns the new tail seq."""
+        async with self._session() as session:
+            async with session.begin():
+                if session.bind.dialect.name == "postgresql":
+                    await session.execute(CHAIN_LOCK_SQL, {"ns": ADVISORY_NAMESPACE})
+                tail = (await session.execute(
+                    select(AuditLog.seq, AuditLog.entry_hash).order_by(AuditLog.seq.desc()).limit(1)
+                )).first()
+                seq, prev_hash = tail if tail else (0, GENESIS_HASH)
+                rows = []
+                for entry in entries:
+                    seq += 1
+                    payload_hash = payload_digest(entry["payload"])
+                    entry_hash = entry_digest(prev_hash, seq, entry["created_at"], entry["tenant_id"], entry["actor_id"],
+                                              entry["event_type"], payload_hash)
+                    rows.append({**entry, "seq": seq, "payload_hash": payload_hash, "prev_hash": prev_hash,
+                                 "entry_hash": entry_hash})
+                    prev_hash = entry_hash
+                if rows:
+                    await session.execute(insert(AuditLog), rows)
+                await self._checkpoint(session, seq, rows)
+        self.metrics.written += len(rows)
+        self.metrics.batches += 1 if rows else 0
+        return seq
+
+    async def _checkpoint(self, session, tail_seq: int, new_rows: list[dict]):
+        last = (await session.execute(
+            select(AuditCheckpoint).order_by(AuditCheckpoint.last_seq.desc()).limit(1)
+        )).scalar_one_or_none()
+        covered = last.last_seq if last else 0
+        uncovered = tail_seq - covered
+        timed_out = time.monotonic() - self._checkpointed_at >= self.checkpoint_interval
+        if uncovered <= 0 or (uncovered < self.checkpoint_every and not timed_out):
+            return
+        first_new = new_rows[0]["seq"] if new_rows else tail_seq + 1
+        hashes = []
+        if covered + 1 < first_new:
+            hashes = list((await session.execute(
+                select(AuditLog.entry_hash).where(AuditLog.seq > covered, AuditLog.seq < first_new).order_by(AuditLog.seq)
+            )).scalars())
+        hashes += [row["entry_hash"] for row in new_rows]
+        prev_hash = last.checkpoint_hash if last else GENESIS_HASH
+        first = covered + 1
+        # Full blocks of `checkpoint_every`, plus the remainder when the interval has run out
+        while hashes and (len(hashes) >= self.checkpoint_every or timed_out):
+            block, hashes = hashes[:self.checkpoint_every], hashes[self.checkpoint_every:]
+            created_at = datetime.now(timezone.utc)
+            root = merkle_root(block)
+            checkpoint_hash = checkpoint_digest(prev_hash, first, first + len(block) - 1, root, created_at)
+            session.add(AuditCheckpoint(first_seq=first, last_seq=first + len(block) - 1, merkle_root=root,
+                                        prev_checkpoint_hash=prev_hash, checkpoint_hash=checkpoint_hash,
+                                        created_at=created_at))
+            prev_hash = checkpoint_hash
+            first += len(block)
+            self.metrics.checkpoints += 1
+        self._checkpointed_at = time.monotonic()
+
+    async def _next_batch(self) -> list[dict]:
+        batch = self._batch
+        loop = asyncio.get_running_loop()
+        try:
+            # Idle workers still wake up to write the time-based checkpoint
+            batch.append(await asyncio.wait_for(self._queue.get(), self.checkpoint_interval))
+        except asyncio.TimeoutError:
+            return batch
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        backoff = self.retry_backoff
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self.write(batch)
+            except Exception:
+                # Never drop audit events: keep the batch and retry it
+                self.metrics.retries += 1
+                logger.exception("Audit batch of %d events failed; retrying in %.1fs", len(batch), backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            backoff = self.retry_backoff
+            self._batch = []
+
+    async def drain(self, timeout: float = 5.0) -> bool:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self.pending and loop.time() < deadline:
+            await asyncio.sleep(0.01)
+        return not self.pending
+
+    async def stop(self, timeout: float = 5.0):
+        if self._task is None:
+            return
+        if not await self.drain(timeout):
+            logger.error("Audit writer stopped with %d events unwritten", self.pending)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# -- verification --------------------------------------------------------------
+async def inclusion_proof(db, seq: int) -> dict | None:
+    """Merkle path from entry `seq` to its checkpoint root; None until a checkpoint covers it."""
+    checkpoint = (await db.execute(
+        select(AuditCheckpoint).where(AuditCheckpoint.first_seq <= seq, AuditCheckpoint.last_seq >= seq)
+    )).scalar_one_or_none()
+    if checkpoint is None:
+        return None
+    hashes = list((await db.execute(
+        select(AuditLog.entry_hash)
+        .where(AuditLog.seq >= checkpoint.first_seq, AuditLog.seq <= checkpoint.last_seq)
+        .order_by(AuditLog.seq)
+    )).scalars())
+    index = seq - checkpoint.first_seq
+    return {
+        "seq": seq,
+        "entry_hash": hashes[index],
+        "path": merkle_proof(hashes, index),
+        "merkle_root": checkpoint.merkle_root,
+        "checkpoint_id": checkpoint.id,
+        "checkpoint_hash": checkpoint.checkpoint_hash,
+    }
+
+
+async def verify_chain(db, page_size: int = 5000) -> dict:
+    """Full rehash of the log and its checkpoints; `first_invalid_seq` is None when intact."""
+    checkpoints = list((await db.execute(select(AuditCheckpoint).order_by(AuditCheckpoint.first_seq))).scalars())
+    prev_checkpoint = GENESIS_HASH
+    for cp in checkpoints:
+        expected = checkpoint_digest(prev_checkpoint, cp.first_seq, cp.last_seq, cp.merkle_root, cp.created_at)
+        if cp.prev_checkpoint_hash != prev_checkpoint or not hmac.compare_digest(expected, cp.checkpoint_hash):
+            return {"entries": 0, "checkpoints": len(checkpoints), "first_invalid_seq": cp.first_seq}
+        prev_checkpoint = cp.checkpoint_hash
+    ranges = iter(checkpoints)
+    current = next(ranges, None)
+    block: list[str] = []
+    prev_hash, last_seq, count = GENESIS_HASH, 0, 0
+    while True:
+        rows = (await db.execute(
+            select(AuditLog).where(AuditLog.seq > last_seq).order_by(AuditLog.seq).limit(page_size)
+        )).scalars().all()
+        if not rows:
+            break
+        for row in rows:
+            if row.seq != last_seq + 1 or row.prev_hash != prev_hash or not verify_entry(row):
+                return {"entries": count, "checkpoints": len(checkpoints), "first_invalid_seq": last_seq + 1}
+            prev_hash, last_seq, count = row.entry_hash, row.seq, count + 1
+            if current is not None:
+                block.append(row.entry_hash)
+                if row.seq == current.last_seq:
+                    if merkle_root(block) != current.merkle_root:
+                        return {"entries": count, "checkpoints": len(checkpoints), "first_invalid_seq": current.first_seq}
+                    block, current = [], next(ranges, None)
+        db.expunge_all()  # stream: don't keep millions of rows in the identity map
+    if current is not None:
+        # A checkpoint claims rows that are gone
+        return {"entries": count, "checkpoints": len(checkpoints), "first_invalid_seq": last_seq + 1}
+    return {"entries": count, "checkpoints": len(checkpoints), "first_invalid_seq": None}
+
+
+# -- module singleton ------------------------------------------------------------
+_writer: AuditWriter | None = None
+
+
+async def audit_event(event_type: str, payload: dict | None = None, tenant_id: int | None = None,
+                      actor_id: int | None = None):
+    """Buffer a security event for the audit log (no-op when no writer is running)."""
+    if _writer is None:
+        return
+    ctx = current_context()
+    if ctx is not None and ctx.request_id:
+        payload = {**(payload or {}), "request_id": ctx.request_id}
+    await _writer.record(event_type, payload, tenant_id, actor_id)
+
+
+def init_audit_writer(**options) -> AuditWriter:
+    global _writer
+    _writer = AuditWriter(**options)
+    _writer.start()
+    return _writer
+
+
+def get_audit_writer() -> AuditWriter | None:
+    return _writer
+
+
+async def close_audit_writer():
+    global _writer
+    if _writer is not None:
+        await _writer.stop()
+    _writer = None
@@ -3,16 +3,189 @@
 Examples:
 - @require_permission("documents.read")
 - @require_role("admin")
+
+Permissions are registered once in `catalog`, and each one gets a bit. A role compiles
+to an int mask: the built-in `BUILTIN_ROLES` plus the tenant's `roles` rows, which
+redefine a built-in role or add new ones. `RBACMiddleware` puts the caller's mask on
+`ctx.permissions` once per request. A check is then `ctx.permissions & bit`, where
+`bit` was resolved when the route module was imported.
+
+Compiled masks are cached per tenant and keyed on `tenants.roles_version`. An ORM flush
+that touches a `Role` row bumps that version in the same transaction. Each worker
+re-reads the version at most every `recheck_interval` seconds per tenant, and only
+recompiles the tenant's roles when the version has moved. A steady request stream
+therefore never parses role strings or queries roles.
+
+Bit positions are assigned per process, in registration order. Masks are never
+persisted or sent anywhere, so they do not need to be stable across deploys.
 """
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from functools import wraps
+
 from fastapi import HTTPException
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from app.core import db as db_module
+from app.middleware.context import current_context
+from app.models.role import Role
+from app.models.tenant import Tenant
+
+logger = logging.getLogger(__name__)
+
+
+class PermissionCatalog:
+    def __init__(self):
+        self._bits: dict[str, int] = {}
+
+    def register(self, *names: str) -> int:
+        mask = 0
+        for name in names:
+            if name not in self._bits:
+                self._bits[name] = 1 << len(self._bits)
+            mask |= self._bits[name]
+        return mask
+
+    def bit(self, name: str) -> int:
+        try:
+            return self._bits[name]
+        except KeyError:
+            raise ValueError(f"Unknown permission '{name}' (register it in app/core/authz.py)") from None
+
+    def mask(self, names) -> int:
+        """OR of the registered `names`; unknown names grant nothing."""
+        mask = 0
+        for name in names:
+            mask |= self._bits.get(name, 0)
+        return mask
+
+    def names(self, mask: int) -> list[str]:
+        return [name for name, bit in self._bits.items() if mask & bit]
+
+    @property
+    def all(self) -> int:
+        return (1 << len(self._bits)) - 1
+
+
+catalog = PermissionCatalog()
+catalog.register(
+    "documents.read", "documents.write", "search.query",
+    "users.read", "users.manage", "api_keys.manage", "tenants.manage",
+)
+
+_VIEWER = ("documents.read", "search.query", "users.read")
+_USER = _VIEWER + ("documents.write",)
+BUILTIN_ROLES = {
+    "viewer": catalog.mask(_VIEWER),
+    "user": catalog.mask(_USER),
+    "owner": catalog.mask(_USER + ("users.manage", "api_keys.manage", "tenants.manage")),
+    "admin": catalog.all,  # platform operators
+}
+DEFAULT_ROLE = "user"  # tokens without a role claim (users.role defaults to 'user')
 
 
+def parse_permissions(value: str | None) -> int:
+    return catalog.mask(value.replace(",", " ").split()) if value else 0
+
+
+# -- role versioning -----------------------------------------------------------
+def bump_roles_version(connection, tenant_ids):
+    """Increment the roles version of each tenant in `tenant_ids` (a sync Connection or Session)."""
+    tenant_ids = sorted({int(t) for t in tenant_ids if t is not None})
+    if tenant_ids:
+        connection.execute(
+            update(Tenant).where(Tenant.id.in_(tenant_ids)).values(roles_version=Tenant.roles_version + 1)
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session, flush_context):
+    changed = [*session.new, *session.deleted, *(obj for obj in session.dirty if session.is_modified(obj))]
+    tenant_ids = {obj.tenant_id for obj in changed if isinstance(obj, Role)}
+    if tenant_ids:
+        bump_roles_version(session.connection(), tenant_ids)
+
+
+# -- compiled per-tenant masks ---------------------------------------------------
+@dataclass
+class _TenantRoles:
+    version: int | None
+    masks: dict[str, int]
+    checked: float
+
+
+class RolePermissionCache:
+    def __init__(self, recheck_interval: float = 5.0, max_tenants: int = 10000):
+        self.recheck_interval = recheck_interval
+        self.max_tenants = max_tenants
+        self._tenants: OrderedDict[int, _TenantRoles] = OrderedDict()
+        self._inflight: dict[int, asyncio.Task] = {}
+        self.compiles = 0
+
+    async def mask(self, tenant_id: int | None, role: str | None) -> int:
+        role = role or DEFAULT_ROLE
+        if tenant_id is None or db_module.AsyncSessionLocal is None:
+            return BUILTIN_ROLES.get(role, 0)
+        entry = self._tenants.get(tenant_id)
+        if entry is None or time.monotonic() - entry.checked >= self.recheck_interval:
+            task = self._inflight.get(tenant_id)
+            if task is None:
+                task = self._inflight[tenant_id] = asyncio.create_task(self._refresh(tenant_id, entry))
+                task.add_done_callback(lambda _: self._inflight.pop(tenant_id, None))
+            entry = await asyncio.shield(task)
+        return entry.masks.get(role, 0)
+
+    async def _refresh(self, tenant_id: int, entry: _TenantRoles | None) -> _TenantRoles:
+        try:
+            async with db_module.AsyncSessionLocal() as db:
+                version = (await db.execute(
+                    select(Tenant.roles_version).where(Tenant.id == tenant_id))).scalar_one_or_none()
+                if entry is not None and version == entry.version:
+                    entry.checked = time.monotonic()
+                    return entry
+                rows = (await db.execute(
+                    select(Role.name, Role.permissions).where(Role.tenant_id == tenant_id))).all()
+        except Exception as exc:
+            if entry is not None:
+                logger.warning("Could not refresh roles of tenant %s, keeping version %s: %s", tenant_id, entry.version, exc)
+                entry.checked = time.monotonic()
+                return entry
+            logger.warning("Could not load roles of tenant %s, using built-in roles: %s", tenant_id, exc)
+            return _TenantRoles(None, BUILTIN_ROLES, 0.0)  # not cached: retried on the next request
+        self.compiles += 1
+        masks = {**BUILTIN_ROLES, **{name: parse_permissions(permissions) for name, permissions in rows}}
+        masks["admin"] = BUILTIN_ROLES["admin"]  # the platform role is not the tenant's to redefine
+        compiled = _TenantRoles(version, masks, time.monotonic())
+        self._tenants[tenant_id] = compiled
+        self._tenants.move_to_end(tenant_id)
+        while len(self._tenants) > self.max_tenants:
+            self._tenants.popitem(last=False)
+        return compiled
+
+    def invalidate(self, tenant_id: int | None = None):
+        if tenant_id is None:
+            self._tenants.clear()
+        else:
+            self._tenants.pop(tenant_id, None)
+
+
+role_permissions = RolePermissionCache()
+
+
+# -- route decorators --------------------------------------------------------------
 def require_permission(permission: str):
+    bit = catalog.bit(permission)  # resolved once, at import time
+
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Implement permission check using request.state.user or dependency
+            ctx = current_context()
+            if ctx is None or not ctx.permissions & bit:
+                raise HTTPException(status_code=403, detail=f"Missing permission: {permission}")
             return await func(*args, **kwargs)
         return wrapper
     return decorator
@@ -22,7 +195,9 @@ def require_role(role: str):
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            # Implement role check
+            ctx = current_context()
+            if ctx is None or ctx.role != role:
+                raise HTTPException(status_code=403, detail=f"Role required: {role}")
             return await func(*args, **kwargs)
         return wrapper
     return decorator
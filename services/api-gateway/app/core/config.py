@@ -1,6 +1,11 @@
 """Application configuration (Pydantic settings)."""
+import os
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
+
+DEFAULT_SECRET = "changeme"  # development placeholder; features that seal or sign data check for it
     
 class Settings(BaseSettings):
     model_config = ConfigDict(env_file=".env", extra="allow")  
@@ -8,8 +13,142 @@ class Settings(BaseSettings):
     REDIS_URL: str
     RABBITMQ_URL: str
     APP_ENV: str = "development"
+    WEB_CONCURRENCY: int = 4  # uvicorn worker processes (run_server.py); sizes the per-worker CPU pools
     LOG_LEVEL: str = "INFO"
-    SECRET_KEY: str = "changeme"
+    LOG_QUEUE_SIZE: int = 10000  # records buffered for the writer thread; beyond this they are dropped and counted
+    LOG_SAMPLE_RATES: dict = {}  # access-log sampling by route template, e.g. {"/healthz": 0.01, "*": 1.0}
+    LOG_SLOW_REQUEST_MS: float = 500.0  # slower requests (and 5xx) are always logged
+    SECRET_KEY: str = DEFAULT_SECRET
+    # Per-purpose secrets; empty = SECRET_KEY
+    CURSOR_SECRET: str = ""  # signs pagination cursors
+    PROFILE_SECRET: str = ""  # signs debug-profiling tokens
+    USER_IMPORT_SECRET: str = ""  # seals staged import passwords (HKDF-derived AES key)
     JWT_SECRET: str = "changeme"
     JWT_ISSUER: str = "https://auth.example.com/"
+    JWKS_URL: str = ""  # issuer key set for RS256/EdDSA tokens; empty = HS256 only
+    JWKS_REFRESH_INTERVAL: int = 300
+    JWT_VERIFIED_CACHE_SIZE: int = 10000
+    # Resolved API keys cached per worker; revocations are pushed over Redis pub/sub
+    API_KEY_CACHE_SIZE: int = 10000
+    API_KEY_CACHE_TTL: float = 60.0
+    API_KEY_NEGATIVE_TTL: float = 10.0  # unknown / revoked keys
+    API_KEY_NEGATIVE_CACHE_SIZE: int = 1000  # kept apart from valid keys so misses cannot evict them
+    RBAC_RECHECK_INTERVAL: float = 5.0  # seconds between per-tenant roles_version checks (staleness bound)
+    # Open Policy Agent; empty = no OPA checks. Decisions are cached until TTL or a bundle revision change
+    OPA_URL: str = ""
+    OPA_CACHE_SIZE: int = 50000
+    OPA_CACHE_TTL: float = 30.0
+    OPA_REVISION_INTERVAL: float = 10.0  # seconds between bundle revision polls
     VAULT_ADDR: str = "http://127.0.0.1:8200"
+
+    EMBEDDING_SERVICE_URL: str = "http://localhost:8002"
+    INGESTION_SERVICE_URL: str = "http://localhost:8001"
+    HTTP_CLIENT_TIMEOUT: float = 10.0
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100  # pooled client shared by all internal service calls
+
+    # Ingestion events: "http" (batched POSTs to the ingestion service) or "rabbitmq"
+    EVENT_TRANSPORT: str = "http"
+    OUTBOX_RELAY_ENABLED: bool = True  # relay document/tenant outbox rows (safe to run in every worker)
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_POLL_INTERVAL: float = 0.5
+    OUTBOX_MAX_ATTEMPTS: int = 10  # failed deliveries before an event is dead-lettered
+    OUTBOX_CLAIM_TTL: float = 120.0  # lease on a claimed batch; rows of a relay that died go out again after it
+    # Hash-chained audit log: buffered per worker, written in batches, checkpointed by Merkle root
+    AUDIT_ENABLED: bool = True
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL: float = 0.2
+    AUDIT_BUFFER_SIZE: int = 10000
+    AUDIT_CHECKPOINT_EVERY: int = 1024  # entries per Merkle checkpoint (proof length ~ log2 of this)
+    AUDIT_CHECKPOINT_INTERVAL: float = 300.0  # checkpoint a partial block after this many seconds
+    ANN_INDEX_ROOT: str = "./indexes"  # per-tenant IVF index files (mmap-shared by workers)
+    ANN_MIN_ROWS: int = 20000  # tenants below this size use exact search
+    ANN_DEFAULT_NPROBE: int = 16
+    SEARCH_CACHE_SIZE: int = 2048  # cached result sets per worker (keyed by tenant corpus version)
+    SEARCH_CACHE_TTL: float = 600.0
+    STORAGE_ROOT: str = "./storage"  # local blob storage for uploaded documents
+
+    # Document ingestion (extract -> split -> embed -> insert); 0 workers = this worker's share of the CPUs
+    INGEST_ENABLED: bool = True
+    INGEST_EXECUTOR_KIND: str = "process"
+    INGEST_WORKERS: int = 0
+    INGEST_WINDOW_PAGES: int = 8  # pages extracted per pool task (bounds memory per document)
+    INGEST_LEASE: float = 300.0  # seconds without a committed window before another worker takes a document over
+    CHUNK_CHARS: int = 1200
+    CHUNK_OVERLAP: int = 200
+    EMBED_BATCH_SIZE: int = 64
+
+    # Bulk user import (Argon2 on its own pool, apart from logins); 0 workers = this worker's share of the CPUs
+    USER_IMPORT_EXECUTOR_KIND: str = "process"
+    USER_IMPORT_WORKERS: int = 0
+    USER_IMPORT_BATCH_SIZE: int = 500  # rows hashed, inserted and committed together
+    USER_IMPORT_LEASE: float = 120.0  # seconds without a committed batch before another worker takes over
+
+    # Database pool (shared by the sync and async engines)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800  # seconds; keep below server/proxy idle timeouts
+
+    # Argon2 hashing executor (0 workers = this worker's share of the CPUs)
+    HASH_EXECUTOR_KIND: str = "thread"  # "thread" (argon2-cffi releases the GIL) or "process"
+    HASH_WORKERS: int = 0
+    HASH_MAX_QUEUE: int = 64
+
+    # Rate limiting: overrides merged over app.core.rate_limiter defaults (JSON in env)
+    # e.g. {"plans": {"free": {"rate": 2, "burst": 10}}, "routes": {"/v1/search": {"*": {"rate": 5, "burst": 10}}}}
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: dict = {}
+
+    def pool_workers(self, configured: int) -> int:
+        """`configured`, or when 0 the CPUs divided among the WEB_CONCURRENCY server processes."""
+        return configured or max(1, (os.cpu_count() or 1) // max(1, self.WEB_CONCURRENCY))
+
+    def ingestion_options(self) -> dict:
+        return {
+            "executor_kind": self.INGEST_EXECUTOR_KIND,
+            "workers": self.pool_workers(self.INGEST_WORKERS),
+            "window_pages": self.INGEST_WINDOW_PAGES,
+            "lease": self.INGEST_LEASE,
+            "chunk_chars": self.CHUNK_CHARS,
+            "overlap": self.CHUNK_OVERLAP,
+            "embed_batch": self.EMBED_BATCH_SIZE,
+        }
+
+    def logging_options(self) -> dict:
+        return {
+            "level": self.LOG_LEVEL,
+            "max_queue": self.LOG_QUEUE_SIZE,
+            "sample_rates": self.LOG_SAMPLE_RATES,
+            "slow_ms": self.LOG_SLOW_REQUEST_MS,
+        }
+
+    def user_import_options(self) -> dict:
+        return {
+            "executor_kind": self.USER_IMPORT_EXECUTOR_KIND,
+            "workers": self.pool_workers(self.USER_IMPORT_WORKERS),
+            "batch_size": self.USER_IMPORT_BATCH_SIZE,
+            "lease": self.USER_IMPORT_LEASE,
+        }
+
+    def audit_writer_options(self) -> dict:
+        return {
+            "max_batch": self.AUDIT_BATCH_SIZE,
+            "flush_interval": self.AUDIT_FLUSH_INTERVAL,
+            "max_buffer": self.AUDIT_BUFFER_SIZE,
+            "checkpoint_every": self.AUDIT_CHECKPOINT_EVERY,
+            "checkpoint_interval": self.AUDIT_CHECKPOINT_INTERVAL,
+        }
+
+    def db_pool_options(self) -> dict:
+        return {
+            "pool_size": self.DB_POOL_SIZE,
+            "max_overflow": self.DB_MAX_OVERFLOW,
+            "pool_pre_ping": self.DB_POOL_PRE_PING,
+            "pool_recycle": self.DB_POOL_RECYCLE,
+        }
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """The process-wide settings (environment, then `.env`), loaded on first use."""
+    return Settings()
@@ -1,22 +1,94 @@
-"""Database session management (SQLAlchemy sessionmaker)."""
+"""Database session management (SQLAlchemy sessionmaker).
+
+Two engines are available:
+- `init_db` builds the synchronous engine (alembic, scripts, legacy sync routes).
+- `init_async_db` builds an asyncpg-backed engine so `async def` routes never block the event loop.
+
+Both share the pool settings exposed through `Settings` (DB_POOL_SIZE, DB_MAX_OVERFLOW, ...).
+Sessions from either factory bind the request's tenant for RLS on the connection they check out (`app.core.rls`).
+"""
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.core import rls  # noqa: F401  (registers the tenant binding hooks)
+
 engine = None
 SessionLocal = None
 
+async_engine = None
+AsyncSessionLocal = None
+
+# Sync driver -> async driver used when deriving the async URL from DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgresql+asyncpg": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "sqlite+aiosqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Return `url` rewritten to use the async driver (e.g. psycopg2 -> asyncpg)."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        raise ValueError(f"No async driver known for '{parsed.drivername}'")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _pool_kwargs(url: str, pool_size=None, max_overflow=None, pool_pre_ping=True, pool_recycle=None) -> dict:
+    # SQLite uses a SingletonThreadPool/StaticPool which rejects QueuePool sizing arguments
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    kwargs = {"pool_pre_ping": pool_pre_ping}
+    if pool_size is not None:
+        kwargs["pool_size"] = pool_size
+    if max_overflow is not None:
+        kwargs["max_overflow"] = max_overflow
+    if pool_recycle is not None:
+        kwargs["pool_recycle"] = pool_recycle
+    return kwargs
 
-def init_db(url: str):
+
+def init_db(url: str, **pool_options):
     global engine, SessionLocal
-    engine = create_engine(url, future=True)
+    engine = create_engine(url, future=True, **_pool_kwargs(url, **pool_options))
     SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 
-def get_db(): #Explanation: this function is used as a dependency in FastAPI routes to provide a database session  
+def init_async_db(url: str, **pool_options):
+    global async_engine, AsyncSessionLocal
+    async_url = to_async_url(url)
+    async_engine = create_async_engine(async_url, **_pool_kwargs(async_url, **pool_options))
+    # expire_on_commit=False: returned ORM objects stay usable after commit without a lazy (blocking) reload
+    AsyncSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+
+async def dispose_async_db():
+    global async_engine, AsyncSessionLocal
+    if async_engine is not None:
+        await async_engine.dispose()
+    async_engine = None
+    AsyncSessionLocal = None
+
+
+def get_db(): #Explanation: this function is used as a dependency in FastAPI routes to provide a database session
     if SessionLocal is None:
         raise RuntimeError("DB not initialized")
     db = SessionLocal() #db is now a SQLAlchemy session object which is used to interact with the database
     try:
         yield db #Explanation: yield allows this function to be used as a generator, providing a session to the route handler, because yield is like return but allows the function to be resumed later
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """Async counterpart of `get_db`; the connection goes back to the pool when the request ends."""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async DB not initialized")
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,13 +1,28 @@
 """FastAPI dependency injection helpers (get_current_user, get_db)."""
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from fastapi import Depends, HTTPException
-from .db import get_db
+from .db import get_async_db, get_db
+from app.middleware.jwt_auth import jwt_auth_dependency
 
 
-def get_current_user():
-    # Stub: extract user from JWT or API key
-    raise HTTPException(status_code=401, detail="Not implemented")
+async def get_current_user(claims: dict = Depends(jwt_auth_dependency)) -> dict:
+    # Claims of the verified access token (user_id, tenant_id, ...)
+    if claims.get("user_id") is None or claims.get("tenant_id") is None:
+        raise HTTPException(status_code=401, detail="Token is not bound to a user")
+    return claims
+
+
+async def require_admin(user: dict = Depends(get_current_user)) -> dict:
+    # Platform operators only (the `role` claim), not tenant owners
+    if user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+    return user
 
 
 def get_db_dep() -> Generator:
     yield from get_db()
+
+
+async def get_async_db_dep() -> AsyncGenerator:
+    async for db in get_async_db():
+        yield db
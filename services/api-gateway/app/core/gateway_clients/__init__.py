@@ -1,4 +1,5 @@
 """Gateway client exports (structured helpers to call other services)."""
-from .ingestion_client import IngestionClient
+from .embedding_client import EmbeddingClient
+from .ingestion_client import IngestionClient, RabbitMQTransport
 
-__all__ = ["IngestionClient"]
+__all__ = ["EmbeddingClient", "IngestionClient", "RabbitMQTransport"]
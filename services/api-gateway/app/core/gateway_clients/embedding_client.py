@@ -0,0 +1,18 @@
+"""Client for the embedding service (query/chunk text -> vectors)."""
+import httpx
+
+
+class EmbeddingClient:
+    def __init__(self, base_url: str, client: httpx.AsyncClient | None = None):
+        self.base_url = base_url
+        self.client = client
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        payload = {"texts": texts}
+        if self.client is not None:
+            response = await self.client.post(f"{self.base_url}/embed", json=payload)
+        else:
+            async with httpx.AsyncClient() as c:
+                response = await c.post(f"{self.base_url}/embed", json=payload)
+        response.raise_for_status()
+        return response.json()["embeddings"]
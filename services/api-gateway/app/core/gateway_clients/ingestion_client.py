@@ -1,10 +1,73 @@
-"""Client for ingestion service (document upload events)."""
+"""Clients for the ingestion service (document upload events).
+
+`IngestionClient` posts over a shared pooled httpx client; `RabbitMQTransport` publishes the
+same events to an AMQP exchange. Both implement `send_batch(events)`, which is what the
+outbox relay (`app.core.outbox`) delivers through.
+"""
+import asyncio
+import json
+
 import httpx
 
+try:
+    import aio_pika
+except ImportError:  # optional: only needed for EVENT_TRANSPORT=rabbitmq
+    aio_pika = None
+
+
 class IngestionClient:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, client: httpx.AsyncClient | None = None):
         self.base_url = base_url
+        self.client = client or httpx.AsyncClient(timeout=10.0)
+        self._owns_client = client is None
 
     async def notify_upload(self, payload: dict):
-        async with httpx.AsyncClient() as c:
-            await c.post(f"{self.base_url}/ingest/events", json=payload)
+        response = await self.client.post(f"{self.base_url}/ingest/events", json=payload)
+        response.raise_for_status()
+
+    async def send_batch(self, events: list[dict]):
+        response = await self.client.post(f"{self.base_url}/ingest/events/batch", json={"events": events})
+        response.raise_for_status()
+
+    async def close(self):
+        if self._owns_client:
+            await self.client.aclose()
+
+
+class RabbitMQTransport:
+    """Publishes each event as a persistent message on a durable topic exchange.
+
+    Routing key is the event `type` (e.g. `document.uploaded`). Requires `aio-pika`; the
+    robust connection reconnects on its own, and publisher confirms make `send_batch`
+    return only once the broker has accepted every message of the batch.
+    """
+
+    def __init__(self, url: str, exchange: str = "ingestion"):
+        self.url = url
+        self.exchange_name = exchange
+        self._connection = None
+        self._exchange = None
+
+    async def start(self):
+        if aio_pika is None:
+            raise RuntimeError("RabbitMQ transport requires the 'aio-pika' package")
+        self._connection = await aio_pika.connect_robust(self.url)
+        channel = await self._connection.channel(publisher_confirms=True)
+        self._exchange = await channel.declare_exchange(self.exchange_name, aio_pika.ExchangeType.TOPIC, durable=True)
+
+    async def send_batch(self, events: list[dict]):
+        if self._exchange is None:
+            await self.start()
+        await asyncio.gather(*(
+            self._exchange.publish(
+                aio_pika.Message(json.dumps(event).encode(), content_type="application/json",
+                                 delivery_mode=aio_pika.DeliveryMode.PERSISTENT),
+                routing_key=event.get("type", "event"),
+            )
+            for event in events
+        ))
+
+    async def close(self):
+        if self._connection is not None:
+            await self._connection.close()
+        self._connection = self._exchange = None
@@ -0,0 +1,28 @@
+"""Shared pooled httpx client for calls to internal services (one pool per worker).
+
+Call `init_http_client()` at startup and `close_http_client()` at shutdown; service
+clients take the instance so keep-alive connections are reused across requests.
+"""
+import httpx
+
+_client: httpx.AsyncClient | None = None
+
+
+def init_http_client(timeout: float = 10.0, max_connections: int = 100, max_keepalive: int = 20) -> httpx.AsyncClient:
+    global _client
+    _client = httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+    )
+    return _client
+
+
+def get_http_client() -> httpx.AsyncClient | None:
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+    _client = None
@@ -1,11 +1,87 @@
-"""Idempotency key handler (Redis-backed)."""
+"""Idempotency key handler (Redis-backed).
+
+A key moves through two states in Redis:
+- in-flight marker (`claim`, SET NX with a short lock TTL) while the first request runs;
+- stored response (`save`): status, headers and body, zlib-compressed above a threshold.
+
+Both carry the sha256 fingerprint of the request body that claimed the key, so a reuse of
+the key with a different body can be told apart from a retry.
+
+Bodies larger than `max_body_bytes` are never stored; the claim is released instead so a
+retry re-executes the handler.
+"""
+import json
 import time
+import zlib
+
+INFLIGHT = b"P"
+RESPONSE = b"R"
+
+
+class StoredResponse:
+    __slots__ = ("status", "headers", "body", "fingerprint")
+
+    def __init__(self, status: int, headers: list, body: bytes, fingerprint: str = ""):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.fingerprint = fingerprint
+
+
+class InFlight:
+    """The key is claimed and its first request still runs."""
+    __slots__ = ("fingerprint",)
+
+    def __init__(self, fingerprint: str = ""):
+        self.fingerprint = fingerprint
 
 
 class IdempotencyStore:
-    def __init__(self, redis):
+    def __init__(self, redis, lock_ttl: int = 60, max_body_bytes: int = 1024 * 1024, compress_threshold: int = 1024):
         self.redis = redis
+        self.lock_ttl = lock_ttl
+        self.max_body_bytes = max_body_bytes
+        self.compress_threshold = compress_threshold
+
+    async def claim(self, key: str, fingerprint: str = "", ttl: int | None = None):
+        # SETNX-like behavior: only the first request for a key gets to run the handler
+        marker = INFLIGHT + fingerprint.encode() + b"\n" + str(time.time()).encode()
+        return bool(await self.redis.set(key, marker, ex=ttl or self.lock_ttl, nx=True))
+
+    async def get(self, key: str):
+        """Return `StoredResponse`, `InFlight` while the first request still runs, or None."""
+        raw = await self.redis.get(key)
+        if raw is None:
+            return None
+        if raw[:1] == INFLIGHT:
+            fingerprint, _, stamp = raw[1:].partition(b"\n")
+            return InFlight(fingerprint.decode() if stamp else "")  # markers from before fingerprints: unknown
+        return self.decode(raw)
+
+    async def save(self, key: str, response: StoredResponse, ttl: int = 86400):
+        await self.redis.set(key, self.encode(response), ex=ttl)
+
+    async def release(self, key: str):
+        await self.redis.delete(key)
+
+    def encode(self, response: StoredResponse) -> bytes:
+        body = response.body
+        compressed = len(body) >= self.compress_threshold
+        if compressed:
+            body = zlib.compress(body, 6)
+        meta = json.dumps({
+            "s": response.status,
+            "h": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in response.headers],
+            "z": compressed,
+            "f": response.fingerprint,
+        }, separators=(",", ":")).encode()
+        return RESPONSE + meta + b"\n" + body
 
-    def claim(self, key: str, ttl: int = 86400):
-        # SETNX-like behavior
-        return self.redis.set(key, time.time(), ex=ttl, nx=True)
+    @staticmethod
+    def decode(raw: bytes) -> StoredResponse:
+        meta, _, body = raw[1:].partition(b"\n")
+        data = json.loads(meta)
+        if data["z"]:
+            body = zlib.decompress(body)
+        headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in data["h"]]
+        return StoredResponse(data["s"], headers, body, data.get("f", ""))
@@ -1,8 +1,142 @@
-"""Prometheus metrics and health check helpers."""
-from fastapi import APIRouter
+"""Prometheus metrics and health check helpers.
+
+All instruments are defined here, at import time. Hot paths record through label
+children that are bound once and cached, so recording a value is a dict lookup plus
+`observe()`/`inc()`. No `labels()` call happens per request.
+
+Multiple workers: `run_server.py` points `PROMETHEUS_MULTIPROC_DIR` at an empty directory
+before uvicorn forks. Each worker then writes its values to mmap files there, and
+`/metrics` merges them on every scrape. Histograms and counters are summed. Gauges use
+"livesum", so dead workers drop out once `shutdown_metrics()` marks them.
+
+Cache hit ratios are exported as `gateway_cache_requests_total{cache, result}` counters:
+rate(hit) / rate(hit + miss) is the ratio over any window and aggregates across
+workers, which a per-process ratio gauge would not.
+"""
+import os
+import time
+
+from fastapi import APIRouter, Response
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "gateway_http_request_duration_seconds", "Request latency by route template",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "gateway_http_requests_in_flight", "Requests currently being served", multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "gateway_db_pool_checkout_seconds", "Time spent waiting for a pooled DB connection",
+    ["engine"], buckets=FAST_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "gateway_db_pool_checked_out", "DB connections currently checked out", ["engine"], multiprocess_mode="livesum",
+)
+DB_POOL_CAPACITY = Gauge(
+    "gateway_db_pool_capacity", "Configured pool_size + max_overflow", ["engine"], multiprocess_mode="livesum",
+)
+HASH_QUEUE_DEPTH = Gauge(
+    "gateway_hash_queue_depth", "Argon2 calls waiting for an executor slot", multiprocess_mode="livesum",
+)
+HASH_IN_FLIGHT = Gauge(
+    "gateway_hash_in_flight", "Argon2 calls running or queued", multiprocess_mode="livesum",
+)
+HASH_SECONDS = Histogram(
+    "gateway_hash_duration_seconds", "Argon2 call latency including queueing", buckets=LATENCY_BUCKETS,
+)
+HASH_REJECTED = Counter("gateway_hash_rejected_total", "Argon2 calls shed because the queue was full")
+REDIS_COMMAND_SECONDS = Histogram(
+    "gateway_redis_command_seconds", "Redis round-trip time by command", ["command"], buckets=FAST_BUCKETS,
+)
+CACHE_REQUESTS = Counter("gateway_cache_requests_total", "Cache lookups by outcome", ["cache", "result"])
+
+_route_children: dict[tuple, object] = {}
+_redis_children: dict[str, object] = {}
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    key = (method, route, status)
+    child = _route_children.get(key)
+    if child is None:
+        child = _route_children[key] = HTTP_REQUEST_SECONDS.labels(method, route, str(status))
+    child.observe(seconds)
+
+
+def observe_redis(command: str, seconds: float):
+    child = _redis_children.get(command)
+    if child is None:
+        child = _redis_children[command] = REDIS_COMMAND_SECONDS.labels(command)
+    child.observe(seconds)
+
+
+class CacheCounters:
+    """Pre-bound hit/miss counters for one named cache."""
+
+    __slots__ = ("hit", "miss")
+
+    def __init__(self, cache: str):
+        self.hit = CACHE_REQUESTS.labels(cache, "hit").inc
+        self.miss = CACHE_REQUESTS.labels(cache, "miss").inc
+
+
+def instrument_engine(engine, name: str):
+    """Checkout wait / usage metrics for `engine`'s pool (sync engine, or `async_engine.sync_engine`)."""
+    pool = engine.pool
+    wait = DB_POOL_CHECKOUT_SECONDS.labels(name)
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    size = getattr(pool, "size", None)
+    overflow = getattr(pool, "_max_overflow", 0)
+    if callable(size):
+        DB_POOL_CAPACITY.labels(name).set(size() + max(0, overflow))
+    get = pool._do_get  # the only place a checkout can block on a full pool
+
+    def timed_get():
+        started = time.perf_counter()
+        try:
+            return get()
+        finally:
+            wait.observe(time.perf_counter() - started)
+
+    pool._do_get = timed_get
+    event.listen(pool, "checkout", lambda *args: checked_out.inc())
+    event.listen(pool, "checkin", lambda *args: checked_out.dec())
+
+
+def _registry():
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> bytes:
+    return generate_latest(_registry())
+
+
+def shutdown_metrics():
+    """Drop this worker's live gauges from the multiprocess aggregate."""
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        multiprocess.mark_process_dead(os.getpid())
+
 
 router = APIRouter()
 
 @router.get("/healthz")
 async def healthz():
     return {"status": "ok"}
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Merging many workers' mmap files is file I/O: keep it off the event loop
+    return Response(await run_in_threadpool(render_metrics), media_type=CONTENT_TYPE_LATEST)
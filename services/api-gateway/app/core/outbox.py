@@ -0,0 +1,293 @@
+"""Transactional outbox and its relay.
+
+Handlers call `add_outbox_event(db, ...)` before committing their own rows: the event is
+then durable exactly when the change is, and the request does no network I/O. The relay
+(one per worker, started at app startup) repeatedly:
+
+1. claims up to `batch_size` pending rows in a short transaction, stamping them with a
+   lease (`claimed_until`) and committing. On PostgreSQL it takes the tenants of the
+   oldest pending rows, one at a time, and tries a transaction-scoped advisory lock on
+   each. It skips a tenant that still has leased rows, reads the rows of every other
+   tenant it locked (`FOR UPDATE SKIP LOCKED`) and stops locking once the batch is full.
+   Concurrent relays therefore split the work by tenant and never reorder one tenant's
+   events, and a relay never holds a tenant it has no rows for;
+2. publishes them in one `transport.send_batch()` call (HTTP or RabbitMQ, see
+   `app.core.gateway_clients`), holding no transaction, lock or pooled connection;
+3. marks them published, and releases the rest of its lease, in a second transaction.
+
+When a batch is rejected, its rows are retried one at a time. This isolates a poison
+event: once one of a tenant's rows fails, the tenant's later rows wait, which keeps them
+in order, while other tenants' rows still go out. If nothing gets through after a few
+tries, the transport is taken to be down and the pass stops; it also stops at half the
+lease, and rows it did not try go back to the queue. Each failure bumps the row's
+`attempts`. At `max_attempts` the row is dead-lettered (`failed_at` is set, and it is
+never claimed again), which unblocks its tenant. A relay that dies mid-send leaves its
+rows to be claimed again when the lease runs out. Delivery is at-least-once; consumers
+dedupe on `event_id`.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import case, delete, event, select, text, update
+from sqlalchemy.orm import Session
+
+from app.core import db as db_module
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+ADVISORY_NAMESPACE = 0x0B0C  # first key of pg_try_advisory_xact_lock(int, int)
+
+# Tenants of the oldest pending rows, oldest first (a bounded scan of the pending index)
+CANDIDATE_TENANTS_SQL = text(
+    "SELECT tenant_id FROM (SELECT tenant_id, id FROM outbox_events WHERE published_at IS NULL AND failed_at IS NULL "
+    "AND (claimed_until IS NULL OR claimed_until < :now) ORDER BY id LIMIT :scan) oldest GROUP BY tenant_id ORDER BY min(id)"
+)
+# Evaluated once per candidate, never as a row filter, so only tenants we read are locked
+LOCK_TENANT_SQL = text("SELECT pg_try_advisory_xact_lock(:ns, :key)")
+OUTAGE_PROBES = 3  # single-row failures, with nothing delivered, before a pass gives up
+
+
+def _pending():
+    return OutboxEvent.published_at.is_(None) & OutboxEvent.failed_at.is_(None)
+
+
+def _claimable(now: datetime):
+    return _pending() & (OutboxEvent.claimed_until.is_(None) | (OutboxEvent.claimed_until < now))
+
+
+def add_outbox_event(db, event_type: str, payload: dict, tenant_id: int | None = None) -> OutboxEvent:
+    """Stage an event in the caller's transaction (AsyncSession or Session)."""
+    row = OutboxEvent(tenant_id=tenant_id, event_type=event_type, payload=payload)
+    db.add(row)
+    sync_session = getattr(db, "sync_session", db)
+    sync_session.info["outbox_pending"] = True
+    return row
+
+
+def to_message(row: OutboxEvent) -> dict:
+    return {**row.payload, "type": row.event_type, "tenant_id": row.tenant_id, "event_id": row.id}
+
+
+class OutboxRelay:
+    def __init__(self, transport, session_factory=None, batch_size: int = 500, poll_interval: float = 0.5,
+                 max_backoff: float = 30.0, retention: float = 86400.0, max_attempts: int = 10, claim_ttl: float = 120.0):
+        self.transport = transport
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.retention = retention
+        self.max_attempts = max_attempts
+        self.claim_ttl = claim_ttl  # lease on claimed rows; a relay that dies mid-send loses them after this
+        self.published = 0
+        self.failures = 0
+        self.dead_lettered = 0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._purged_at = time.monotonic()
+
+    def _session(self):
+        factory = self.session_factory or db_module.AsyncSessionLocal
+        return factory()
+
+    def wake(self):
+        """Called after a commit that staged events: skip the rest of the poll interval."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)  # commits may happen on threadpool workers
+
+    async def _claim_postgres(self, session, now: datetime) -> list[int]:
+        tenants = (await session.execute(CANDIDATE_TENANTS_SQL, {"scan": self.batch_size * 4, "now": now})).scalars().all()
+        ids: list[int] = []
+        for tenant_id in tenants:
+            if len(ids) >= self.batch_size:
+                break
+            locked = (await session.execute(
+                LOCK_TENANT_SQL, {"ns": ADVISORY_NAMESPACE, "key": tenant_id or 0})).scalar()
+            if not locked:
+                continue  # another relay is claiming this tenant
+            owner = OutboxEvent.tenant_id.is_(None) if tenant_id is None else OutboxEvent.tenant_id == tenant_id
+            in_flight = (await session.execute(
+                select(OutboxEvent.id).where(_pending(), owner, OutboxEvent.claimed_until >= now).limit(1))).first()
+            if in_flight is not None:
+                continue  # another relay is sending this tenant's earlier events
+            ids += (await session.execute(
+                select(OutboxEvent.id).where(_claimable(now), owner)
+                .order_by(OutboxEvent.id).limit(self.batch_size - len(ids)).with_for_update(skip_locked=True)
+            )).scalars().all()
+        return ids
+
+    async def _claim(self, session, now: datetime, lease: datetime) -> list[OutboxEvent]:
+        if session.bind.dialect.name == "postgresql":
+            ids = await self._claim_postgres(session, now)
+            if not ids:
+                return []
+            query = select(OutboxEvent).where(OutboxEvent.id.in_(ids))
+        else:
+            # SQLite and friends serialise writers; a plain ordered scan is enough
+            query = select(OutboxEvent).where(_claimable(now)).limit(self.batch_size)
+        rows = list((await session.execute(query.order_by(OutboxEvent.id))).scalars().all())
+        if rows:
+            await session.execute(
+                update(OutboxEvent).where(OutboxEvent.id.in_([row.id for row in rows])).values(claimed_until=lease))
+        return rows
+
+    async def relay_once(self) -> int:
+        """Claim, publish and mark one batch; returns the number of events delivered."""
+        now = datetime.now(timezone.utc)
+        lease = now + timedelta(seconds=self.claim_ttl)
+        deadline = time.monotonic() + self.claim_ttl / 2  # per-row retries stop well inside the lease
+        async with self._session() as session:  # expire_on_commit=False: rows stay readable below
+            async with session.begin():
+                rows = await self._claim(session, now, lease)
+        if not rows:
+            return 0
+        try:
+            await self.transport.send_batch([to_message(row) for row in rows])
+            delivered, failed = [row.id for row in rows], {}
+        except Exception as exc:
+            if len(rows) == 1:
+                delivered, failed = [], {rows[0].id: repr(exc)[:1000]}
+            else:
+                delivered, failed = await self._deliver_individually(rows, deadline)
+        now = datetime.now(timezone.utc)
+        async with self._session() as session:
+            async with session.begin():
+                if delivered:
+                    await session.execute(
+                        update(OutboxEvent).where(OutboxEvent.id.in_(delivered)).values(published_at=now, claimed_until=None)
+                    )
+                if failed:
+                    await self._record_failures(session, [row for row in rows if row.id in failed], failed, now)
+                # Failed and untried rows go back to the queue, unless our lease ran out and another relay has them
+                await session.execute(
+                    update(OutboxEvent).where(OutboxEvent.id.in_([row.id for row in rows]), OutboxEvent.claimed_until == lease)
+                    .values(claimed_until=None)
+                )
+        self.published += len(delivered)
+        if failed:
+            self.failures += 1
+            raise _PublishFailed(list(failed), next(iter(failed.values())))
+        return len(delivered)
+
+    async def _deliver_individually(self, rows: list[OutboxEvent], deadline: float) -> tuple[list[int], dict[int, str]]:
+        delivered, failed, blocked = [], {}, set()
+        for row in rows:
+            if time.monotonic() >= deadline:
+                break  # the rest waits for the next pass rather than outliving the lease
+            if row.tenant_id in blocked:
+                continue  # behind a failed event of the same tenant
+            try:
+                await self.transport.send_batch([to_message(row)])
+            except Exception as exc:
+                failed[row.id] = repr(exc)[:1000]
+                blocked.add(row.tenant_id)
+                if not delivered and len(failed) >= OUTAGE_PROBES:
+                    break  # nothing gets through: the transport is down, not one event
+            else:
+                delivered.append(row.id)
+        return delivered, failed
+
+    async def _record_failures(self, session, rows: list[OutboxEvent], errors: dict[int, str], now: datetime):
+        for row in rows:
+            attempts = row.attempts + 1  # read first: the ORM update below refreshes `row` in place
+            await session.execute(
+                update(OutboxEvent).where(OutboxEvent.id == row.id).values(
+                    attempts=OutboxEvent.attempts + 1, last_error=errors[row.id],
+                    failed_at=case((OutboxEvent.attempts + 1 >= self.max_attempts, now), else_=None),
+                )
+            )
+            if attempts >= self.max_attempts:
+                self.dead_lettered += 1
+                logger.error("Outbox event %s (%s, tenant %s) dead-lettered after %d attempts: %s",
+                             row.id, row.event_type, row.tenant_id, attempts, errors[row.id])
+
+    async def purge_published(self):
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.retention)
+        async with self._session() as session:
+            async with session.begin():
+                await session.execute(
+                    delete(OutboxEvent).where(OutboxEvent.published_at.is_not(None), OutboxEvent.published_at < cutoff)
+                )
+
+    async def _run(self):
+        backoff = self.poll_interval
+        while True:
+            self._wakeup.clear()  # a commit landing during this pass re-arms it
+            try:
+                delivered = await self.relay_once()
+                backoff = self.poll_interval
+                if delivered == self.batch_size:
+                    continue  # backlog: keep draining without waiting
+                if time.monotonic() - self._purged_at > 60:
+                    self._purged_at = time.monotonic()
+                    await self.purge_published()
+            except _PublishFailed as failure:
+                logger.warning("Outbox publish of %d events failed: %s", len(failure.ids), failure.error)
+                backoff = min(backoff * 2, self.max_backoff)
+            except Exception:
+                logger.exception("Outbox relay iteration failed")
+                backoff = min(backoff * 2, self.max_backoff)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), backoff)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class _PublishFailed(Exception):
+    def __init__(self, ids, error):
+        super().__init__(error)
+        self.ids = ids
+        self.error = error
+
+
+_relay: OutboxRelay | None = None
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_relay(session):
+    if session.info.pop("outbox_pending", False) and _relay is not None:
+        _relay.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_staged(session):
+    session.info.pop("outbox_pending", None)
+
+
+def init_outbox_relay(transport, **options) -> OutboxRelay:
+    global _relay
+    _relay = OutboxRelay(transport, **options)
+    _relay.start()
+    return _relay
+
+
+def get_outbox_relay() -> OutboxRelay | None:
+    return _relay
+
+
+async def close_outbox_relay():
+    global _relay
+    if _relay is not None:
+        await _relay.stop()
+        close = getattr(_relay.transport, "close", None)
+        if close is not None:
+            await close()
+    _relay = None
@@ -0,0 +1,307 @@
+"""On-demand request profiling: stack samples plus per-phase timings.
+
+A request is profiled when:
+- an admin has switched sampling on (`PUT /v1/admin/profiling`) and the request falls in
+  the sampled fraction, optionally narrowed to one tenant or route prefix; or
+- it carries a valid `X-Debug-Profile` header, minted by `POST /v1/admin/profiling/debug-token`.
+  The header is HMAC-signed, expires, and may be bound to a tenant.
+
+While profiled requests are in flight, one sampler thread reads the event-loop thread's
+stack every `interval` seconds. Each sample goes to the request that owns the running
+task, never to another request. Sub-tasks (e.g. `asyncio.gather` branches) are counted
+on Python 3.12+, where a task's context can be read. Stacks are kept folded
+(`root;...;leaf count`), which flamegraph.pl and speedscope read directly. Code running on worker threads (sync routes, Argon2) does not appear in the
+stacks; its wall time shows up in the phase timings instead.
+
+Phases (milliseconds): `middleware` (outer layers up to tenant resolution), `redis`,
+`db`, `hashing`, `serialization` and `total`.
+
+The profiling switch and finished profiles live in Redis when it is available, so any
+of the workers can configure profiling and read the results. Without Redis this
+worker keeps them in memory. Disabled profiling costs one cached config check per
+request.
+"""
+import asyncio
+import contextvars
+import hashlib
+import hmac
+import json
+import logging
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+DEBUG_HEADER = b"x-debug-profile"
+MAX_STACK_DEPTH = 128
+
+_active: contextvars.ContextVar = contextvars.ContextVar("profile_session", default=None)
+
+
+def _secret() -> bytes:
+    settings = get_settings()
+    return (settings.PROFILE_SECRET or settings.SECRET_KEY).encode()
+
+
+@dataclass
+class ProfileConfig:
+    sample_rate: float = 0.0
+    tenant_id: int | None = None
+    route_prefix: str | None = None
+    interval: float = 0.005
+    expires_at: float = 0.0  # wall clock; sampling switches itself off
+
+    @property
+    def active(self) -> bool:
+        return self.sample_rate > 0 and time.time() < self.expires_at
+
+
+@dataclass
+class ProfileSession:
+    id: str
+    request_id: str | None
+    tenant_id: int | None
+    method: str
+    path: str
+    reason: str
+    started: float = field(default_factory=time.perf_counter)
+    phases: Counter = field(default_factory=Counter)  # seconds
+    stacks: Counter = field(default_factory=Counter)
+    samples: int = 0
+
+    def add_phase(self, name: str, seconds: float):
+        self.phases[name] += seconds
+
+    def add_stack(self, frame):
+        names = []
+        while frame is not None and len(names) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            names.append(f"{frame.f_globals.get('__name__', code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        self.stacks[";".join(reversed(names))] += 1
+        self.samples += 1
+
+
+@contextmanager
+def phase(name: str):
+    """Add the block's wall time to the current request's profile (no-op when not profiled)."""
+    session = _active.get()
+    if session is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        session.add_phase(name, time.perf_counter() - started)
+
+
+def current_session() -> ProfileSession | None:
+    return _active.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _db_started(conn, cursor, statement, parameters, context, executemany):
+    if _active.get() is not None and context is not None:
+        context._profile_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _db_finished(conn, cursor, statement, parameters, context, executemany):
+    session = _active.get()
+    started = getattr(context, "_profile_started", None)
+    if session is not None and started is not None:
+        session.add_phase("db", time.perf_counter() - started)
+
+
+class ProfiledJSONResponse(JSONResponse):
+    """Default response class: times JSON rendering as the `serialization` phase."""
+
+    def render(self, content) -> bytes:
+        with phase("serialization"):
+            return super().render(content)
+
+
+class StackSampler:
+    """Samples the event-loop thread while at least one profiled request is in flight."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+        self._loop = None
+        self._loop_thread = None
+        self._interval = 0.005
+        self._thread: threading.Thread | None = None
+        self._owners: dict = {}  # request task -> ProfileSession
+
+    def attach(self, session: ProfileSession, interval: float):
+        with self._lock:
+            self._owners[asyncio.current_task()] = session
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread = threading.get_ident()
+            self._interval = max(0.001, interval)
+            self._active += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def detach(self, session: ProfileSession):
+        with self._lock:
+            self._owners = {task: owner for task, owner in self._owners.items() if owner is not session}
+            self._active = max(0, self._active - 1)
+
+    def _sample(self):
+        frame = sys._current_frames().get(self._loop_thread)
+        task = asyncio.tasks._current_tasks.get(self._loop)  # a plain dict read; safe under the GIL
+        if frame is None or task is None:
+            return  # the loop is idle (in select)
+        session = self._owners.get(task)
+        if session is None and hasattr(task, "get_context"):
+            session = task.get_context().get(_active)
+        if session is not None:
+            session.add_stack(frame)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+            try:
+                self._sample()
+            except Exception:  # a racing task switch must not kill the sampler
+                pass
+            time.sleep(self._interval)
+
+
+class Profiler:
+    CONFIG_KEY = "profiling:config"
+    RESULTS_KEY = "profiling:profiles"
+
+    def __init__(self, redis_getter=None, max_profiles: int = 200, config_refresh: float = 1.0):
+        self._redis_getter = redis_getter or (lambda: None)
+        self.max_profiles = max_profiles
+        self.config_refresh = config_refresh
+        self.sampler = StackSampler()
+        self._config = ProfileConfig()
+        self._config_checked = 0.0
+        self._results: deque = deque(maxlen=max_profiles)
+
+    # -- configuration -------------------------------------------------------
+    async def config(self) -> ProfileConfig:
+        now = time.monotonic()
+        client = self._redis_getter()
+        if client is not None and now - self._config_checked >= self.config_refresh:
+            self._config_checked = now
+            try:
+                raw = await client.get(self.CONFIG_KEY)
+                self._config = ProfileConfig(**json.loads(raw)) if raw else ProfileConfig()
+            except Exception as exc:
+                logger.warning("Could not refresh profiling config: %s", exc)
+        return self._config
+
+    async def configure(self, config: ProfileConfig):
+        self._config = config
+        client = self._redis_getter()
+        if client is not None:
+            ttl = max(1, int(config.expires_at - time.time()))
+            await client.set(self.CONFIG_KEY, json.dumps(asdict(config)), ex=ttl)
+
+    async def disable(self):
+        self._config = ProfileConfig()
+        client = self._redis_getter()
+        if client is not None:
+            await client.delete(self.CONFIG_KEY)
+
+    # -- debug header --------------------------------------------------------
+    @staticmethod
+    def issue_debug_token(ttl: float, tenant_id: int | None = None) -> str:
+        message = f"{int(time.time() + ttl)}.{'*' if tenant_id is None else int(tenant_id)}"
+        signature = hmac.new(_secret(), message.encode(), hashlib.sha256).hexdigest()[:32]
+        return f"{message}.{signature}"
+
+    @staticmethod
+    def verify_debug_token(value: str, tenant_id: int | None) -> bool:
+        try:
+            expires, tenant, signature = value.split(".")
+            if int(expires) < time.time():
+                return False
+        except ValueError:
+            return False
+        expected = hmac.new(_secret(), f"{expires}.{tenant}".encode(), hashlib.sha256).hexdigest()[:32]
+        if not hmac.compare_digest(signature, expected):
+            return False
+        return tenant == "*" or (tenant_id is not None and tenant == str(tenant_id))
+
+    # -- per request -----------------------------------------------------------
+    async def should_profile(self, path: str, tenant_id: int | None, debug_header: str | None) -> str | None:
+        """Why this request is profiled ("debug-header" / "sampled"), or None."""
+        if debug_header is not None and self.verify_debug_token(debug_header, tenant_id):
+            return "debug-header"
+        config = await self.config()
+        if not config.active:
+            return None
+        if config.tenant_id is not None and config.tenant_id != tenant_id:
+            return None
+        if config.route_prefix and not path.startswith(config.route_prefix):
+            return None
+        return "sampled" if random.random() < config.sample_rate else None
+
+    def begin(self, ctx, method: str, path: str, reason: str) -> ProfileSession:
+        session = ProfileSession(uuid.uuid4().hex, ctx.request_id, ctx.tenant_id, method, path, reason)
+        session.add_phase("middleware", session.started - ctx.started_at)
+        self.sampler.attach(session, self._config.interval)
+        return session
+
+    async def finish(self, session: ProfileSession, status: int, route: str | None):
+        self.sampler.detach(session)
+        session.add_phase("total", time.perf_counter() - session.started + session.phases["middleware"])
+        result = {
+            "id": session.id, "request_id": session.request_id, "tenant_id": session.tenant_id,
+            "method": session.method, "path": session.path, "route": route, "status": status,
+            "reason": session.reason, "finished_at": time.time(), "samples": session.samples,
+            "phases_ms": {name: round(seconds * 1000, 3) for name, seconds in session.phases.items()},
+            "folded": dict(session.stacks),
+        }
+        self._results.appendleft(result)
+        client = self._redis_getter()
+        if client is not None:
+            try:
+                await client.lpush(self.RESULTS_KEY, json.dumps(result))
+                await client.ltrim(self.RESULTS_KEY, 0, self.max_profiles - 1)
+            except Exception as exc:
+                logger.warning("Could not store profile %s: %s", session.id, exc)
+
+    # -- results ---------------------------------------------------------------
+    async def results(self) -> list[dict]:
+        client = self._redis_getter()
+        if client is not None:
+            try:
+                return [json.loads(raw) for raw in await client.lrange(self.RESULTS_KEY, 0, -1)]
+            except Exception as exc:
+                logger.warning("Could not read profiles from Redis: %s", exc)
+        return list(self._results)
+
+
+def folded_text(stacks: dict) -> str:
+    """Brendan Gregg's folded format: one `frame;frame;frame count` line per stack."""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items(), key=lambda item: -item[1]))
+
+
+def merge_folded(results: list[dict]) -> dict:
+    merged = Counter()
+    for result in results:
+        merged.update(result.get("folded", {}))
+    return dict(merged)
@@ -0,0 +1,196 @@
+"""Token-bucket rate limiter: in-process pre-admission tier + one atomic Redis script per decision.
+
+Decision path for a bucket key:
+1. Local tier (no I/O): a key recently denied by Redis stays blocked locally until its
+   retry time, and a per-worker bucket with the same rate/burst rejects keys that this
+   worker alone has already driven past the global limit.
+2. Global tier: a single EVALSHA that refills and takes from the shared bucket.
+
+Redis failures fail open (logged) so an outage of the limiter never takes the gateway down.
+"""
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.models.enums import TenantPlan
+
+logger = logging.getLogger(__name__)
+
+# Refill and take `cost` tokens atomically; uses the Redis clock so all workers agree on time.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+  tokens = burst
+  ts = now
+end
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed = 0
+local retry_ms = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry_ms = math.ceil((cost - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return {allowed, math.floor(tokens), retry_ms}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    rate: float  # tokens refilled per second
+    burst: int   # bucket capacity
+
+    def seconds_to_full(self, remaining: int) -> int:
+        return math.ceil(max(0, self.burst - remaining) / self.rate)
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    policy: RateLimitPolicy
+    remaining: int
+    retry_after: float = 0.0
+    local: bool = False  # decided by the in-process tier without a Redis round-trip
+
+    def headers(self) -> dict:
+        reset = math.ceil(self.retry_after) if not self.allowed else self.policy.seconds_to_full(self.remaining)
+        headers = {
+            "RateLimit-Limit": str(self.policy.burst),
+            "RateLimit-Remaining": str(max(0, self.remaining)),
+            "RateLimit-Reset": str(reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+DEFAULT_PLAN_POLICIES = {
+    TenantPlan.free: RateLimitPolicy(rate=5, burst=20),
+    TenantPlan.pro: RateLimitPolicy(rate=20, burst=100),
+    TenantPlan.enterprise: RateLimitPolicy(rate=100, burst=500),
+}
+
+# Route overrides apply to every plan unless a plan-specific entry exists ("*" = any plan).
+# Credential endpoints are deliberately tight: they are keyed by client IP and hit Argon2.
+DEFAULT_ROUTE_POLICIES = {
+    "/v1/auth/login": {"*": RateLimitPolicy(rate=1, burst=10)},
+    "/auth/login": {"*": RateLimitPolicy(rate=1, burst=10)},
+    "/v1/auth/register": {"*": RateLimitPolicy(rate=0.2, burst=5)},
+    "/auth/register": {"*": RateLimitPolicy(rate=0.2, burst=5)},
+}
+
+
+def _parse_policy(value) -> RateLimitPolicy:
+    if isinstance(value, RateLimitPolicy):
+        return value
+    return RateLimitPolicy(rate=float(value["rate"]), burst=int(value["burst"]))
+
+
+class PolicyTable:
+    """Resolves (path, plan) to a bucket scope and policy; longest route prefix wins."""
+
+    def __init__(self, plan_policies=None, route_policies=None):
+        self.plan_policies = dict(plan_policies or DEFAULT_PLAN_POLICIES)
+        routes = route_policies if route_policies is not None else DEFAULT_ROUTE_POLICIES
+        self.route_policies = sorted(routes.items(), key=lambda item: len(item[0]), reverse=True)
+
+    @classmethod
+    def from_config(cls, config: dict | None):
+        """Build from settings, e.g. {"plans": {"free": {"rate": 2, "burst": 10}}, "routes": {"/v1/search": {"*": {...}}}}."""
+        config = config or {}
+        plans = dict(DEFAULT_PLAN_POLICIES)
+        for name, value in config.get("plans", {}).items():
+            plans[TenantPlan(name)] = _parse_policy(value)
+        routes = {path: dict(per_plan) for path, per_plan in DEFAULT_ROUTE_POLICIES.items()}
+        for path, per_plan in config.get("routes", {}).items():
+            routes[path] = {plan: _parse_policy(value) for plan, value in per_plan.items()}
+        return cls(plans, routes)
+
+    def resolve(self, path: str, plan: TenantPlan) -> tuple[str, RateLimitPolicy]:
+        for prefix, per_plan in self.route_policies:
+            if path.startswith(prefix):
+                policy = per_plan.get(plan.value) or per_plan.get("*")
+                if policy is not None:
+                    return prefix, policy
+        return f"plan:{plan.value}", self.plan_policies[plan]
+
+
+class _LocalBucket:
+    __slots__ = ("tokens", "updated", "blocked_until")
+
+    def __init__(self, burst: int, now: float):
+        self.tokens = float(burst)
+        self.updated = now
+        self.blocked_until = 0.0
+
+
+class RateLimiter:
+    def __init__(self, redis_getter=None, policies: PolicyTable | None = None, max_local_keys: int = 10000, prefix: str = "rl"):
+        self._redis_getter = redis_getter or (lambda: None)
+        self.policies = policies or PolicyTable()
+        self.max_local_keys = max_local_keys
+        self.prefix = prefix
+        self.enabled = True
+        self._local: OrderedDict[str, _LocalBucket] = OrderedDict()
+        self._script = None
+        self._script_client = None
+
+    def _local_bucket(self, key: str, policy: RateLimitPolicy, now: float) -> _LocalBucket:
+        bucket = self._local.get(key)
+        if bucket is None:
+            bucket = self._local[key] = _LocalBucket(policy.burst, now)
+            if len(self._local) > self.max_local_keys:
+                self._local.popitem(last=False)
+        else:
+            self._local.move_to_end(key)
+            bucket.tokens = min(policy.burst, bucket.tokens + (now - bucket.updated) * policy.rate)
+            bucket.updated = now
+        return bucket
+
+    def _get_script(self, client):
+        if self._script is None or self._script_client is not client:
+            self._script = client.register_script(TOKEN_BUCKET_LUA)
+            self._script_client = client
+        return self._script
+
+    async def check(self, key: str, policy: RateLimitPolicy, cost: int = 1) -> RateLimitDecision:
+        now = time.monotonic()
+        bucket = self._local_bucket(key, policy, now)
+        if now < bucket.blocked_until:
+            return RateLimitDecision(False, policy, 0, bucket.blocked_until - now, local=True)
+        if bucket.tokens < cost:
+            # This worker alone already exceeded the global budget; no need to ask Redis
+            retry = (cost - bucket.tokens) / policy.rate
+            return RateLimitDecision(False, policy, 0, retry, local=True)
+        bucket.tokens -= cost
+
+        client = self._redis_getter()
+        if client is None:
+            return RateLimitDecision(True, policy, int(bucket.tokens), local=True)
+        try:
+            allowed, remaining, retry_ms = await self._get_script(client)(
+                keys=[f"{self.prefix}:{key}"], args=[policy.rate, policy.burst, cost]
+            )
+        except Exception as exc:  # fail open: a limiter outage must not become a gateway outage
+            logger.warning("Rate limiter Redis call failed for %s: %s", key, exc)
+            return RateLimitDecision(True, policy, int(bucket.tokens), local=True)
+
+        if not allowed:
+            # The request was not admitted, so it must not spend this worker's budget either
+            bucket.tokens = min(policy.burst, bucket.tokens + cost)
+            retry = int(retry_ms) / 1000
+            bucket.blocked_until = now + retry
+            return RateLimitDecision(False, policy, 0, retry)
+        return RateLimitDecision(True, policy, int(remaining))
@@ -0,0 +1,45 @@
+"""Shared async Redis client (one connection pool per worker).
+
+Call `init_redis(REDIS_URL)` at startup; consumers call `get_redis()` at use time so
+they pick up the pool created after app assembly. Every command's round-trip time is
+recorded in `gateway_redis_command_seconds`.
+"""
+import time
+
+import redis.asyncio as redis
+
+from app.core.observability import observe_redis
+from app.core.profiling import current_session
+
+_client = None
+
+
+class TimedRedis(redis.Redis):
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            elapsed = time.perf_counter() - started
+            command = args[0] if args else "?"
+            observe_redis(command.decode() if isinstance(command, bytes) else str(command), elapsed)
+            session = current_session()
+            if session is not None:
+                session.add_phase("redis", elapsed)
+
+
+def init_redis(url: str, **kwargs):
+    global _client
+    _client = TimedRedis.from_url(url, **kwargs)
+    return _client
+
+
+def get_redis():
+    return _client
+
+
+async def close_redis():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+    _client = None
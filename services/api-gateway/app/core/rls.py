@@ -1,9 +1,99 @@
 """Row-Level Security helpers: binding tenant context for DB sessions.
 
-Pattern: middleware sets `SET app.current_tenant = <id>` on connection per request.
+Every session transaction binds its tenant from the session's `after_begin` hook, when
+the transaction checks out its connection:
+
+    SELECT set_config('app.current_tenant', :tenant, false)
+
+The value is a bound parameter. The setting is session-level, so it stays on the pooled
+connection after COMMIT. The bound tenant is recorded in the pool record's `info`, which
+SQLAlchemy clears whenever the DBAPI connection is replaced. The next transaction on that
+connection then compares before binding:
+
+- the same tenant: no round-trip at all;
+- another tenant: one `set_config`;
+- no tenant: `set_config(..., '', false)` clears what the last user left, so a pooled
+  connection can never carry one request's tenant into the next.
+
+A ROLLBACK undoes a `set_config` made in the transaction, so the record is restored to
+what it was before the transaction.
+
+The tenant comes from `session.info["tenant_id"]` if set. Otherwise it comes from
+`current_tenant()`, which `RLSBindMiddleware` sets for the duration of a request. All
+application queries go through sessions; a bare `engine.connect()` would skip the hook.
 """
+import contextvars
+from contextlib import contextmanager
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+# Dialects that understand set_config(); elsewhere (SQLite in tests) binding is a no-op
+RLS_DIALECTS = frozenset({"postgresql"})
+
+BOUND_TENANT_KEY = "rls_tenant"
+PREVIOUS_TENANT_KEY = "rls_tenant_before"  # binding the open transaction replaced; restored on rollback
+
+SET_TENANT_SQL = text("SELECT set_config('app.current_tenant', :tenant, false)")
+
+_current_tenant: contextvars.ContextVar = contextvars.ContextVar("rls_tenant", default=None)
+
+
+def current_tenant() -> int | None:
+    return _current_tenant.get()
+
+
+@contextmanager
+def tenant_scope(tenant_id: int | None):
+    """Sessions that begin a transaction inside this block bind `tenant_id`."""
+    token = _current_tenant.set(tenant_id)
+    try:
+        yield
+    finally:
+        _current_tenant.reset(token)
+
+
+def bound_tenant(connection) -> int | None:
+    """Tenant bound on `connection`, if any."""
+    return connection.info.get(BOUND_TENANT_KEY)
+
+
+def bind_tenant_to_session(connection, tenant_id: int | None) -> bool:
+    """Bind `tenant_id` (None: no tenant) to the connection; False if it already was."""
+    tenant_id = None if tenant_id is None else int(tenant_id)
+    info = connection.info
+    if info.get(BOUND_TENANT_KEY) == tenant_id:
+        return False
+    connection.execute(SET_TENANT_SQL, {"tenant": "" if tenant_id is None else str(tenant_id)})
+    info.setdefault(PREVIOUS_TENANT_KEY, info.get(BOUND_TENANT_KEY))
+    if tenant_id is None:
+        info.pop(BOUND_TENANT_KEY, None)
+    else:
+        info[BOUND_TENANT_KEY] = tenant_id
+    return True
+
+
+@event.listens_for(Session, "after_begin")
+def _bind_on_begin(session, transaction, connection):
+    if connection.dialect.name not in RLS_DIALECTS:
+        return
+    bind_tenant_to_session(connection, session.info.get("tenant_id", _current_tenant.get()))
+
+
+@event.listens_for(Engine, "commit")
+def _keep_on_commit(connection):
+    connection.info.pop(PREVIOUS_TENANT_KEY, None)
 
 
-def bind_tenant_to_session(connection, tenant_id: int):
-    # Use raw SQL to set local session variable for postgres row level policies
-    connection.execute("SET app.current_tenant = %s;" % tenant_id)
+# A rolled-back transaction takes its set_config with it; so does the record
+@event.listens_for(Engine, "rollback")
+def _restore_on_rollback(connection):
+    info = connection.info
+    if PREVIOUS_TENANT_KEY not in info:
+        return
+    previous = info.pop(PREVIOUS_TENANT_KEY)
+    if previous is None:
+        info.pop(BOUND_TENANT_KEY, None)
+    else:
+        info[BOUND_TENANT_KEY] = previous
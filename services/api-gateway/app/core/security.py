@@ -1,6 +1,20 @@
-"""Password hashing and token helpers (Argon2id, token utils)."""
+"""Password hashing and token helpers (Argon2id, token utils).
+
+Argon2 costs tens of milliseconds of CPU per call, so request handlers must use the
+`*_async` variants: they run on a dedicated bounded executor (threads by default;
+argon2-cffi releases the GIL) and fail fast with `HashingBusyError` when saturated.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 from argon2 import PasswordHasher
 
+from app.core.observability import HASH_IN_FLIGHT, HASH_QUEUE_DEPTH, HASH_REJECTED, HASH_SECONDS
+from app.core.profiling import current_session
+
 ph = PasswordHasher()
 
 
@@ -13,3 +27,130 @@ def verify_password(hash: str, password: str) -> bool:
         return ph.verify(hash, password)
     except Exception:
         return False
+
+
+class HashingBusyError(Exception):
+    """Raised when the hashing queue is full; mapped to 503 + Retry-After by the error handler."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Password hashing capacity exhausted")
+        self.retry_after = retry_after
+
+
+class HashingMetrics:
+    """Per-call latency counters for the hashing executor (read by observability)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds = 0.0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.calls += 1
+            self.total_seconds += seconds
+            self.last_seconds = seconds
+            if seconds > self.max_seconds:
+                self.max_seconds = seconds
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            avg = self.total_seconds / self.calls if self.calls else 0.0
+            return {
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "avg_seconds": avg,
+                "max_seconds": self.max_seconds,
+                "last_seconds": self.last_seconds,
+            }
+
+
+class HashingExecutor:
+    """Bounded off-loop executor for Argon2 work.
+
+    At most `max_workers` calls run concurrently and at most `max_queue` more wait;
+    anything beyond that is rejected immediately instead of piling up tail latency.
+    """
+
+    def __init__(self, max_workers: int | None = None, max_queue: int = 64, kind: str = "thread"):
+        if kind not in ("thread", "process"):
+            raise ValueError("kind must be 'thread' or 'process'")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.kind = kind
+        self.metrics = HashingMetrics()
+        self._pool = None
+        self._pending = 0  # running + queued; only touched from the event loop thread
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def queued(self) -> int:
+        return max(0, self._pending - self.max_workers)
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="argon2")
+        return self._pool
+
+    async def run(self, fn, *args):
+        if self._pending >= self.max_workers + self.max_queue:
+            self.metrics.reject()
+            HASH_REJECTED.inc()
+            raise HashingBusyError()
+        self._pending += 1
+        HASH_IN_FLIGHT.inc()
+        HASH_QUEUE_DEPTH.set(self.queued)
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_pool(), fn, *args)
+        finally:
+            self._pending -= 1
+            HASH_IN_FLIGHT.dec()
+            HASH_QUEUE_DEPTH.set(self.queued)
+            elapsed = time.perf_counter() - started
+            self.metrics.observe(elapsed)
+            HASH_SECONDS.observe(elapsed)
+            session = current_session()
+            if session is not None:
+                session.add_phase("hashing", elapsed)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+hash_executor = HashingExecutor()
+
+
+def configure_hash_executor(max_workers: int | None = None, max_queue: int = 64, kind: str = "thread") -> HashingExecutor:
+    global hash_executor
+    hash_executor.shutdown()
+    hash_executor = HashingExecutor(max_workers=max_workers, max_queue=max_queue, kind=kind)
+    return hash_executor
+
+
+def shutdown_hash_executor():
+    hash_executor.shutdown()
+
+
+async def hash_password_async(password: str) -> str:
+    return await hash_executor.run(hash_password, password)
+
+
+async def verify_password_async(hash: str, password: str) -> bool:
+    return await hash_executor.run(verify_password, hash, password)
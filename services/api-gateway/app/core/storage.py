@@ -0,0 +1,87 @@
+"""Local blob storage for uploaded documents (content-addressed per tenant).
+
+Blobs live at `<root>/<tenant_id>/<sha[:2]>/<sha>`; uploads are written to `<root>/tmp`
+chunk by chunk and atomically renamed once their hash is known. File I/O runs in the
+threadpool so the event loop never blocks on disk.
+"""
+import hashlib
+import os
+import uuid
+
+from starlette.concurrency import run_in_threadpool
+
+
+class BlobWriter:
+    """Temp file that hashes and counts bytes as they are written."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._fh = open(path, "wb")
+
+    async def write(self, chunk: bytes):
+        self._digest.update(chunk)
+        self.size += len(chunk)
+        await run_in_threadpool(self._fh.write, chunk)
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+    def close(self):
+        if not self._fh.closed:
+            self._fh.close()
+
+
+class LocalBlobStorage:
+    def __init__(self, root: str):
+        self.root = root
+
+    def blob_key(self, tenant_id: int, sha256: str) -> str:
+        return f"{tenant_id}/{sha256[:2]}/{sha256}"
+
+    def blob_path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    async def open_writer(self) -> BlobWriter:
+        tmp_dir = os.path.join(self.root, "tmp")
+        await run_in_threadpool(os.makedirs, tmp_dir, exist_ok=True)
+        return await run_in_threadpool(BlobWriter, os.path.join(tmp_dir, uuid.uuid4().hex))
+
+    async def commit(self, writer: BlobWriter, key: str) -> str:
+        """Move a finished upload to its content address; an existing identical blob wins."""
+        writer.close()
+        target = self.blob_path(key)
+
+        def _move():
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.exists(target):
+                os.remove(writer.path)
+            else:
+                os.replace(writer.path, target)
+
+        await run_in_threadpool(_move)
+        return key
+
+    async def discard(self, writer: BlobWriter):
+        writer.close()
+        if os.path.exists(writer.path):
+            await run_in_threadpool(os.remove, writer.path)
+
+    def open(self, key: str):
+        return open(self.blob_path(key), "rb")
+
+
+_storage: LocalBlobStorage | None = None
+
+
+def init_storage(root: str) -> LocalBlobStorage:
+    global _storage
+    _storage = LocalBlobStorage(root)
+    return _storage
+
+
+def get_storage() -> LocalBlobStorage:
+    if _storage is None:
+        raise RuntimeError("Storage not initialized")
+    return _storage
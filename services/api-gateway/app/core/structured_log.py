@@ -0,0 +1,232 @@
+"""Queue-backed structured (JSON lines) logging.
+
+On the request path, logging is a dict build and a `put_nowait`. A background thread
+encodes the records (orjson when installed) and writes them to the stream in batches,
+with one `write()` per batch. Nothing on the event loop waits on stdout.
+
+Under pressure records are dropped, never waited for. Drops are counted per
+(route, status class) and reported by the writer as one `log.dropped` summary
+record per `summary_interval`.
+
+Access records can be sampled per route (`sample_rates`, keyed by route template, with
+"*" as the default). Server errors and requests slower than `slow_ms` are always kept.
+
+`QueueLogHandler` routes stdlib `logging` calls through the same queue, stamped with the
+request id and tenant of the current request context.
+"""
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+from app.middleware.context import current_context
+
+try:  # optional: ~5-10x faster than json.dumps for log-sized dicts
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is not installed
+    orjson = None
+
+_json_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def encode_record(record: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return _json_encoder.encode(record).encode()
+
+
+class LogMetrics:
+    def __init__(self):
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.sampled_out = 0
+
+    def snapshot(self) -> dict:
+        return dict(vars(self))
+
+
+class StructuredLogger:
+    MAX_DROP_KEYS = 256  # distinct (route, status) counters kept between summaries
+
+    def __init__(self, stream=None, max_queue: int = 10000, batch_size: int = 256, flush_interval: float = 0.2,
+                 sample_rates: dict | None = None, slow_ms: float = 500.0, summary_interval: float = 5.0):
+        self.stream = stream or sys.stdout
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_rates = dict(sample_rates or {})
+        self.slow_ms = slow_ms
+        self.summary_interval = summary_interval
+        self.metrics = LogMetrics()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._drops: Counter = Counter()
+        self._drops_lock = threading.Lock()  # stdlib handlers also log from threadpool workers
+        self._summarised_at = time.monotonic()
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    # -- producers (any thread, never block) -----------------------------------
+    def submit(self, record: dict, drop_key=("-", "-")) -> bool:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._drops_lock:
+                self.metrics.dropped += 1
+                if drop_key in self._drops or len(self._drops) < self.MAX_DROP_KEYS:
+                    self._drops[drop_key] += 1
+                else:
+                    self._drops[("other", "-")] += 1
+            return False
+        self.metrics.enqueued += 1
+        return True
+
+    def sampled(self, route: str, status: int, latency_ms: float) -> bool:
+        if status >= 500 or latency_ms >= self.slow_ms:
+            return True
+        rate = self.sample_rates.get(route, self.sample_rates.get("*", 1.0))
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.metrics.sampled_out += 1
+        return False
+
+    def access(self, record: dict) -> bool:
+        """Submit an access record (`route`, `status`, `latency_ms` keys) subject to sampling."""
+        route, status = record.get("route", "-"), record.get("status", 0)
+        if not self.sampled(route, status, record.get("latency_ms", 0.0)):
+            return False
+        return self.submit(record, (route, f"{status // 100}xx"))
+
+    # -- writer thread ---------------------------------------------------------
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="structured-log", daemon=True)
+            self._thread.start()
+
+    def _write(self, records: list[dict]):
+        lines = []
+        for record in records:
+            try:
+                lines.append(encode_record(record))
+            except Exception:  # an unencodable record must not kill the writer
+                lines.append(encode_record({"event": "log.unencodable", "repr": repr(record)[:500]}))
+        data = b"\n".join(lines) + b"\n"
+        buffer = getattr(self.stream, "buffer", None)
+        if buffer is not None:
+            buffer.write(data)
+            buffer.flush()
+        else:
+            self.stream.write(data.decode())
+            self.stream.flush()
+        self.metrics.written += len(records)
+
+    def _drop_summary(self) -> dict | None:
+        with self._drops_lock:
+            drops, self._drops = self._drops, Counter()
+        if not drops:
+            return None
+        return {
+            "ts": time.time(), "level": "WARNING", "event": "log.dropped", "dropped": sum(drops.values()),
+            "by_route": {f"{route} {status}": count for (route, status), count in drops.most_common()},
+        }
+
+    def _run(self):
+        while True:
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if time.monotonic() - self._summarised_at >= self.summary_interval or (self._stopping.is_set() and not batch):
+                self._summarised_at = time.monotonic()
+                summary = self._drop_summary()
+                if summary is not None:
+                    batch.append(summary)
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception:
+                    traceback.print_exc(file=sys.stderr)
+            elif self._stopping.is_set():
+                return
+
+    def stop(self, timeout: float = 5.0):
+        """Flush what is queued (and the drop summary), then stop the writer."""
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join(timeout)
+            self._thread = None
+
+
+class QueueLogHandler(logging.Handler):
+    """stdlib logging -> StructuredLogger, with request correlation."""
+
+    def __init__(self, structured: StructuredLogger, level=logging.NOTSET):
+        super().__init__(level)
+        self.structured = structured
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            entry = {
+                "ts": record.created,
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+            }
+            ctx = current_context()
+            if ctx is not None:
+                entry["request_id"] = ctx.request_id
+                if ctx.tenant_id is not None:
+                    entry["tenant_id"] = ctx.tenant_id
+            if record.exc_info:
+                entry["exc"] = "".join(traceback.format_exception(*record.exc_info))
+            self.structured.submit(entry, (record.name, record.levelname))
+        except Exception:
+            self.handleError(record)
+
+
+_structured: StructuredLogger | None = None
+_access_fallback = logging.getLogger("app.access")
+
+
+def configure_logging(level: str = "INFO", **options) -> StructuredLogger:
+    """Install the queue-backed pipeline as the only root handler and start its writer."""
+    global _structured
+    shutdown_logging()
+    _structured = StructuredLogger(**options)
+    _structured.start()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueLogHandler(_structured))
+    root.setLevel(level.upper())
+    return _structured
+
+
+def get_structured_logger() -> StructuredLogger | None:
+    return _structured
+
+
+def access_log(record: dict):
+    """Emit one access record; before `configure_logging` it goes to the `app.access` logger."""
+    if _structured is not None:
+        _structured.access(record)
+    elif _access_fallback.isEnabledFor(logging.INFO):
+        _access_fallback.info("%s", encode_record(record).decode())
+
+
+def shutdown_logging():
+    global _structured
+    if _structured is not None:
+        root = logging.getLogger()
+        for handler in [h for h in root.handlers if isinstance(h, QueueLogHandler)]:
+            root.removeHandler(handler)
+        _structured.stop()
+    _structured = None
@@ -0,0 +1,8 @@
+"""Document ingestion: page extraction, chunking and embedding into `Chunk` rows."""
+from .pipeline import IngestionPipeline, close_ingestion, get_ingestion, init_ingestion, process_window
+from .text import TextChunk, TextSplitter, normalize_text
+
+__all__ = [
+    "IngestionPipeline", "TextChunk", "TextSplitter", "close_ingestion", "get_ingestion", "init_ingestion",
+    "normalize_text", "process_window",
+]
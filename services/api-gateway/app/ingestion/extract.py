@@ -0,0 +1,112 @@
+"""Page text extraction for the allowed upload types (PDF, DOCX).
+
+`read_pages(path, content_type, start, stop)` returns only the requested page window, so a
+500-page tender is never held in memory at once. PDFs go through `pypdf` (optional
+dependency; scanned pages without a text layer come back empty). DOCX is streamed with
+`iterparse` straight out of the zip, splitting pages on explicit and rendered page breaks.
+
+A DOCX cannot be entered mid-stream, so its XML is parsed once: the first window spools
+every page's text to `<blob>.pages` (the texts, then their offsets), and each window
+seeks into that file. The spool is derived from the content-addressed blob, so documents
+sharing a blob share it and a resumed document skips the parse.
+"""
+import os
+import struct
+import uuid
+import zipfile
+from array import array
+from xml.etree.ElementTree import iterparse
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # optional: PDF ingestion only
+    PdfReader = None
+
+PDF = "application/pdf"
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class ExtractionError(Exception):
+    pass
+
+
+def read_pdf_pages(path: str, start: int, stop: int) -> tuple[list[tuple[int, str]], int, bool]:
+    if PdfReader is None:
+        raise ExtractionError("PDF extraction requires the 'pypdf' package")
+    reader = PdfReader(path)
+    total = len(reader.pages)
+    pages = [(number, reader.pages[number].extract_text() or "") for number in range(start, min(stop, total))]
+    return pages, total, stop >= total
+
+
+def iter_docx_pages(path: str):
+    """Text of each page of a DOCX, in order, from one streaming pass over word/document.xml."""
+    paragraphs, runs = [], []
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as body:
+        for event, element in iterparse(body, events=("start", "end")):
+            tag = element.tag
+            if event == "start":
+                if tag == _W + "lastRenderedPageBreak" or (tag == _W + "br" and element.get(_W + "type") == "page"):
+                    paragraphs.append("".join(runs))
+                    yield "\n".join(p for p in paragraphs if p)
+                    paragraphs, runs = [], []
+                continue
+            if tag == _W + "t":
+                runs.append(element.text or "")
+            elif tag == _W + "tab":
+                runs.append("\t")
+            elif tag == _W + "p":
+                if runs:
+                    paragraphs.append("".join(runs))
+                runs = []
+                element.clear()  # keep iterparse memory flat
+    paragraphs.append("".join(runs))
+    yield "\n".join(p for p in paragraphs if p)
+
+
+def _spool_docx(path: str, spool: str):
+    offsets = array("q", [0])
+    tmp = f"{spool}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, "wb") as out:
+            for text in iter_docx_pages(path):
+                out.write(text.encode())
+                offsets.append(out.tell())
+            out.write(offsets.tobytes())
+            out.write(struct.pack("q", len(offsets)))
+        os.replace(tmp, spool)  # readers only ever see a complete spool
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def read_docx_pages(path: str, start: int, stop: int) -> tuple[list[tuple[int, str]], int, bool]:
+    """Pages [start, stop) of a DOCX, read from its page spool (built on first use)."""
+    spool = path + ".pages"
+    if not os.path.exists(spool):
+        _spool_docx(path, spool)
+    with open(spool, "rb") as fh:
+        fh.seek(-8, os.SEEK_END)
+        (count,) = struct.unpack("q", fh.read(8))
+        fh.seek(-8 * (count + 1), os.SEEK_END)
+        offsets = array("q")
+        offsets.frombytes(fh.read(8 * count))
+        total = count - 1
+        pages = []
+        if start < total:
+            fh.seek(offsets[start])
+            for number in range(start, min(stop, total)):
+                pages.append((number, fh.read(offsets[number + 1] - offsets[number]).decode()))
+    return pages, total, stop >= total
+
+
+def read_pages(path: str, content_type: str, start: int, stop: int) -> tuple[list[tuple[int, str]], int | None, bool]:
+    """(pages, total, done) for page window [start, stop); total is None while unknown."""
+    if content_type == PDF:
+        return read_pdf_pages(path, start, stop)
+    if content_type == DOCX:
+        return read_docx_pages(path, start, stop)
+    raise ExtractionError(f"No extractor for {content_type}")
@@ -0,0 +1,276 @@
+"""Document -> chunk ingestion: extract -> normalize -> split -> embed -> bulk insert.
+
+A document is processed as a stream of page windows (`window_pages` pages each):
+
+- `process_window` (extract, normalize and split; CPU-bound) runs in a process pool. The
+  splitter's unsplit tail is carried into the next window, so overlap spans window edges;
+- while window k is embedded and inserted, window k+1 is already being extracted. At most
+  two windows of one document are in memory, whatever its page count;
+- every window takes a pool slot from a FIFO semaphore, so a 500-page tender queues
+  behind small documents between windows instead of holding the pool until it is done;
+- each window commits its chunks together with the document's progress columns, so the
+  `/documents/{id}/ocr-status` endpoint reads real progress from any worker.
+
+Documents are claimed with a conditional `uploaded -> processing` update that also stamps
+`heartbeat_at`; every committed window renews it, guarded on the value this worker wrote.
+A `processing` document whose heartbeat is older than `lease` seconds was left by a worker
+that died, and the next claim takes it over, dropping the chunks it had stored. A worker
+that is shut down hands its documents back as `uploaded`. Every worker can therefore
+`resume()` at startup without processing a document twice.
+"""
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from sqlalchemy import and_, delete, insert, or_, select, update
+
+from app.core import db as db_module
+from app.models.chunk import Chunk
+from app.models.document import Document
+from app.models.enums import DocumentStatus
+from app.search.corpus import bump_corpus_version, get_corpus_version
+from app.search.vectors import pack_vector
+
+from .extract import read_pages
+from .text import TextSplitter, normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLost(Exception):
+    """Another worker took the document over after this worker's lease expired."""
+
+
+class WindowResult(NamedTuple):
+    chunks: list        # TextChunk
+    carry: tuple        # splitter state for the next window
+    next_page: int
+    total_pages: int | None
+    done: bool
+
+
+def process_window(path: str, content_type: str, start: int, window_pages: int, carry,
+                   chunk_chars: int, overlap: int) -> WindowResult:
+    """Extract pages [start, start + window_pages), normalise and split them (pool worker)."""
+    pages, total, done = read_pages(path, content_type, start, start + window_pages)
+    splitter = TextSplitter(chunk_chars, overlap, carry)
+    chunks = []
+    for number, text in pages:
+        chunks.extend(splitter.feed(number + 1, normalize_text(text)))
+    if done:
+        chunks.extend(splitter.flush())
+    return WindowResult(chunks, splitter.carry, start + window_pages, total, done)
+
+
+class IngestionPipeline:
+    def __init__(self, embed, storage, session_factory=None, workers: int | None = None, executor_kind: str = "process",
+                 window_pages: int = 8, chunk_chars: int = 1200, overlap: int = 200, embed_batch: int = 64,
+                 max_documents: int | None = None, on_chunks=None, lease: float = 300.0):
+        if executor_kind not in ("thread", "process"):
+            raise ValueError("executor_kind must be 'thread' or 'process'")
+        self.embed = embed
+        self.storage = storage
+        self.session_factory = session_factory
+        self.workers = workers or os.cpu_count() or 1
+        self.window_pages = window_pages
+        self.chunk_chars = chunk_chars
+        self.overlap = overlap
+        self.embed_batch = embed_batch
+        self.lease = lease
+        self.on_chunks = on_chunks  # async (tenant_id, chunk_ids, document_ids, vectors, texts, version)
+        if executor_kind == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest")
+        self._slots = asyncio.Semaphore(self.workers)
+        self._documents = asyncio.Semaphore(max_documents or 2 * self.workers)
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    def _session(self):
+        return (self.session_factory or db_module.AsyncSessionLocal)()
+
+    def _claimable(self, now: datetime):
+        # Waiting, or claimed by a worker whose lease ran out (NULL: interrupted before leases existed)
+        return or_(
+            Document.status == DocumentStatus.uploaded.value,
+            and_(Document.status == DocumentStatus.processing.value,
+                 or_(Document.heartbeat_at.is_(None), Document.heartbeat_at < now - timedelta(seconds=self.lease))),
+        )
+
+    # -- scheduling --------------------------------------------------------
+    def submit(self, document_id: int) -> asyncio.Task:
+        task = self._tasks.get(document_id)
+        if task is None or task.done():
+            task = self._tasks[document_id] = asyncio.get_running_loop().create_task(self._guarded(document_id))
+            task.add_done_callback(lambda _: self._tasks.pop(document_id, None))
+        return task
+
+    async def resume(self) -> int:
+        async with self._session() as session:
+            ids = (await session.execute(
+                select(Document.id).where(self._claimable(datetime.now(timezone.utc))).order_by(Document.id)
+            )).scalars().all()
+        for document_id in ids:
+            self.submit(document_id)
+        return len(ids)
+
+    async def _guarded(self, document_id: int):
+        try:
+            await self.process(document_id)
+        except LeaseLost:
+            logger.warning("Lost the ingestion lease on document %s; another worker took it over", document_id)
+        except Exception as exc:
+            logger.exception("Ingestion of document %s failed", document_id)
+            try:
+                async with self._session() as session:
+                    await session.execute(update(Document).where(Document.id == document_id)
+                                          .values(status=DocumentStatus.failed.value, error=str(exc)[:1000]))
+                    await session.commit()
+            except Exception:
+                logger.exception("Could not mark document %s as failed", document_id)
+
+    async def _extract(self, doc: dict, start: int, carry) -> WindowResult:
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._pool, process_window, doc["path"], doc["content_type"], start, self.window_pages, carry,
+                self.chunk_chars, self.overlap,
+            )
+
+    # -- one document ------------------------------------------------------
+    async def _claim(self, document_id: int) -> dict | None:
+        now = datetime.now(timezone.utc)
+        async with self._session() as session:
+            claimed = await session.execute(
+                update(Document)
+                .where(Document.id == document_id, self._claimable(now))
+                .values(status=DocumentStatus.processing.value, pages_processed=0, chunk_count=0, error=None,
+                        heartbeat_at=now)
+            )
+            if claimed.rowcount != 1:
+                return None
+            doc = (await session.execute(
+                select(Document.id, Document.tenant_id, Document.path, Document.content_type).where(Document.id == document_id)
+            )).one()
+            # A previous, interrupted run may have left chunks behind
+            stale = await session.execute(delete(Chunk).where(Chunk.document_id == document_id))
+            if stale.rowcount:
+                await session.run_sync(bump_corpus_version, [doc.tenant_id])
+            await session.commit()
+        return {"id": doc.id, "tenant_id": doc.tenant_id, "content_type": doc.content_type,
+                "path": self.storage.blob_path(doc.path), "heartbeat": now}
+
+    async def _renew(self, session, doc: dict, **values):
+        """Update the document and move its heartbeat on, unless another worker now holds it."""
+        now = datetime.now(timezone.utc)
+        renewed = await session.execute(
+            update(Document).where(Document.id == doc["id"], Document.heartbeat_at == doc["heartbeat"])
+            .values(heartbeat_at=now, **values)
+        )
+        if renewed.rowcount != 1:
+            await session.rollback()
+            raise LeaseLost(doc["id"])
+        doc["heartbeat"] = now
+
+    async def _release(self, doc: dict):
+        """Hand an interrupted document back as `uploaded` (its chunks go on the next claim)."""
+        try:
+            async with self._session() as session:
+                await session.execute(
+                    update(Document).where(Document.id == doc["id"], Document.heartbeat_at == doc["heartbeat"])
+                    .values(status=DocumentStatus.uploaded.value, heartbeat_at=None)
+                )
+                await session.commit()
+        except Exception:
+            logger.exception("Could not release document %s; it is retried once its lease expires", doc["id"])
+
+    async def process(self, document_id: int) -> bool:
+        """Ingest one document; False if another worker already claimed it."""
+        async with self._documents:
+            doc = await self._claim(document_id)
+            if doc is None:
+                return False
+            chunk_index = 0
+            pending = asyncio.ensure_future(self._extract(doc, 0, None))
+            try:
+                while True:
+                    result = await pending
+                    if not result.done:
+                        pending = asyncio.ensure_future(self._extract(doc, result.next_page, result.carry))
+                    chunk_index = await self._store(doc, result, chunk_index)
+                    if result.done:
+                        break
+            except asyncio.CancelledError:
+                pending.cancel()
+                await self._release(doc)
+                raise
+            except BaseException:
+                pending.cancel()
+                raise
+            async with self._session() as session:
+                await self._renew(session, doc, status=DocumentStatus.processed.value)
+                await session.commit()
+            return True
+
+    async def _store(self, doc: dict, result: WindowResult, chunk_index: int) -> int:
+        """Embed and insert one window's chunks and advance the document's progress atomically."""
+        chunks = result.chunks
+        vectors = []
+        for start in range(0, len(chunks), self.embed_batch):
+            vectors.extend(await self.embed([c.text for c in chunks[start:start + self.embed_batch]]))
+        rows = []
+        for offset, (chunk, vector) in enumerate(zip(chunks, vectors)):
+            blob, scale = pack_vector(vector)
+            rows.append({
+                "document_id": doc["id"], "tenant_id": doc["tenant_id"], "chunk_index": chunk_index + offset,
+                "page_start": chunk.page_start, "page_end": chunk.page_end, "text": chunk.text,
+                "vector": blob, "vector_dim": len(vector), "vector_dtype": "float32", "vector_scale": scale,
+            })
+        pages_processed = result.total_pages if result.done else result.next_page
+        if result.total_pages is not None:
+            pages_processed = min(pages_processed, result.total_pages)
+        async with self._session() as session:
+            # Renew first: on PostgreSQL the row lock also holds off a takeover until we commit
+            await self._renew(session, doc, pages_processed=pages_processed, pages_total=result.total_pages,
+                              chunk_count=Document.chunk_count + len(rows))
+            ids = []
+            if rows:
+                inserted = await session.execute(insert(Chunk).values(rows).returning(Chunk.id, Chunk.chunk_index))
+                by_index = dict((index, chunk_id) for chunk_id, index in inserted.all())
+                ids = [by_index[row["chunk_index"]] for row in rows]
+                await session.run_sync(bump_corpus_version, [doc["tenant_id"]])
+            version = await get_corpus_version(session, doc["tenant_id"]) if rows else None
+            await session.commit()
+        if rows and self.on_chunks is not None:
+            await self.on_chunks(doc["tenant_id"], ids, [doc["id"]] * len(ids), vectors, [c.text for c in chunks], version)
+        return chunk_index + len(rows)
+
+    async def close(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)  # let them hand their documents back
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_pipeline: IngestionPipeline | None = None
+
+
+def init_ingestion(embed, storage, **options) -> IngestionPipeline:
+    global _pipeline
+    _pipeline = IngestionPipeline(embed, storage, **options)
+    return _pipeline
+
+
+def get_ingestion() -> IngestionPipeline | None:
+    return _pipeline
+
+
+async def close_ingestion():
+    global _pipeline
+    if _pipeline is not None:
+        await _pipeline.close()
+    _pipeline = None
@@ -0,0 +1,96 @@
+"""Text normalisation and overlapping chunk splitting for extracted pages."""
+import re
+import unicodedata
+from typing import NamedTuple
+
+_HYPHEN_BREAK = re.compile(r"(\w)-\n(\w)")
+_CONTROL = re.compile("[\\x00-\\x08\\x0b\\x0c\\x0e-\\x1f\\x7f\\u00ad]")
+_SPACES = re.compile("[ \\t\\u00a0]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+_SENTENCE_END = re.compile(r"[.!?;:]\s|\n")
+
+
+class TextChunk(NamedTuple):
+    text: str
+    page_start: int
+    page_end: int
+
+
+def normalize_text(text: str) -> str:
+    """NFKC, re-join words hyphenated across lines, drop control chars, collapse whitespace."""
+    text = unicodedata.normalize("NFKC", text or "")
+    text = _HYPHEN_BREAK.sub(r"\1\2", text)
+    text = _CONTROL.sub("", text)
+    text = _SPACES.sub(" ", text)
+    text = _BLANK_LINES.sub("\n\n", text)
+    return "\n".join(line.strip() for line in text.split("\n")).strip()
+
+
+class TextSplitter:
+    """Incremental splitter: feed pages, get chunks of ~`chunk_chars` with `overlap` chars shared.
+
+    Cuts prefer a sentence/line end in the last 40% of the window, then whitespace. The
+    unsplit tail (`carry`) can be handed to a fresh splitter, so a document can be processed
+    in independent page windows.
+    """
+
+    def __init__(self, chunk_chars: int = 1200, overlap: int = 200, carry: tuple | None = None):
+        if not 0 <= overlap <= chunk_chars // 2:
+            raise ValueError("overlap must be between 0 and chunk_chars / 2")
+        self.chunk_chars = chunk_chars
+        self.overlap = overlap
+        self._buffer, marks = carry or ("", [])
+        self._marks = list(marks)  # (offset in buffer, page number), ascending
+
+    @property
+    def carry(self) -> tuple:
+        return self._buffer, list(self._marks)
+
+    def _page_at(self, offset: int) -> int:
+        page = self._marks[0][1] if self._marks else 0
+        for start, number in self._marks:
+            if start > offset:
+                break
+            page = number
+        return page
+
+    def _cut(self) -> int:
+        window = self._buffer[:self.chunk_chars]
+        floor = int(self.chunk_chars * 0.6)
+        best = None
+        for match in _SENTENCE_END.finditer(window, floor):
+            best = match.end()
+        if best is None:
+            space = window.rfind(" ", floor)
+            best = space + 1 if space > 0 else self.chunk_chars
+        return best
+
+    def _emit(self, end: int) -> TextChunk:
+        chunk = TextChunk(self._buffer[:end].strip(), self._page_at(0), self._page_at(max(end - 1, 0)))
+        restart = max(end - self.overlap, 0)
+        space = self._buffer.find(" ", restart, end)
+        if 0 <= space < end - 1:
+            restart = space + 1  # start the overlap on a word boundary
+        self._buffer = self._buffer[restart:]
+        page = self._page_at(restart)
+        self._marks = [(0, page)] + [(start - restart, number) for start, number in self._marks if start > restart]
+        return chunk
+
+    def feed(self, page_number: int, text: str) -> list[TextChunk]:
+        if not text:
+            return []
+        if self._buffer:
+            self._buffer += "\n"
+        self._marks.append((len(self._buffer), page_number))
+        self._buffer += text
+        chunks = []
+        while len(self._buffer) >= self.chunk_chars:
+            chunks.append(self._emit(self._cut()))
+        return chunks
+
+    def flush(self) -> list[TextChunk]:
+        if not self._buffer.strip():
+            return []
+        chunk = TextChunk(self._buffer.strip(), self._page_at(0), self._page_at(len(self._buffer) - 1))
+        self._buffer, self._marks = "", []
+        return [chunk]
@@ -1,10 +1,30 @@
 """FastAPI app initialization + lifespan events."""
 from .bootstrap import create_app
-from .core.config import Settings
-from .core.db import init_db
+from .core.audit import close_audit_writer, init_audit_writer
+from .core.authz import role_permissions
+from .core.config import get_settings
+from .core import db as db_module
+from .core.db import dispose_async_db, init_async_db, init_db
+from .core.gateway_clients import IngestionClient, RabbitMQTransport
+from .core.http_client import close_http_client, init_http_client
+from .core.observability import instrument_engine, shutdown_metrics
+from .core.outbox import close_outbox_relay, init_outbox_relay
+from .core.rate_limiter import PolicyTable
+from .core.redis_client import close_redis, init_redis
+from .middleware.rate_limit import rate_limiter
+from .core.storage import init_storage
+from .ingestion import close_ingestion, init_ingestion
+from .core.security import configure_hash_executor, shutdown_hash_executor
+from .core.structured_log import configure_logging, shutdown_logging
+from .security.api_keys import api_key_resolver
+from .security.auth.user_import import close_user_importer, init_user_importer
+from .security.policy.opa_client import close_opa_client, init_opa_client
+from .security.auth import jwt_handler
+from .routes.v1 import search as search_routes
+from .routes.v1.search import init_search
 from fastapi.middleware.cors import CORSMiddleware
 
-settings = Settings()
+settings = get_settings()
 app = create_app()
 
 app.add_middleware(
@@ -17,12 +37,67 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event():
-    # Initialize database connection
-    init_db(settings.DATABASE_URL)
-    # TODO: Initialize redis and rabbitmq connections
+    configure_logging(**settings.logging_options())
+    # Initialize database connections (sync engine for legacy paths, async engine for request handlers)
+    init_db(settings.DATABASE_URL, **settings.db_pool_options())
+    init_async_db(settings.DATABASE_URL, **settings.db_pool_options())
+    instrument_engine(db_module.engine, "sync")
+    instrument_engine(db_module.async_engine.sync_engine, "async")
+    configure_hash_executor(settings.pool_workers(settings.HASH_WORKERS), settings.HASH_MAX_QUEUE, settings.HASH_EXECUTOR_KIND)
+    init_redis(settings.REDIS_URL)
+    http_client = init_http_client(settings.HTTP_CLIENT_TIMEOUT, settings.HTTP_CLIENT_MAX_CONNECTIONS)
+    if settings.AUDIT_ENABLED:
+        init_audit_writer(**settings.audit_writer_options())
+    if settings.OUTBOX_RELAY_ENABLED:
+        if settings.EVENT_TRANSPORT == "rabbitmq":
+            transport = RabbitMQTransport(settings.RABBITMQ_URL)
+            await transport.start()
+        else:
+            transport = IngestionClient(settings.INGESTION_SERVICE_URL, http_client)
+        init_outbox_relay(transport, batch_size=settings.OUTBOX_BATCH_SIZE, poll_interval=settings.OUTBOX_POLL_INTERVAL,
+                          max_attempts=settings.OUTBOX_MAX_ATTEMPTS, claim_ttl=settings.OUTBOX_CLAIM_TTL)
+    storage = init_storage(settings.STORAGE_ROOT)
+    init_search(
+        settings.EMBEDDING_SERVICE_URL, settings.ANN_INDEX_ROOT, settings.ANN_MIN_ROWS, settings.ANN_DEFAULT_NPROBE,
+        settings.SEARCH_CACHE_SIZE, settings.SEARCH_CACHE_TTL, http_client=http_client,
+    )
+    if settings.INGEST_ENABLED:
+        pipeline = init_ingestion(
+            lambda texts: search_routes.get_embedding_client().embed(texts), storage,
+            on_chunks=lambda *args: search_routes.search_service.add_chunks(*args),
+            **settings.ingestion_options(),
+        )
+        await pipeline.resume()
+    await init_user_importer(**settings.user_import_options()).resume()
+    rate_limiter.policies = PolicyTable.from_config(settings.RATE_LIMITS)
+    rate_limiter.enabled = settings.RATE_LIMIT_ENABLED
+    jwt_handler.verified_tokens.max_entries = settings.JWT_VERIFIED_CACHE_SIZE
+    api_key_resolver.max_entries = settings.API_KEY_CACHE_SIZE
+    api_key_resolver.ttl = settings.API_KEY_CACHE_TTL
+    api_key_resolver.negative_ttl = settings.API_KEY_NEGATIVE_TTL
+    api_key_resolver.max_negative_entries = settings.API_KEY_NEGATIVE_CACHE_SIZE
+    api_key_resolver.start()
+    role_permissions.recheck_interval = settings.RBAC_RECHECK_INTERVAL
+    if settings.OPA_URL:
+        init_opa_client(settings.OPA_URL, http_client, ttl=settings.OPA_CACHE_TTL,
+                        max_entries=settings.OPA_CACHE_SIZE, revision_interval=settings.OPA_REVISION_INTERVAL)
+    if jwt_handler.configure_jwks(settings.JWKS_URL, settings.JWKS_REFRESH_INTERVAL):
+        jwt_handler.jwks_cache.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    # TODO: Cleanup connections
-    pass
+    if jwt_handler.jwks_cache is not None:
+        await jwt_handler.jwks_cache.stop()
+    await api_key_resolver.stop()
+    await close_opa_client()
+    await close_ingestion()
+    await close_user_importer()
+    await close_outbox_relay()  # closes the event transport; before the pooled client goes away
+    await close_audit_writer()  # flushes buffered audit events before the engine goes away
+    await close_http_client()
+    await close_redis()
+    await dispose_async_db()
+    shutdown_hash_executor()
+    shutdown_metrics()
+    shutdown_logging()  # last: flushes everything the shutdown steps logged
 
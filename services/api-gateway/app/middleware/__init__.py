@@ -1,2 +1,5 @@
-"""Middleware package. Order of middleware matters; check `bootstrap.py` for registration order."""
-__all__ = ["request_id", "logging_middleware"]
+"""Middleware package. Order of middleware matters; check `bootstrap.py` for registration order.
+
+All layers are pure ASGI and share `context.RequestContext` (no BaseHTTPMiddleware).
+"""
+__all__ = ["context", "request_id", "logging_middleware"]
@@ -1,7 +1,45 @@
-"""API Key middleware validates incoming service-to-service requests and injects scopes into request.state."""
-from starlette.middleware.base import BaseHTTPMiddleware
+"""API Key middleware validates incoming service-to-service requests and injects scopes into the request context.
 
-class APIKeyMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # Validate X-API-Key header and set request.state.api_key_scopes
-        return await call_next(request)
+A request carrying `X-API-Key` is resolved through the cached resolver (see
+`app/security/api_keys/resolver.py`), so steady machine traffic costs no DB round-trip.
+Unknown or revoked keys get 401 here; requests without the header pass through to JWT auth.
+"""
+import logging
+
+from fastapi.responses import JSONResponse
+
+from app.security.api_keys.resolver import APIKeyResolver, api_key_resolver
+
+from .context import get_header, get_request_context
+
+logger = logging.getLogger(__name__)
+
+
+class APIKeyMiddleware:
+    def __init__(self, app, resolver: APIKeyResolver | None = None):
+        self.app = app
+        self.resolver = resolver or api_key_resolver
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            raw_key = get_header(scope, b"x-api-key")
+            if raw_key:
+                try:
+                    key = await self.resolver.resolve(raw_key)
+                except Exception as exc:
+                    # Fail closed: a key we cannot check is not a key we accept
+                    logger.warning("API key lookup failed: %s", exc)
+                    response = JSONResponse(status_code=503, content={
+                        "error": "api_key_unavailable", "message": "API key could not be verified"})
+                    return await response(scope, receive, send)
+                if key is None:
+                    response = JSONResponse(status_code=401, content={
+                        "error": "invalid_api_key", "message": "Invalid or revoked API key"})
+                    return await response(scope, receive, send)
+                ctx = get_request_context(scope)
+                ctx.api_key_id = key.id
+                ctx.api_key_scopes = key.scopes
+                ctx.permissions = key.permissions
+                ctx.tenant_id = key.tenant_id
+                ctx.tenant_plan = key.plan
+        await self.app(scope, receive, send)
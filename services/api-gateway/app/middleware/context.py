@@ -0,0 +1,85 @@
+"""Per-request context shared by every gateway middleware layer.
+
+The pure-ASGI middlewares create one `RequestContext` per HTTP request and store it in
+`scope["state"]["ctx"]` (i.e. `request.state.ctx` inside routes). It is also published
+through a ContextVar so helpers deep in the call stack can reach it without a Request.
+"""
+import contextvars
+import time
+from dataclasses import dataclass, field
+
+_current_context: contextvars.ContextVar = contextvars.ContextVar("request_context", default=None)
+
+
+@dataclass
+class RequestContext:
+    request_id: str | None = None
+    tenant_id: int | None = None
+    tenant_plan: str | None = None
+    user_id: int | None = None
+    role: str | None = None
+    claims: dict | None = None
+    api_key_id: int | None = None
+    api_key_scopes: frozenset = frozenset()
+    permissions: int = 0  # compiled bitset, see app/core/authz.py
+    started_at: float = field(default_factory=time.perf_counter)
+
+
+def get_request_context(scope) -> RequestContext:
+    """Return the context for this ASGI scope, creating it on first use."""
+    state = scope.setdefault("state", {})
+    ctx = state.get("ctx")
+    if ctx is None:
+        ctx = state["ctx"] = RequestContext()
+        _current_context.set(ctx)
+    return ctx
+
+
+def current_context() -> RequestContext | None:
+    return _current_context.get()
+
+
+def get_header(scope, name: bytes) -> str | None:
+    """Case-insensitive lookup of a request header (`name` must be lower-case bytes)."""
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _mount_prefix(scope, route) -> str:
+    """Router prefix in front of `route.path`.
+
+    FastAPI >= 0.140 matches included routers lazily and records the route as declared,
+    without its router's prefix: the prefix is the part of the path the route does not match.
+    """
+    path = scope.get("path", "")
+    regex = getattr(route, "path_regex", None)
+    if regex is None or regex.match(path):
+        return ""
+    for i, char in enumerate(path):
+        if char == "/" and i and regex.match(path[i:]):
+            return path[:i]
+    return ""
+
+
+def route_template(scope) -> str | None:
+    """Path template of the matched route (e.g. `/v1/documents/{document_id}`), once routing ran."""
+    route = scope.get("route")
+    if route is not None:
+        return _mount_prefix(scope, route) + route.path if hasattr(route, "path") else None
+    endpoint = scope.get("endpoint")  # older Starlette only records the endpoint
+    if endpoint is not None:
+        return f"{endpoint.__module__}.{endpoint.__qualname__}"
+    return None
+
+
+def with_response_headers(send, headers):
+    """Wrap `send` so `headers` (list of (bytes, bytes), or a callable returning one) are added to the response."""
+    async def send_wrapper(message):
+        if message["type"] == "http.response.start":
+            extra = headers() if callable(headers) else headers
+            if extra:
+                message["headers"] = list(message.get("headers", ())) + list(extra)
+        await send(message)
+    return send_wrapper
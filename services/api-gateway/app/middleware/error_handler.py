@@ -4,3 +4,27 @@ from fastapi.responses import JSONResponse
 
 async def http_error_handler(request: Request, exc: Exception):
     return JSONResponse(status_code=500, content={"error": "internal_error", "message": str(exc)})
+
+
+async def hashing_busy_handler(request: Request, exc: Exception):
+    # Argon2 executor saturated: shed load instead of queueing behind other logins
+    return JSONResponse(
+        status_code=503,
+        content={"error": "hashing_busy", "message": str(exc)},
+        headers={"Retry-After": str(getattr(exc, "retry_after", 1))},
+    )
+
+
+async def invalid_page_handler(request: Request, exc: Exception):
+    # Tampered/foreign pagination cursor or unsupported sort key
+    return JSONResponse(status_code=400, content={"error": "invalid_pagination", "message": str(exc)})
+
+
+async def audit_busy_handler(request: Request, exc: Exception):
+    # Audit buffer full: refuse the security-relevant action rather than leave it unaudited
+    return JSONResponse(status_code=503, content={"error": "audit_busy", "message": str(exc)}, headers={"Retry-After": "1"})
+
+
+async def policy_unavailable_handler(request: Request, exc: Exception):
+    # OPA unreachable: fail closed rather than serve an unchecked decision
+    return JSONResponse(status_code=503, content={"error": "policy_unavailable", "message": str(exc)}, headers={"Retry-After": "1"})
@@ -1,7 +1,203 @@
-"""Idempotency middleware using Redis to deduplicate requests by a key."""
-from starlette.middleware.base import BaseHTTPMiddleware
+"""Idempotency middleware using Redis to deduplicate requests by a key.
 
-class IdempotencyMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # Parse Idempotency-Key header and consult Redis
-        return await call_next(request)
+For unsafe methods carrying an `Idempotency-Key` header:
+- the first request claims the key and runs the handler; its response is streamed to the
+  client as usual while a copy is stored for replay;
+- concurrent duplicates on the same worker await the in-flight result, duplicates on other
+  workers poll Redis until it appears (409 if it does not within `wait_timeout`);
+- later retries replay the stored status, headers and body without touching the handler.
+5xx responses and handler errors release the key so the client can retry for real; waiting
+duplicates then go back through the claim, so still only one of them runs.
+
+The request body is read up front (spooled to disk past `spool_bytes`) and its sha256 is
+kept with the key: reusing a key with a different body gets a 422, not someone else's
+response.
+"""
+import asyncio
+import hashlib
+import logging
+import tempfile
+
+from fastapi.responses import JSONResponse
+
+from app.core.idempotency import IdempotencyStore, StoredResponse
+from app.core.redis_client import get_redis
+
+from .context import get_header, get_request_context
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+MAX_KEY_LENGTH = 255
+REPLAY_CHUNK = 64 * 1024
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app, redis_getter=None, result_ttl: int = 86400, wait_timeout: float = 30.0,
+                 max_body_bytes: int = 1024 * 1024, spool_bytes: int = 1024 * 1024):
+        self.app = app
+        self.redis_getter = redis_getter or get_redis
+        self.result_ttl = result_ttl
+        self.wait_timeout = wait_timeout
+        self.max_body_bytes = max_body_bytes
+        self.spool_bytes = spool_bytes
+        self._inflight: dict[str, tuple[asyncio.Future, str]] = {}  # key -> (result, body fingerprint)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            return await self.app(scope, receive, send)
+        idem_key = get_header(scope, b"idempotency-key")
+        redis = self.redis_getter()
+        if not idem_key or redis is None:
+            return await self.app(scope, receive, send)
+        if len(idem_key) > MAX_KEY_LENGTH:
+            response = JSONResponse(status_code=400, content={"error": "invalid_idempotency_key", "message": "Idempotency-Key too long"})
+            return await response(scope, receive, send)
+
+        store = IdempotencyStore(redis, lock_ttl=int(self.wait_timeout) + 30, max_body_bytes=self.max_body_bytes)
+        key = self._storage_key(scope, idem_key)
+        fingerprint, receive = await self._buffer_body(receive)
+        return await self._dispatch(store, key, fingerprint, scope, receive, send)
+
+    async def _dispatch(self, store: IdempotencyStore, key: str, fingerprint: str, scope, receive, send):
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await self._await_local(store, key, fingerprint, pending, scope, receive, send)
+        if await store.claim(key, fingerprint):
+            return await self._execute(store, key, fingerprint, scope, receive, send)
+        return await self._await_remote(store, key, fingerprint, scope, receive, send)
+
+    async def _buffer_body(self, receive):
+        """Read the request body once; returns its sha256 and a `receive` that replays it."""
+        digest = hashlib.sha256()
+        spool = tempfile.SpooledTemporaryFile(max_size=self.spool_bytes)
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            body = message.get("body", b"")
+            digest.update(body)
+            spool.write(body)
+            if not message.get("more_body", False):
+                break
+        size = spool.tell()
+        spool.seek(0)
+        done = False
+
+        async def replay():
+            nonlocal done
+            if done:
+                return await receive()
+            body = spool.read(REPLAY_CHUNK)
+            done = spool.tell() >= size
+            if done:
+                spool.close()
+            return {"type": "http.request", "body": body, "more_body": not done}
+
+        return digest.hexdigest(), replay
+
+    @staticmethod
+    def _storage_key(scope, idem_key: str) -> str:
+        ctx = get_request_context(scope)
+        if ctx.tenant_id is not None:
+            owner = f"t{ctx.tenant_id}"
+        else:
+            client = scope.get("client")
+            owner = f"ip{client[0] if client else '-'}"
+        return f"idem:{owner}:{scope['method']}:{scope['path']}:{idem_key}"
+
+    async def _execute(self, store: IdempotencyStore, key: str, fingerprint: str, scope, receive, send):
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (future, fingerprint)
+        status = 500
+        headers = []
+        chunks = []
+        size = 0
+        too_large = False
+
+        async def capture(message):
+            nonlocal status, headers, size, too_large
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", ()))
+            elif message["type"] == "http.response.body" and not too_large:
+                body = message.get("body", b"")
+                size += len(body)
+                if size > store.max_body_bytes:
+                    too_large = True
+                    chunks.clear()
+                else:
+                    chunks.append(body)
+            await send(message)
+
+        result = None
+        try:
+            await self.app(scope, receive, capture)
+            if status < 500 and not too_large:
+                result = StoredResponse(status, headers, b"".join(chunks), fingerprint)
+        finally:
+            # Update the store before waking duplicates: after a release they re-claim the key
+            try:
+                if result is not None:
+                    await store.save(key, result, ttl=self.result_ttl)
+                else:
+                    await store.release(key)
+            except Exception as exc:
+                logger.warning("Idempotency store update failed for %s: %s", key, exc)
+            finally:
+                self._inflight.pop(key, None)
+                future.set_result(result)
+
+    async def _await_local(self, store: IdempotencyStore, key: str, fingerprint: str, pending, scope, receive, send):
+        future, claimed_with = pending
+        if claimed_with != fingerprint:
+            return await self._body_mismatch(scope, receive, send)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), self.wait_timeout)
+        except asyncio.TimeoutError:
+            return await self._in_progress(scope, receive, send)
+        if result is None:
+            # The first attempt failed or was not storable: compete for the key again
+            return await self._dispatch(store, key, fingerprint, scope, receive, send)
+        return await self._replay(result, scope, receive, send)
+
+    async def _await_remote(self, store: IdempotencyStore, key: str, fingerprint: str, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_timeout
+        delay = 0.01
+        while True:
+            record = await store.get(key)
+            if record is not None and record.fingerprint and record.fingerprint != fingerprint:
+                return await self._body_mismatch(scope, receive, send)
+            if isinstance(record, StoredResponse):
+                return await self._replay(record, scope, receive, send)
+            # Released after a failure (or expired): try to become the executor
+            if record is None and await store.claim(key, fingerprint):
+                return await self._execute(store, key, fingerprint, scope, receive, send)
+            if loop.time() >= deadline:
+                return await self._in_progress(scope, receive, send)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    @staticmethod
+    async def _replay(record: StoredResponse, scope, receive, send):
+        await send({"type": "http.response.start", "status": record.status,
+                    "headers": record.headers + [(b"idempotent-replayed", b"true")]})
+        await send({"type": "http.response.body", "body": record.body})
+
+    @staticmethod
+    async def _body_mismatch(scope, receive, send):
+        response = JSONResponse(
+            status_code=422,
+            content={"error": "idempotency_key_reused", "message": "Idempotency-Key was already used with a different request body"},
+        )
+        await response(scope, receive, send)
+
+    @staticmethod
+    async def _in_progress(scope, receive, send):
+        response = JSONResponse(
+            status_code=409,
+            content={"error": "idempotency_in_progress", "message": "A request with this Idempotency-Key is still running"},
+            headers={"Retry-After": "1"},
+        )
+        await response(scope, receive, send)
@@ -2,13 +2,34 @@
 
 Routes may use `Depends(get_current_user)` which relies on this module.
 """
-from fastapi import Request
+import jwt
+from fastapi import HTTPException, Request
 
+from app.security.auth.jwt_handler import verify_jwt as _verify_jwt
 
-def verify_jwt(token: str):
-    # Decode token based on header alg; consult JWKS endpoint for RS256/EdDSA
-    raise NotImplementedError
+
+def bearer_token(authorization: str | None) -> str | None:
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token.strip()
+
+
+async def verify_jwt(token: str):
+    # Decode token based on header alg; RS256/EdDSA keys come from the cached JWKS
+    return await _verify_jwt(token)
 
 async def jwt_auth_dependency(request: Request):
-    # Extract from Authorization header and verify
-    return None
+    # Claims already verified by TenantCtxMiddleware are reused; otherwise verify here
+    ctx = getattr(request.state, "ctx", None)
+    if ctx is not None and ctx.claims is not None:
+        return ctx.claims
+    token = bearer_token(request.headers.get("Authorization"))
+    if token is None:
+        raise HTTPException(status_code=401, detail="Missing bearer token")
+    try:
+        return await verify_jwt(token)
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token")
@@ -1,11 +1,44 @@
-"""Structured JSON logging middleware (ELK-compatible)."""
-import json
-from starlette.middleware.base import BaseHTTPMiddleware
-
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # Basic example: log method/path/request_id
-        response = await call_next(request)
-        # Emit structured log (replace with real logger)
-        print(json.dumps({"method": request.method, "path": request.url.path, "status": response.status_code}))
-        return response
+"""Structured JSON access logging (ELK-compatible), one record per request.
+
+The record is handed to the queue-backed pipeline in `app.core.structured_log`: building
+it and enqueueing it is all the request pays for. Sampling is keyed by route template,
+so `/v1/documents/{document_id}` is one route, not one per id.
+"""
+import time
+
+from app.core.structured_log import access_log
+
+from .context import get_request_context, route_template
+
+
+class LoggingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        ctx = get_request_context(scope)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            access_log({
+                "ts": time.time(),
+                "event": "http.access",
+                "request_id": ctx.request_id,
+                "tenant_id": ctx.tenant_id,
+                "user_id": ctx.user_id,
+                "method": scope["method"],
+                "route": route_template(scope) or scope["path"],
+                "path": scope["path"],
+                "status": status,
+                "latency_ms": round((time.perf_counter() - ctx.started_at) * 1000, 3),
+            })
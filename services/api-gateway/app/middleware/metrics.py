@@ -0,0 +1,36 @@
+"""Per-route latency histogram and in-flight gauge (see `app.core.observability`).
+
+Routes are labelled by template, never by raw path. Requests that match no route share
+one `<unmatched>` series, so scanners can't explode the series count.
+"""
+import time
+
+from app.core.observability import HTTP_IN_FLIGHT, observe_request
+
+from .context import get_request_context, route_template
+
+UNMATCHED = "<unmatched>"
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        ctx = get_request_context(scope)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            observe_request(scope["method"], route_template(scope) or UNMATCHED, status, time.perf_counter() - ctx.started_at)
@@ -0,0 +1,41 @@
+"""Profile selected requests (sampled by admin switch, or carrying a signed debug header).
+
+Sits right after tenant resolution so sampling can target one tenant; everything before
+it is reported as the `middleware` phase. See `app.core.profiling`.
+"""
+from app.core.profiling import DEBUG_HEADER, Profiler, _active
+from app.core.redis_client import get_redis
+
+from .context import get_header, get_request_context, route_template, with_response_headers
+
+profiler = Profiler(redis_getter=get_redis)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, profiler_: Profiler | None = None):
+        self.app = app
+        self.profiler = profiler_ or profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        ctx = get_request_context(scope)
+        reason = await self.profiler.should_profile(scope["path"], ctx.tenant_id, get_header(scope, DEBUG_HEADER))
+        if reason is None:
+            return await self.app(scope, receive, send)
+
+        session = self.profiler.begin(ctx, scope["method"], scope["path"], reason)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = _active.set(session)
+        try:
+            await self.app(scope, receive, with_response_headers(send_wrapper, [(b"x-profile-id", session.id.encode())]))
+        finally:
+            _active.reset(token)
+            await self.profiler.finish(session, status, route_template(scope))
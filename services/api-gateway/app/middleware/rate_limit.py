@@ -1,7 +1,56 @@
-"""Basic rate limiting middleware using Redis token buckets (per-tenant/per-user)."""
-from starlette.middleware.base import BaseHTTPMiddleware
+"""Basic rate limiting middleware using Redis token buckets (per-tenant/per-user).
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # Implement token bucket using Redis INCR/EXPIRE
-        return await call_next(request)
+Buckets are keyed by tenant (or user, then client IP for anonymous calls) and by the
+policy scope resolved from the route and the tenant plan; see `app/core/rate_limiter.py`.
+The plan comes with the caller's credentials: login copies `tenants.plan` into the access
+token, and the API key resolver loads it with the key.
+"""
+from fastapi.responses import JSONResponse
+
+from app.core.rate_limiter import RateLimiter
+from app.core.redis_client import get_redis
+from app.models.enums import TenantPlan
+
+from .context import get_request_context, with_response_headers
+
+EXEMPT_PATHS = ("/healthz", "/metrics", "/docs", "/openapi.json", "/redoc")
+
+rate_limiter = RateLimiter(redis_getter=get_redis)
+
+
+def rate_limit_identity(scope, ctx) -> str:
+    if ctx.tenant_id is not None:
+        return f"t:{ctx.tenant_id}"
+    if ctx.user_id is not None:
+        return f"u:{ctx.user_id}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def tenant_plan(ctx) -> TenantPlan:
+    try:
+        return TenantPlan(ctx.tenant_plan) if ctx.tenant_plan else TenantPlan.free
+    except ValueError:
+        return TenantPlan.free
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, limiter: RateLimiter | None = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limiter.enabled or scope["path"].startswith(EXEMPT_PATHS):
+            return await self.app(scope, receive, send)
+        ctx = get_request_context(scope)
+        bucket, policy = self.limiter.policies.resolve(scope["path"], tenant_plan(ctx))
+        decision = await self.limiter.check(f"{bucket}:{rate_limit_identity(scope, ctx)}", policy)
+        if not decision.allowed:
+            response = JSONResponse(
+                status_code=429,
+                content={"error": "rate_limited", "message": "Too many requests"},
+                headers=decision.headers(),
+            )
+            return await response(scope, receive, send)
+        headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in decision.headers().items()]
+        await self.app(scope, receive, with_response_headers(send, headers))
@@ -1,7 +1,22 @@
-"""RBAC middleware (present but often unused by current stack). Enforces role/permission checks at request level."""
-from starlette.middleware.base import BaseHTTPMiddleware
+"""RBAC middleware: attaches the caller's compiled permission bitset to the request context.
 
-class RBACMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # Optional enforcement layer; check request.state.user roles
-        return await call_next(request)
+Runs after tenant and API key resolution. JWT callers get their role's mask for their
+tenant (see `app/core/authz.py`); API key callers already carry their scopes' mask.
+Routes then check with `require_permission`, a single bitwise AND.
+"""
+from app.core.authz import RolePermissionCache, role_permissions
+
+from .context import get_request_context
+
+
+class RBACMiddleware:
+    def __init__(self, app, roles: RolePermissionCache | None = None):
+        self.app = app
+        self.roles = roles or role_permissions
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            ctx = get_request_context(scope)
+            if ctx.claims and ctx.api_key_id is None:
+                ctx.permissions = await self.roles.mask(ctx.tenant_id, ctx.role)
+        await self.app(scope, receive, send)
@@ -1,11 +1,25 @@
-"""Inject or propagate X-Request-ID header (UUID v4) into request.state and response header."""
+"""Inject or propagate X-Request-ID header (UUID v4) into the request context and response header."""
 import uuid
-from starlette.middleware.base import BaseHTTPMiddleware
-
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        rid = request.headers.get("X-Request-ID") or str(uuid.uuid4())
-        request.state.request_id = rid
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = rid
-        return response
+
+from .context import get_header, get_request_context, with_response_headers
+
+MAX_REQUEST_ID_LENGTH = 128
+
+
+def _accept_request_id(value: str | None) -> str | None:
+    # Client-supplied ids end up in logs: keep them short and printable
+    if value and len(value) <= MAX_REQUEST_ID_LENGTH and value.isprintable():
+        return value
+    return None
+
+
+class RequestIDMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        ctx = get_request_context(scope)
+        ctx.request_id = _accept_request_id(get_header(scope, b"x-request-id")) or str(uuid.uuid4())
+        await self.app(scope, receive, with_response_headers(send, [(b"x-request-id", ctx.request_id.encode("latin-1"))]))
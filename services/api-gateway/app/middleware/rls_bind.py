@@ -1,7 +1,21 @@
-"""Bind tenant id to PostgreSQL session variable on each request to enforce RLS."""
-from starlette.middleware.base import BaseHTTPMiddleware
+"""Publish the request's tenant to the DB layer so every transaction it opens binds it for RLS.
 
-class RLSBindMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # e.g. set request.state.tenant_id and execute SET app.current_tenant
-        return await call_next(request)
+No SQL runs here: `app.core.rls` binds the tenant when a session transaction checks out its
+connection, and only if that connection is not bound to it already. Requests that never
+touch the database cost nothing.
+"""
+from app.core.rls import tenant_scope
+
+from .context import get_request_context
+
+
+class RLSBindMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with tenant_scope(get_request_context(scope).tenant_id):
+            await self.app(scope, receive, send)
@@ -1,7 +1,28 @@
-"""Extract tenant from JWT or API key and set `request.state.tenant_id`."""
-from starlette.middleware.base import BaseHTTPMiddleware
+"""Extract tenant from JWT or API key and set `ctx.tenant_id` on the request context."""
+import jwt
 
-class TenantCtxMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # Example: parse JWT, set request.state.tenant_id
-        return await call_next(request)
+from .context import get_header, get_request_context
+from .jwt_auth import bearer_token, verify_jwt
+
+
+class TenantCtxMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            ctx = get_request_context(scope)
+            token = bearer_token(get_header(scope, b"authorization"))
+            if token is not None and ctx.claims is None:
+                try:
+                    ctx.claims = await verify_jwt(token)
+                except jwt.InvalidTokenError:
+                    # Leave the context anonymous; protected routes reject it with 401
+                    ctx.claims = None
+            if ctx.claims:
+                ctx.user_id = ctx.claims.get("user_id")
+                ctx.role = ctx.claims.get("role")
+                if ctx.tenant_id is None:
+                    ctx.tenant_id = ctx.claims.get("tenant_id")
+                    ctx.tenant_plan = ctx.claims.get("plan")  # set by login from `tenants.plan`
+        await self.app(scope, receive, send)
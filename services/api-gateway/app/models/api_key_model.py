@@ -1,11 +1,13 @@
 """API key model for service authentication."""
-from sqlalchemy import Column, Integer, String, DateTime, func, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, false, func, Boolean
 from .base import Base
 
 class APIKey(Base):
     __tablename__ = 'api_keys'
+    __mapper_args__ = {"eager_defaults": True}  # created_at is read back at flush, not lazily after commit
     id = Column(Integer, primary_key=True)
-    key_hash = Column(String, nullable=False)
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), index=True)
+    key_hash = Column(String, nullable=False, unique=True)  # sha256 hex; the resolver's lookup key
     scopes = Column(String)
-    disabled = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    disabled = Column(Boolean, nullable=False, default=False, server_default=false())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())  # keyset sort key
@@ -1,10 +1,33 @@
-"""Audit log model (immutable, hash-chained)."""
-from sqlalchemy import Column, Integer, String, DateTime, func
+"""Audit log model (immutable, hash-chained) and its Merkle checkpoints.
+
+`seq` is the chain position (1, 2, ...). Each entry's hash covers the previous entry's
+hash, so editing, deleting or reordering any row breaks every later link. A checkpoint
+stores the Merkle root over the entry hashes of `[first_seq, last_seq]`. It also
+chains to the previous checkpoint, so one published checkpoint hash vouches for the
+whole log up to `last_seq`. See `app.core.audit`.
+"""
+from sqlalchemy import JSON, BigInteger, Column, DateTime, Integer, String
 from .base import Base
 
 class AuditLog(Base):
     __tablename__ = 'audit_logs'
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=False)
+    tenant_id = Column(Integer, index=True)
+    actor_id = Column(Integer)
+    event_type = Column(String(64), nullable=False)
+    payload = Column(JSON, nullable=False)
+    payload_hash = Column(String(64), nullable=False)
+    prev_hash = Column(String(64), nullable=False)
+    entry_hash = Column(String(64), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)  # set by the writer: it is hashed
+
+
+class AuditCheckpoint(Base):
+    __tablename__ = 'audit_checkpoints'
     id = Column(Integer, primary_key=True)
-    event_type = Column(String)
-    payload_hash = Column(String)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    first_seq = Column(BigInteger, nullable=False)
+    last_seq = Column(BigInteger, nullable=False, unique=True)
+    merkle_root = Column(String(64), nullable=False)
+    prev_checkpoint_hash = Column(String(64), nullable=False)
+    checkpoint_hash = Column(String(64), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,10 +1,22 @@
-"""Chunk model (embeddings / RAG support)."""
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+"""Chunk model (embeddings / RAG support).
+
+`vector` holds the embedding as packed binary (see `app/search/vectors.py`): float32 or
+int8-quantized with a per-vector scale, so search loads it with a single `frombuffer`.
+"""
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, LargeBinary, Text
 from .base import Base
 
 class Chunk(Base):
     __tablename__ = 'chunks'
     id = Column(Integer, primary_key=True)
     document_id = Column(Integer, ForeignKey('documents.id'))
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), index=True)  # denormalised for tenant-scoped scans
     embedding_id = Column(String)
-    vector = Column(String)  # In prod use vector DB
+    chunk_index = Column(Integer)  # position within the document
+    page_start = Column(Integer)   # 1-based pages the chunk spans
+    page_end = Column(Integer)
+    text = Column(Text)  # chunk text, indexed for BM25 (see `app/search/lexical.py`)
+    vector = Column(LargeBinary)
+    vector_dim = Column(Integer)
+    vector_dtype = Column(String(8), default="float32")  # "float32" | "int8"
+    vector_scale = Column(Float, default=1.0)
@@ -1,10 +1,24 @@
 """Document model (tender documents) with tenant association."""
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String, ForeignKey, Text, UniqueConstraint, func
 from .base import Base
+from .enums import DocumentStatus
 
 class Document(Base):
     __tablename__ = 'documents'
+    # One blob per content hash per tenant (upload deduplication)
+    __table_args__ = (UniqueConstraint('tenant_id', 'sha256', name='uq_documents_tenant_sha256'),)
     id = Column(Integer, primary_key=True)
     tenant_id = Column(Integer, ForeignKey('tenants.id'))
     filename = Column(String)
     path = Column(String)
+    sha256 = Column(String(64))
+    size_bytes = Column(BigInteger)
+    content_type = Column(String)
+    status = Column(String, nullable=False, default=DocumentStatus.uploaded.value)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Ingestion progress (see app/ingestion/pipeline.py); pages_total stays NULL until known
+    pages_total = Column(Integer)
+    pages_processed = Column(Integer, nullable=False, default=0)
+    chunk_count = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    heartbeat_at = Column(DateTime(timezone=True))  # ingestion lease: last committed window of the claiming worker
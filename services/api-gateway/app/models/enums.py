@@ -1,4 +1,4 @@
-"""Database enums used across models (TenantPlan, UserRole, DocumentStatus)."""
+"""Database enums used across models (TenantPlan, UserRole, DocumentStatus, import job/row states)."""
 import enum
 
 class TenantPlan(enum.Enum):
@@ -12,5 +12,18 @@ class UserRole(enum.Enum):
 
 class DocumentStatus(enum.Enum):
     uploaded = "uploaded"
+    processing = "processing"
     processed = "processed"
     failed = "failed"
+
+class ImportJobStatus(enum.Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+class ImportRowStatus(enum.Enum):
+    pending = "pending"
+    created = "created"
+    invalid = "invalid"
+    duplicate = "duplicate"
@@ -0,0 +1,16 @@
+"""Transactional outbox: events written in the same transaction as the rows they describe."""
+from sqlalchemy import JSON, BigInteger, Column, DateTime, Integer, String, Text, func
+from .base import Base
+
+class OutboxEvent(Base):
+    __tablename__ = 'outbox_events'
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)  # per-tenant delivery order
+    tenant_id = Column(Integer, index=True)
+    event_type = Column(String(64), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    published_at = Column(DateTime(timezone=True))  # NULL = pending
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+    failed_at = Column(DateTime(timezone=True))  # dead-lettered after max_attempts; never claimed again
+    claimed_until = Column(DateTime(timezone=True))  # a relay is sending it until then (NULL: not claimed)
@@ -1,9 +1,16 @@
-"""Role model (RBAC roles + permissions)."""
-from sqlalchemy import Column, Integer, String
+"""Role model (RBAC roles + permissions).
+
+Rows are per-tenant roles that add to, or redefine, the built-in roles in
+`app/core/authz.py`. Changing a row bumps `tenants.roles_version`, which is how workers
+learn that their compiled permission bitsets are stale.
+"""
+from sqlalchemy import Column, ForeignKey, Integer, String, UniqueConstraint
 from .base import Base
 
 class Role(Base):
     __tablename__ = 'roles'
+    __table_args__ = (UniqueConstraint('tenant_id', 'name', name='uq_roles_tenant_name'),)
     id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False, index=True)
     name = Column(String, nullable=False)
-    permissions = Column(String)  # comma-separated list or JSON in prod
+    permissions = Column(String)  # comma-separated catalog names, e.g. "documents.read,search.query"
@@ -1,8 +1,12 @@
 """Tenant model (organization accounts)."""
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import BigInteger, Column, Integer, String
 from .base import Base
+from .enums import TenantPlan
 
 class Tenant(Base):
     __tablename__ = 'tenants'
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
+    plan = Column(String(16), nullable=False, default=TenantPlan.free.value, server_default=TenantPlan.free.value)  # rate-limit tier
+    corpus_version = Column(BigInteger, nullable=False, default=0, server_default="0")  # see app/search/corpus.py
+    roles_version = Column(BigInteger, nullable=False, default=0, server_default="0")  # see app/core/authz.py
@@ -0,0 +1,38 @@
+"""Bulk user import jobs and their staged rows (see app/security/auth/user_import.py).
+
+Rows are staged when the import is uploaded and carry their own outcome, so a job can be
+resumed from its first pending row and its per-row results read back page by page.
+"""
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Integer, LargeBinary, String, Text, func
+from .base import Base
+from .enums import ImportJobStatus, ImportRowStatus
+
+class UserImportJob(Base):
+    __tablename__ = 'user_import_jobs'
+    __mapper_args__ = {"eager_defaults": True}  # created_at is read back at flush, not lazily after commit
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(Integer, ForeignKey('tenants.id'), nullable=False, index=True)
+    created_by = Column(Integer)
+    status = Column(String, nullable=False, default=ImportJobStatus.pending.value)
+    total_rows = Column(Integer, nullable=False, default=0)
+    processed_rows = Column(Integer, nullable=False, default=0)
+    created_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)  # invalid + duplicate
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    heartbeat_at = Column(DateTime(timezone=True))  # last committed batch; a stale one means the worker died
+    finished_at = Column(DateTime(timezone=True))
+
+class UserImportRow(Base):
+    __tablename__ = 'user_import_rows'
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    job_id = Column(Integer, ForeignKey('user_import_jobs.id', ondelete='CASCADE'), nullable=False)
+    row_number = Column(Integer, nullable=False)  # 1-based, in upload order
+    email = Column(String)
+    first_name = Column(String)
+    last_name = Column(String)
+    role = Column(String)
+    password = Column(LargeBinary)  # AES-GCM sealed until the row is processed, then cleared
+    status = Column(String, nullable=False, default=ImportRowStatus.pending.value)
+    user_id = Column(Integer)
+    error = Column(String)
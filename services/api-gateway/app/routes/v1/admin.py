@@ -1,8 +1,85 @@
-"""Admin endpoints (analytics, audit logs, system info)."""
-from fastapi import APIRouter
+"""Admin endpoints (analytics, audit logs, system info).
+
+Every route requires the platform `admin` role.
+"""
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.core.audit import audit_event
+from app.core.dependencies import require_admin
+from app.core.profiling import ProfileConfig, folded_text, merge_folded
+from app.middleware.profiling import profiler
+from app.schemas.admin import DebugTokenRequest, ProfilingSettings
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+STARTED_AT = time.time()
 
-router = APIRouter(prefix="/admin", tags=["admin"])
 
 @router.get("/health")
 async def system_info():
-    return {"uptime": 0}
+    return {"uptime": round(time.time() - STARTED_AT, 1)}
+
+
+# -- profiling ---------------------------------------------------------------
+@router.get("/profiling")
+async def profiling_status(tenant_id: Optional[int] = None):
+    config = await profiler.config()
+    results = [r for r in await profiler.results() if tenant_id is None or r["tenant_id"] == tenant_id]
+    summaries = [{k: v for k, v in r.items() if k != "folded"} for r in results]
+    return {"active": config.active, "config": config.__dict__, "profiles": summaries}
+
+
+@router.put("/profiling")
+async def enable_profiling(payload: ProfilingSettings, admin=Depends(require_admin)):
+    config = ProfileConfig(
+        sample_rate=payload.sample_rate, tenant_id=payload.tenant_id, route_prefix=payload.route_prefix,
+        interval=payload.interval_ms / 1000, expires_at=time.time() + payload.duration_seconds,
+    )
+    await profiler.configure(config)
+    await audit_event("admin.profiling_enabled", payload.model_dump(), admin.get("tenant_id"), admin.get("user_id"))
+    return {"active": True, "config": config.__dict__}
+
+
+@router.delete("/profiling")
+async def disable_profiling(admin=Depends(require_admin)):
+    await profiler.disable()
+    await audit_event("admin.profiling_disabled", None, admin.get("tenant_id"), admin.get("user_id"))
+    return {"active": False}
+
+
+@router.post("/profiling/debug-token")
+async def issue_debug_token(payload: DebugTokenRequest, admin=Depends(require_admin)):
+    token = profiler.issue_debug_token(payload.ttl_seconds, payload.tenant_id)
+    await audit_event("admin.profiling_token_issued", payload.model_dump(), admin.get("tenant_id"), admin.get("user_id"))
+    return {"header": "X-Debug-Profile", "value": token, "expires_in": payload.ttl_seconds}
+
+
+@router.get("/profiling/folded", response_class=PlainTextResponse)
+async def merged_flamegraph(tenant_id: Optional[int] = None, route: Optional[str] = None):
+    """Folded stacks of every stored profile (optionally one tenant / route), ready for flamegraph.pl."""
+    results = [
+        r for r in await profiler.results()
+        if (tenant_id is None or r["tenant_id"] == tenant_id) and (route is None or r["route"] == route)
+    ]
+    return folded_text(merge_folded(results))
+
+
+async def _find(profile_id: str) -> dict:
+    for result in await profiler.results():
+        if result["id"] == profile_id:
+            return result
+    raise HTTPException(status_code=404, detail="Profile not found")
+
+
+@router.get("/profiling/{profile_id}")
+async def get_profile(profile_id: str):
+    return await _find(profile_id)
+
+
+@router.get("/profiling/{profile_id}/folded", response_class=PlainTextResponse)
+async def get_profile_folded(profile_id: str):
+    return folded_text((await _find(profile_id))["folded"])
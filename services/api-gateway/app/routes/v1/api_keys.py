@@ -1,8 +1,72 @@
 """API key lifecycle endpoints (create, list, rotate, revoke)."""
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+
+from app.core.audit import audit_event
+from app.core.authz import require_permission
+from app.core.dependencies import get_async_db_dep, get_current_user
+from app.models.api_key_model import APIKey
+from app.schemas.api_key import APIKeyCreate
+from app.security.api_keys import APIKeyManager
+from app.utils.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.utils.pagination import keyset_page
 
 router = APIRouter(prefix="/api-keys", tags=["api_keys"])
 
+API_KEY_SORTS = {"id": APIKey.id, "created_at": APIKey.created_at}
+
+manager = APIKeyManager()
+
+
+def _key_response(key: APIKey, raw: str | None = None) -> dict:
+    body = {"id": key.id, "scopes": key.scopes, "disabled": key.disabled, "created_at": key.created_at}
+    if raw is not None:
+        body["key"] = raw  # shown once; only the hash is stored
+    return body
+
+
 @router.get("/")
-async def list_api_keys():
-    return {"api_keys": []}
+@require_permission("api_keys.manage")
+async def list_api_keys(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = None,
+    user=Depends(get_current_user),
+    db=Depends(get_async_db_dep),
+):
+    page = await keyset_page(
+        db, select(APIKey).where(APIKey.tenant_id == user["tenant_id"]), API_KEY_SORTS, APIKey.id,
+        sort=sort, cursor=cursor, limit=limit, scope=f"api_keys:{user['tenant_id']}", default_sort="-created_at",
+    )
+    return {"api_keys": [_key_response(k) for k in page.items], **page.meta}
+
+
+@router.post("/", status_code=201)
+@require_permission("api_keys.manage")
+async def create_api_key(payload: APIKeyCreate, user=Depends(get_current_user), db=Depends(get_async_db_dep)):
+    raw, key = await manager.create(db, user["tenant_id"], ",".join(payload.scopes) or None)
+    await audit_event("api_key.created", {"key_id": key.id, "scopes": payload.scopes}, user["tenant_id"], user["user_id"])
+    return _key_response(key, raw)
+
+
+@router.post("/{key_id}/rotate", status_code=201)
+@require_permission("api_keys.manage")
+async def rotate_api_key(key_id: int, user=Depends(get_current_user), db=Depends(get_async_db_dep)):
+    rotated = await manager.rotate(db, key_id, user["tenant_id"])
+    if rotated is None:
+        raise HTTPException(status_code=404, detail="API key not found")
+    raw, key = rotated
+    await audit_event("api_key.rotated", {"key_id": key_id, "replaced_by": key.id}, user["tenant_id"], user["user_id"])
+    return _key_response(key, raw)
+
+
+@router.delete("/{key_id}")
+@require_permission("api_keys.manage")
+async def revoke_api_key(key_id: int, user=Depends(get_current_user), db=Depends(get_async_db_dep)):
+    key = await manager.revoke(db, key_id, user["tenant_id"])
+    if key is None:
+        raise HTTPException(status_code=404, detail="API key not found")
+    await audit_event("api_key.revoked", {"key_id": key_id}, user["tenant_id"], user["user_id"])
+    return _key_response(key)
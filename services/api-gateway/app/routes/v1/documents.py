@@ -1,8 +1,197 @@
 """Document management (upload, list, download, delete)."""
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.authz import require_permission
+from app.core.dependencies import get_async_db_dep, get_current_user
+from app.core.outbox import add_outbox_event
+from app.core.storage import get_storage
+from app.ingestion import get_ingestion
+from app.models.document import Document
+from app.models.enums import DocumentStatus
+from app.security.policy.opa_client import get_opa_client
+from app.utils.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.utils.hashing import CHUNK_SIZE
+from app.utils.pagination import keyset_page
+from app.utils.multipart_stream import FilePartStart, MultipartError, iter_file_part
+from app.validators.document_validators import (
+    MAX_SIZE_BYTES,
+    safe_filename,
+    validate_file_size,
+    validate_file_type,
+    validate_magic_bytes,
+)
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
-@router.post("/upload")
-async def upload_document():
-    return {"status": "accepted"}
+# Each sort is backed by a (tenant_id, ..., id) index (alembic 0012, 0020); filename is nullable
+DOCUMENT_SORTS = {"id": Document.id, "created_at": Document.created_at, "filename": func.coalesce(Document.filename, "")}
+DOCUMENTS_VISIBLE_POLICY = "gateway/documents/visible"  # input.subject + input.resources -> visible ids
+
+
+def _document_response(doc: Document, deduplicated: bool) -> dict:
+    return {
+        "id": doc.id,
+        "filename": doc.filename,
+        "sha256": doc.sha256,
+        "size_bytes": doc.size_bytes,
+        "status": doc.status,
+        "deduplicated": deduplicated,
+    }
+
+
+async def _find_by_hash(db, tenant_id: int, sha256: str) -> Document | None:
+    result = await db.execute(select(Document).where(Document.tenant_id == tenant_id, Document.sha256 == sha256).limit(1))
+    return result.scalar_one_or_none()
+
+
+@router.get("/")
+@require_permission("documents.read")
+async def list_documents(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = Query(None, description="Comma-separated keys, '-' for descending (default '-created_at')"),
+    status: Optional[str] = None,
+    user=Depends(get_current_user),
+    db=Depends(get_async_db_dep),
+):
+    tenant_id = user["tenant_id"]
+    query = select(Document).where(Document.tenant_id == tenant_id)
+    scope = f"documents:{tenant_id}"
+    if status:
+        query = query.where(Document.status == status)
+        scope += f":{status}"
+    page = await keyset_page(db, query, DOCUMENT_SORTS, Document.id, sort=sort, cursor=cursor, limit=limit,
+                             scope=scope, default_sort="-created_at")
+    documents = [
+        {"id": doc.id, "filename": doc.filename, "sha256": doc.sha256, "size_bytes": doc.size_bytes,
+         "content_type": doc.content_type, "status": doc.status, "created_at": doc.created_at}
+        for doc in page.items
+    ]
+    opa = get_opa_client()
+    if opa is not None and documents:
+        # One batched decision for the page; the cursor is unaffected, so a page may come back short
+        subject = {"user_id": user["user_id"], "tenant_id": tenant_id, "role": user.get("role")}
+        resources = [{"id": doc.id, "tenant_id": doc.tenant_id, "status": doc.status} for doc in page.items]
+        visible = await opa.filter_allowed(DOCUMENTS_VISIBLE_POLICY, subject, resources)
+        documents = [document for document in documents if document["id"] in visible]
+    return {"documents": documents, **page.meta}
+
+
+@router.post("/upload", status_code=201)
+@require_permission("documents.write")
+async def upload_document(request: Request, user=Depends(get_current_user), db=Depends(get_async_db_dep)):
+    """Stream a multipart `file` part to storage in CHUNK_SIZE pieces.
+
+    Size and type are enforced while reading, the sha256 is computed incrementally, and an
+    upload whose hash the tenant already holds resolves to the existing document. Clients
+    that send `X-Content-SHA256` skip the transfer entirely on a hit.
+    """
+    tenant_id = user["tenant_id"]
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and not validate_file_size(int(declared_length) - 64 * 1024):
+        raise HTTPException(status_code=413, detail=f"File exceeds {MAX_SIZE_BYTES} bytes")
+
+    client_sha = (request.headers.get("x-content-sha256") or "").lower()
+    if len(client_sha) == 64:
+        existing = await _find_by_hash(db, tenant_id, client_sha)
+        if existing is not None:
+            return _document_response(existing, deduplicated=True)
+
+    storage = get_storage()
+    writer = await storage.open_writer()
+    part = None
+    sniffed = False
+    buffer = bytearray()
+    try:
+        async for event in iter_file_part(request):
+            if isinstance(event, FilePartStart):
+                if not validate_file_type(event.content_type):
+                    raise HTTPException(status_code=415, detail=f"Unsupported file type: {event.content_type}")
+                part = event
+                continue
+            buffer += event
+            if not sniffed and len(buffer) >= 8:
+                if not validate_magic_bytes(part.content_type, bytes(buffer[:8])):
+                    raise HTTPException(status_code=415, detail="File content does not match its declared type")
+                sniffed = True
+            if not validate_file_size(writer.size + len(buffer)):
+                raise HTTPException(status_code=413, detail=f"File exceeds {MAX_SIZE_BYTES} bytes")
+            while len(buffer) >= CHUNK_SIZE:
+                await writer.write(bytes(buffer[:CHUNK_SIZE]))
+                del buffer[:CHUNK_SIZE]
+        if buffer:
+            if not sniffed and not validate_magic_bytes(part.content_type, bytes(buffer)):
+                raise HTTPException(status_code=415, detail="File content does not match its declared type")
+            await writer.write(bytes(buffer))
+        if part is None or writer.size == 0:
+            raise HTTPException(status_code=400, detail="Empty upload")
+    except MultipartError as exc:
+        await storage.discard(writer)
+        raise HTTPException(status_code=400, detail=str(exc))
+    except BaseException:
+        await storage.discard(writer)
+        raise
+
+    sha256 = writer.hexdigest()
+    existing = await _find_by_hash(db, tenant_id, sha256)
+    if existing is not None:
+        await storage.discard(writer)
+        return _document_response(existing, deduplicated=True)
+
+    key = await storage.commit(writer, storage.blob_key(tenant_id, sha256))
+    doc = Document(
+        tenant_id=tenant_id,
+        filename=safe_filename(part.filename),
+        path=key,
+        sha256=sha256,
+        size_bytes=writer.size,
+        content_type=part.content_type,
+    )
+    db.add(doc)
+    try:
+        await db.flush()
+        # Same transaction as the row: the ingestion event exists iff the document does
+        add_outbox_event(db, "document.uploaded", {
+            "document_id": doc.id, "path": doc.path, "sha256": doc.sha256, "content_type": doc.content_type,
+        }, tenant_id=tenant_id)
+        await db.commit()
+    except IntegrityError:
+        # Same file uploaded concurrently by another request of this tenant: reuse its row
+        await db.rollback()
+        existing = await _find_by_hash(db, tenant_id, sha256)
+        if existing is None:
+            raise
+        return _document_response(existing, deduplicated=True)
+    pipeline = get_ingestion()
+    if pipeline is not None:
+        pipeline.submit(doc.id)
+    return _document_response(doc, deduplicated=False)
+
+
+@router.get("/{document_id}/ocr-status")
+@require_permission("documents.read")
+async def ocr_status(document_id: int, user=Depends(get_current_user), db=Depends(get_async_db_dep)):
+    """Ingestion progress (pages extracted, chunks stored) for one of the tenant's documents."""
+    result = await db.execute(select(Document).where(Document.id == document_id, Document.tenant_id == user["tenant_id"]))
+    doc = result.scalar_one_or_none()
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if doc.status == DocumentStatus.processed.value:
+        progress = 1.0
+    elif doc.pages_total:
+        progress = round(min(doc.pages_processed / doc.pages_total, 1.0), 4)
+    else:
+        progress = None  # page count not known yet
+    return {
+        "id": doc.id,
+        "status": doc.status,
+        "pages_total": doc.pages_total,
+        "pages_processed": doc.pages_processed,
+        "chunks": doc.chunk_count,
+        "progress": progress,
+        "error": doc.error,
+    }
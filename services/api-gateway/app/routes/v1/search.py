@@ -1,8 +1,52 @@
 """Semantic search endpoints (RAG queries and hybrid search)."""
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Response
+
+from app.core.authz import require_permission
+from app.core.dependencies import get_async_db_dep, get_current_user
+from app.core.gateway_clients import EmbeddingClient
+from app.schemas.search import SearchRequest, SearchResponse
+from app.search import SearchService
 
 router = APIRouter(prefix="/search", tags=["search"])
 
-@router.post("/query")
-async def query():
-    return {"results": []}
+search_service = SearchService()
+embedding_client: EmbeddingClient | None = None
+
+
+def init_search(embedding_service_url: str, index_root: str = "./indexes", ann_min_rows: int = 20000, default_nprobe: int = 16,
+                cache_size: int = 2048, cache_ttl: float = 600.0, http_client=None):
+    global embedding_client, search_service
+    embedding_client = EmbeddingClient(embedding_service_url, http_client)
+    search_service = SearchService(index_root, ann_min_rows=ann_min_rows, default_nprobe=default_nprobe,
+                                   cache_size=cache_size, cache_ttl=cache_ttl)
+    return search_service
+
+
+def get_embedding_client() -> EmbeddingClient:
+    if embedding_client is None:
+        raise RuntimeError("Embedding client not initialized")
+    return embedding_client
+
+
+@router.post("/query", response_model=SearchResponse)
+@require_permission("search.query")
+async def query(payload: SearchRequest, response: Response, user=Depends(get_current_user), db=Depends(get_async_db_dep)):
+    """Vector, BM25 or hybrid (reciprocal-rank fused) retrieval over the tenant's chunks."""
+    mode = payload.mode or ("hybrid" if payload.query else "vector")
+    if mode != "vector" and not payload.query:
+        raise HTTPException(status_code=422, detail=f"'{mode}' search needs 'query' text")
+    if payload.vector is None and not payload.query:
+        raise HTTPException(status_code=422, detail="Provide 'query' or 'vector'")
+
+    async def embed(text: str):
+        return (await get_embedding_client().embed([text]))[0]
+
+    try:
+        results, cached = await search_service.search(
+            db, user["tenant_id"], mode, text=payload.query, vector=payload.vector, embed=embed,
+            k=payload.top_k, nprobe=payload.nprobe, exact=payload.exact,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    response.headers["X-Search-Cache"] = "hit" if cached else "miss"
+    return {"results": results}
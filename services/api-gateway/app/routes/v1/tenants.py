@@ -1,8 +1,32 @@
 """Tenant management (CRUD)."""
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+
+from app.core.dependencies import get_async_db_dep, get_current_user
+from app.models.tenant import Tenant
+from app.utils.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.utils.pagination import keyset_page
 
 router = APIRouter(prefix="/tenants", tags=["tenants"])
 
+TENANT_SORTS = {"id": Tenant.id, "name": Tenant.name}
+
+
 @router.get("/")
-async def list_tenants():
-    return {"tenants": []}
+async def list_tenants(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = None,
+    user=Depends(get_current_user),
+    db=Depends(get_async_db_dep),
+):
+    # Only platform admins see every tenant; everyone else sees their own
+    query = select(Tenant)
+    scope = "tenants:all"
+    if user.get("role") != "admin":
+        query = query.where(Tenant.id == user["tenant_id"])
+        scope = f"tenants:{user['tenant_id']}"
+    page = await keyset_page(db, query, TENANT_SORTS, Tenant.id, sort=sort, cursor=cursor, limit=limit, scope=scope)
+    return {"tenants": [{"id": t.id, "name": t.name} for t in page.items], **page.meta}
@@ -1,8 +1,152 @@
-"""User management endpoints (CRUD, profile)."""
-from fastapi import APIRouter
+"""User management endpoints (CRUD, profile, bulk import)."""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select, update
+
+from app.core.audit import audit_event
+from app.core.authz import require_permission
+from app.core.dependencies import get_async_db_dep, get_current_user
+from app.models.enums import ImportJobStatus
+from app.models.user import User
+from app.models.user_import import UserImportJob, UserImportRow
+from app.security.auth.user_import import (
+    IMPORT_FORMATS,
+    SealingKeyUnavailable,
+    get_user_importer,
+    parse_import,
+    stage_import,
+)
+from app.utils.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.utils.pagination import keyset_page
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+# Each sort is backed by a (tenant_id, ..., id) index (alembic 0012)
+USER_SORTS = {"id": User.id, "email": User.email, "last_name": User.last_name, "first_name": User.first_name}
+IMPORT_ROW_SORTS = {"id": UserImportRow.id}  # ids follow upload order (alembic 0017)
+MAX_IMPORT_BYTES = 20 * 1024 * 1024
+MAX_IMPORT_ROWS = 50000
+
+
 @router.get("/")
-async def list_users():
-    return {"users": []}
+@require_permission("users.read")
+async def list_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Optional[str] = Query(None, description="Comma-separated keys, '-' for descending, e.g. 'last_name,first_name'"),
+    user=Depends(get_current_user),
+    db=Depends(get_async_db_dep),
+):
+    page = await keyset_page(
+        db, select(User).where(User.tenant_id == user["tenant_id"]), USER_SORTS, User.id,
+        sort=sort, cursor=cursor, limit=limit, scope=f"users:{user['tenant_id']}",
+    )
+    users = [
+        {"id": u.id, "email": u.email, "first_name": u.first_name, "last_name": u.last_name, "role": u.role, "is_active": u.is_active}
+        for u in page.items
+    ]
+    return {"users": users, **page.meta}
+
+
+def _job_response(job: UserImportJob) -> dict:
+    return {
+        "id": job.id, "status": job.status, "total_rows": job.total_rows, "processed_rows": job.processed_rows,
+        "created": job.created_count, "failed": job.failed_count, "error": job.error,
+        "created_at": job.created_at, "finished_at": job.finished_at,
+    }
+
+
+async def _get_job(db, job_id: int, tenant_id: int) -> UserImportJob:
+    job = (await db.execute(
+        select(UserImportJob).where(UserImportJob.id == job_id, UserImportJob.tenant_id == tenant_id)
+    )).scalar_one_or_none()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
+@router.post("/import", status_code=202)
+@require_permission("users.manage")
+async def import_users(request: Request, user=Depends(get_current_user), db=Depends(get_async_db_dep)):
+    """Stage a CSV, JSON or NDJSON list of users and import it in the background.
+
+    Fields: `email`, `first_name`, `last_name`, optional `role` (default "user") and
+    `password` (without one the account needs a password reset). Rows that fail validation
+    are recorded with their error; read them back from `GET /users/import/{id}/rows`.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in IMPORT_FORMATS:
+        raise HTTPException(status_code=415, detail=f"Import must be one of: {', '.join(IMPORT_FORMATS)}")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MAX_IMPORT_BYTES:
+            raise HTTPException(status_code=413, detail=f"Import exceeds {MAX_IMPORT_BYTES} bytes")
+    try:
+        records = parse_import(bytes(body), content_type)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if not records:
+        raise HTTPException(status_code=400, detail="Import contains no users")
+    if len(records) > MAX_IMPORT_ROWS:
+        raise HTTPException(status_code=413, detail=f"Import exceeds {MAX_IMPORT_ROWS} rows")
+
+    try:
+        job = await stage_import(db, user["tenant_id"], user["user_id"], records)
+    except SealingKeyUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    await audit_event("users.import_started", {"job_id": job.id, "rows": job.total_rows}, user["tenant_id"], user["user_id"])
+    await db.commit()
+    importer = get_user_importer()
+    if importer is not None:
+        importer.submit(job.id)  # otherwise the next worker to start resumes it
+    return _job_response(job)
+
+
+@router.get("/import/{job_id}")
+@require_permission("users.manage")
+async def get_import(job_id: int, user=Depends(get_current_user), db=Depends(get_async_db_dep)):
+    return _job_response(await _get_job(db, job_id, user["tenant_id"]))
+
+
+@router.get("/import/{job_id}/rows")
+@require_permission("users.manage")
+async def list_import_rows(
+    job_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    user=Depends(get_current_user),
+    db=Depends(get_async_db_dep),
+):
+    await _get_job(db, job_id, user["tenant_id"])
+    query = select(UserImportRow).where(UserImportRow.job_id == job_id)
+    scope = f"user_import:{job_id}"
+    if status:
+        query = query.where(UserImportRow.status == status)
+        scope += f":{status}"
+    page = await keyset_page(db, query, IMPORT_ROW_SORTS, UserImportRow.id, cursor=cursor, limit=limit, scope=scope)
+    rows = [
+        {"row": r.row_number, "email": r.email, "status": r.status, "user_id": r.user_id, "error": r.error}
+        for r in page.items
+    ]
+    return {"rows": rows, **page.meta}
+
+
+@router.post("/import/{job_id}/resume", status_code=202)
+@require_permission("users.manage")
+async def resume_import(job_id: int, user=Depends(get_current_user), db=Depends(get_async_db_dep)):
+    """Restart a failed import from its first pending row (created users are kept)."""
+    job = await _get_job(db, job_id, user["tenant_id"])
+    if job.status == ImportJobStatus.completed.value:
+        raise HTTPException(status_code=409, detail="Import already completed")
+    if job.status == ImportJobStatus.failed.value:
+        await db.execute(update(UserImportJob).where(UserImportJob.id == job_id, UserImportJob.status == job.status)
+                         .values(status=ImportJobStatus.pending.value, error=None))
+        await db.commit()
+        await db.refresh(job)
+    importer = get_user_importer()
+    if importer is not None:
+        importer.submit(job.id)  # a running job is only taken over once its lease has expired
+    return _job_response(job)
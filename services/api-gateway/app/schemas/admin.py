@@ -0,0 +1,14 @@
+"""Admin request schemas (profiling controls)."""
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class ProfilingSettings(BaseModel):
+    sample_rate: float = Field(..., gt=0, le=1)  # fraction of matching requests to profile
+    tenant_id: Optional[int] = None  # only this tenant's traffic
+    route_prefix: Optional[str] = None  # only paths starting with this
+    duration_seconds: int = Field(300, ge=1, le=3600)  # sampling switches itself off afterwards
+    interval_ms: float = Field(5.0, ge=1, le=100)  # stack sampling period
+
+class DebugTokenRequest(BaseModel):
+    ttl_seconds: int = Field(300, ge=1, le=3600)
+    tenant_id: Optional[int] = None  # token only valid for this tenant's requests
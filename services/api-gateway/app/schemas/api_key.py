@@ -0,0 +1,6 @@
+"""API key request schemas."""
+from pydantic import BaseModel, Field
+from typing import List
+
+class APIKeyCreate(BaseModel):
+    scopes: List[str] = Field(default_factory=list)  # e.g. ["documents.read", "search.query"]
@@ -9,3 +9,9 @@ class ErrorResponse(BaseModel):
 class Pagination(BaseModel):
     limit: int
     offset: int
+
+class CursorPagination(BaseModel):
+    """Keyset page metadata: pass `next_cursor` back as `cursor` (with the same `sort`)."""
+    limit: int
+    next_cursor: Optional[str] = None
+    sort: str
@@ -0,0 +1,21 @@
+"""Search request/response schemas."""
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+class SearchRequest(BaseModel):
+    query: Optional[str] = None
+    vector: Optional[List[float]] = None  # precomputed query embedding; skips the embedding call
+    top_k: int = Field(10, ge=1, le=100)
+    nprobe: Optional[int] = Field(None, ge=1, le=4096)  # ANN lists scanned: higher = better recall, slower
+    exact: bool = False  # force brute-force search (bypasses the ANN index)
+    mode: Optional[Literal["hybrid", "vector", "lexical"]] = None  # default: hybrid when `query` is given
+
+class SearchResult(BaseModel):
+    chunk_id: int
+    document_id: int
+    score: float
+    vector_rank: Optional[int] = None
+    lexical_rank: Optional[int] = None
+
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
@@ -0,0 +1,11 @@
+"""Retrieval for RAG queries (vector codecs, tenant-scoped vector/BM25 engines and fusion)."""
+from .ann import ANNIndexManager, TenantANNIndex
+from .cache import SearchResultCache
+from .corpus import bump_corpus_version, get_corpus_version
+from .engine import VectorSearchEngine, top_k_cosine
+from .fusion import reciprocal_rank_fusion
+from .lexical import BM25Index, LexicalSearchEngine, tokenize
+from .service import SearchService
+from .vectors import pack_vector, unpack_matrix, unpack_vector
+
+__all__ = ["ANNIndexManager", "BM25Index", "LexicalSearchEngine", "SearchResultCache", "bump_corpus_version", "get_corpus_version", "reciprocal_rank_fusion", "tokenize", "SearchService", "TenantANNIndex", "VectorSearchEngine", "top_k_cosine", "pack_vector", "unpack_matrix", "unpack_vector"]
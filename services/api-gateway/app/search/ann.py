@@ -0,0 +1,377 @@
+"""Per-tenant approximate nearest-neighbour index (IVF-Flat, cosine) persisted as mmap files.
+
+Layout under `<root>/tenant_<id>/` (one directory per tenant, so a query can only ever read
+its own tenant's vectors):
+
+    manifest.json                 {"generation": g, "dim": d, "nlist": L, "previous": g'}
+    gen_<g>/centroids.npy         (L, d) float32 coarse quantizer
+    gen_<g>/vectors.npy           (N, d) float32, rows grouped by inverted list
+    gen_<g>/ids.npy, doc_ids.npy  (N,) int64 chunk / document ids
+    gen_<g>/offsets.npy           (L + 1,) int64 list boundaries into vectors.npy
+    gen_<g>/delta.f32, delta.ids  append-only inserts since the last build
+    gen_<g>/tombstones.i64        append-only deleted chunk ids
+    building, pending.*           initial-build claim, and the writes queued while it runs
+
+Base files are opened with `mmap_mode="r"`, so every worker shares the page cache and a
+restart is just an `open`. Inserts and deletes append to the delta files (under an flock);
+readers pick them up by file size. `compact()` folds the delta into a new generation and
+swaps the manifest atomically once the delta grows past `compact_ratio` of the base. A
+replaced generation is deleted only when the next one is published, so readers that have
+just read the old manifest can still open its files.
+
+The initial build is shared by every process: `begin_build()` drops a claim file, and
+from then on `add`/`delete` in any process queue their writes under the tenant directory.
+`build()` trains outside the lock, then, under it, applies the queue and publishes. A build
+that finds the index already published appends only the rows it lacks to the delta.
+"""
+import fcntl
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from .vectors import normalize_rows
+
+MANIFEST = "manifest.json"
+BUILDING = "building"  # initial-build claim; its mtime ages it out if the builder died
+PENDING_FILES = ("pending.f32", "pending.ids", "pending.i64")  # writes queued during the initial build
+
+
+def train_centroids(vectors: np.ndarray, nlist: int, iterations: int = 10, sample: int = 50000, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on (a sample of) normalised vectors."""
+    rng = np.random.default_rng(seed)
+    if vectors.shape[0] > sample:
+        vectors = vectors[rng.choice(vectors.shape[0], sample, replace=False)]
+    nlist = max(1, min(nlist, vectors.shape[0]))
+    centroids = vectors[rng.choice(vectors.shape[0], nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        empty = np.bincount(assign, minlength=nlist) == 0
+        sums[empty] = centroids[empty]  # keep empty lists where they were
+        centroids = normalize_rows(sums)
+    return centroids.astype(np.float32)
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, batch: int = 65536) -> np.ndarray:
+    out = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], batch):
+        out[start:start + batch] = np.argmax(vectors[start:start + batch] @ centroids.T, axis=1)
+    return out
+
+
+def default_nlist(n: int) -> int:
+    return int(min(4096, max(1, round(4 * np.sqrt(n)))))
+
+
+class TenantANNIndex:
+    def __init__(self, path: str, refresh_interval: float = 1.0, compact_ratio: float = 0.1, min_compact_rows: int = 1000,
+                 build_timeout: float = 1800.0):
+        self.path = path
+        self.build_timeout = build_timeout
+        self.refresh_interval = refresh_interval
+        self.compact_ratio = compact_ratio
+        self.min_compact_rows = min_compact_rows
+        self.generation = None
+        self.dim = None
+        self._checked_at = 0.0
+        self._delta_sizes = (-1, -1)
+        self._base = None
+        self._delta = (np.empty((0, 0), np.float32), np.empty((0, 2), np.int64))
+        self._tombstones = np.empty(0, np.int64)
+
+    # -- files -------------------------------------------------------------
+    def _gen_dir(self, generation: int) -> str:
+        return os.path.join(self.path, f"gen_{generation}")
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self._gen_dir(self.generation), name)
+
+    @contextmanager
+    def _write_lock(self):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, ".lock"), "a+") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> dict | None:
+        try:
+            with open(os.path.join(self.path, MANIFEST)) as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return None
+
+    def exists(self) -> bool:
+        return self._read_manifest() is not None
+
+    # -- loading -----------------------------------------------------------
+    def refresh(self, force: bool = False):
+        """Pick up a new generation or appended delta/tombstones written by any process."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.refresh_interval:
+            return
+        self._checked_at = now
+        manifest = self._read_manifest()
+        if manifest is None:
+            self._base = None
+            return
+        if manifest["generation"] != self.generation:
+            self.generation = manifest["generation"]
+            self.dim = manifest["dim"]
+            load = lambda name: np.load(self._file(name), mmap_mode="r")  # noqa: E731
+            self._base = {name: load(f"{name}.npy") for name in ("centroids", "vectors", "ids", "doc_ids", "offsets")}
+            self._delta_sizes = (-1, -1)
+        sizes = tuple(os.path.getsize(self._file(n)) if os.path.exists(self._file(n)) else 0 for n in ("delta.ids", "tombstones.i64"))
+        if sizes != self._delta_sizes:
+            self._delta_sizes = sizes
+            ids = np.fromfile(self._file("delta.ids"), dtype=np.int64).reshape(-1, 2) if sizes[0] else np.empty((0, 2), np.int64)
+            vectors = np.fromfile(self._file("delta.f32"), dtype=np.float32, count=len(ids) * self.dim).reshape(len(ids), self.dim)
+            self._delta = (vectors, ids)
+            self._tombstones = np.unique(np.fromfile(self._file("tombstones.i64"), dtype=np.int64)) if sizes[1] else np.empty(0, np.int64)
+
+    @property
+    def size(self) -> int:
+        self.refresh()
+        if self._base is None:
+            return 0
+        return int(self._base["ids"].shape[0] + self._delta[1].shape[0])
+
+    # -- builds ------------------------------------------------------------
+    def building(self) -> bool:
+        """True while some process holds an initial-build claim younger than `build_timeout`."""
+        try:
+            return time.time() - os.path.getmtime(os.path.join(self.path, BUILDING)) < self.build_timeout
+        except FileNotFoundError:
+            return False
+
+    def begin_build(self) -> bool:
+        """Claim the initial build. Until it is published, `add`/`delete` queue their writes.
+
+        False if the index already exists or another process is building it.
+        """
+        with self._write_lock():
+            if self.exists() or self.building():
+                return False
+            self._clear_build()
+            open(os.path.join(self.path, BUILDING), "w").close()
+        return True
+
+    def abort_build(self):
+        with self._write_lock():
+            self._clear_build()
+
+    def _clear_build(self):
+        # Caller holds the write lock
+        for name in (BUILDING, *PENDING_FILES):
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
+
+    def build(self, chunk_ids, document_ids, vectors, nlist: int | None = None):
+        """Write the initial generation and publish it.
+
+        Training runs outside the write lock. Writes queued since `begin_build()` are then
+        applied on top. If another process published the index meanwhile, the rows it lacks
+        are appended to its delta instead of replacing it.
+        """
+        vectors = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+        document_ids = np.asarray(document_ids, dtype=np.int64)
+        with self._write_lock():
+            built = self.exists()
+            if built:
+                self._append_missing(chunk_ids, document_ids, vectors)
+            else:
+                generation = self._reserve_generation()
+        if not built:
+            nlist = self._write_files(generation, chunk_ids, document_ids, vectors, nlist)
+            with self._write_lock():
+                if self.exists():
+                    shutil.rmtree(self._gen_dir(generation), ignore_errors=True)
+                    self._append_missing(chunk_ids, document_ids, vectors)
+                else:
+                    self._apply_pending(generation, chunk_ids, vectors.shape[1])
+                    self._publish(generation, vectors.shape[1], nlist)
+                    self._clear_build()
+        self.refresh(force=True)
+
+    def _reserve_generation(self) -> int:
+        # Caller holds the write lock; creating the directory claims the number
+        os.makedirs(self.path, exist_ok=True)
+        taken = [int(name[4:]) for name in os.listdir(self.path) if name.startswith("gen_") and name[4:].isdigit()]
+        generation = max(taken, default=0) + 1
+        os.makedirs(self._gen_dir(generation))
+        return generation
+
+    def _write_files(self, generation: int, chunk_ids, document_ids, vectors, nlist: int | None = None) -> int:
+        gen_dir = self._gen_dir(generation)
+        if vectors.shape[0]:
+            centroids = train_centroids(vectors, nlist or default_nlist(vectors.shape[0]))
+            lists = assign_lists(vectors, centroids)
+        else:
+            centroids = np.zeros((1, vectors.shape[1]), np.float32)
+            lists = np.empty(0, np.int64)
+        order = np.argsort(lists, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=centroids.shape[0]))]).astype(np.int64)
+        for name, array in (("centroids", centroids), ("vectors", vectors[order]), ("ids", chunk_ids[order]),
+                            ("doc_ids", document_ids[order]), ("offsets", offsets)):
+            np.save(os.path.join(gen_dir, f"{name}.npy"), array)
+        for name in ("delta.f32", "delta.ids", "tombstones.i64"):
+            open(os.path.join(gen_dir, name), "wb").close()
+        return int(centroids.shape[0])
+
+    def _publish(self, generation: int, dim: int, nlist: int):
+        # Caller holds the write lock. The generation being replaced stays on disk until the
+        # next publish, so a reader that has just read the old manifest can still load it.
+        manifest = self._read_manifest()
+        tmp = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp, "w") as fh:
+            json.dump({"generation": generation, "dim": int(dim), "nlist": int(nlist),
+                       "previous": manifest["generation"] if manifest else None}, fh)
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+        if manifest and manifest.get("previous"):
+            shutil.rmtree(self._gen_dir(manifest["previous"]), ignore_errors=True)
+
+    def _apply_pending(self, generation: int, snapshot_ids, dim: int):
+        # Caller holds the write lock: writes queued during the build become the new delta
+        pending = lambda name: os.path.join(self.path, name)  # noqa: E731
+        gen_dir = self._gen_dir(generation)
+        if os.path.exists(pending("pending.ids")):
+            pairs = np.fromfile(pending("pending.ids"), dtype=np.int64).reshape(-1, 2)
+            vectors = np.fromfile(pending("pending.f32"), dtype=np.float32, count=len(pairs) * dim).reshape(len(pairs), dim)
+            fresh = ~np.isin(pairs[:, 0], snapshot_ids)  # the snapshot may already hold them
+            with open(os.path.join(gen_dir, "delta.f32"), "ab") as fh:
+                fh.write(vectors[fresh].tobytes())
+            with open(os.path.join(gen_dir, "delta.ids"), "ab") as fh:
+                fh.write(pairs[fresh].tobytes())
+        if os.path.exists(pending("pending.i64")):
+            with open(os.path.join(gen_dir, "tombstones.i64"), "ab") as fh:
+                fh.write(np.fromfile(pending("pending.i64"), dtype=np.int64).tobytes())
+
+    def _append_missing(self, chunk_ids, document_ids, vectors):
+        # Caller holds the write lock: a concurrent build lost the race, keep what it adds
+        self.refresh(force=True)
+        known = np.concatenate([np.asarray(self._base["ids"]), self._delta[1][:, 0], self._tombstones])
+        missing = ~np.isin(chunk_ids, known)
+        if missing.any():
+            self._append_delta(np.stack([chunk_ids[missing], document_ids[missing]], axis=1), vectors[missing])
+
+    def _append_delta(self, pairs, vectors):
+        # Caller holds the write lock and has refreshed
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Vector dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+        with open(self._file("delta.f32"), "ab") as fh:
+            fh.write(vectors.tobytes())
+        with open(self._file("delta.ids"), "ab") as fh:
+            fh.write(pairs.tobytes())
+
+    # -- incremental writes ------------------------------------------------
+    def _writable(self) -> bool:
+        # Lock-free fast path for tenants without an index. A build claimed after this check
+        # reads the database after the caller's commit, so the write is in its snapshot.
+        return self.exists() or self.building()
+
+    def add(self, chunk_ids, document_ids, vectors):
+        """Append to the delta; queued while an initial build runs, dropped before one starts."""
+        if not self._writable():
+            return
+        vectors = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        pairs = np.stack([np.asarray(chunk_ids, np.int64), np.asarray(document_ids, np.int64)], axis=1)
+        with self._write_lock():
+            self.refresh(force=True)  # a build or compaction may have switched generations meanwhile
+            if self._base is None:
+                # No index yet: a later build reads these rows from the database
+                if self.building():
+                    with open(os.path.join(self.path, "pending.f32"), "ab") as fh:
+                        fh.write(vectors.tobytes())
+                    with open(os.path.join(self.path, "pending.ids"), "ab") as fh:
+                        fh.write(pairs.tobytes())
+                return
+            self._append_delta(pairs, vectors)
+        self.refresh(force=True)
+        if self._delta[1].shape[0] >= max(self.min_compact_rows, self.compact_ratio * self._base["ids"].shape[0]):
+            self.compact()
+
+    def delete(self, chunk_ids):
+        if not self._writable():
+            return
+        with self._write_lock():
+            self.refresh(force=True)
+            if self._base is None:
+                if self.building():
+                    with open(os.path.join(self.path, "pending.i64"), "ab") as fh:
+                        fh.write(np.asarray(chunk_ids, dtype=np.int64).tobytes())
+                return
+            with open(self._file("tombstones.i64"), "ab") as fh:
+                fh.write(np.asarray(chunk_ids, dtype=np.int64).tobytes())
+        self.refresh(force=True)
+
+    def compact(self):
+        """Fold delta inserts and tombstones into a new generation (re-trains the centroids)."""
+        with self._write_lock():
+            self.refresh(force=True)
+            vectors = np.concatenate([np.asarray(self._base["vectors"]), self._delta[0]])
+            ids = np.concatenate([np.asarray(self._base["ids"]), self._delta[1][:, 0]])
+            doc_ids = np.concatenate([np.asarray(self._base["doc_ids"]), self._delta[1][:, 1]])
+            live = ~np.isin(ids, self._tombstones)
+            generation = self._reserve_generation()
+            nlist = self._write_files(generation, ids[live], doc_ids[live], vectors[live])
+            self._publish(generation, vectors.shape[1], nlist)
+        self.refresh(force=True)
+
+    # -- queries -----------------------------------------------------------
+    def search(self, queries, k: int = 10, nprobe: int = 8):
+        """Return per query a list of (chunk_id, document_id, score), best first.
+
+        `nprobe` trades recall for latency: the number of inverted lists scanned per query.
+        """
+        self.refresh()
+        queries = normalize_rows(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        if self._base is None:
+            return [[] for _ in range(queries.shape[0])]
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"Query dimension {queries.shape[1]} does not match index dimension {self.dim}")
+        base = self._base
+        offsets = base["offsets"]
+        nlist = base["centroids"].shape[0]
+        nprobe = max(1, min(nprobe, nlist))
+        probes = np.argsort(-(queries @ base["centroids"].T), axis=1)[:, :nprobe]
+        delta_vectors, delta_ids = self._delta
+        results = []
+        for query, lists in zip(queries, probes):
+            rows = np.concatenate([np.arange(offsets[l], offsets[l + 1]) for l in lists])
+            cand_vectors = base["vectors"][rows]
+            cand_ids = np.concatenate([base["ids"][rows], delta_ids[:, 0]])
+            cand_docs = np.concatenate([base["doc_ids"][rows], delta_ids[:, 1]])
+            scores = np.concatenate([cand_vectors @ query, delta_vectors @ query if len(delta_ids) else np.empty(0, np.float32)])
+            if self._tombstones.size:
+                scores[np.isin(cand_ids, self._tombstones)] = -np.inf
+            top = min(k, scores.shape[0])
+            best = np.argpartition(-scores, top - 1)[:top] if 0 < top < scores.shape[0] else np.arange(top)
+            best = best[np.argsort(-scores[best])]
+            results.append([(int(cand_ids[i]), int(cand_docs[i]), float(scores[i])) for i in best if np.isfinite(scores[i])])
+        return results
+
+
+class ANNIndexManager:
+    """One `TenantANNIndex` per tenant, rooted in its own directory."""
+
+    def __init__(self, root: str, **index_options):
+        self.root = root
+        self.index_options = index_options
+        self._indexes: dict[int, TenantANNIndex] = {}
+
+    def index_for(self, tenant_id: int) -> TenantANNIndex:
+        tenant_id = int(tenant_id)  # path component: never accept anything but an integer id
+        index = self._indexes.get(tenant_id)
+        if index is None:
+            index = self._indexes[tenant_id] = TenantANNIndex(os.path.join(self.root, f"tenant_{tenant_id}"), **self.index_options)
+        return index
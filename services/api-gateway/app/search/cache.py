@@ -0,0 +1,106 @@
+"""Tenant-scoped LRU/TTL cache of search results, keyed by corpus version.
+
+A key embeds the tenant's corpus version (see `corpus.py`), so any document/chunk change
+makes older entries unreachable; the first lookup at a newer version also drops them.
+Query text is normalised (NFKC, case, whitespace) and precomputed query vectors are
+bucketed by their int8-quantised direction, so trivially different requests share an entry.
+"""
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+from app.core.observability import CacheCounters
+
+from .vectors import normalize_rows
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(text: str | None) -> str:
+    if not text:
+        return ""
+    return _SPACES.sub(" ", unicodedata.normalize("NFKC", text).casefold()).strip(" ?!.")
+
+
+def vector_bucket(vector) -> str:
+    """Digest of the unit vector quantised to int8; near-identical vectors share a bucket."""
+    if vector is None:
+        return ""
+    unit = normalize_rows(np.atleast_2d(np.asarray(vector, dtype=np.float32)))[0]
+    return hashlib.blake2b(np.round(unit * 127).astype(np.int8).tobytes(), digest_size=16).hexdigest()
+
+
+class SearchCacheMetrics:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SearchResultCache:
+    def __init__(self, max_entries: int = 2048, ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.metrics = SearchCacheMetrics()
+        self.counters = CacheCounters("search_results")
+        self._entries: OrderedDict[tuple, tuple[float, object]] = OrderedDict()
+        self._versions: dict[int, int] = {}  # latest corpus version seen per tenant
+
+    @staticmethod
+    def key(tenant_id: int, version: int, **params) -> tuple:
+        return (tenant_id, version, *sorted(params.items()))
+
+    def _observe_version(self, tenant_id: int, version: int):
+        known = self._versions.get(tenant_id)
+        if known is None or version > known:
+            self._versions[tenant_id] = version
+            if known is not None:
+                stale = [k for k in self._entries if k[0] == tenant_id and k[1] < version]
+                for k in stale:
+                    del self._entries[k]
+                self.metrics.invalidations += len(stale)
+
+    def get(self, key: tuple):
+        self._observe_version(key[0], key[1])
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            if entry is not None:
+                del self._entries[key]
+            self.metrics.misses += 1
+            self.counters.miss()
+            return None
+        self._entries.move_to_end(key)
+        self.metrics.hits += 1
+        self.counters.hit()
+        return entry[1]
+
+    def put(self, key: tuple, value):
+        if self._versions.get(key[0], key[1]) > key[1]:
+            return  # computed against a corpus that has since changed
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.metrics.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._versions.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,39 @@
+"""Per-tenant corpus version: bumped whenever a tenant's documents or chunks change.
+
+`tenants.corpus_version` is incremented in the same transaction as the change (via an ORM
+flush hook), so every worker sees a consistent version. Search caches key on it instead of
+guessing with TTLs. Core-level bulk writes bypass the ORM and must call
+`bump_corpus_version` themselves.
+"""
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from app.models.chunk import Chunk
+from app.models.document import Document
+from app.models.tenant import Tenant
+
+VERSIONED_MODELS = (Document, Chunk)
+
+
+def bump_corpus_version(connection, tenant_ids):
+    """Increment the version of each tenant in `tenant_ids` (a sync Connection or Session)."""
+    tenant_ids = sorted({int(t) for t in tenant_ids if t is not None})
+    if tenant_ids:
+        connection.execute(
+            update(Tenant).where(Tenant.id.in_(tenant_ids)).values(corpus_version=Tenant.corpus_version + 1)
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session, flush_context):
+    # after_flush still sees the pre-flush new/dirty/deleted collections
+    changed = [*session.new, *session.deleted, *(obj for obj in session.dirty if session.is_modified(obj))]
+    tenant_ids = {obj.tenant_id for obj in changed if isinstance(obj, VERSIONED_MODELS)}
+    if tenant_ids:
+        bump_corpus_version(session.connection(), tenant_ids)
+
+
+async def get_corpus_version(db, tenant_id: int) -> int | None:
+    """Current version, or None when the tenant row does not exist (callers skip caching)."""
+    result = await db.execute(select(Tenant.corpus_version).where(Tenant.id == tenant_id))
+    return result.scalar_one_or_none()
@@ -0,0 +1,145 @@
+"""Brute-force vector search over a tenant's chunk matrix.
+
+Each tenant's embeddings are loaded once into a contiguous, L2-normalised float32 matrix
+and kept in a small LRU (with TTL); cosine top-k for a batch of queries is then a single
+matrix product plus `argpartition`, run in the threadpool (NumPy releases the GIL).
+"""
+import asyncio
+import logging
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from app.models.chunk import Chunk
+
+from .vectors import normalize_rows, unpack_matrix
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TenantMatrix:
+    chunk_ids: np.ndarray     # int64, row -> Chunk.id
+    document_ids: np.ndarray  # int64, row -> Chunk.document_id
+    matrix: np.ndarray        # float32 (n, dim), rows L2-normalised
+    loaded_at: float
+    version: int | None = None  # tenant corpus version the matrix was built from
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+
+@dataclass
+class SearchHit:
+    chunk_id: int
+    document_id: int
+    score: float
+
+
+def top_k_cosine(matrix: np.ndarray, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return (row indices, scores), each (q, k'), best first; `matrix` rows must be normalised."""
+    queries = normalize_rows(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+    n = matrix.shape[0]
+    k = min(k, n)
+    if k == 0:
+        empty = np.empty((queries.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+    scores = queries @ matrix.T  # (q, n)
+    if k < n:
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.broadcast_to(np.arange(n), (queries.shape[0], n))
+    top = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-top, axis=1)
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(top, order, axis=1)
+
+
+def build_tenant_matrix(rows) -> TenantMatrix:
+    """rows: iterable of (chunk_id, document_id, vector, dtype, dim, scale)."""
+    groups: dict[tuple[str, int], list] = {}
+    for row in rows:
+        if row[2] is None:
+            continue
+        groups.setdefault((row[3] or "float32", row[4]), []).append(row)
+    if not groups:
+        return TenantMatrix(np.empty(0, np.int64), np.empty(0, np.int64), np.empty((0, 0), np.float32), time.monotonic())
+    # A tenant's corpus has one embedding model; rows of any other dimension are stale and skipped
+    per_dim = Counter()
+    for (_, gdim), group in groups.items():
+        per_dim[gdim] += len(group)
+    dim = per_dim.most_common(1)[0][0]
+    ids, docs, parts = [], [], []
+    for (dtype, gdim), group in groups.items():
+        if gdim != dim:
+            logger.warning("Skipping %d chunk vectors with dim %s (expected %s)", len(group), gdim, dim)
+            continue
+        ids.extend(r[0] for r in group)
+        docs.extend(r[1] for r in group)
+        parts.append(unpack_matrix([r[2] for r in group], dim, dtype, [r[5] for r in group]))
+    matrix = normalize_rows(np.concatenate(parts) if len(parts) > 1 else parts[0])
+    return TenantMatrix(np.asarray(ids, np.int64), np.asarray(docs, np.int64), np.ascontiguousarray(matrix, np.float32), time.monotonic())
+
+
+class VectorSearchEngine:
+    def __init__(self, ttl: float = 300.0, max_tenants: int = 64):
+        self.ttl = ttl
+        self.max_tenants = max_tenants
+        self._matrices: OrderedDict[int, TenantMatrix] = OrderedDict()
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    def invalidate(self, tenant_id: int):
+        self._matrices.pop(tenant_id, None)
+
+    async def _fetch_rows(self, db, tenant_id: int):
+        result = await db.execute(
+            select(Chunk.id, Chunk.document_id, Chunk.vector, Chunk.vector_dtype, Chunk.vector_dim, Chunk.vector_scale)
+            .where(Chunk.tenant_id == tenant_id)
+        )
+        return result.all()
+
+    def _fresh(self, tenant_id: int, version: int | None) -> TenantMatrix | None:
+        cached = self._matrices.get(tenant_id)
+        if cached is None or time.monotonic() - cached.loaded_at >= self.ttl:
+            return None
+        if version is not None and cached.version != version:
+            return None
+        self._matrices.move_to_end(tenant_id)
+        return cached
+
+    async def load(self, db, tenant_id: int, version: int | None = None) -> TenantMatrix:
+        cached = self._fresh(tenant_id, version)
+        if cached is not None:
+            return cached
+        # One loader per tenant; concurrent queries wait for it instead of re-reading the table
+        lock = self._locks.setdefault(tenant_id, asyncio.Lock())
+        async with lock:
+            cached = self._fresh(tenant_id, version)
+            if cached is not None:
+                return cached
+            rows = await self._fetch_rows(db, tenant_id)
+            tenant_matrix = await run_in_threadpool(build_tenant_matrix, rows)
+            tenant_matrix.version = version
+            self._matrices[tenant_id] = tenant_matrix
+            self._matrices.move_to_end(tenant_id)
+            while len(self._matrices) > self.max_tenants:
+                self._matrices.popitem(last=False)
+            return tenant_matrix
+
+    async def search(self, db, tenant_id: int, queries, k: int = 10, version: int | None = None) -> list[list[SearchHit]]:
+        """Top-k chunks of `tenant_id` for each query vector in the batch."""
+        tenant_matrix = await self.load(db, tenant_id, version)
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if tenant_matrix.matrix.shape[0] == 0:
+            return [[] for _ in range(queries.shape[0])]
+        if queries.shape[1] != tenant_matrix.dim:
+            raise ValueError(f"Query dimension {queries.shape[1]} does not match corpus dimension {tenant_matrix.dim}")
+        idx, scores = await run_in_threadpool(top_k_cosine, tenant_matrix.matrix, queries, k)
+        return [
+            [SearchHit(int(tenant_matrix.chunk_ids[i]), int(tenant_matrix.document_ids[i]), float(s)) for i, s in zip(row_idx, row_scores)]
+            for row_idx, row_scores in zip(idx, scores)
+        ]
@@ -0,0 +1,29 @@
+"""Reciprocal-rank fusion of ranked result lists."""
+from dataclasses import dataclass
+
+
+@dataclass
+class FusedHit:
+    chunk_id: int
+    document_id: int
+    score: float
+    vector_rank: int | None = None
+    lexical_rank: int | None = None
+
+
+def reciprocal_rank_fusion(vector_hits, lexical_hits, k: int = 10, rrf_k: int = 60) -> list[FusedHit]:
+    """score(d) = sum over lists of 1 / (rrf_k + rank); ranks are 1-based.
+
+    RRF needs only ranks, so cosine similarities and BM25 scores never have to be put on a
+    common scale.
+    """
+    fused: dict[int, FusedHit] = {}
+    for rank, hit in enumerate(vector_hits, start=1):
+        entry = fused.setdefault(hit.chunk_id, FusedHit(hit.chunk_id, hit.document_id, 0.0))
+        entry.score += 1.0 / (rrf_k + rank)
+        entry.vector_rank = rank
+    for rank, (chunk_id, document_id, _) in enumerate(lexical_hits, start=1):
+        entry = fused.setdefault(chunk_id, FusedHit(chunk_id, document_id, 0.0))
+        entry.score += 1.0 / (rrf_k + rank)
+        entry.lexical_rank = rank
+    return sorted(fused.values(), key=lambda hit: -hit.score)[:k]
@@ -0,0 +1,202 @@
+"""Per-tenant BM25 inverted index over chunk text.
+
+Tender queries lean on exact identifiers (lot numbers, CPV codes such as `45233120-6`,
+norms such as `EN 1090-2`), so the tokenizer keeps joined tokens whole and also indexes
+their alphanumeric parts. Postings are kept as dicts for cheap incremental updates, plus
+NumPy arrays per term built on first use. A query touches only the arrays of its own
+terms, so scoring costs O(matching postings).
+"""
+import asyncio
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import numpy as np
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from app.models.chunk import Chunk
+
+TOKEN_RE = re.compile(r"[^\W_]+(?:[-./:][^\W_]+)*")
+PART_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = TOKEN_RE.findall((text or "").lower())
+    for token in [t for t in tokens if not t.isalnum()]:
+        tokens.extend(part for part in PART_RE.findall(token) if len(part) > 1)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.loaded_at = time.monotonic()
+        self.version = None  # tenant corpus version the index reflects
+        self._rows: dict[int, int] = {}           # chunk_id -> row
+        self._chunk_ids: list[int] = []           # row -> chunk_id
+        self._document_ids: list[int] = []        # row -> document_id
+        self._lengths = np.zeros(0, np.float32)   # row -> token count (0 once removed)
+        self._terms: list[tuple[str, ...]] = []   # row -> distinct terms, for removal
+        self._postings: dict[str, dict[int, int]] = {}
+        self._arrays: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._total_length = 0
+        self._live = 0
+        self._lock = threading.Lock()  # ingestion and queries run on different threadpool workers
+
+    def __len__(self) -> int:
+        return self._live
+
+    def add(self, chunk_ids, document_ids, texts):
+        """Index (or re-index) chunks."""
+        with self._lock:
+            self._add(chunk_ids, document_ids, texts)
+
+    def _add(self, chunk_ids, document_ids, texts):
+        stale = [cid for cid in chunk_ids if cid in self._rows]
+        if stale:
+            self._remove(stale)
+        start = len(self._chunk_ids)
+        lengths = []
+        touched = set()
+        for offset, (chunk_id, document_id, text) in enumerate(zip(chunk_ids, document_ids, texts)):
+            row = start + offset
+            counts = Counter(tokenize(text))
+            self._rows[chunk_id] = row
+            self._chunk_ids.append(chunk_id)
+            self._document_ids.append(document_id)
+            self._terms.append(tuple(counts))
+            length = sum(counts.values())
+            lengths.append(length)
+            self._total_length += length
+            touched.update(counts)
+            for term, tf in counts.items():
+                self._postings.setdefault(term, {})[row] = tf
+        for term in touched.intersection(self._arrays):
+            del self._arrays[term]
+        self._lengths = np.concatenate([self._lengths, np.asarray(lengths, np.float32)])
+        self._live += len(lengths)
+
+    def remove(self, chunk_ids):
+        with self._lock:
+            self._remove(chunk_ids)
+
+    def _remove(self, chunk_ids):
+        for chunk_id in chunk_ids:
+            row = self._rows.pop(chunk_id, None)
+            if row is None:
+                continue
+            for term in self._terms[row]:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(row, None)
+                    if not postings:
+                        del self._postings[term]
+                self._arrays.pop(term, None)
+            self._terms[row] = ()
+            self._total_length -= int(self._lengths[row])
+            self._lengths[row] = 0
+            self._live -= 1
+
+    def _term_arrays(self, term: str):
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            if not postings:
+                return None
+            arrays = self._arrays[term] = (
+                np.fromiter(postings.keys(), np.int64, len(postings)),
+                np.fromiter(postings.values(), np.float32, len(postings)),
+            )
+        return arrays
+
+    def search(self, query: str, k: int = 10) -> list[tuple[int, int, float]]:
+        """Top-k (chunk_id, document_id, bm25 score), best first."""
+        with self._lock:
+            return self._search(query, k)
+
+    def _search(self, query: str, k: int):
+        if not self._live:
+            return []
+        avg_length = self._total_length / self._live or 1.0
+        scores = None
+        for term in set(tokenize(query)):
+            arrays = self._term_arrays(term)
+            if arrays is None:
+                continue
+            rows, tf = arrays
+            idf = math.log(1 + (self._live - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[rows] / avg_length)
+            if scores is None:
+                scores = np.zeros(len(self._chunk_ids), np.float32)
+            scores[rows] += idf * tf * (self.k1 + 1) / (tf + norm)
+        if scores is None:
+            return []
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(self._chunk_ids[r], self._document_ids[r], float(scores[r])) for r in matched]
+
+
+class LexicalSearchEngine:
+    """Tenant BM25 indexes, built from the chunks table on first use and kept in an LRU.
+
+    Ingestion in this worker updates the index incrementally (`add` / `remove`) and stamps
+    it with the new corpus version; a version written by another worker triggers a reload.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_tenants: int = 64):
+        self.ttl = ttl
+        self.max_tenants = max_tenants
+        self._indexes: OrderedDict[int, BM25Index] = OrderedDict()
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    def invalidate(self, tenant_id: int):
+        self._indexes.pop(tenant_id, None)
+
+    def _fresh(self, tenant_id: int, version: int | None) -> BM25Index | None:
+        index = self._indexes.get(tenant_id)
+        if index is None or time.monotonic() - index.loaded_at >= self.ttl:
+            return None
+        if version is not None and index.version != version:
+            return None
+        self._indexes.move_to_end(tenant_id)
+        return index
+
+    async def load(self, db, tenant_id: int, version: int | None = None) -> BM25Index:
+        index = self._fresh(tenant_id, version)
+        if index is not None:
+            return index
+        lock = self._locks.setdefault(tenant_id, asyncio.Lock())
+        async with lock:
+            index = self._fresh(tenant_id, version)
+            if index is not None:
+                return index
+            result = await db.execute(
+                select(Chunk.id, Chunk.document_id, Chunk.text)
+                .where(Chunk.tenant_id == tenant_id, Chunk.text.isnot(None))
+            )
+            rows = result.all()
+            index = BM25Index()
+            index.version = version
+            await run_in_threadpool(index.add, [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows])
+            self._indexes[tenant_id] = index
+            while len(self._indexes) > self.max_tenants:
+                self._indexes.popitem(last=False)
+            return index
+
+    async def add(self, tenant_id: int, chunk_ids, document_ids, texts, version: int | None = None):
+        index = self._indexes.get(tenant_id)
+        if index is not None:
+            await run_in_threadpool(index.add, chunk_ids, document_ids, texts)
+            index.version = version
+
+    async def remove(self, tenant_id: int, chunk_ids, version: int | None = None):
+        index = self._indexes.get(tenant_id)
+        if index is not None:
+            await run_in_threadpool(index.remove, chunk_ids)
+            index.version = version
@@ -0,0 +1,144 @@
+"""Search orchestration: picks the retrievers for a tenant and fuses their results."""
+import asyncio
+import logging
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core import db as db_module
+from app.core.rls import tenant_scope
+
+from .ann import ANNIndexManager
+from .cache import SearchResultCache, normalize_query, vector_bucket
+from .corpus import get_corpus_version
+from .engine import SearchHit, VectorSearchEngine, build_tenant_matrix
+from .fusion import FusedHit, reciprocal_rank_fusion
+from .lexical import LexicalSearchEngine
+
+logger = logging.getLogger(__name__)
+
+
+class SearchService:
+    """Exact search for small corpora, per-tenant IVF index once a tenant is large.
+
+    The first exact query over a corpus of at least `ann_min_rows` chunks schedules an index
+    build; later queries use the index unless `exact=True`. The build claims the tenant's
+    index directory before it reads the chunks, so adds and removals from any worker that
+    land during the build are queued by the index and applied when it is published.
+    `search()` fronts all modes with a result cache keyed by the tenant's corpus version.
+    """
+
+    def __init__(self, index_root: str = "./indexes", ann_min_rows: int = 20000, default_nprobe: int = 16,
+                 cache_size: int = 2048, cache_ttl: float = 600.0):
+        self.cache = SearchResultCache(cache_size, cache_ttl)
+        self.vectors = VectorSearchEngine()
+        self.lexical = LexicalSearchEngine()
+        self.ann = ANNIndexManager(index_root)
+        self.ann_min_rows = ann_min_rows
+        self.default_nprobe = default_nprobe
+        self._building: set[int] = set()
+
+    async def search(self, db, tenant_id: int, mode: str, text: str | None = None, vector=None, embed=None,
+                     k: int = 10, nprobe: int | None = None, exact: bool = False) -> tuple[list[dict], bool]:
+        """Run a `vector` / `lexical` / `hybrid` query; returns (results, served_from_cache).
+
+        A hit costs one primary-key read of the corpus version: no embedding call, no scan.
+        """
+        version = await get_corpus_version(db, tenant_id)
+        key = None
+        if version is not None:
+            key = self.cache.key(tenant_id, version, mode=mode, text=normalize_query(text),
+                                 vector=vector_bucket(vector), k=k, nprobe=nprobe or 0, exact=exact)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached, True
+        if mode == "lexical":
+            hits = await self.lexical_search(db, tenant_id, text, k=k, version=version)
+        elif mode == "hybrid":
+            hits = await self.hybrid_search(db, tenant_id, text, vector=vector, embed=embed, k=k,
+                                            nprobe=nprobe, exact=exact, version=version)
+        else:
+            if vector is None:
+                vector = await embed(text)
+            hits = await self.vector_search(db, tenant_id, vector, k=k, nprobe=nprobe, exact=exact, version=version)
+        results = [dict(hit.__dict__) for hit in hits]
+        if key is not None:
+            self.cache.put(key, results)
+        return results, False
+
+    async def vector_search(self, db, tenant_id: int, vector, k: int = 10, nprobe: int | None = None, exact: bool = False,
+                            version: int | None = None) -> list[SearchHit]:
+        index = self.ann.index_for(tenant_id)
+        if not exact and await run_in_threadpool(index.exists):
+            rows = (await run_in_threadpool(index.search, [vector], k, nprobe or self.default_nprobe))[0]
+            return [SearchHit(chunk_id, document_id, score) for chunk_id, document_id, score in rows]
+        hits = (await self.vectors.search(db, tenant_id, [vector], k=k, version=version))[0]
+        self._maybe_build_index(tenant_id)
+        return hits
+
+    async def lexical_search(self, db, tenant_id: int, text: str, k: int = 10, version: int | None = None) -> list[SearchHit]:
+        index = await self.lexical.load(db, tenant_id, version)
+        rows = await run_in_threadpool(index.search, text, k)
+        return [SearchHit(chunk_id, document_id, score) for chunk_id, document_id, score in rows]
+
+    async def hybrid_search(self, db, tenant_id: int, text: str, vector=None, embed=None, k: int = 10,
+                            nprobe: int | None = None, exact: bool = False, candidates: int | None = None,
+                            version: int | None = None) -> list[FusedHit]:
+        """BM25 and vector retrieval run concurrently, then merge by reciprocal-rank fusion.
+
+        Pass `vector` or an `embed()` coroutine function; the embedding call overlaps the
+        lexical query. Each retriever contributes `candidates` (default 3k) hits to fusion.
+        """
+        candidates = candidates or max(3 * k, 30)
+        # Warm the lexical index first: the session is then only used by the vector side
+        index = await self.lexical.load(db, tenant_id, version)
+
+        async def vector_side():
+            query_vector = vector if vector is not None else (await embed(text))
+            return await self.vector_search(db, tenant_id, query_vector, k=candidates, nprobe=nprobe, exact=exact, version=version)
+
+        vector_hits, lexical_rows = await asyncio.gather(vector_side(), run_in_threadpool(index.search, text, candidates))
+        return reciprocal_rank_fusion(vector_hits, lexical_rows, k=k)
+
+    def _maybe_build_index(self, tenant_id: int):
+        matrix = self.vectors._matrices.get(tenant_id)
+        if matrix is None or matrix.matrix.shape[0] < self.ann_min_rows or tenant_id in self._building:
+            return
+        self._building.add(tenant_id)
+        index = self.ann.index_for(tenant_id)
+
+        async def build():
+            try:
+                if not await run_in_threadpool(index.begin_build):
+                    return  # built already, or another worker is building it
+                try:
+                    # Read the chunks only once the claim exists: later writes are queued by the index
+                    with tenant_scope(tenant_id):
+                        async with db_module.AsyncSessionLocal() as db:
+                            rows = await self.vectors._fetch_rows(db, tenant_id)
+                    snapshot = await run_in_threadpool(build_tenant_matrix, rows)
+                    await run_in_threadpool(index.build, snapshot.chunk_ids, snapshot.document_ids, snapshot.matrix)
+                except BaseException:
+                    index.abort_build()
+                    raise
+            except Exception:
+                logger.exception("ANN index build failed for tenant %s", tenant_id)
+            finally:
+                self._building.discard(tenant_id)
+
+        asyncio.ensure_future(build())
+
+    # Ingestion hooks: keep the tenant's indexes in step with its chunks. `version` is the
+    # corpus version after the write; it lets the in-place lexical update stand.
+    async def add_chunks(self, tenant_id: int, chunk_ids, document_ids, vectors, texts=None, version: int | None = None):
+        self.vectors.invalidate(tenant_id)
+        if texts is not None:
+            await self.lexical.add(tenant_id, chunk_ids, document_ids, texts, version)
+        else:
+            self.lexical.invalidate(tenant_id)
+        # The index appends, queues behind a running build, or drops (no index yet)
+        await run_in_threadpool(self.ann.index_for(tenant_id).add, chunk_ids, document_ids, vectors)
+
+    async def remove_chunks(self, tenant_id: int, chunk_ids, version: int | None = None):
+        self.vectors.invalidate(tenant_id)
+        await self.lexical.remove(tenant_id, chunk_ids, version)
+        await run_in_threadpool(self.ann.index_for(tenant_id).delete, chunk_ids)
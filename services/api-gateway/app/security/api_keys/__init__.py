@@ -1,5 +1,6 @@
 """API key security exports."""
 from .manager import APIKeyManager
+from .resolver import APIKeyResolver, ResolvedKey, api_key_resolver
 from .validator import validate_api_key
 
-__all__ = ["APIKeyManager", "validate_api_key"]
+__all__ = ["APIKeyManager", "APIKeyResolver", "ResolvedKey", "api_key_resolver", "validate_api_key"]
@@ -2,11 +2,56 @@
 import hashlib
 import secrets
 
+from sqlalchemy import select
+
+from app.models.api_key_model import APIKey
+
+from .resolver import APIKeyResolver, api_key_resolver
+
+
 class APIKeyManager:
+    """Raw keys are returned once, at creation; only their SHA-256 is stored.
+
+    Revocation and rotation commit first, then broadcast the old digest through the
+    resolver, so no worker can re-cache the key from a transaction that has not committed.
+    """
+
+    def __init__(self, resolver: APIKeyResolver | None = None):
+        self.resolver = resolver or api_key_resolver
+
     def generate(self):
         raw = secrets.token_urlsafe(32)
         return raw, hashlib.sha256(raw.encode()).hexdigest()
 
-    def rotate(self, key_id):
-        # rotate key logic
-        pass
+    async def _get(self, db, key_id: int, tenant_id: int) -> APIKey | None:
+        result = await db.execute(select(APIKey).where(APIKey.id == key_id, APIKey.tenant_id == tenant_id))
+        return result.scalar_one_or_none()
+
+    async def create(self, db, tenant_id: int, scopes: str | None = None) -> tuple[str, APIKey]:
+        raw, digest = self.generate()
+        key = APIKey(tenant_id=tenant_id, key_hash=digest, scopes=scopes, disabled=False)
+        db.add(key)
+        await db.commit()
+        return raw, key
+
+    async def revoke(self, db, key_id: int, tenant_id: int) -> APIKey | None:
+        key = await self._get(db, key_id, tenant_id)
+        if key is None:
+            return None
+        key.disabled = True
+        await db.commit()
+        await self.resolver.revoked(key.key_hash)
+        return key
+
+    async def rotate(self, db, key_id: int, tenant_id: int) -> tuple[str, APIKey] | None:
+        """Replace `key_id` with a new key carrying the same scopes; the old one stops working."""
+        old = await self._get(db, key_id, tenant_id)
+        if old is None or old.disabled:
+            return None
+        raw, digest = self.generate()
+        key = APIKey(tenant_id=tenant_id, key_hash=digest, scopes=old.scopes, disabled=False)
+        old.disabled = True
+        db.add(key)
+        await db.commit()
+        await self.resolver.revoked(old.key_hash)
+        return raw, key
@@ -0,0 +1,194 @@
+"""API key -> (tenant, plan, scopes) resolution with a per-worker cache and revocation fan-out.
+
+- Keys are looked up by SHA-256 digest through the unique index on `api_keys.key_hash`.
+  The stored digest is then compared with `hmac.compare_digest`. Only digests are held
+  in memory, never raw keys.
+- Hits are cached for `ttl` seconds (LRU-bounded). Unknown, disabled and revoked keys are
+  cached as misses for `negative_ttl`, so a client retrying a bad key does not reach the
+  database on every request. Misses live in their own, smaller map (`max_negative_entries`,
+  oldest first out), so a flood of random keys cannot evict valid ones. Concurrent misses
+  for one key share a single query.
+- `APIKeyManager` revokes and rotates keys and then publishes the old digest on
+  `CHANNEL`. Every worker's listener drops the entry, so a revoked key stops working
+  everywhere within one pub/sub round-trip, not one TTL. A lookup that was in flight
+  when a revocation arrived is not cached. After a (re)subscribe the whole cache is
+  dropped, because anything published while disconnected was missed. Without Redis,
+  revocation only reaches this worker at once; the others pick it up when their entry
+  expires.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import select
+
+from app.core import db as db_module
+from app.core.authz import catalog
+from app.core.observability import CacheCounters
+from app.core.redis_client import get_redis
+from app.models.api_key_model import APIKey
+from app.models.tenant import Tenant
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "api_keys:revoked"
+FLUSH_ALL = "*"
+
+
+def hash_api_key(raw_key: str) -> str:
+    return hashlib.sha256(raw_key.encode()).hexdigest()
+
+
+def parse_scopes(value: str | None) -> frozenset:
+    return frozenset(value.replace(",", " ").split()) if value else frozenset()
+
+
+@dataclass(frozen=True, slots=True)
+class ResolvedKey:
+    id: int
+    tenant_id: int | None
+    scopes: frozenset
+    permissions: int  # the scopes compiled against the permission catalog
+    plan: str | None = None  # the tenant's rate-limit tier
+
+
+class APIKeyResolver:
+    def __init__(self, redis_getter=None, max_entries: int = 10000, ttl: float = 60.0, negative_ttl: float = 10.0,
+                 max_negative_entries: int = 1000):
+        self._redis_getter = redis_getter or (lambda: None)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_negative_entries = max_negative_entries
+        self._entries: OrderedDict[str, tuple[float, ResolvedKey]] = OrderedDict()
+        self._misses: OrderedDict[str, float] = OrderedDict()  # digest -> expiry; insertion order, no LRU bump
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._generation = 0  # bumped by every invalidation; stale lookups are not cached
+        self._listener: asyncio.Task | None = None
+        self.lookups = 0
+        self.counters = CacheCounters("api_keys")
+
+    # -- resolution ------------------------------------------------------------
+    async def resolve(self, raw_key: str) -> ResolvedKey | None:
+        """The key's tenant and scopes, or None for unknown / disabled keys."""
+        digest = hash_api_key(raw_key)
+        entry = self._entries.get(digest)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(digest)
+            self.counters.hit()
+            return entry[1]
+        expires = self._misses.get(digest)
+        if expires is not None and expires > time.monotonic():
+            self.counters.hit()
+            return None
+        self.counters.miss()
+        task = self._inflight.get(digest)
+        if task is None:
+            task = self._inflight[digest] = asyncio.create_task(self._lookup(digest))
+            task.add_done_callback(lambda _: self._inflight.pop(digest, None))
+        return await asyncio.shield(task)
+
+    async def _lookup(self, digest: str) -> ResolvedKey | None:
+        generation = self._generation
+        self.lookups += 1
+        async with db_module.AsyncSessionLocal() as db:
+            found = (await db.execute(
+                select(APIKey, Tenant.plan).outerjoin(Tenant, Tenant.id == APIKey.tenant_id)
+                .where(APIKey.key_hash == digest))).first()
+        resolved = None
+        row, plan = found if found is not None else (None, None)
+        if row is not None and not row.disabled and hmac.compare_digest(row.key_hash, digest):
+            scopes = parse_scopes(row.scopes)
+            resolved = ResolvedKey(row.id, row.tenant_id, scopes, catalog.mask(scopes), plan)
+        if generation == self._generation:
+            self._store(digest, resolved)
+        return resolved
+
+    def _store(self, digest: str, resolved: ResolvedKey | None):
+        if resolved is None:
+            self._entries.pop(digest, None)
+            self._misses.pop(digest, None)
+            self._misses[digest] = time.monotonic() + self.negative_ttl
+            while len(self._misses) > self.max_negative_entries:
+                self._misses.popitem(last=False)
+            return
+        self._misses.pop(digest, None)
+        self._entries[digest] = (time.monotonic() + self.ttl, resolved)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # -- invalidation ----------------------------------------------------------
+    def invalidate(self, digest: str):
+        self._generation += 1
+        if digest == FLUSH_ALL:
+            self._entries.clear()
+            self._misses.clear()
+        else:
+            self._entries.pop(digest, None)
+            self._misses.pop(digest, None)
+
+    def clear(self):
+        self.invalidate(FLUSH_ALL)
+
+    async def revoked(self, *digests: str):
+        """Drop `digests` here and tell every other worker to do the same."""
+        for digest in digests:
+            self.invalidate(digest)
+        client = self._redis_getter()
+        if client is None:
+            return
+        for digest in digests:
+            try:
+                await client.publish(CHANNEL, digest)
+            except Exception as exc:
+                logger.warning("Could not publish API key revocation: %s", exc)
+
+    # -- listener ---------------------------------------------------------------
+    def start(self):
+        if self._listener is None and self._redis_getter() is not None:
+            self._listener = asyncio.create_task(self._listen())
+        return self._listener
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self):
+        backoff = 0.5
+        while True:
+            client = self._redis_getter()
+            if client is None:
+                return
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(CHANNEL)
+                self.clear()  # revocations published while we were not subscribed were missed
+                backoff = 0.5
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        data = message["data"]
+                        self.invalidate(data.decode() if isinstance(data, bytes) else data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("API key revocation listener lost Redis (%s); retrying in %.1fs", exc, backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+
+api_key_resolver = APIKeyResolver(redis_getter=get_redis)
@@ -1,5 +1,8 @@
 """API key validation helper (compare hashed value)"""
-import hashlib
+import hmac
+
+from .resolver import hash_api_key
+
 
 def validate_api_key(raw_key: str, stored_hash: str) -> bool:
-    return hashlib.sha256(raw_key.encode()).hexdigest() == stored_hash
+    return hmac.compare_digest(hash_api_key(raw_key), stored_hash)
@@ -4,26 +4,87 @@ import jwt
 import os
 import secrets
 import time
-def verify_jwt(token: str):
-    # Decode JWT, verify 'iss' claim and algorithm
-    raise NotImplementedError
 
-def create_Ajwt(user_id, tenant_id, algorithm: str = "HS256"):
-    print("Creating Access Token for user with user_id:", user_id)
+from .token_cache import JWKSCache, VerifiedTokenCache
+
+# HS256 tokens are ours (JWT_SECRET); RS256/EdDSA tokens come from the issuer's JWKS.
+# Anything else (notably "none") is rejected before any key is looked up.
+ALLOWED_ALGORITHMS = ("HS256", "RS256", "EdDSA")
+# JWK key types allowed per algorithm: prevents key confusion (e.g. an RSA public key used as an HMAC secret)
+JWKS_KEY_TYPES = {"RS256": "RSA", "EdDSA": "OKP"}
+
+verified_tokens = VerifiedTokenCache()
+jwks_cache: JWKSCache | None = None
+
+
+def configure_jwks(url: str, refresh_interval: float = 300.0) -> JWKSCache | None:
+    global jwks_cache
+    jwks_cache = JWKSCache(url, refresh_interval=refresh_interval) if url else None
+    return jwks_cache
+
+
+def _issuer() -> str:
+    return os.getenv("JWT_ISSUER", "https://auth.example.com/")
+
+
+async def _verification_key(header: dict):
+    alg = header.get("alg")
+    if alg not in ALLOWED_ALGORITHMS:
+        raise jwt.InvalidAlgorithmError(f"Algorithm not allowed: {alg}")
+    if alg == "HS256":
+        return os.getenv("JWT_SECRET", "changeme")
+    if jwks_cache is None:
+        raise jwt.InvalidKeyError("No JWKS configured for asymmetric tokens")
+    kid = header.get("kid")
+    jwk = await jwks_cache.get_key(kid) if kid else None
+    if jwk is None:
+        raise jwt.InvalidKeyError(f"Unknown signing key: {kid}")
+    if jwk.key_type != JWKS_KEY_TYPES[alg]:
+        raise jwt.InvalidKeyError(f"Key {kid} cannot verify {alg}")
+    return jwk.key
+
+
+async def verify_jwt(token: str) -> dict:
+    """Decode and verify `token`; returns its claims or raises `jwt.InvalidTokenError`.
+
+    Signature verification runs once per token per worker: verified claims are cached
+    until the token's `exp`.
+    """
+    claims = verified_tokens.get(token)
+    if claims is not None:
+        return claims
+    header = jwt.get_unverified_header(token)
+    key = await _verification_key(header)
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=[header["alg"]],
+        issuer=_issuer(),
+        options={"require": ["exp", "iat", "iss"]},
+    )
+    verified_tokens.put(token, claims)
+    return claims
+
+def create_Ajwt(user_id, tenant_id, algorithm: str = "HS256", role: str | None = None, plan: str | None = None):
     now = int(time.time())
     jwt_payload = {
         "user_id": user_id,
         "tenant_id": tenant_id,
+        "iss": _issuer(),
         "iat": now,
         "exp": now + (15 * 60)  # 15 minutes from now
     }
+    if role is not None:
+        jwt_payload["role"] = role  # RBAC compiles permissions from it without a user lookup
+    if plan is not None:
+        jwt_payload["plan"] = plan  # rate-limit tier, read without a tenant lookup
     secret = os.getenv("JWT_SECRET", "changeme")
     token = jwt.encode(jwt_payload, secret, algorithm=algorithm)
     return token
 
 def create_Rt(user_id, tenant_id, algorithm: str = "HS256"):
-    return secrets.token_urlsafe(256) 
+    return secrets.token_urlsafe(256)
 
 #Verify JWT Vulnerabilities (JWKs, alg none, key confusion...)
 #Tie refresh tokens to IP/device fingerprint
-#Multi-Algorithm JWT: EdDSA (Ed25519), RS256 (RSA 2048), HS256 (HMAC-SHA256)
\ No newline at end of file
+#Multi-Algorithm JWT: EdDSA (Ed25519), RS256 (RSA 2048), HS256 (HMAC-SHA256)
@@ -1,6 +1,9 @@
 from fastapi import HTTPException
+from sqlalchemy import select
+from app.core.audit import audit_event
+from app.models.tenant import Tenant
 from app.models.user import User
-from app.core.security import verify_password
+from app.core.security import verify_password_async
 from app.security.auth.session_manager import SessionManager
 from app.security.auth.mfa_handler import requires_mfa
 import logging
@@ -9,30 +12,34 @@ import traceback
 logger = logging.getLogger(__name__)
 
 async def login_user(db, email: str, password: str):
-    user = db.query(User).filter(User.email == email).first()
+    """Authenticate `email`/`password` using an AsyncSession and return a fresh token pair."""
+    result = await db.execute(select(User).where(User.email == email).limit(1))
+    user = result.scalar_one_or_none()
     if not user :
-        print("wrong mail")
+        await audit_event("auth.login_failed", {"email": email, "reason": "unknown_email"})
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    if not verify_password(user.password_hash, password):
-        print("Invalid pswd")
+    if not await verify_password_async(user.password_hash, password):
+        await audit_event("auth.login_failed", {"reason": "bad_password"}, user.tenant_id, user.id)
         raise HTTPException(status_code=401, detail="Invalid credentials")
     if user.is_verified == False:
-        print("Not Verified")
+        await audit_event("auth.login_failed", {"reason": "unverified"}, user.tenant_id, user.id)
         raise HTTPException(status_code=403, detail="Email not verified")
     if not user.is_active:
-        print("Account Disabled")
+        await audit_event("auth.login_failed", {"reason": "disabled"}, user.tenant_id, user.id)
         raise HTTPException(status_code=403, detail="User account is disabled")
     if requires_mfa(user):
         # TODO: Implement temporary MFA token generation
-        print("MFA!")
         raise HTTPException(status_code=403, detail="MFA required")
 
     tenant_id = user.tenant_id
+    plan = (await db.execute(select(Tenant.plan).where(Tenant.id == tenant_id))).scalar_one_or_none()
     manager = SessionManager()
     try:
-        return manager.create_session(user.id, tenant_id)
+        tokens = manager.create_session(user.id, tenant_id, user.role, plan)
     except Exception as exc:
         tb = traceback.format_exc()
         logger.exception("Failed to create session for user %s: %s", user.id if user else None, exc)
         # Return a 500 with a short message; full traceback is in the logs
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(exc)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(exc)}")
+    await audit_event("auth.login", tenant_id=tenant_id, actor_id=user.id)
+    return tokens
\ No newline at end of file
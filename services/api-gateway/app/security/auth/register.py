@@ -1,7 +1,10 @@
 from fastapi import HTTPException
+from sqlalchemy import select
 from app.models.tenant import Tenant
 from app.models.user import User
-from app.core.security import hash_password
+from app.core.audit import AuditBusyError, audit_event
+from app.core.outbox import add_outbox_event
+from app.core.security import HashingBusyError, hash_password_async
 # from app.security.auth.session_manager import SessionManager
 import logging
 import traceback
@@ -10,21 +13,28 @@ from sqlalchemy.exc import IntegrityError
 logger = logging.getLogger(__name__)
 
 async def register_tenant(db, tenant_name: str, email: str, password: str, first_name: str, last_name: str):
+    """Create (or join) `tenant_name` and its owner user using an AsyncSession."""
     try:
+        # Hash before touching the database: no write transaction is held across Argon2
+        password_hash = await hash_password_async(password)
         # tenant = Tenant(name=tenant_name)
-        tenant = db.query(Tenant).filter(Tenant.name == tenant_name).first()
+        result = await db.execute(select(Tenant).where(Tenant.name == tenant_name).limit(1))
+        tenant = result.scalar_one_or_none()
         if not tenant:
             tenant = Tenant(name=tenant_name)
             db.add(tenant)
-            db.flush()
+            await db.flush()
+            add_outbox_event(db, "tenant.created", {"name": tenant.name}, tenant_id=tenant.id)
             # raise HTTPException(status_code=409, detail="Tenant with this name already exists")
         
-        user = User(first_name=first_name, last_name=last_name, email=email, password_hash=hash_password(password), tenant_id=tenant.id, role='owner', is_active=True, is_verified=False)
+        user = User(first_name=first_name, last_name=last_name, email=email, password_hash=password_hash, tenant_id=tenant.id, role='owner', is_active=True, is_verified=False)
         db.add(user)
-        db.commit()
+        await db.flush()  # a duplicate email fails here, before anything is audited
+        await audit_event("auth.registered", {"email": user.email, "role": user.role}, tenant.id, user.id)
+        await db.commit()
 
         # tokens = manager.create_session(user.id, tenant.id)
-        print(f"id: {user.id}, email: {user.email}, tenant_id: {tenant.id}")  
+        logger.info("Registered user %s in tenant %s", user.id, tenant.id)
         return {
             "id": user.id,
             "email": user.email,
@@ -34,12 +44,15 @@ async def register_tenant(db, tenant_name: str, email: str, password: str, first
         }     
         # return {"msg": "Registration successful"}
     
+    except (AuditBusyError, HashingBusyError):
+        await db.rollback()
+        raise  # 503 + Retry-After from the error handlers
     except IntegrityError as exc:
-        db.rollback()
+        await db.rollback()
         logger.warning("Registration conflict for %s: %s", email, exc)
         raise HTTPException(status_code=409, detail="Email already registered")
     except Exception as exc:
-        db.rollback() # Ensure we rollback on any exception to avoid leaving the session in an error state
+        await db.rollback() # Ensure we rollback on any exception to avoid leaving the session in an error state
         tb = traceback.format_exc()
         logger.exception("Failed to register user %s: %s", email, exc)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(exc)}") #to be removed in Prod
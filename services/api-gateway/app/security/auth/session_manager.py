@@ -6,8 +6,8 @@ import random
 
 
 class SessionManager:
-    def create_session(self, user_id: int, tenant_id: int):
-        Ajwt_token=create_Ajwt(user_id, tenant_id)
+    def create_session(self, user_id: int, tenant_id: int, role: str | None = None, plan: str | None = None):
+        Ajwt_token=create_Ajwt(user_id, tenant_id, role=role, plan=plan)
         R_token=create_Rt(user_id, tenant_id)
         return {"access_token": Ajwt_token, "refresh_token": R_token, "token_type": "bearer"}
     def rotate_refresh(self, session_id: int):
@@ -0,0 +1,140 @@
+"""Caches backing `verify_jwt`: verified-token LRU and JWKS signing keys.
+
+- `VerifiedTokenCache` keeps claims of tokens whose signature already verified, so each
+  token is cryptographically checked once per worker; entries never outlive `exp`.
+- `JWKSCache` keeps the issuer's public keys, refreshes them in the background and
+  coalesces kid-miss refetches so a burst of unknown kids causes at most one fetch.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+
+import httpx
+import jwt
+
+from app.core.observability import CacheCounters
+
+logger = logging.getLogger(__name__)
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.counters = CacheCounters("verified_tokens")
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # Store a digest rather than the bearer token itself
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, token: str, now: float | None = None) -> dict | None:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            self.counters.miss()
+            return None
+        exp, claims = entry
+        if (now or time.time()) >= exp:
+            del self._entries[key]
+            self.misses += 1
+            self.counters.miss()
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.counters.hit()
+        return claims
+
+    def put(self, token: str, claims: dict):
+        exp = claims.get("exp")
+        if exp is None:
+            return  # never cache tokens without an expiry
+        key = self._key(token)
+        self._entries[key] = (float(exp), claims)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+async def fetch_jwks(url: str) -> dict:
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        response = await client.get(url)
+        response.raise_for_status()
+        return response.json()
+
+
+class JWKSCache:
+    def __init__(self, url: str, refresh_interval: float = 300.0, min_refetch_interval: float = 10.0, fetcher=None):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refetch_interval = min_refetch_interval
+        self._fetcher = fetcher or fetch_jwks
+        self._keys: dict[str, jwt.PyJWK] = {}
+        self._inflight: asyncio.Task | None = None
+        self._last_fetch = 0.0
+        self._refresh_task: asyncio.Task | None = None
+        self.fetches = 0
+
+    async def _fetch(self):
+        self.fetches += 1
+        self._last_fetch = time.monotonic()
+        jwks = await self._fetcher(self.url)
+        keys = {}
+        for data in jwks.get("keys", []):
+            try:
+                key = jwt.PyJWK(data)
+            except jwt.PyJWKError as exc:
+                logger.warning("Skipping unusable JWKS key %s: %s", data.get("kid"), exc)
+                continue
+            if key.key_id:
+                keys[key.key_id] = key
+        self._keys = keys
+
+    async def refresh(self):
+        """Refetch the key set; concurrent callers share the same in-flight request."""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch())
+            self._inflight.add_done_callback(lambda _task: setattr(self, "_inflight", None))
+        await asyncio.shield(self._inflight)
+
+    async def get_key(self, kid: str) -> jwt.PyJWK | None:
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        # Unknown kid (key rotation): refetch, but never more often than min_refetch_interval
+        if self._inflight is None and time.monotonic() - self._last_fetch < self.min_refetch_interval:
+            return None
+        try:
+            await self.refresh()
+        except Exception as exc:
+            logger.warning("JWKS refetch failed: %s", exc)
+        return self._keys.get(kid)
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as exc:
+                logger.warning("Background JWKS refresh failed: %s", exc)
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self):
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.ensure_future(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
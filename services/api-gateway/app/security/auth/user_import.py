@@ -0,0 +1,393 @@
+"""Bulk user import: staged rows -> Argon2 across a process pool -> batched inserts.
+
+- `stage_import` validates every uploaded row: the email (`is_valid_email`), the names,
+  the role, and duplicates within the file. Emails are stored stripped and lowercased, and
+  the registered-email check ignores case, so every check compares the same address. It stores the job and all of its rows in the
+  caller's transaction. Passwords are sealed with AES-GCM while staged and cleared once
+  their row has been processed. The key is HKDF-derived from USER_IMPORT_SECRET (default
+  SECRET_KEY), and passwords are refused while that is still the placeholder.
+- `UserImporter` works through a job `batch_size` rows at a time. A batch's passwords are
+  hashed across a dedicated pool, never the login executor, so an import cannot starve
+  sign-ins. Emails that are already registered are marked `duplicate`. The remaining
+  users go in with one COPY (PostgreSQL/asyncpg) or one executemany INSERT. The users,
+  the row outcomes and the job counters commit together, so a crash loses at most the
+  batch in flight.
+- Jobs are claimed with a conditional update. A `running` job whose heartbeat (its last
+  committed batch) is older than `lease` seconds counts as abandoned. Each batch commits
+  only while the heartbeat is still the one this worker wrote; otherwise the worker stops
+  (`LeaseLost`). Every worker can therefore `resume()` at startup without two of them
+  running the same job.
+
+Rows without a password get an unusable hash; those users sign in after a reset.
+"""
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, bindparam, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core import db as db_module
+from app.core.audit import AuditBusyError, audit_event
+from app.core.authz import role_permissions
+from app.core.config import DEFAULT_SECRET, get_settings
+from app.core.security import hash_password
+from app.models.enums import ImportJobStatus, ImportRowStatus
+from app.models.user import User
+from app.models.user_import import UserImportJob, UserImportRow
+from app.security.crypto.key_derivation import derive_key
+from app.security.encryption.cipher_suite import decrypt, encrypt
+from app.validators.mail_validators import is_valid_email
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("text/csv", "application/json", "application/x-ndjson")
+UNUSABLE_PASSWORD = "!"  # never a valid Argon2 hash, so verify_password() is always False
+STAGE_BATCH = 1000
+STORE_ATTEMPTS = 3
+_FIELD_ALIASES = {"firstname": "first_name", "lastname": "last_name", "mail": "email"}
+
+
+class LeaseLost(Exception):
+    """Another worker took the job over after this worker's lease expired."""
+
+
+class SealingKeyUnavailable(Exception):
+    """No import secret is configured, so passwords cannot be staged (503)."""
+
+
+# -- parsing and staging -----------------------------------------------------
+def _normalize_key(key) -> str:
+    key = str(key or "").strip().lower().replace(" ", "_").replace("-", "_")
+    return _FIELD_ALIASES.get(key.replace("_", ""), key)
+
+
+def parse_import(body: bytes, content_type: str) -> list[dict]:
+    """Records of a CSV (header row), JSON array or NDJSON upload; ValueError if malformed."""
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ValueError("Import must be UTF-8") from None
+    if content_type == "text/csv":
+        records = list(csv.DictReader(io.StringIO(text)))
+    elif content_type == "application/x-ndjson":
+        try:
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Invalid NDJSON: {exc}") from None
+    else:
+        try:
+            records = json.loads(text) if text.strip() else []
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Invalid JSON: {exc}") from None
+        if isinstance(records, dict):
+            records = records.get("users", [])
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        raise ValueError("Import must be a list of user objects")
+    return [{_normalize_key(key): value for key, value in record.items()} for record in records]
+
+
+def _sealing_key() -> bytes:
+    settings = get_settings()
+    secret = settings.USER_IMPORT_SECRET or settings.SECRET_KEY
+    if not secret or secret == DEFAULT_SECRET:
+        raise SealingKeyUnavailable("Set SECRET_KEY (or USER_IMPORT_SECRET) to import passwords")
+    return derive_key(secret.encode(), info=b"user-import/staged-passwords")
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value).strip()
+
+
+async def stage_import(db, tenant_id: int, actor_id: int | None, records: list[dict]) -> UserImportJob:
+    """Validate `records` and stage them as a pending job (flushed, not committed)."""
+    key = _sealing_key() if any(record.get("password") for record in records) else None
+    job = UserImportJob(tenant_id=tenant_id, created_by=actor_id, total_rows=len(records),
+                        status=ImportJobStatus.pending.value)
+    db.add(job)
+    await db.flush()
+
+    roles = {_text(record.get("role")) or "user" for record in records}
+    grantable = {role for role in roles if role != "admin" and await role_permissions.mask(tenant_id, role)}
+    rows, seen, invalid = [], set(), 0
+    for number, record in enumerate(records, 1):
+        email, role, password = _text(record.get("email")).lower(), _text(record.get("role")) or "user", record.get("password")
+        first_name, last_name = _text(record.get("first_name")), _text(record.get("last_name"))
+        if not is_valid_email(email):
+            error = "Invalid email"
+        elif email in seen:
+            error = "Duplicate email in import"
+        elif not first_name or not last_name:
+            error = "first_name and last_name are required"
+        elif role not in grantable:
+            error = f"Role '{role}' cannot be assigned"
+        else:
+            error = None
+        seen.add(email)
+        rows.append({
+            "job_id": job.id, "row_number": number, "email": email or None, "first_name": first_name or None,
+            "last_name": last_name or None, "role": role,
+            "password": encrypt(str(password).encode(), key) if password and error is None else None,
+            "status": ImportRowStatus.pending.value if error is None else ImportRowStatus.invalid.value,
+            "error": error,
+        })
+        invalid += error is not None
+    for start in range(0, len(rows), STAGE_BATCH):
+        await db.execute(insert(UserImportRow), rows[start:start + STAGE_BATCH])
+    job.processed_rows = job.failed_count = invalid
+    return job
+
+
+# -- pool work ------------------------------------------------------------------
+def hash_passwords(passwords: list) -> list[str]:
+    """Argon2 hashes of `passwords` (pool worker); None gets the unusable marker."""
+    return [hash_password(password) if password else UNUSABLE_PASSWORD for password in passwords]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class UserImporter:
+    def __init__(self, session_factory=None, workers: int | None = None, executor_kind: str = "process",
+                 batch_size: int = 500, lease: float = 120.0):
+        if executor_kind not in ("thread", "process"):
+            raise ValueError("executor_kind must be 'thread' or 'process'")
+        self.session_factory = session_factory
+        self.workers = workers or os.cpu_count() or 1
+        self.executor_kind = executor_kind
+        self.batch_size = batch_size
+        self.lease = lease
+        self._pool = None
+        self._tasks: dict[int, asyncio.Task] = {}
+
+    def _session(self):
+        return (self.session_factory or db_module.AsyncSessionLocal)()
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.executor_kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="user-import")
+        return self._pool
+
+    # -- scheduling --------------------------------------------------------
+    def submit(self, job_id: int) -> asyncio.Task:
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            task = self._tasks[job_id] = asyncio.get_running_loop().create_task(self._guarded(job_id))
+            task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        return task
+
+    async def resume(self) -> int:
+        async with self._session() as session:
+            ids = (await session.execute(
+                select(UserImportJob.id)
+                .where(UserImportJob.status.in_([ImportJobStatus.pending.value, ImportJobStatus.running.value]))
+                .order_by(UserImportJob.id)
+            )).scalars().all()
+        for job_id in ids:
+            self.submit(job_id)
+        return len(ids)
+
+    async def _guarded(self, job_id: int):
+        try:
+            await self.process(job_id)
+        except LeaseLost:
+            logger.warning("User import %s was taken over by another worker", job_id)
+        except Exception as exc:
+            logger.exception("User import %s failed", job_id)
+            try:
+                async with self._session() as session:
+                    await session.execute(update(UserImportJob).where(UserImportJob.id == job_id)
+                                          .values(status=ImportJobStatus.failed.value, error=str(exc)[:1000]))
+                    await session.commit()
+            except Exception:
+                logger.exception("Could not mark user import %s as failed", job_id)
+
+    # -- one job -----------------------------------------------------------
+    async def _claim(self, job_id: int) -> dict | None:
+        now = _utcnow()
+        async with self._session() as session:
+            claimed = await session.execute(
+                update(UserImportJob)
+                .where(UserImportJob.id == job_id, or_(
+                    UserImportJob.status == ImportJobStatus.pending.value,
+                    and_(UserImportJob.status == ImportJobStatus.running.value,
+                         UserImportJob.heartbeat_at < now - timedelta(seconds=self.lease)),
+                ))
+                .values(status=ImportJobStatus.running.value, heartbeat_at=now, error=None)
+            )
+            if claimed.rowcount != 1:
+                return None
+            tenant_id = (await session.execute(
+                select(UserImportJob.tenant_id).where(UserImportJob.id == job_id))).scalar_one()
+            await session.commit()
+        return {"id": job_id, "tenant_id": tenant_id, "heartbeat": now}
+
+    async def _renew(self, session, job: dict, **values) -> datetime:
+        """Update the job and move its heartbeat on, unless another worker now holds it.
+
+        Returns the new heartbeat; the caller records it in `job` once the session commits.
+        """
+        now = _utcnow()
+        renewed = await session.execute(
+            update(UserImportJob)
+            .where(UserImportJob.id == job["id"], UserImportJob.status == ImportJobStatus.running.value,
+                   UserImportJob.heartbeat_at == job["heartbeat"])
+            .values(heartbeat_at=now, **values)
+        )
+        if renewed.rowcount != 1:
+            await session.rollback()
+            raise LeaseLost(job["id"])
+        return now
+
+    async def process(self, job_id: int) -> bool:
+        """Import every pending row of the job; False if another worker holds it."""
+        job = await self._claim(job_id)
+        if job is None:
+            return False
+        while await self._run_batch(job):
+            pass
+        async with self._session() as session:
+            await self._renew(session, job, status=ImportJobStatus.completed.value, finished_at=_utcnow())
+            await session.commit()
+            job = await session.get(UserImportJob, job_id)
+        logger.info("User import %s: %d created, %d failed", job_id, job.created_count, job.failed_count)
+        try:
+            await audit_event("users.imported", {"job_id": job_id, "created": job.created_count,
+                                                 "failed": job.failed_count}, job.tenant_id, job.created_by)
+        except AuditBusyError:
+            logger.warning("Audit buffer full; user import %s completion was not audited", job_id)
+        return True
+
+    async def _hash(self, passwords: list) -> list[str]:
+        loop = asyncio.get_running_loop()
+        size = max(1, -(-len(passwords) // self.workers))
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(self._get_pool(), hash_passwords, passwords[start:start + size])
+            for start in range(0, len(passwords), size)
+        ))
+        return [hashed for part in parts for hashed in part]
+
+    async def _run_batch(self, job: dict) -> bool:
+        job_id = job["id"]
+        async with self._session() as session:
+            batch = (await session.execute(
+                select(UserImportRow.id, UserImportRow.email, UserImportRow.first_name, UserImportRow.last_name,
+                       UserImportRow.role, UserImportRow.password)
+                .where(UserImportRow.job_id == job_id, UserImportRow.status == ImportRowStatus.pending.value)
+                .order_by(UserImportRow.id).limit(self.batch_size)
+            )).all()
+        if not batch:
+            return False
+        # Hash with no connection checked out: this is where the batch spends its time
+        key = _sealing_key()
+        hashes = await self._hash([decrypt(row.password, key).decode() if row.password else None for row in batch])
+        for attempt in range(1, STORE_ATTEMPTS + 1):
+            try:
+                await self._store(job, batch, hashes)
+                return True
+            except IntegrityError:
+                # An email was registered after our duplicate check; the retry's check sees it
+                if attempt == STORE_ATTEMPTS:
+                    raise
+                logger.info("User import %s: email conflict in batch, retrying", job_id)
+        return True
+
+    async def _store(self, job: dict, batch, hashes: list[str]):
+        tenant_id = job["tenant_id"]
+        async with self._session() as session:
+            # Renew first: on PostgreSQL the row lock also holds off a takeover until we commit
+            heartbeat = await self._renew(session, job)
+            taken = set((await session.execute(
+                select(func.lower(User.email)).where(func.lower(User.email).in_([row.email for row in batch]))
+            )).scalars())
+            users = [
+                {"first_name": row.first_name, "last_name": row.last_name, "email": row.email, "password_hash": hashed,
+                 "tenant_id": tenant_id, "role": row.role, "is_active": True, "is_2fa_enabled": False,
+                 "is_verified": False}
+                for row, hashed in zip(batch, hashes) if row.email not in taken
+            ]
+            ids = {}
+            if users:
+                await self._insert(session, users)
+                ids = dict((await session.execute(
+                    select(User.email, User.id).where(User.tenant_id == tenant_id,
+                                                      User.email.in_([user["email"] for user in users]))
+                )).all())
+            outcomes = [
+                {"row_id": row.id, "row_status": ImportRowStatus.created.value, "row_user_id": ids[row.email],
+                 "row_error": None}
+                if row.email in ids else
+                {"row_id": row.id, "row_status": ImportRowStatus.duplicate.value, "row_user_id": None,
+                 "row_error": "Email already registered"}
+                for row in batch
+            ]
+            # One executemany keyed on the row id (Core, so no ORM bulk-update semantics apply)
+            rows = UserImportRow.__table__
+            await session.execute(
+                update(rows).where(rows.c.id == bindparam("row_id")).values(
+                    status=bindparam("row_status"), user_id=bindparam("row_user_id"), error=bindparam("row_error"),
+                    password=None,
+                ),
+                outcomes,
+            )
+            await session.execute(
+                update(UserImportJob).where(UserImportJob.id == job["id"]).values(
+                    processed_rows=UserImportJob.processed_rows + len(batch),
+                    created_count=UserImportJob.created_count + len(ids),
+                    failed_count=UserImportJob.failed_count + len(batch) - len(ids),
+                )
+            )
+            await session.commit()
+        job["heartbeat"] = heartbeat
+
+    @staticmethod
+    async def _insert(session, users: list[dict]):
+        connection = await session.connection()
+        if connection.dialect.name == "postgresql" and connection.dialect.driver == "asyncpg":
+            import asyncpg
+
+            columns = list(users[0])
+            raw = await connection.get_raw_connection()
+            try:
+                await raw.driver_connection.copy_records_to_table(
+                    User.__tablename__, records=[tuple(user[c] for c in columns) for user in users], columns=columns)
+            except asyncpg.UniqueViolationError as exc:
+                raise IntegrityError("COPY users", None, exc) from exc
+        else:
+            await session.execute(insert(User), users)
+
+    async def close(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_importer: UserImporter | None = None
+
+
+def init_user_importer(**options) -> UserImporter:
+    global _importer
+    _importer = UserImporter(**options)
+    return _importer
+
+
+def get_user_importer() -> UserImporter | None:
+    return _importer
+
+
+async def close_user_importer():
+    global _importer
+    if _importer is not None:
+        await _importer.close()
+    _importer = None
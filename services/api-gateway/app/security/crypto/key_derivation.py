@@ -1,7 +1,16 @@
-"""HKDF key derivation (RFC 5869) - thin wrapper."""
-from hashlib import sha256
+"""HKDF key derivation (RFC 5869) over SHA-256."""
+import hashlib
+import hmac
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 
 def hkdf_extract(salt: bytes, ikm: bytes) -> bytes:
-    # placeholder
-    return sha256(salt + ikm).digest()
+    """The pseudorandom key PRK = HMAC-SHA256(salt, ikm) (RFC 5869, section 2.2)."""
+    return hmac.new(salt or bytes(hashlib.sha256().digest_size), ikm, hashlib.sha256).digest()
+
+
+def derive_key(secret: bytes, info: bytes, salt: bytes | None = None, length: int = 32) -> bytes:
+    """`length` bytes of key material for one purpose (`info`) from a shared secret."""
+    return HKDF(algorithm=hashes.SHA256(), length=length, salt=salt, info=info).derive(secret)
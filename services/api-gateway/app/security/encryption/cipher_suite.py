@@ -1,7 +1,19 @@
-"""AES-256-GCM cipher suite helpers (production should use libsodium or cryptography)."""
+"""AES-256-GCM cipher suite helpers.
 
-def encrypt(plaintext: bytes, key: bytes) -> bytes:
-    raise NotImplementedError
+`encrypt` returns the 12-byte random nonce followed by the ciphertext and tag; `decrypt`
+takes that blob back. The key must be 32 bytes (see app/security/crypto/key_derivation.py).
+"""
+import os
 
-def decrypt(ciphertext: bytes, key: bytes) -> bytes:
-    raise NotImplementedError
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+NONCE_BYTES = 12
+
+
+def encrypt(plaintext: bytes, key: bytes, associated_data: bytes | None = None) -> bytes:
+    nonce = os.urandom(NONCE_BYTES)
+    return nonce + AESGCM(key).encrypt(nonce, plaintext, associated_data)
+
+
+def decrypt(ciphertext: bytes, key: bytes, associated_data: bytes | None = None) -> bytes:
+    return AESGCM(key).decrypt(ciphertext[:NONCE_BYTES], ciphertext[NONCE_BYTES:], associated_data)
@@ -1,9 +1,223 @@
-"""Open Policy Agent client for policy evaluation."""
+"""Open Policy Agent client for policy evaluation.
+
+Decisions go through OPA's Data API (`POST /v1/data/<policy>`) on the shared pooled
+httpx client, so no connection setup happens per decision.
+
+- Cache: results are cached per worker, keyed by policy plus a hash of the canonical
+  JSON input (sorted keys), so equal inputs built in a different order share an entry.
+  Entries expire after `ttl` seconds, the cache is LRU-bounded, and identical
+  concurrent misses share one request.
+- Bundle revision: every uncached query asks for `provenance`. When the bundle revision
+  in a response differs from the one the cache was filled under, the whole cache is
+  dropped. `start()` also polls the revision every `revision_interval` seconds, so a
+  policy rollout reaches a worker that only serves cache hits.
+- Batching: `filter_allowed` answers "which of these N resources may the subject see"
+  with one query to a rule that takes `input.resources` and returns the allowed ids.
+  Each per-resource answer is cached, and only the misses are sent.
+
+OPA being unreachable raises `PolicyUnavailableError` (503): decisions fail closed.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+REVISION_PROBE = "system/gateway/revision"  # any path: OPA returns provenance even for undefined documents
+
+
+class PolicyUnavailableError(Exception):
+    """OPA could not be reached or answered with an error."""
+
+
+def input_digest(policy: str, input_data) -> str:
+    canonical = json.dumps(input_data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return f"{policy}:{hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()}"
+
+
+def bundle_revision(provenance: dict | None) -> str | None:
+    """One string for the loaded bundle revisions (several bundles, or the legacy single one)."""
+    if not provenance:
+        return None
+    bundles = provenance.get("bundles")
+    if bundles:
+        return ",".join(f"{name}={info.get('revision', '')}" for name, info in sorted(bundles.items()))
+    return provenance.get("revision")
+
 
 class OPAClient:
-    def __init__(self, base_url: str):
-        self.base_url = base_url
+    def __init__(self, base_url: str, client: httpx.AsyncClient | None = None, ttl: float = 30.0,
+                 max_entries: int = 50000, revision_interval: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.client = client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.revision_interval = revision_interval
+        self.revision: str | None = None
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._generation = 0  # bumped on revision change; results from older generations are not cached
+        self._watcher: asyncio.Task | None = None
+        self.queries = 0
+
+    # -- transport -------------------------------------------------------------
+    async def _post(self, policy: str, input_data) -> dict:
+        url = f"{self.base_url}/v1/data/{policy.strip('/')}"
+        self.queries += 1
+        try:
+            if self.client is not None:
+                response = await self.client.post(url, params={"provenance": "true"}, json={"input": input_data})
+            else:
+                async with httpx.AsyncClient() as c:
+                    response = await c.post(url, params={"provenance": "true"}, json={"input": input_data})
+            response.raise_for_status()
+            body = response.json()
+        except (httpx.HTTPError, ValueError) as exc:
+            raise PolicyUnavailableError(f"OPA query {policy} failed: {exc}") from exc
+        self._observe_revision(bundle_revision(body.get("provenance")))
+        return body
+
+    def _observe_revision(self, revision: str | None):
+        if revision is not None and revision != self.revision:
+            if self.revision is not None:
+                logger.info("OPA bundle revision %s -> %s: dropping %d cached decisions",
+                            self.revision, revision, len(self._entries))
+            self.revision = revision
+            self.clear()
+
+    # -- cache -----------------------------------------------------------------
+    def _get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry[1]
+
+    def _put(self, key: str, value, generation: int):
+        if generation != self._generation:
+            return  # answered under a revision that has since been replaced
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+
+    # -- decisions -------------------------------------------------------------
+    async def evaluate(self, policy: str, input_data: dict):
+        """The policy's result for `input_data` (None when undefined)."""
+        key = input_digest(policy, input_data)
+        hit, value = self._get(key)
+        if hit:
+            return value
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.create_task(self._evaluate(policy, input_data, key))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _evaluate(self, policy: str, input_data: dict, key: str):
+        generation = self._generation
+        body = await self._post(policy, input_data)
+        # A revision change seen in this very response already bumped the generation
+        generation = self._generation if bundle_revision(body.get("provenance")) == self.revision else generation
+        result = body.get("result")
+        self._put(key, result, generation)
+        return result
+
+    async def allowed(self, policy: str, input_data: dict) -> bool:
+        return await self.evaluate(policy, input_data) is True
+
+    async def filter_allowed(self, policy: str, subject: dict, resources: list[dict], id_key: str = "id") -> set:
+        """Ids of `resources` that `policy` allows for `subject`, in at most one OPA query.
+
+        `policy` must accept `input.subject` and `input.resources` and return the allowed ids.
+        """
+        allowed, misses, keys = set(), [], {}
+        for resource in resources:
+            key = input_digest(policy, {"subject": subject, "resource": resource})
+            hit, value = self._get(key)
+            if hit:
+                if value:
+                    allowed.add(resource[id_key])
+            else:
+                misses.append(resource)
+                keys[resource[id_key]] = key
+        if not misses:
+            return allowed
+        generation = self._generation
+        body = await self._post(policy, {"subject": subject, "resources": misses})
+        if bundle_revision(body.get("provenance")) == self.revision:
+            generation = self._generation
+        granted = set(body.get("result") or ())
+        for resource in misses:
+            ok = resource[id_key] in granted
+            self._put(keys[resource[id_key]], ok, generation)
+            if ok:
+                allowed.add(resource[id_key])
+        return allowed
+
+    # -- revision watch ----------------------------------------------------------
+    async def refresh_revision(self):
+        url = f"{self.base_url}/v1/data/{REVISION_PROBE}"
+        try:
+            if self.client is not None:
+                response = await self.client.get(url, params={"provenance": "true"})
+            else:
+                async with httpx.AsyncClient() as c:
+                    response = await c.get(url, params={"provenance": "true"})
+            response.raise_for_status()
+            self._observe_revision(bundle_revision(response.json().get("provenance")))
+        except (httpx.HTTPError, ValueError) as exc:
+            logger.warning("OPA revision check failed: %s", exc)
+
+    def start(self):
+        if self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
+        return self._watcher
+
+    async def _watch(self):
+        while True:
+            await self.refresh_revision()
+            await asyncio.sleep(self.revision_interval)
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+
+_opa: OPAClient | None = None
+
+
+def init_opa_client(base_url: str, client: httpx.AsyncClient | None = None, **options) -> OPAClient:
+    global _opa
+    _opa = OPAClient(base_url, client, **options)
+    _opa.start()
+    return _opa
+
+
+def get_opa_client() -> OPAClient | None:
+    return _opa
+
 
-    def evaluate(self, policy: str, input_data: dict):
-        # call OPA REST API
-        return {}
+async def close_opa_client():
+    global _opa
+    if _opa is not None:
+        await _opa.stop()
+    _opa = None
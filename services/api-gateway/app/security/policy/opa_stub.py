@@ -0,0 +1,72 @@
+"""A stand-in for OPA's Data API, for tests and local development.
+
+Rules are plain Python callables, `input -> result`, registered under a policy path.
+Every query is recorded in `queries`, and `revision` is reported in the `provenance`
+of each response the way an OPA bundle does. Setting `revision` simulates a bundle
+rollout, and `fail` makes every query return 500.
+
+    python -m app.security.policy.opa_stub  # serves the default gateway rules on :8181
+"""
+import json
+from urllib.parse import parse_qs
+
+DOCUMENTS_VISIBLE = "gateway/documents/visible"
+
+
+def _documents_visible(input_data: dict) -> list:
+    # Same-tenant documents; failed ingestions are hidden from viewers
+    subject = input_data.get("subject") or {}
+    return [
+        resource["id"] for resource in input_data.get("resources") or ()
+        if resource.get("tenant_id") == subject.get("tenant_id")
+        and not (resource.get("status") == "failed" and subject.get("role") == "viewer")
+    ]
+
+
+DEFAULT_RULES = {DOCUMENTS_VISIBLE: _documents_visible}
+
+
+class StubOPA:
+    def __init__(self, rules: dict | None = None, revision: str = "1"):
+        self.rules = dict(DEFAULT_RULES if rules is None else rules)
+        self.revision = revision
+        self.fail = False
+        self.queries: list[tuple[str, dict | None]] = []
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        path = scope["path"]
+        if not path.startswith("/v1/data/"):
+            return await self._send(send, 404, {"code": "not_found"})
+        policy = path[len("/v1/data/"):].strip("/")
+        input_data = json.loads(body).get("input") if body else None
+        self.queries.append((policy, input_data))
+        if self.fail:
+            return await self._send(send, 500, {"code": "internal_error", "message": "stub failure"})
+        response = {}
+        rule = self.rules.get(policy)
+        if rule is not None:
+            response["result"] = rule(input_data or {})
+        if "provenance" in parse_qs(scope.get("query_string", b"").decode(), keep_blank_values=True):
+            response["provenance"] = {"version": "stub", "bundles": {"gateway": {"revision": self.revision}}}
+        await self._send(send, 200, response)
+
+    @staticmethod
+    async def _send(send, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(StubOPA(), host="127.0.0.1", port=8181)
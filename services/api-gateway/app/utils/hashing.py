@@ -1,6 +1,21 @@
 """Hashing utilities (SHA-256, file checksums)."""
 import hashlib
+from typing import Iterable
+
+CHUNK_SIZE = 1024 * 1024
 
 
 def sha256_hex(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
+
+
+def sha256_chunks(chunks: Iterable[bytes]) -> str:
+    """Incremental SHA-256 over an iterable of byte chunks (never holds the whole input)."""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sha256_file(fileobj, chunk_size: int = CHUNK_SIZE) -> str:
+    return sha256_chunks(iter(lambda: fileobj.read(chunk_size), b""))
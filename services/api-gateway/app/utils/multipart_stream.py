@@ -0,0 +1,85 @@
+"""Incremental multipart/form-data reader for large uploads.
+
+Starlette's `UploadFile` spools the whole part to a temp file before the route runs, which
+makes on-the-fly size/type checks impossible. `iter_file_part` feeds the request body to
+python-multipart's push parser as it arrives and yields the file part piece by piece.
+"""
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+
+class MultipartError(ValueError):
+    pass
+
+
+class FilePartStart:
+    __slots__ = ("filename", "content_type")
+
+    def __init__(self, filename: str, content_type: str):
+        self.filename = filename
+        self.content_type = content_type
+
+
+async def iter_file_part(request, field_name: str = "file"):
+    """Yield a `FilePartStart` for the `field_name` part, then its data as `bytes` chunks."""
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise MultipartError("Expected multipart/form-data with a boundary")
+
+    events = []
+    state = {"field": b"", "value": b"", "headers": {}, "current": None, "done": False}
+
+    def on_part_begin():
+        state["headers"] = {}
+        state["current"] = None
+
+    def on_header_field(data, start, end):
+        state["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["field"].lower()] = state["value"]
+        state["field"] = state["value"] = b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        if disposition.get(b"name", b"").decode() == field_name and b"filename" in disposition and not state["done"]:
+            part_type = state["headers"].get(b"content-type", b"application/octet-stream").decode("latin-1")
+            state["current"] = field_name
+            events.append(FilePartStart(disposition[b"filename"].decode("utf-8", "replace"), part_type))
+
+    def on_part_data(data, start, end):
+        if state["current"] is not None:
+            events.append(bytes(data[start:end]))
+
+    def on_part_end():
+        if state["current"] is not None:
+            state["done"] = True
+        state["current"] = None
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    seen = False
+    async for chunk in request.stream():
+        parser.write(chunk)
+        for event in events:
+            seen = True
+            yield event
+        events.clear()
+    parser.finalize()
+    for event in events:
+        seen = True
+        yield event
+    if not seen:
+        raise MultipartError(f"Missing file field '{field_name}'")
@@ -1,4 +1,153 @@
-"""Pagination helpers (offset, cursor-based)."""
+"""Pagination helpers (offset, cursor-based).
+
+List endpoints use keyset pagination: rows are ordered by a (possibly multi-column) sort
+key that always ends in the primary key. The cursor carries the last row's key values,
+and the next page is a `WHERE (k1, k2, id) > (:v1, :v2, :id)` seek on a composite index.
+Page 1000 therefore costs the same as page 1, unlike OFFSET.
+
+A NULL key would make that comparison unknown and end the listing early, so sort keys
+must be NOT NULL: a nullable column is sorted through an expression such as
+`coalesce(filename, '')`, indexed the same way. Cursor values are read back from the
+query itself, so they always match what the seek compares.
+
+Cursors are opaque: base64url JSON plus an HMAC over the payload and a `scope` (endpoint,
+tenant, sort). A cursor can't be forged, edited, or replayed against another tenant or
+sort order.
+"""
+import base64
+import hashlib
+import hmac
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import and_, or_, tuple_
+
+from app.core.config import get_settings
+from app.utils.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class InvalidSort(ValueError):
+    pass
+
 
 def offset_pagination(query, limit, offset):
     return query.limit(limit).offset(offset)
+
+
+def _cursor_secret() -> bytes:
+    settings = get_settings()
+    return (settings.CURSOR_SECRET or settings.SECRET_KEY).encode()
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _unb64(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def encode_cursor(values: list, scope: str) -> str:
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":")).encode()
+    signature = hmac.new(_cursor_secret(), scope.encode() + b"\0" + payload, hashlib.sha256).digest()[:16]
+    return f"{_b64(payload)}.{_b64(signature)}"
+
+
+def decode_cursor(cursor: str, scope: str, size: int) -> list:
+    try:
+        payload_part, signature_part = cursor.split(".", 1)
+        payload, signature = _unb64(payload_part), _unb64(signature_part)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor") from None
+    expected = hmac.new(_cursor_secret(), scope.encode() + b"\0" + payload, hashlib.sha256).digest()[:16]
+    if not hmac.compare_digest(signature, expected):
+        raise InvalidCursor("Cursor does not belong to this listing")
+    values = json.loads(payload)
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Malformed cursor")
+    return [_decode_value(v) for v in values]
+
+
+def parse_sort(sort: str | None, allowed: dict, default: str, tiebreaker) -> list[tuple[str, object, bool]]:
+    """`"-created_at,filename"` -> [(name, column, descending), ...] ending in the tiebreaker."""
+    keys = []
+    for part in (sort or default).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        descending = part.startswith("-")
+        name = part.lstrip("+-")
+        if name not in allowed:
+            raise InvalidSort(f"Cannot sort by '{name}'; allowed: {', '.join(sorted(allowed))}")
+        if any(existing == name for existing, _, _ in keys):
+            continue
+        keys.append((name, allowed[name], descending))
+    if not any(column is tiebreaker for _, column, _ in keys):
+        keys.append(("id", tiebreaker, keys[-1][2] if keys else False))
+    for name, column, _ in keys:
+        if getattr(column, "nullable", False):
+            raise ValueError(f"Sort key '{name}' is nullable; sort on a coalesce() of it instead")
+    return keys
+
+
+def seek_after(keys, values):
+    """WHERE clause selecting rows strictly after `values` in `keys` order."""
+    columns = [column for _, column, _ in keys]
+    directions = {descending for _, _, descending in keys}
+    if len(directions) == 1:
+        # Uniform direction: a row-value comparison the planner maps onto the composite index
+        left, right = tuple_(*columns), tuple_(*values)
+        return left < right if directions.pop() else left > right
+    clauses = []
+    for i, (_, column, descending) in enumerate(keys):
+        prefix = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*prefix, column < values[i] if descending else column > values[i]))
+    return or_(*clauses)
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    limit: int
+    next_cursor: str | None = None
+    sort: str = ""
+    meta: dict = field(init=False)
+
+    def __post_init__(self):
+        self.meta = {"limit": self.limit, "next_cursor": self.next_cursor, "sort": self.sort}
+
+
+async def keyset_page(db, query, allowed: dict, tiebreaker, sort: str | None = None, cursor: str | None = None,
+                      limit: int = DEFAULT_PAGE_SIZE, scope: str = "", default_sort: str = "id") -> KeysetPage:
+    """Run one page of `query` (a `select(Model)`); rows come back as ORM objects."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    keys = parse_sort(sort, allowed, default_sort, tiebreaker)
+    sort_signature = ",".join(("-" if descending else "") + name for name, _, descending in keys)
+    scope = f"{scope}|{sort_signature}"
+    if cursor:
+        query = query.where(seek_after(keys, decode_cursor(cursor, scope, len(keys))))
+    columns = [column for _, column, _ in keys]
+    order = [column.desc() if descending else column.asc() for _, column, descending in keys]
+    rows = (await db.execute(query.add_columns(*columns).order_by(*order).limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(list(rows[-1][1:]), scope)
+    return KeysetPage([row[0] for row in rows], limit, next_cursor, sort_signature)
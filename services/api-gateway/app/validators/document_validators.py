@@ -1,8 +1,15 @@
 """Document validation helpers (file type, size, path traversal)."""
+import os
 
 ALLOWED_TYPES = ["application/pdf", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]
 MAX_SIZE_BYTES = 50 * 1024 * 1024
 
+# Leading bytes per allowed type; DOCX is a ZIP container
+MAGIC_BYTES = {
+    "application/pdf": b"%PDF-",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": b"PK\x03\x04",
+}
+
 
 def validate_file_type(mimetype: str) -> bool:
     return mimetype in ALLOWED_TYPES
@@ -10,3 +17,15 @@ def validate_file_type(mimetype: str) -> bool:
 
 def validate_file_size(size: int) -> bool:
     return size <= MAX_SIZE_BYTES
+
+
+def validate_magic_bytes(mimetype: str, head: bytes) -> bool:
+    """Check the first bytes of the upload actually match the declared type."""
+    magic = MAGIC_BYTES.get(mimetype)
+    return magic is not None and head.startswith(magic)
+
+
+def safe_filename(filename: str) -> str:
+    # Drop any client-supplied directory components (../, C:\...)
+    name = os.path.basename(filename.replace("\\", "/")).strip()
+    return name or "upload"
@@ -0,0 +1 @@
+"""Gateway benchmarks (run as scripts: `python -m benchmarks.<name>`)."""
@@ -0,0 +1,293 @@
+"""Throughput and latency of the gateway's hot endpoints, with a regression gate.
+
+Drives the real ASGI app in-process through httpx, with no sockets and no uvicorn. It
+covers login, register, upload, search (lexical, so no embedding service is needed) and
+document listing. Each endpoint runs at several concurrency levels, and each level
+reports req/s and p50/p95/p99 latency.
+
+Backends: by default a throwaway SQLite database and no Redis. `--database-url` and
+`--redis-url` point the run at real services instead; `make bench-services` starts the
+docker-compose Postgres and Redis (run `make migrate` against it first so the RLS
+policies exist).
+
+Baselines: `--save-baseline` writes `baselines/<backend>.json`. `--compare` re-runs and
+exits 1 when any endpoint/level is worse than the baseline by more than `--threshold`
+on p50 or throughput, or by twice that on p95 (tails are noisier). Both files record a
+short CPU calibration loop, and the baseline is scaled up by it before comparing, so a
+slower machine does not read as a regression. p99 is reported but not gated: with a
+few hundred requests it is a handful of samples.
+
+Usage: python -m benchmarks.bench_hot_paths [--concurrency 1,8,32] [--requests 200]
+                                            [--save-baseline | --compare] [--only login,search]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import httpx
+
+from app.core import db as db_module
+from app.core.redis_client import close_redis, init_redis
+from app.core.security import configure_hash_executor, hash_password, shutdown_hash_executor
+from app.core.storage import init_storage
+from app.middleware.rate_limit import rate_limiter
+from app.models import audit_log_model, chunk, document, outbox, tenant, user  # noqa: F401  (register tables on Base.metadata)
+from app.models.base import Base
+from app.models.chunk import Chunk
+from app.models.document import Document
+from app.models.tenant import Tenant
+from app.models.user import User
+from app.routes.v1.search import init_search
+from app.security.auth.jwt_handler import create_Ajwt
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+GATED_METRICS = {"p50_ms": 1.0, "p95_ms": 2.0}  # metric -> multiple of --threshold allowed
+PASSWORD = "bench-Passw0rd!"
+SEARCH_TERMS = ("steel", "roofing", "excavation", "welding", "EN 1090-2", "lot", "foundations", "CPV 45223210-1")
+CHUNK_TEXTS = (
+    "Lot {n}: structural steel per EN 1090-2, CPV 45223210-1",
+    "Lot {n}: roofing works and drainage, CPV 45261000-4",
+    "Excavation of foundations for block {n}",
+    "Welding per EN ISO 3834-2, execution class EXC{m}",
+)
+
+
+@dataclass
+class Fixture:
+    """Seeded state the scenarios share: one verified user in one tenant."""
+    run_id: str
+    email: str
+    headers: dict
+
+
+@dataclass
+class Scenario:
+    name: str
+    request: Callable[[Fixture, int], dict]  # i -> httpx.request(**kwargs)
+    expect: int = 200
+    hashes: bool = False  # Argon2 on the request path: run fewer requests per level
+
+
+def _pdf(fx: Fixture, i: int) -> bytes:
+    # Unique content per request, so every upload stores a new blob instead of deduplicating
+    return b"%PDF-1.7\n" + hashlib.sha256(f"{fx.run_id}:{i}".encode()).digest() * 2048
+
+
+SCENARIOS = [
+    Scenario("login", lambda fx, i: {
+        "method": "POST", "url": "/v1/auth/login", "json": {"email": fx.email, "password": PASSWORD},
+    }, hashes=True),
+    Scenario("register", lambda fx, i: {
+        "method": "POST", "url": "/v1/auth/register", "json": {
+            "tenant_name": f"bench-{fx.run_id}-{i}", "email": f"bench-{fx.run_id}-{i}@example.com",
+            "password": PASSWORD, "firstName": "Bench", "lastName": "User",
+        },
+    }, hashes=True),
+    Scenario("upload", lambda fx, i: {
+        "method": "POST", "url": "/v1/documents/upload", "headers": fx.headers,
+        "files": {"file": (f"bench-{i}.pdf", _pdf(fx, i), "application/pdf")},
+    }, expect=201),
+    # A rotating set of queries: the first pass misses the result cache, later ones mostly hit
+    Scenario("search", lambda fx, i: {
+        "method": "POST", "url": "/v1/search/query", "headers": fx.headers,
+        "json": {"query": f"{SEARCH_TERMS[i % len(SEARCH_TERMS)]} {i % 32}", "mode": "lexical", "top_k": 10},
+    }),
+    Scenario("list", lambda fx, i: {
+        "method": "GET", "url": "/v1/documents/", "headers": fx.headers, "params": {"limit": 50},
+    }),
+]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def calibrate(rounds: int = 5) -> float:
+    """Best-of-N time (ms) for a fixed mix of interpreter work and hashing."""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        digest = b""
+        for n in range(20000):
+            digest = hashlib.sha256(digest + str(n).encode()).digest()
+        sorted({str(n * 7919 % 10007): n for n in range(20000)})
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def setup_backends(workdir: str, database_url: str | None, redis_url: str | None) -> str:
+    """Wire the app's module-level singletons the way `main.startup_event` does, minus
+    outbound services (event transport, embedding service, ingestion). Returns the backend name."""
+    url = database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    db_module.init_db(url)
+    db_module.init_async_db(url)
+    Base.metadata.create_all(db_module.engine)
+    if redis_url:
+        init_redis(redis_url)
+    configure_hash_executor()
+    init_storage(os.path.join(workdir, "blobs"))
+    init_search("http://embedding.invalid", os.path.join(workdir, "indexes"))
+    rate_limiter.enabled = False  # measure the endpoints, not 429s
+    return db_module.engine.dialect.name
+
+
+def seed(run_id: str, documents: int = 200, chunks: int = 2000) -> Fixture:
+    """One verified user, `documents` documents to page through and `chunks` searchable chunks."""
+    email = f"bench-owner-{run_id}@example.com"
+    with db_module.SessionLocal() as session:
+        owner_tenant = Tenant(name=f"bench-owner-{run_id}")
+        session.add(owner_tenant)
+        session.flush()
+        owner = User(first_name="Bench", last_name="Owner", email=email, password_hash=hash_password(PASSWORD),
+                     tenant_id=owner_tenant.id, role="owner", is_active=True, is_verified=True)
+        session.add(owner)
+        docs = [Document(tenant_id=owner_tenant.id, filename=f"seed-{n}.pdf", path=f"seed/{run_id}/{n}",
+                         sha256=hashlib.sha256(f"{run_id}:seed:{n}".encode()).hexdigest(), size_bytes=1024,
+                         content_type="application/pdf") for n in range(documents)]
+        session.add_all(docs)
+        session.flush()
+        session.add_all([
+            Chunk(document_id=docs[n % documents].id, tenant_id=owner_tenant.id, chunk_index=n,
+                  text=CHUNK_TEXTS[n % len(CHUNK_TEXTS)].format(n=n % 32, m=n % 4 + 1))
+            for n in range(chunks)
+        ])
+        session.commit()
+        return Fixture(run_id, email, {"Authorization": f"Bearer {create_Ajwt(owner.id, owner_tenant.id)}"})
+
+
+async def measure(client: httpx.AsyncClient, scenario: Scenario, fx: Fixture, concurrency: int,
+                  requests: int, offset: int = 0) -> dict:
+    """Run `requests` calls with `concurrency` in flight; latency in ms, errors counted by status."""
+    latencies: list[float] = []
+    errors: dict[int, int] = {}
+    counter = iter(range(offset, offset + requests))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            res = await client.request(**scenario.request(fx, i))
+            latencies.append((time.perf_counter() - started) * 1000)
+            if res.status_code != scenario.expect:
+                errors[res.status_code] = errors.get(res.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": requests, "rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 3), "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3), "errors": errors,
+    }
+
+
+async def run_suite(app, fx: Fixture, scenarios: list[Scenario], levels: list[int], requests: int,
+                    warmup: int = 5, log=print) -> dict:
+    results: dict[str, dict[str, dict]] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        offset = 0
+        for scenario in scenarios:
+            per_level = max(10, requests // 5) if scenario.hashes else requests
+            await measure(client, scenario, fx, 1, warmup, offset)
+            offset += warmup
+            results[scenario.name] = {}
+            for level in levels:
+                row = await measure(client, scenario, fx, level, per_level, offset)
+                offset += per_level
+                results[scenario.name][str(level)] = row
+                log(f"{scenario.name:<10}{level:>6}{row['rps']:>10.1f}{row['p50_ms']:>10.2f}"
+                    f"{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}{sum(row['errors'].values()):>8}")
+    return results
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Regressions of `current` against `baseline`, after scaling by the calibration ratio."""
+    # Only ever loosen: a calibration loop that happens to run fast must not tighten the gate
+    scale = max(1.0, current["meta"]["calibration_ms"] / baseline["meta"]["calibration_ms"])
+    regressions = []
+    for name, levels in baseline["results"].items():
+        for level, base in levels.items():
+            row = current["results"].get(name, {}).get(level)
+            if row is None:
+                continue
+            for metric, slack in GATED_METRICS.items():
+                allowed = base[metric] * scale * (1 + threshold * slack)
+                if row[metric] > allowed:
+                    regressions.append(f"{name} @{level}: {metric} {row[metric]:.2f} > {allowed:.2f}")
+            floor = base["rps"] / scale * (1 - threshold)
+            if row["rps"] < floor:
+                regressions.append(f"{name} @{level}: rps {row['rps']:.1f} < {floor:.1f}")
+    return regressions
+
+
+async def main(args) -> int:
+    from app.main import app  # after argument parsing: importing the app reads Settings from the env
+
+    scenarios = [s for s in SCENARIOS if not args.only or s.name in args.only.split(",")]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    run_id = uuid.uuid4().hex[:8]
+    with tempfile.TemporaryDirectory(prefix="gateway-bench-") as workdir:
+        backend = setup_backends(workdir, args.database_url, args.redis_url)
+        fx = seed(run_id)
+        print(f"backend={backend} redis={'yes' if args.redis_url else 'no'} run={run_id}")
+        print(f"{'endpoint':<10}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        try:
+            results = await run_suite(app, fx, scenarios, levels, args.requests)
+        finally:
+            await close_redis()
+            await db_module.dispose_async_db()
+            db_module.engine.dispose()
+            shutdown_hash_executor()
+
+    report = {
+        "meta": {
+            "backend": backend, "redis": bool(args.redis_url), "python": platform.python_version(),
+            "calibration_ms": round(calibrate(), 3), "requests": args.requests, "created": time.time(),
+        },
+        "results": results,
+    }
+    baseline_path = Path(args.baseline or BASELINE_DIR / f"{backend}.json")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    failed = [f"{name} @{level}: errors {row['errors']}"
+              for name, rows in results.items() for level, row in rows.items() if row["errors"]]
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"baseline written to {baseline_path}")
+    elif args.compare:
+        failed += compare(json.loads(baseline_path.read_text()), report, args.threshold)
+    for line in failed:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated in-flight request counts")
+    parser.add_argument("--requests", type=int, default=200, help="requests per level (a fifth for Argon2 endpoints)")
+    parser.add_argument("--only", help="comma-separated endpoint names: " + ",".join(s.name for s in SCENARIOS))
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"))
+    parser.add_argument("--redis-url", default=os.getenv("BENCH_REDIS_URL"))
+    parser.add_argument("--baseline", help="baseline file (default: benchmarks/baselines/<backend>.json)")
+    parser.add_argument("--output", help="also write this run's results as JSON")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--save-baseline", action="store_true")
+    mode.add_argument("--compare", action="store_true")
+    sys.exit(asyncio.run(main(parser.parse_args())))
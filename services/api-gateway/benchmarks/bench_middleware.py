@@ -0,0 +1,90 @@
+"""Per-layer overhead of the gateway middleware chain.
+
+Drives raw ASGI calls (no sockets, no HTTP parsing) through progressively deeper prefixes
+of `bootstrap.MIDDLEWARE_STACK` and reports the marginal cost of each layer. A
+BaseHTTPMiddleware pass-through is measured alongside as a reference point.
+
+Usage: python -m benchmarks.bench_middleware [--requests 20000]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.bootstrap import MIDDLEWARE_STACK
+from app.core.rate_limiter import PolicyTable, RateLimitPolicy, RateLimiter
+from app.middleware.rate_limit import RateLimitMiddleware
+
+BODY = b'{"ok":true}'
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": BODY})
+
+
+class PassThroughBaseHTTP(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+def build(layers):
+    app = endpoint
+    for layer in reversed(layers):
+        if layer is RateLimitMiddleware:
+            # Effectively unlimited so the benchmark measures the decision path, not 429s
+            limiter = RateLimiter(policies=PolicyTable({}, {"/": {"*": RateLimitPolicy(rate=1e9, burst=10**9)}}))
+            app = layer(app, limiter=limiter)
+        else:
+            app = layer(app)
+    return app
+
+
+def make_scope():
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/bench", "raw_path": b"/bench", "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+
+
+async def run(app, n: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(min(n, 500)):  # warm-up
+        await app(make_scope(), receive, send)
+    started = time.perf_counter()
+    for _ in range(n):
+        await app(make_scope(), receive, send)
+    return (time.perf_counter() - started) / n * 1e6
+
+
+async def main(n: int):
+    rows = [("bare endpoint", await run(endpoint, n))]
+    for depth in range(1, len(MIDDLEWARE_STACK) + 1):
+        layers = MIDDLEWARE_STACK[:depth]
+        # LoggingMiddleware prints one line per request; keep the benchmark output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows.append((f"+ {layers[-1].__name__}", await run(build(layers), n)))
+    rows.append(("BaseHTTPMiddleware pass-through (reference)", await run(PassThroughBaseHTTP(endpoint), n)))
+
+    print(f"{'layer':<46}{'us/req':>10}{'delta':>10}")
+    previous = rows[0][1]
+    for name, cost in rows:
+        print(f"{name:<46}{cost:>10.2f}{cost - previous:>+10.2f}")
+        if not name.startswith("BaseHTTP"):
+            previous = cost
+    print(f"full chain overhead: {rows[-2][1] - rows[0][1]:.2f} us/req")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args().requests))
@@ -1,5 +1,22 @@
-"""Production server launcher (runs Uvicorn with recommended production flags)."""
+"""Production server launcher (runs Uvicorn with recommended production flags).
+
+The workers share one Prometheus multiprocess directory (`/metrics` aggregates it). It
+has to be set before uvicorn forks, and emptied so a restart doesn't resurrect the
+previous run's counters. The worker count is `WEB_CONCURRENCY`, which also sizes each
+worker's CPU pools so that together they do not oversubscribe the host.
+"""
+import os
+import shutil
+import tempfile
+
 import uvicorn
 
+from app.core.config import get_settings
+
+WORKERS = get_settings().WEB_CONCURRENCY
+
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, workers=4)
+    metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "api-gateway-metrics"))
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, workers=WORKERS)
@@ -2,7 +2,54 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.core import db as db_module
+from app.models.base import Base
+from app.models import audit_log_model, chunk, document, outbox, tenant, user  # noqa: F401  (register tables on Base.metadata)
+from app.core.storage import init_storage
+from app.middleware.rate_limit import rate_limiter
+from app.routes.v1 import search as search_routes
+from app.security.auth.jwt_handler import create_Ajwt
 
 @pytest.fixture
 def client():
     return TestClient(app)
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    """File-backed SQLite wired into both the sync and async session factories."""
+    url = f"sqlite:///{tmp_path / 'gateway.db'}"
+    db_module.init_db(url)
+    db_module.init_async_db(url)
+    Base.metadata.create_all(db_module.engine)
+    yield url
+    db_module.engine.dispose()
+    db_module.async_engine.sync_engine.dispose()
+    db_module.engine = db_module.SessionLocal = None
+    db_module.async_engine = db_module.AsyncSessionLocal = None
+
+
+@pytest.fixture(autouse=True)
+def search_service(tmp_path):
+    """Fresh per-test search caches/indexes (module state would otherwise leak across tests)."""
+    service = search_routes.init_search("http://embedding.invalid", str(tmp_path / "indexes"))
+    yield service
+    search_routes.embedding_client = None
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limits():
+    """Each test starts with full per-worker buckets (they are module state)."""
+    rate_limiter._local.clear()
+    yield
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return init_storage(str(tmp_path / "blobs"))
+
+
+@pytest.fixture
+def auth_headers():
+    """Bearer header for user 1 of tenant 1."""
+    return {"Authorization": f"Bearer {create_Ajwt(1, 1)}"}
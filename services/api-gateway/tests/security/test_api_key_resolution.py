@@ -0,0 +1,149 @@
+"""API key resolver: cached lookups, negative caching, middleware and revocation fan-out."""
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.bootstrap import MIDDLEWARE_STACK
+from app.core import db as db_module
+from app.models.tenant import Tenant
+from app.security.api_keys import APIKeyManager, APIKeyResolver, api_key_resolver
+from app.security.auth.jwt_handler import create_Ajwt
+
+
+class FakeBroker:
+    """In-memory Redis pub/sub: every subscriber gets every published message."""
+
+    def __init__(self):
+        self.queues: list[asyncio.Queue] = []
+
+    async def publish(self, channel, message):
+        for queue in self.queues:
+            queue.put_nowait({"type": "message", "channel": channel, "data": message.encode()})
+
+    def pubsub(self):
+        broker = self
+
+        class PubSub:
+            async def subscribe(self, channel):
+                self.queue = asyncio.Queue()
+                broker.queues.append(self.queue)
+
+            async def listen(self):
+                while True:
+                    yield await self.queue.get()
+
+            async def aclose(self):
+                broker.queues.remove(self.queue)
+
+        return PubSub()
+
+
+@pytest.fixture(autouse=True)
+def fresh_resolver():
+    api_key_resolver.clear()
+    yield
+    api_key_resolver.clear()
+
+
+async def create_key(tenant_id=1, scopes="documents.read search.query"):
+    async with db_module.AsyncSessionLocal() as db:
+        raw, key = await APIKeyManager().create(db, tenant_id, scopes)
+        return raw, key.id
+
+
+def test_hits_and_unknown_keys_are_cached(sqlite_db):
+    resolver = APIKeyResolver()
+
+    async def scenario():
+        raw, key_id = await create_key()
+        first, again = await resolver.resolve(raw), await resolver.resolve(raw)
+        assert first == again and first.id == key_id and first.tenant_id == 1
+        assert first.scopes == {"documents.read", "search.query"}
+        assert await resolver.resolve("not-a-key") is None and await resolver.resolve("not-a-key") is None
+        assert resolver.lookups == 2
+
+        other, _ = await create_key()
+        results = await asyncio.gather(*(resolver.resolve(other) for _ in range(20)))
+        assert len({r.id for r in results}) == 1 and resolver.lookups == 3  # one query for the burst
+
+    asyncio.run(scenario())
+
+
+def test_unknown_keys_cannot_evict_valid_ones(sqlite_db):
+    resolver = APIKeyResolver(max_entries=2, max_negative_entries=3)
+
+    async def scenario():
+        raw, key_id = await create_key()
+        assert (await resolver.resolve(raw)).id == key_id
+        for n in range(10):
+            assert await resolver.resolve(f"guess-{n}") is None
+        assert (await resolver.resolve(raw)).id == key_id and resolver.lookups == 11  # still cached
+        assert len(resolver._misses) == 3 and await resolver.resolve("guess-9") is None and resolver.lookups == 11
+
+    asyncio.run(scenario())
+
+
+def test_middleware_populates_context_and_rejects_bad_keys(sqlite_db):
+    with db_module.SessionLocal() as session:
+        session.add(Tenant(id=7, name="seven", plan="enterprise"))
+        session.commit()
+    raw, key_id = asyncio.run(create_key(tenant_id=7))
+    app = FastAPI()
+    for middleware in reversed(MIDDLEWARE_STACK):
+        app.add_middleware(middleware)
+
+    @app.get("/whoami")
+    async def whoami(request: Request):
+        ctx = request.state.ctx
+        return {"tenant_id": ctx.tenant_id, "plan": ctx.tenant_plan, "api_key_id": ctx.api_key_id,
+                "scopes": sorted(ctx.api_key_scopes)}
+
+    client = TestClient(app)
+    assert client.get("/whoami", headers={"X-API-Key": raw}).json() == {
+        "tenant_id": 7, "plan": "enterprise", "api_key_id": key_id, "scopes": ["documents.read", "search.query"]}
+    res = client.get("/whoami", headers={"X-API-Key": raw + "x"})
+    assert res.status_code == 401 and res.json()["error"] == "invalid_api_key"
+    assert client.get("/whoami").json()["api_key_id"] is None
+
+
+def test_rotation_through_the_api_retires_the_old_key(client, sqlite_db):
+    owner = {"Authorization": f"Bearer {create_Ajwt(1, 1, role='owner')}"}
+    created = client.post("/v1/api-keys/", json={"scopes": ["search.query"]}, headers=owner)
+    assert created.status_code == 201
+    old = created.json()
+    assert asyncio.run(api_key_resolver.resolve(old["key"])).id == old["id"]
+
+    rotated = client.post(f"/v1/api-keys/{old['id']}/rotate", headers=owner).json()
+    assert rotated["scopes"] == "search.query" and rotated["id"] != old["id"]
+    assert asyncio.run(api_key_resolver.resolve(old["key"])) is None
+    assert asyncio.run(api_key_resolver.resolve(rotated["key"])).id == rotated["id"]
+
+    other_tenant = {"Authorization": f"Bearer {create_Ajwt(2, 2, role='owner')}"}
+    assert client.delete(f"/v1/api-keys/{rotated['id']}", headers=other_tenant).status_code == 404
+    assert client.delete(f"/v1/api-keys/{rotated['id']}", headers=owner).json()["disabled"] is True
+    assert asyncio.run(api_key_resolver.resolve(rotated["key"])) is None
+
+
+def test_revocation_is_pushed_to_every_worker(sqlite_db):
+    broker = FakeBroker()
+    workers = [APIKeyResolver(redis_getter=lambda: broker, ttl=3600) for _ in range(2)]
+
+    async def scenario():
+        for worker in workers:
+            worker.start()
+        await asyncio.sleep(0)  # let both listeners subscribe
+        raw, key_id = await create_key()
+        assert all([(await w.resolve(raw)).id == key_id for w in workers])
+
+        async with db_module.AsyncSessionLocal() as db:
+            await APIKeyManager(resolver=workers[0]).revoke(db, key_id, tenant_id=1)
+        await asyncio.sleep(0)
+        # The second worker dropped its hour-long entry and re-reads the now disabled row
+        assert await workers[1].resolve(raw) is None and workers[1].lookups == 2
+        for worker in workers:
+            await worker.stop()
+        assert broker.queues == []
+
+    asyncio.run(scenario())
@@ -0,0 +1,77 @@
+"""verify_jwt: algorithm allow-list, verified-token cache and JWKS refetch coalescing."""
+import asyncio
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.security.auth import jwt_handler
+from app.security.auth.jwt_handler import create_Ajwt, verify_jwt
+from app.security.auth.token_cache import JWKSCache, VerifiedTokenCache
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(jwt_handler, "verified_tokens", VerifiedTokenCache())
+    monkeypatch.setattr(jwt_handler, "jwks_cache", None)
+
+
+def test_hs256_token_verifies_once_then_hits_cache(monkeypatch):
+    token = create_Ajwt(7, 3)
+    calls = []
+    real_decode = jwt.decode
+    monkeypatch.setattr(jwt, "decode", lambda *a, **kw: calls.append(1) or real_decode(*a, **kw))
+
+    first = asyncio.run(verify_jwt(token))
+    second = asyncio.run(verify_jwt(token))
+    assert first == second and first["tenant_id"] == 3
+    assert len(calls) == 1
+
+
+def test_cached_entry_does_not_outlive_exp():
+    cache = VerifiedTokenCache()
+    cache.put("tok", {"exp": time.time() + 1})
+    assert cache.get("tok") is not None
+    assert cache.get("tok", now=time.time() + 2) is None
+
+
+def test_alg_none_and_expired_tokens_are_rejected():
+    unsigned = jwt.encode({"user_id": 1, "tenant_id": 1, "exp": time.time() + 60}, None, algorithm="none")
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        asyncio.run(verify_jwt(unsigned))
+    now = int(time.time())
+    expired = jwt.encode({"iss": jwt_handler._issuer(), "iat": now - 120, "exp": now - 60}, "changeme", algorithm="HS256")
+    with pytest.raises(jwt.ExpiredSignatureError):
+        asyncio.run(verify_jwt(expired))
+
+
+def test_rs256_via_jwks_and_kid_miss_coalescing(monkeypatch):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    public_jwk["kid"] = "k1"
+    fetches = []
+
+    async def fetcher(url):
+        fetches.append(url)
+        await asyncio.sleep(0.01)
+        return {"keys": [public_jwk]}
+
+    monkeypatch.setattr(jwt_handler, "jwks_cache", JWKSCache("https://idp/jwks", fetcher=fetcher))
+    now = int(time.time())
+    claims = {"user_id": 1, "tenant_id": 9, "iss": jwt_handler._issuer(), "iat": now, "exp": now + 60}
+    tokens = [jwt.encode({**claims, "jti": str(i)}, private_key, algorithm="RS256", headers={"kid": "k1"}) for i in range(20)]
+
+    async def burst():
+        return await asyncio.gather(*(verify_jwt(t) for t in tokens))
+
+    results = asyncio.run(burst())
+    assert all(r["tenant_id"] == 9 for r in results)
+    assert len(fetches) == 1  # 20 concurrent kid misses, one JWKS request
+
+    # An unknown kid right after a fetch is rejected without hammering the JWKS endpoint
+    rogue = jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": "k2"})
+    with pytest.raises(jwt.InvalidKeyError):
+        asyncio.run(verify_jwt(rogue))
+    assert len(fetches) == 1
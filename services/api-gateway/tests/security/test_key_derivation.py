@@ -0,0 +1,18 @@
+"""HKDF (RFC 5869) key derivation: the RFC's SHA-256 test vector."""
+from app.security.crypto.key_derivation import derive_key, hkdf_extract
+
+IKM = bytes([0x0B]) * 22
+SALT = bytes(range(0x0D))
+INFO = bytes(range(0xF0, 0xFA))
+
+
+def test_rfc5869_test_case_1():
+    assert hkdf_extract(SALT, IKM).hex() == "077709362c2e32df0ddc3f0dc47bba6390b6c73bb50f9c3122ec844ad7c2b3e5"
+    assert derive_key(IKM, INFO, SALT, 42).hex() == (
+        "3cb25f25faacd57a90434f64d0362f2a2d2d0a90cf1a5a4c5db02d56ecc4c5bf34007208d5b887185865"
+    )
+
+
+def test_purposes_get_independent_keys():
+    assert derive_key(b"secret", b"a") != derive_key(b"secret", b"b")
+    assert len(derive_key(b"secret", b"a")) == 32
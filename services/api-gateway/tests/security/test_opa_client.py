@@ -0,0 +1,112 @@
+"""OPA client: decision cache, bundle-revision invalidation, batched list checks, fail-closed."""
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import db as db_module
+from app.models.document import Document
+from app.security.auth.jwt_handler import create_Ajwt
+from app.security.policy import opa_client as opa_module
+from app.security.policy.opa_client import OPAClient, PolicyUnavailableError
+from app.security.policy.opa_stub import DOCUMENTS_VISIBLE, StubOPA
+
+ALLOW = "gateway/authz/allow"
+
+
+def make_client(stub: StubOPA, **options) -> OPAClient:
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub))
+    return OPAClient("http://opa.test", http, **options)
+
+
+@pytest.fixture
+def stub():
+    return StubOPA({ALLOW: lambda input_data: input_data.get("role") == "owner", **StubOPA().rules})
+
+
+def test_decisions_are_cached_by_canonical_input(stub):
+    opa = make_client(stub)
+
+    async def scenario():
+        assert await opa.allowed(ALLOW, {"role": "owner", "tenant_id": 1}) is True
+        assert await opa.allowed(ALLOW, {"tenant_id": 1, "role": "owner"}) is True  # same input, other key order
+        assert await opa.allowed(ALLOW, {"role": "viewer", "tenant_id": 1}) is False
+        # Identical concurrent misses share one query
+        await asyncio.gather(*(opa.evaluate(ALLOW, {"role": "user"}) for _ in range(20)))
+
+    asyncio.run(scenario())
+    assert len(stub.queries) == 3
+
+
+def test_bundle_revision_change_drops_cached_decisions(stub):
+    opa = make_client(stub)
+
+    async def scenario():
+        await opa.evaluate(ALLOW, {"role": "owner"})
+        assert opa.revision == "gateway=1"
+        stub.rules[ALLOW] = lambda input_data: False  # a new bundle, rolled out as revision 2
+        stub.revision = "2"
+        await opa.refresh_revision()  # what the background watcher does every revision_interval
+        assert opa.revision == "gateway=2"
+        assert await opa.allowed(ALLOW, {"role": "owner"}) is False
+
+    asyncio.run(scenario())
+    assert [policy for policy, _ in stub.queries].count(ALLOW) == 2
+
+
+def test_revision_seen_on_a_query_invalidates_too(stub):
+    opa = make_client(stub)
+
+    async def scenario():
+        await opa.evaluate(ALLOW, {"role": "owner"})
+        stub.revision = "2"
+        await opa.evaluate(ALLOW, {"role": "viewer"})  # a miss reports the new revision
+        await opa.evaluate(ALLOW, {"role": "owner"})  # so the earlier answer was dropped
+
+    asyncio.run(scenario())
+    assert len(stub.queries) == 3
+
+
+def test_list_checks_are_one_batched_query(stub):
+    opa = make_client(stub)
+    subject = {"user_id": 1, "tenant_id": 1, "role": "user"}
+    resources = [{"id": i, "tenant_id": 1 if i % 2 else 2} for i in range(100)]
+
+    async def scenario():
+        visible = await opa.filter_allowed(DOCUMENTS_VISIBLE, subject, resources)
+        assert visible == {i for i in range(100) if i % 2}
+        assert await opa.filter_allowed(DOCUMENTS_VISIBLE, subject, resources) == visible
+        return await opa.filter_allowed(DOCUMENTS_VISIBLE, subject, resources[:10] + [{"id": 100, "tenant_id": 1}])
+
+    assert asyncio.run(scenario()) == {1, 3, 5, 7, 9, 100}
+    assert len(stub.queries) == 2  # the full page, then only the one unseen resource
+    assert len(stub.queries[0][1]["resources"]) == 100 and stub.queries[1][1]["resources"] == [{"id": 100, "tenant_id": 1}]
+
+
+def test_unreachable_opa_fails_closed(stub):
+    opa = make_client(stub)
+    stub.fail = True
+    with pytest.raises(PolicyUnavailableError):
+        asyncio.run(opa.allowed(ALLOW, {"role": "owner"}))
+
+
+def test_document_list_is_filtered_with_one_decision(client, sqlite_db, stub, monkeypatch):
+    with db_module.SessionLocal() as session:
+        for i in range(1, 6):
+            session.add(Document(id=i, tenant_id=1, filename=f"d{i}.pdf", sha256=f"{i:064x}",
+                                 status="failed" if i in (2, 4) else "ready"))
+        session.commit()
+    monkeypatch.setattr(opa_module, "_opa", make_client(stub))
+    viewer = {"Authorization": f"Bearer {create_Ajwt(1, 1, role='viewer')}"}
+
+    res = client.get("/v1/documents/", headers=viewer, params={"sort": "id"})
+    assert res.status_code == 200
+    assert [d["id"] for d in res.json()["documents"]] == [1, 3, 5]
+    assert len(stub.queries) == 1 and len(stub.queries[0][1]["resources"]) == 5
+    assert client.get("/v1/documents/", headers=viewer, params={"sort": "id"}).status_code == 200
+    assert len(stub.queries) == 1  # served from the decision cache
+
+    monkeypatch.setattr(opa_module, "_opa", make_client(stub))
+    stub.fail = True
+    res = client.get("/v1/documents/", headers=viewer)
+    assert res.status_code == 503 and res.json()["error"] == "policy_unavailable"
@@ -0,0 +1,90 @@
+"""Rate limiter: local pre-admission tier, Redis decisions and response headers."""
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.rate_limiter import PolicyTable, RateLimitPolicy, RateLimiter
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.models.enums import TenantPlan
+
+
+class FakeRedis:
+    """Stands in for the Lua script: a shared bucket that admits `budget` calls."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.calls = 0
+
+    def register_script(self, _source):
+        async def script(keys, args):
+            self.calls += 1
+            if self.budget > 0:
+                self.budget -= 1
+                return [1, self.budget, 0]
+            return [0, 0, 30000]
+        return script
+
+
+def test_denied_key_is_then_rejected_locally():
+    redis = FakeRedis(budget=2)
+    limiter = RateLimiter(redis_getter=lambda: redis)
+    policy = RateLimitPolicy(rate=1, burst=100)
+
+    async def scenario():
+        return [await limiter.check("t:1", policy) for _ in range(5)]
+
+    decisions = asyncio.run(scenario())
+    assert [d.allowed for d in decisions] == [True, True, False, False, False]
+    assert redis.calls == 3  # the last two never left the process
+    assert decisions[-1].local and decisions[-1].retry_after > 0
+
+
+def test_redis_denial_refunds_the_local_token():
+    redis = FakeRedis(budget=0)
+    clients = [redis]
+    limiter = RateLimiter(redis_getter=lambda: clients[0] if clients else None)
+    policy = RateLimitPolicy(rate=0.001, burst=3)
+
+    async def scenario():
+        denied = await limiter.check("t:1", policy)
+        limiter._local["t:1"].blocked_until = 0  # the global retry time has passed
+        clients.clear()  # from here on the local tier decides alone
+        return denied, [(await limiter.check("t:1", policy)).allowed for _ in range(4)]
+
+    denied, after = asyncio.run(scenario())
+    assert not denied.allowed
+    assert after == [True, True, True, False]  # the denied request cost nothing locally
+
+
+def test_local_bucket_caps_a_single_worker_without_redis():
+    limiter = RateLimiter()
+    policy = RateLimitPolicy(rate=0.001, burst=3)
+
+    async def scenario():
+        return [(await limiter.check("ip:x", policy)).allowed for _ in range(4)]
+
+    assert asyncio.run(scenario()) == [True, True, True, False]
+
+
+def test_policy_resolution_by_route_and_plan():
+    table = PolicyTable.from_config({"routes": {"/v1/search": {"enterprise": {"rate": 50, "burst": 50}}}})
+    assert table.resolve("/v1/auth/login", TenantPlan.enterprise)[0] == "/v1/auth/login"
+    assert table.resolve("/v1/search/query", TenantPlan.enterprise)[1].burst == 50
+    assert table.resolve("/v1/search/query", TenantPlan.free) == ("plan:free", table.plan_policies[TenantPlan.free])
+
+
+def test_middleware_sets_headers_and_returns_429():
+    app = FastAPI()
+    limiter = RateLimiter(policies=PolicyTable(route_policies={"/ping": {"*": RateLimitPolicy(rate=0.001, burst=1)}}))
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    client = TestClient(app)
+    first = client.get("/ping")
+    assert first.status_code == 200 and first.headers["RateLimit-Limit"] == "1"
+    second = client.get("/ping")
+    assert second.status_code == 429 and int(second.headers["Retry-After"]) >= 1
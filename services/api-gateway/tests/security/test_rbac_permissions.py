@@ -0,0 +1,75 @@
+"""RBAC: permission bitsets, per-tenant compiled roles and version-based recompilation."""
+import asyncio
+
+import pytest
+
+from app.core import db as db_module
+from app.core.authz import BUILTIN_ROLES, catalog, require_permission, role_permissions
+from app.models.role import Role
+from app.models.tenant import Tenant
+from app.security.api_keys import APIKeyManager, api_key_resolver
+from app.security.auth.jwt_handler import create_Ajwt
+
+
+@pytest.fixture(autouse=True)
+def fresh_roles(monkeypatch):
+    role_permissions.invalidate()
+    monkeypatch.setattr(role_permissions, "recheck_interval", 0.0)  # re-read the version on every request
+    yield
+    role_permissions.invalidate()
+
+
+def bearer(user_id, tenant_id, role=None):
+    return {"Authorization": f"Bearer {create_Ajwt(user_id, tenant_id, role=role)}"}
+
+
+def test_catalog_masks_and_unknown_permissions():
+    read, write = catalog.bit("documents.read"), catalog.bit("documents.write")
+    assert read & write == 0 and catalog.mask(["documents.read", "documents.write", "nope"]) == read | write
+    assert catalog.names(BUILTIN_ROLES["viewer"]) == ["documents.read", "search.query", "users.read"]
+    with pytest.raises(ValueError):
+        require_permission("documents.raed")
+
+
+def test_builtin_roles_gate_routes(client, sqlite_db, storage):
+    viewer, user = bearer(1, 1, "viewer"), bearer(1, 1)  # no role claim = "user"
+    assert client.get("/v1/documents/", headers=viewer).status_code == 200
+    res = client.post("/v1/documents/upload", headers=viewer, files={"file": ("a.pdf", b"%PDF-1.7 x", "application/pdf")})
+    assert res.status_code == 403 and "documents.write" in res.json()["detail"]
+    assert client.get("/v1/api-keys/", headers=user).status_code == 403
+    assert client.get("/v1/api-keys/", headers=bearer(1, 1, "owner")).status_code == 200
+
+
+def test_tenant_roles_recompile_only_when_their_version_moves(client, sqlite_db):
+    with db_module.SessionLocal() as session:
+        session.add_all([Tenant(id=1, name="acme"), Role(tenant_id=1, name="auditor", permissions="documents.read")])
+        session.commit()
+        assert session.get(Tenant, 1).roles_version == 1
+    auditor = bearer(5, 1, "auditor")
+    search = {"query": "anything", "mode": "lexical"}
+
+    assert [client.get("/v1/documents/", headers=auditor).status_code for _ in range(3)] == [200] * 3
+    assert client.post("/v1/search/query", json=search, headers=auditor).status_code == 403
+    compiles = role_permissions.compiles
+    assert client.get("/v1/documents/", headers=auditor).status_code == 200
+    assert role_permissions.compiles == compiles  # version unchanged: nothing recompiled
+
+    with db_module.SessionLocal() as session:
+        role = session.query(Role).filter_by(tenant_id=1, name="auditor").one()
+        role.permissions = "documents.read,search.query"
+        session.commit()
+    assert client.post("/v1/search/query", json=search, headers=auditor).status_code == 200
+    assert role_permissions.compiles == compiles + 1
+    # A role the tenant never defined grants nothing
+    assert client.get("/v1/documents/", headers=bearer(5, 1, "intern")).status_code == 403
+
+
+def test_api_key_scopes_compile_to_the_same_bitset(sqlite_db):
+    async def scenario():
+        async with db_module.AsyncSessionLocal() as db:
+            raw, _ = await APIKeyManager().create(db, 1, "documents.read,search.query,unknown.scope")
+        key = await api_key_resolver.resolve(raw)
+        api_key_resolver.clear()
+        return key.permissions
+
+    assert asyncio.run(scenario()) == catalog.mask(["documents.read", "search.query"])
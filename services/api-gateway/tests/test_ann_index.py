@@ -0,0 +1,138 @@
+"""Per-tenant IVF index: recall, incremental updates, persistence and tenant isolation."""
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from app.core import db as db_module
+from app.models.chunk import Chunk
+from app.search.ann import ANNIndexManager, TenantANNIndex
+from app.search.engine import TenantMatrix, top_k_cosine
+from app.search.service import SearchService
+from app.search.vectors import normalize_rows, pack_vector
+
+
+def clustered(rng, n, dim=32, clusters=20):
+    centers = rng.normal(size=(clusters, dim))
+    return (centers[rng.integers(0, clusters, n)] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def test_recall_improves_with_nprobe(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = clustered(rng, 5000)
+    index = TenantANNIndex(str(tmp_path / "t1"))
+    index.build(np.arange(5000), np.arange(5000) // 10, vectors)
+    queries = vectors[:20] + 0.05 * rng.normal(size=(20, 32)).astype(np.float32)
+    exact, _ = top_k_cosine(normalize_rows(vectors), queries, 10)
+
+    def recall(nprobe):
+        found = index.search(queries, 10, nprobe)
+        return np.mean([len({hit[0] for hit in hits} & set(truth)) / 10 for hits, truth in zip(found, exact)])
+
+    assert recall(64) >= 0.95
+    assert recall(64) >= recall(1)
+
+
+def test_incremental_insert_delete_and_reopen(tmp_path):
+    rng = np.random.default_rng(1)
+    vectors = clustered(rng, 500)
+    index = TenantANNIndex(str(tmp_path / "t1"), refresh_interval=0, min_compact_rows=10**6)
+    index.build(np.arange(500), np.zeros(500), vectors)
+
+    new = rng.normal(size=(1, 32)).astype(np.float32)
+    index.add([9000], [42], new)
+    assert index.search(new, 1, nprobe=1)[0][0][:2] == (9000, 42)
+
+    index.delete([9000])
+    assert 9000 not in {hit[0] for hit in index.search(new, 5, nprobe=64)[0]}
+
+    # A fresh process sees the same state from the mmap'd files
+    reopened = TenantANNIndex(str(tmp_path / "t1"))
+    assert reopened.size == 501
+    assert 9000 not in {hit[0] for hit in reopened.search(new, 5, nprobe=64)[0]}
+
+    index.compact()
+    assert TenantANNIndex(str(tmp_path / "t1")).size == 500
+
+
+def test_tenants_never_share_an_index(tmp_path):
+    manager = ANNIndexManager(str(tmp_path))
+    vec = np.ones((1, 8), np.float32)
+    manager.index_for(1).build([1], [1], vec)
+    manager.index_for(2).build([2], [2], vec)
+    assert [hit[:2] for hit in manager.index_for(1).search(vec, 10)[0]] == [(1, 1)]
+    assert [hit[:2] for hit in manager.index_for("2").search(vec, 10)[0]] == [(2, 2)]
+
+
+def test_a_build_that_loses_the_race_appends_what_the_index_lacks(tmp_path):
+    rng = np.random.default_rng(3)
+    vectors = clustered(rng, 150)
+    first = TenantANNIndex(str(tmp_path / "t1"), refresh_interval=0, min_compact_rows=10**6)
+    second = TenantANNIndex(str(tmp_path / "t1"), refresh_interval=0, min_compact_rows=10**6)
+    first.build(np.arange(100), np.zeros(100), vectors[:100])
+    first.add([9000], [42], vectors[:1])
+    first.delete([5])
+
+    second.build(np.arange(150), np.zeros(150), vectors)  # another worker, other snapshot
+    assert first.generation == second.generation == 1
+    assert first.size == 151  # 100 base + the add + 50 rows only the second build had
+    assert 5 not in {hit[0] for hit in first.search(vectors[5:6], 5, nprobe=64)[0]}
+    assert 9000 in {hit[0] for hit in first.search(vectors[:1], 5, nprobe=64)[0]}
+
+
+def test_a_replaced_generation_is_kept_until_the_next_publish(tmp_path):
+    index = TenantANNIndex(str(tmp_path / "t1"), refresh_interval=0)
+    vectors = clustered(np.random.default_rng(4), 50)
+    index.build(np.arange(50), np.zeros(50), vectors)
+    index.compact()
+    # A reader that read the manifest just before the swap can still open generation 1
+    assert index.generation == 2 and (tmp_path / "t1" / "gen_1" / "vectors.npy").exists()
+    index.compact()
+    assert not (tmp_path / "t1" / "gen_1").exists() and (tmp_path / "t1" / "gen_2").exists()
+
+
+def test_chunks_written_by_any_worker_during_a_build_reach_the_index(tmp_path, monkeypatch, sqlite_db):
+    rng = np.random.default_rng(2)
+    vectors = normalize_rows(clustered(rng, 200))
+    with db_module.SessionLocal() as session:
+        for i, vector in enumerate(vectors):
+            blob, scale = pack_vector(vector)
+            session.add(Chunk(id=i + 1, document_id=1, tenant_id=1, vector=blob, vector_dim=32, vector_scale=scale))
+        session.commit()
+    # Two workers sharing the index directory
+    builder, writer = SearchService(str(tmp_path), ann_min_rows=100), SearchService(str(tmp_path), ann_min_rows=100)
+    for service in (builder, writer):
+        service.vectors._matrices[1] = TenantMatrix(np.arange(200), np.ones(200), vectors, time.monotonic())
+    started, release = threading.Event(), threading.Event()
+    builds = []
+    real_build = TenantANNIndex.build
+
+    def slow_build(self, *args, **kwargs):
+        builds.append(self)
+        started.set()
+        release.wait(5)
+        real_build(self, *args, **kwargs)
+
+    monkeypatch.setattr(TenantANNIndex, "build", slow_build)
+    new = rng.normal(size=(1, 32)).astype(np.float32)
+
+    async def scenario():
+        builder._maybe_build_index(1)
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        writer._maybe_build_index(1)  # claimed by the other worker: no second build
+        await writer.add_chunks(1, [9000], [42], new)  # lands mid-build, after the snapshot
+        await writer.remove_chunks(1, [1])
+        release.set()
+        while 1 in builder._building or 1 in writer._building:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert len(builds) == 1
+    index = writer.ann.index_for(1)
+    index.refresh(force=True)
+    assert index.size == 201
+    assert index.search(new, 1, nprobe=64)[0][0][:2] == (9000, 42)
+    assert 1 not in {hit[0] for hit in index.search(vectors[:1], 5, nprobe=64)[0]}
+    assert not index.building()
@@ -0,0 +1,53 @@
+"""Auth routes running on the async session factory."""
+import jwt
+
+from app.core import db as db_module
+from app.core.db import to_async_url
+from app.core.security import HashingBusyError
+from app.models.tenant import Tenant
+from app.models.user import User
+from app.security.auth import register as register_module
+
+
+def test_to_async_url_swaps_driver():
+    assert to_async_url("postgresql+psycopg2://u:p@db:5432/gw") == "postgresql+asyncpg://u:p@db:5432/gw"
+    assert to_async_url("sqlite:///tmp/x.db") == "sqlite+aiosqlite:///tmp/x.db"
+
+
+def test_register_then_login_uses_async_session(client, sqlite_db):
+    payload = {"tenant_name": "acme", "email": "a@acme.io", "password": "s3cret!", "firstName": "A", "lastName": "B"}
+    res = client.post("/v1/auth/register", json=payload)
+    assert res.status_code == 200
+    assert res.json()["email"] == "a@acme.io"
+
+    assert client.post("/v1/auth/register", json=payload).status_code == 409
+    assert client.post("/v1/auth/login", json={"email": "a@acme.io", "password": "wrong"}).status_code == 401
+    # Freshly registered accounts are not verified yet
+    assert client.post("/v1/auth/login", json={"email": "a@acme.io", "password": "s3cret!"}).status_code == 403
+
+
+def test_login_puts_the_tenant_plan_in_the_access_token(client, sqlite_db):
+    payload = {"tenant_name": "acme", "email": "a@acme.io", "password": "s3cret!", "firstName": "A", "lastName": "B"}
+    assert client.post("/v1/auth/register", json=payload).status_code == 200
+    with db_module.SessionLocal() as session:
+        assert session.query(Tenant).one().plan == "free"
+        session.query(Tenant).update({"plan": "pro"})
+        session.query(User).update({"is_verified": True})
+        session.commit()
+
+    res = client.post("/v1/auth/login", json={"email": "a@acme.io", "password": "s3cret!"})
+    assert res.status_code == 200, res.text
+    assert jwt.decode(res.json()["access_token"], options={"verify_signature": False})["plan"] == "pro"
+
+
+def test_register_sheds_load_when_hashing_is_saturated(client, sqlite_db, monkeypatch):
+    async def busy(password):
+        raise HashingBusyError(retry_after=2)
+
+    monkeypatch.setattr(register_module, "hash_password_async", busy)
+    payload = {"tenant_name": "busy", "email": "b@busy.io", "password": "pw", "firstName": "B", "lastName": "C"}
+    res = client.post("/v1/auth/register", json=payload)
+    assert res.status_code == 503 and res.headers["Retry-After"] == "2"
+    assert res.json()["error"] == "hashing_busy"
+    with db_module.SessionLocal() as session:
+        assert session.query(Tenant).count() == 0  # hashed before anything was written
@@ -0,0 +1,36 @@
+"""Hot-path benchmark harness: percentiles, calibrated regression gate, in-process smoke run."""
+import asyncio
+
+from app.main import app
+from app.middleware.rate_limit import rate_limiter
+from benchmarks.bench_hot_paths import SCENARIOS, compare, percentile, run_suite, seed
+
+
+def report(calibration_ms: float, **rows) -> dict:
+    return {"meta": {"calibration_ms": calibration_ms}, "results": {"login": {"8": rows}}}
+
+
+def test_nearest_rank_percentiles():
+    values = [float(n) for n in range(1, 101)]
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50.0, 95.0, 99.0)
+    assert percentile([7.0], 99) == 7.0 and percentile([], 50) == 0.0
+
+
+def test_regressions_are_judged_after_calibration():
+    baseline = report(10.0, rps=100.0, p50_ms=10.0, p95_ms=20.0)
+    assert compare(baseline, report(10.0, rps=95.0, p50_ms=11.0, p95_ms=22.0), 0.25) == []
+    slower = compare(baseline, report(10.0, rps=60.0, p50_ms=14.0, p95_ms=20.0), 0.25)
+    assert slower == ["login @8: p50_ms 14.00 > 12.50", "login @8: rps 60.0 < 75.0"]
+    # Same numbers on a machine that is twice as slow at the calibration loop: not a regression
+    assert compare(baseline, report(20.0, rps=60.0, p50_ms=14.0, p95_ms=30.0), 0.25) == []
+
+
+def test_suite_drives_the_app_in_process(sqlite_db, storage, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "enabled", False)
+    fx = seed("smoke", documents=5, chunks=20)
+    scenarios = [s for s in SCENARIOS if s.name in ("upload", "search", "list")]
+    results = asyncio.run(run_suite(app, fx, scenarios, [1, 2], 4, warmup=1, log=lambda line: None))
+    assert set(results) == {"upload", "search", "list"}
+    for rows in results.values():
+        assert set(rows) == {"1", "2"}
+        assert all(row["errors"] == {} and row["rps"] > 0 and row["p99_ms"] >= row["p50_ms"] for row in rows.values())
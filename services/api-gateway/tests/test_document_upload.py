@@ -0,0 +1,34 @@
+"""Streaming document upload: incremental hashing, validation and per-tenant dedup."""
+import hashlib
+import os
+
+PDF = b"%PDF-1.7\n" + os.urandom(3 * 1024 * 1024 + 17)
+
+
+def upload(client, headers, data=PDF, content_type="application/pdf", filename="annex.pdf"):
+    return client.post("/v1/documents/upload", headers=headers, files={"file": (filename, data, content_type)})
+
+
+def test_upload_streams_hashes_and_deduplicates(client, sqlite_db, storage, auth_headers):
+    first = upload(client, auth_headers, filename="../../etc/annex.pdf")
+    assert first.status_code == 201, first.text
+    body = first.json()
+    assert body["sha256"] == hashlib.sha256(PDF).hexdigest()
+    assert body["size_bytes"] == len(PDF) and body["filename"] == "annex.pdf"
+    assert not body["deduplicated"]
+
+    second = upload(client, auth_headers)
+    assert second.json()["deduplicated"] and second.json()["id"] == body["id"]
+    # Only the committed blob remains; the duplicate's temp file was discarded
+    assert os.listdir(os.path.join(storage.root, "tmp")) == []
+
+    # A client-supplied hash short-circuits before any byte is read
+    hinted = client.post("/v1/documents/upload", headers={**auth_headers, "X-Content-SHA256": body["sha256"]},
+                         files={"file": ("x.pdf", b"ignored", "application/pdf")})
+    assert hinted.json()["id"] == body["id"]
+
+
+def test_upload_rejects_mismatched_type_and_requires_auth(client, sqlite_db, storage, auth_headers):
+    assert upload(client, auth_headers, data=b"MZ\x90\x00 not a pdf").status_code == 415
+    assert upload(client, auth_headers, content_type="text/html").status_code == 415
+    assert upload(client, {}).status_code == 401
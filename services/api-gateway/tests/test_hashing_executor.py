@@ -0,0 +1,38 @@
+"""Bounded Argon2 executor: off-loop execution and admission control."""
+import asyncio
+import threading
+
+import pytest
+
+from app.core.security import HashingBusyError, HashingExecutor, hash_password, verify_password
+
+
+def test_hash_and_verify_run_off_loop():
+    executor = HashingExecutor(max_workers=2, max_queue=2)
+
+    async def scenario():
+        hashed = await executor.run(hash_password, "pw")
+        return hashed, await executor.run(verify_password, hashed, "pw")
+
+    hashed, ok = asyncio.run(scenario())
+    executor.shutdown()
+    assert hashed.startswith("$argon2id$") and ok
+    assert executor.metrics.snapshot()["calls"] == 2
+
+
+def test_saturated_queue_is_rejected():
+    executor = HashingExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(HashingBusyError):
+            await executor.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+
+    asyncio.run(scenario())
+    executor.shutdown()
+    assert executor.metrics.snapshot()["rejected"] == 1
+    assert executor.pending == 0
@@ -0,0 +1,148 @@
+"""Idempotency middleware: single execution, in-flight coalescing and replay."""
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.core.idempotency import IdempotencyStore, StoredResponse
+from app.middleware.idempotency_mw import IdempotencyMiddleware
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+def make_app(redis, **options):
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware, redis_getter=lambda: redis, **options)
+    app.state.executions = 0
+
+    @app.post("/register")
+    async def register():
+        app.state.executions += 1
+        await asyncio.sleep(0.05)
+        return {"id": app.state.executions, "padding": "x" * 4096}
+
+    @app.post("/boom")
+    async def boom():
+        app.state.executions += 1
+        return JSONResponse(status_code=503, content={})
+
+    @app.post("/flaky")
+    async def flaky():
+        app.state.executions += 1
+        await asyncio.sleep(0.05)
+        if app.state.executions == 1:
+            return JSONResponse(status_code=503, content={})
+        return {"id": app.state.executions}
+
+    return app
+
+
+def test_concurrent_duplicates_and_retries_run_handler_once():
+    redis = FakeRedis()
+    app = make_app(redis)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gw") as client:
+            headers = {"Idempotency-Key": "k-1"}
+            burst = await asyncio.gather(*(client.post("/register", headers=headers) for _ in range(5)))
+            retry = await client.post("/register", headers=headers)
+            return burst, retry
+
+    burst, retry = asyncio.run(scenario())
+    assert app.state.executions == 1
+    assert {r.json()["id"] for r in burst} == {1} and retry.json()["id"] == 1
+    assert retry.headers["idempotent-replayed"] == "true"
+
+
+def test_server_errors_release_the_key():
+    redis = FakeRedis()
+    app = make_app(redis)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gw") as client:
+            for _ in range(2):
+                await client.post("/boom", headers={"Idempotency-Key": "k-2"})
+
+    asyncio.run(scenario())
+    assert app.state.executions == 2
+    assert redis.data == {}
+
+
+def test_duplicates_of_a_failed_attempt_run_the_handler_once_more():
+    redis = FakeRedis()
+    app = make_app(redis)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gw") as client:
+            return await asyncio.gather(*(client.post("/flaky", headers={"Idempotency-Key": "k-3"}) for _ in range(4)))
+
+    responses = asyncio.run(scenario())
+    assert app.state.executions == 2
+    assert sorted(r.status_code for r in responses) == [200, 200, 200, 503]
+
+
+def test_reusing_a_key_with_another_body_is_rejected():
+    redis = FakeRedis()
+    app = make_app(redis)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gw") as client:
+            headers = {"Idempotency-Key": "k-4"}
+            burst = await asyncio.gather(client.post("/register", json={"a": 1}, headers=headers),
+                                         client.post("/register", json={"a": 2}, headers=headers))
+            retry = await client.post("/register", json={"a": 1}, headers=headers)
+            reused = await client.post("/register", json={"a": 2}, headers=headers)
+            return burst, retry, reused
+
+    burst, retry, reused = asyncio.run(scenario())
+    assert [r.status_code for r in burst] == [200, 422]
+    assert retry.status_code == 200 and retry.headers["idempotent-replayed"] == "true"
+    assert reused.status_code == 422 and reused.json()["error"] == "idempotency_key_reused"
+    assert app.state.executions == 1
+
+
+def test_remote_waiters_give_up_at_the_deadline():
+    class UnclaimableRedis(FakeRedis):
+        async def set(self, key, value, ex=None, nx=False):
+            return None  # the key keeps expiring between our read and our claim
+
+    app = make_app(UnclaimableRedis(), wait_timeout=0.1)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gw") as client:
+            return await client.post("/register", headers={"Idempotency-Key": "k-5"})
+
+    response = asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert response.status_code == 409
+    assert app.state.executions == 0
+
+
+def test_large_bodies_are_compressed_in_storage():
+    store = IdempotencyStore(FakeRedis(), compress_threshold=1024)
+    record = StoredResponse(201, [(b"content-type", b"application/json")], b"{" + b"a" * 10000 + b"}", "f" * 64)
+    raw = store.encode(record)
+    assert len(raw) < 1000
+    decoded = store.decode(raw)
+    assert (decoded.status, decoded.headers, decoded.body, decoded.fingerprint) == (
+        record.status, record.headers, record.body, record.fingerprint)
@@ -0,0 +1,224 @@
+"""Document ingestion: DOCX page windows, overlapping splits and the end-to-end pipeline."""
+import asyncio
+import os
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.core import db as db_module
+from app.main import settings
+from app.ingestion import IngestionPipeline, TextSplitter, extract, process_window
+from app.ingestion.extract import DOCX, read_docx_pages
+from app.ingestion.pipeline import LeaseLost
+from app.models.chunk import Chunk
+from app.models.document import Document
+from app.models.tenant import Tenant
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def make_docx(path, pages):
+    body = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'.join(
+        "".join(f"<w:p><w:r><w:t>{para}</w:t></w:r></w:p>" for para in page) for page in pages
+    )
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", f"<w:document {W}><w:body>{body}</w:body></w:document>")
+        archive.writestr("docProps/app.xml", f"<Properties><Pages>{len(pages)}</Pages></Properties>")
+    return str(path)
+
+
+def tender_pages(count, paragraphs=6):
+    return [[f"Page {p} clause {i}: the contractor shall supply lot {p}-{i} per EN 1090-2." for i in range(paragraphs)]
+            for p in range(count)]
+
+
+def test_docx_windows_and_carry_match_a_single_pass(tmp_path, monkeypatch):
+    path = make_docx(tmp_path / "tender.docx", tender_pages(7))
+    parses, real_iter = [], extract.iter_docx_pages
+    monkeypatch.setattr(extract, "iter_docx_pages", lambda p: parses.append(p) or real_iter(p))
+    pages, total, done = read_docx_pages(path, 2, 4)
+    assert [number for number, _ in pages] == [2, 3] and total == 7 and not done
+    assert "Page 3 clause 0" in pages[1][1]
+
+    whole = process_window(path, DOCX, 0, 100, None, 300, 60)
+    windowed, carry, start = [], None, 0
+    while True:
+        result = process_window(path, DOCX, start, 2, carry, 300, 60)
+        windowed += result.chunks
+        if result.done:
+            break
+        carry, start = result.carry, result.next_page
+    assert whole.done and whole.total_pages == 7
+    assert windowed == whole.chunks
+    assert whole.chunks[0].page_start == 1 and whole.chunks[-1].page_end == 7
+    assert len(parses) == 1  # every later window seeks into the page spool
+
+
+def test_cpu_pools_split_the_host_between_server_workers(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 16)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    assert settings.pool_workers(0) == 4 and settings.pool_workers(3) == 3
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 32)
+    assert settings.pool_workers(0) == 1
+
+
+def test_splitter_overlaps_on_word_boundaries():
+    splitter = TextSplitter(chunk_chars=120, overlap=30)
+    chunks = splitter.feed(1, " ".join(f"token{i}" for i in range(60))) + splitter.flush()
+    assert all(len(c.text) <= 120 for c in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        first_word = current.text.split()[0]
+        assert first_word in previous.text.split()  # overlap starts on a whole word
+
+
+def add_document(storage, document_id, pages):
+    sha = f"{document_id:064x}"
+    key = storage.blob_key(1, sha)
+    path = storage.blob_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    make_docx(path, pages)
+    with db_module.SessionLocal() as session:
+        if session.get(Tenant, 1) is None:
+            session.add(Tenant(id=1, name="acme"))
+        session.add(Document(id=document_id, tenant_id=1, filename="t.docx", path=key, sha256=sha, content_type=DOCX))
+        session.commit()
+
+
+def test_pipeline_stores_chunks_and_reports_progress(tmp_path, sqlite_db, storage, client, auth_headers):
+    add_document(storage, 1, tender_pages(5, 20))
+
+    embedded, indexed = [], []
+
+    async def embed(texts):
+        embedded.append(len(texts))
+        return [[float(len(t)), 1.0, 0.0] for t in texts]
+
+    async def on_chunks(tenant_id, ids, document_ids, vectors, texts, version):
+        indexed.append((tenant_id, len(ids), version))
+
+    async def scenario():
+        pipeline = IngestionPipeline(embed, storage, workers=2, executor_kind="process", window_pages=2,
+                                     chunk_chars=400, overlap=50, embed_batch=8, on_chunks=on_chunks)
+        try:
+            assert await pipeline.process(1)
+            assert not await pipeline.process(1)  # already claimed/processed
+        finally:
+            await pipeline.close()
+
+    asyncio.run(scenario())
+    with db_module.SessionLocal() as session:
+        chunks = session.execute(select(Chunk).order_by(Chunk.chunk_index)).scalars().all()
+        tenant = session.get(Tenant, 1)
+    assert [c.chunk_index for c in chunks] == list(range(len(chunks))) and len(chunks) == sum(embedded)
+    assert chunks[0].page_start == 1 and chunks[-1].page_end == 5
+    assert all(c.tenant_id == 1 and c.vector_dim == 3 and c.text for c in chunks)
+    assert max(embedded) <= 8 and sum(n for _, n, _ in indexed) == len(chunks)
+    assert indexed[-1][2] == tenant.corpus_version
+
+    status = client.get("/v1/documents/1/ocr-status", headers=auth_headers).json()
+    assert status == {"id": 1, "status": "processed", "pages_total": 5, "pages_processed": 5,
+                      "chunks": len(chunks), "progress": 1.0, "error": None}
+
+
+def test_large_document_does_not_starve_a_small_one(sqlite_db, storage):
+    add_document(storage, 1, tender_pages(40))
+    add_document(storage, 2, tender_pages(2))
+    finished = []
+
+    async def embed(texts):
+        await asyncio.sleep(0.001)
+        return [[1.0, 0.0] for _ in texts]
+
+    async def scenario():
+        pipeline = IngestionPipeline(embed, storage, workers=1, executor_kind="thread", window_pages=2)
+        big = pipeline.submit(1)
+        await asyncio.sleep(0)
+        small = pipeline.submit(2)
+        for document_id, task in ((2, small), (1, big)):
+            task.add_done_callback(lambda _, d=document_id: finished.append(d))
+        await asyncio.gather(big, small)
+        await pipeline.close()
+
+    asyncio.run(scenario())
+    assert finished == [2, 1]
+
+
+def test_interrupted_document_is_handed_back_and_resumed(sqlite_db, storage):
+    add_document(storage, 1, tender_pages(8, 10))
+    first_window = asyncio.Event()
+
+    async def embed(texts):
+        return [[1.0, 0.0] for _ in texts]
+
+    async def stall_after_first_window(texts):
+        if first_window.is_set():
+            await asyncio.sleep(3600)  # a worker shut down mid-document
+        first_window.set()
+        return await embed(texts)
+
+    async def interrupted():
+        pipeline = IngestionPipeline(stall_after_first_window, storage, workers=1, executor_kind="thread", window_pages=2)
+        pipeline.submit(1)
+        await first_window.wait()
+        await asyncio.sleep(0.05)
+        await pipeline.close()
+
+    asyncio.run(interrupted())
+    with db_module.SessionLocal() as session:
+        doc = session.get(Document, 1)
+        assert (doc.status, doc.heartbeat_at) == ("uploaded", None)
+        assert session.query(Chunk).count() > 0  # the first window was committed before the shutdown
+
+    async def resumed():
+        pipeline = IngestionPipeline(embed, storage, workers=1, executor_kind="thread", window_pages=2)
+        try:
+            assert await pipeline.resume() == 1
+            await asyncio.gather(*pipeline._tasks.values())
+        finally:
+            await pipeline.close()
+
+    asyncio.run(resumed())
+    with db_module.SessionLocal() as session:
+        assert session.get(Document, 1).status == "processed"
+        indexes = session.execute(select(Chunk.chunk_index).order_by(Chunk.chunk_index)).scalars().all()
+    assert indexes == list(range(len(indexes)))  # stale chunks were dropped, not duplicated
+
+
+def test_expired_lease_is_taken_over_and_the_old_worker_stops(sqlite_db, storage):
+    add_document(storage, 1, tender_pages(4))
+    add_document(storage, 2, tender_pages(4))
+    stale, fresh = datetime.now(timezone.utc) - timedelta(hours=1), datetime.now(timezone.utc)
+    with db_module.SessionLocal() as session:
+        session.get(Document, 1).status, session.get(Document, 1).heartbeat_at = "processing", stale
+        session.get(Document, 2).status, session.get(Document, 2).heartbeat_at = "processing", fresh
+        session.commit()
+
+    async def embed(texts):
+        return [[1.0, 0.0] for _ in texts]
+
+    async def scenario():
+        pipeline = IngestionPipeline(embed, storage, workers=1, executor_kind="thread", window_pages=2, lease=60)
+        try:
+            assert await pipeline.resume() == 1  # document 2's worker is still alive
+            await asyncio.gather(*pipeline._tasks.values())
+            assert not await pipeline.process(2)
+            # Document 2's lease expires and this worker claims it, then someone else takes it over
+            with db_module.SessionLocal() as session:
+                session.get(Document, 2).heartbeat_at = stale
+                session.commit()
+            doc = await pipeline._claim(2)
+            with db_module.SessionLocal() as session:
+                session.get(Document, 2).heartbeat_at = fresh
+                session.commit()
+            result = await pipeline._extract(doc, 0, None)
+            with pytest.raises(LeaseLost):
+                await pipeline._store(doc, result, 0)
+        finally:
+            await pipeline.close()
+
+    asyncio.run(scenario())
+    with db_module.SessionLocal() as session:
+        assert session.get(Document, 1).status == "processed"
+        assert session.query(Chunk).filter(Chunk.document_id == 2).count() == 0
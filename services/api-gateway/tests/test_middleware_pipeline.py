@@ -0,0 +1,43 @@
+"""Pure-ASGI middleware chain: shared context, header injection and streaming."""
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.bootstrap import MIDDLEWARE_STACK
+from app.middleware.context import current_context
+
+
+def make_app():
+    app = FastAPI()
+    for middleware in reversed(MIDDLEWARE_STACK):
+        app.add_middleware(middleware)
+
+    @app.get("/ctx")
+    async def ctx(request: Request):
+        assert current_context() is request.state.ctx
+        return {"request_id": request.state.ctx.request_id}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk-{i};".encode()
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return app
+
+
+def test_request_id_is_shared_and_echoed():
+    client = TestClient(make_app())
+    res = client.get("/ctx", headers={"X-Request-ID": "abc-123"})
+    assert res.json() == {"request_id": "abc-123"}
+    assert res.headers["x-request-id"] == "abc-123"
+    assert "ratelimit-limit" in res.headers
+
+
+def test_streaming_response_passes_through_chain():
+    client = TestClient(make_app())
+    with client.stream("GET", "/stream") as res:
+        body = b"".join(res.iter_bytes())
+    assert body == b"chunk-0;chunk-1;chunk-2;"
+    assert res.headers["x-request-id"]
@@ -0,0 +1,71 @@
+"""Prometheus metrics: /metrics exposition, pre-bound instruments, multiprocess aggregation."""
+import os
+import subprocess
+import sys
+import textwrap
+
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from app.core.observability import instrument_engine
+from app.search.cache import SearchResultCache
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_endpoint_reports_route_templates(client):
+    before = sample("gateway_http_request_duration_seconds_count", method="GET", route="/healthz", status="200")
+    assert client.get("/healthz").status_code == 200
+    client.get("/no/such/path/12345")
+
+    body = client.get("/metrics").text
+    assert sample("gateway_http_request_duration_seconds_count", method="GET", route="/healthz", status="200") == before + 1
+    assert 'route="<unmatched>"' in body and "/no/such/path" not in body
+    assert "gateway_http_requests_in_flight" in body
+
+
+def test_pool_checkout_wait_and_usage(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'm.db'}", poolclass=QueuePool, pool_size=2, max_overflow=1)
+    instrument_engine(engine, "test")
+    waits = sample("gateway_db_pool_checkout_seconds_count", engine="test")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert sample("gateway_db_pool_checked_out", engine="test") == 1
+    assert sample("gateway_db_pool_checked_out", engine="test") == 0
+    assert sample("gateway_db_pool_checkout_seconds_count", engine="test") == waits + 1
+    assert sample("gateway_db_pool_capacity", engine="test") == 3
+    engine.dispose()
+
+
+def test_cache_lookups_are_counted():
+    hits = sample("gateway_cache_requests_total", cache="search_results", result="hit")
+    misses = sample("gateway_cache_requests_total", cache="search_results", result="miss")
+    cache = SearchResultCache()
+    key = cache.key(1, 1, q="tender")
+    assert cache.get(key) is None
+    cache.put(key, ["result"])
+    assert cache.get(key) == ["result"]
+    assert sample("gateway_cache_requests_total", cache="search_results", result="hit") == hits + 1
+    assert sample("gateway_cache_requests_total", cache="search_results", result="miss") == misses + 1
+
+
+def test_workers_aggregate_through_the_multiprocess_directory(tmp_path):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": os.getcwd()}
+    worker = textwrap.dedent("""
+        from app.core import observability as o
+        o.observe_request("GET", "/v1/search", 200, 0.02)
+        o.HTTP_IN_FLIGHT.inc()
+        o.CacheCounters("search_results").hit()
+    """)
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], env=env, check=True)
+    scrape = subprocess.run(
+        [sys.executable, "-c", "from app.core import observability as o; print(o.render_metrics().decode())"],
+        env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    assert 'gateway_http_request_duration_seconds_count{method="GET",route="/v1/search",status="200"} 2.0' in scrape
+    assert 'gateway_cache_requests_total{cache="search_results",result="hit"} 2.0' in scrape
+    assert "gateway_http_requests_in_flight 2.0" in scrape
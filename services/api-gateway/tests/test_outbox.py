@@ -0,0 +1,152 @@
+"""Transactional outbox: events commit with their rows; the relay delivers them in order."""
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from app.core import db as db_module
+from app.core.gateway_clients import IngestionClient
+from app.core.outbox import OutboxRelay, _PublishFailed, add_outbox_event
+from app.models.outbox import OutboxEvent
+
+
+class RecordingTransport:
+    def __init__(self, fail: bool = False, poison: int | None = None):
+        self.fail = fail
+        self.poison = poison  # document_id the consumer always rejects
+        self.batches = []
+
+    async def send_batch(self, events):
+        if self.fail:
+            raise ConnectionError("broker unavailable")
+        if any(event["document_id"] == self.poison for event in events):
+            raise ValueError("422 from consumer")
+        self.batches.append(events)
+
+
+def pending_events():
+    with db_module.SessionLocal() as session:
+        return session.execute(select(OutboxEvent).where(OutboxEvent.published_at.is_(None), OutboxEvent.failed_at.is_(None)).order_by(OutboxEvent.id)).scalars().all()
+
+
+def test_upload_stages_exactly_one_event(client, sqlite_db, storage, auth_headers):
+    files = {"file": ("annex.pdf", b"%PDF-1.7\n" + b"x" * 100, "application/pdf")}
+    first = client.post("/v1/documents/upload", headers=auth_headers, files=files)
+    again = client.post("/v1/documents/upload", headers=auth_headers, files=files)
+    assert first.status_code == 201 and again.json()["deduplicated"]
+
+    events = pending_events()
+    assert [(e.event_type, e.tenant_id, e.payload["document_id"]) for e in events] == [("document.uploaded", 1, first.json()["id"])]
+
+
+def test_relay_publishes_in_order_and_retries_failures(sqlite_db):
+    with db_module.SessionLocal() as session:
+        for n in range(5):
+            add_outbox_event(session, "document.uploaded", {"document_id": n}, tenant_id=n % 2 + 1)
+        session.commit()
+
+    async def scenario():
+        down = OutboxRelay(RecordingTransport(fail=True), batch_size=3)
+        with pytest.raises(_PublishFailed):
+            await down.relay_once()
+        assert len(pending_events()) == 5 and pending_events()[0].attempts == 1
+
+        transport = RecordingTransport()
+        relay = OutboxRelay(transport, batch_size=3)
+        assert await relay.relay_once() == 3
+        assert await relay.relay_once() == 2
+        assert await relay.relay_once() == 0
+        return transport.batches
+
+    batches = asyncio.run(scenario())
+    delivered = [event for batch in batches for event in batch]
+    assert [e["document_id"] for e in delivered] == [0, 1, 2, 3, 4]
+    assert [len(b) for b in batches] == [3, 2]
+    assert delivered[0]["type"] == "document.uploaded" and delivered[0]["event_id"] is not None
+    assert pending_events() == []
+
+
+def test_poison_event_is_isolated_then_dead_lettered(sqlite_db):
+    with db_module.SessionLocal() as session:
+        for n in range(6):
+            add_outbox_event(session, "document.uploaded", {"document_id": n}, tenant_id=n % 2 + 1)
+        session.commit()
+    transport = RecordingTransport(poison=2)  # tenant 1: 0, 2, 4; tenant 2: 1, 3, 5
+
+    async def scenario():
+        relay = OutboxRelay(transport, batch_size=10, max_attempts=2)
+        for _ in range(2):
+            with pytest.raises(_PublishFailed):
+                await relay.relay_once()
+        assert relay.dead_lettered == 1
+        assert await relay.relay_once() == 1  # tenant 1's event behind the poison one
+        assert await relay.relay_once() == 0
+        return relay
+
+    asyncio.run(scenario())
+    delivered = [event["document_id"] for batch in transport.batches for event in batch]
+    # Tenant order is kept: 4 only goes out once 2 is dead-lettered
+    assert delivered == [0, 1, 3, 5, 4]
+    with db_module.SessionLocal() as session:
+        dead = session.execute(select(OutboxEvent).where(OutboxEvent.failed_at.is_not(None))).scalars().all()
+    assert [(e.payload["document_id"], e.attempts) for e in dead] == [(2, 2)] and "422" in dead[0].last_error
+    assert pending_events() == []
+
+
+def test_claim_is_committed_before_sending_and_leased(sqlite_db):
+    with db_module.SessionLocal() as session:
+        for n in range(2):
+            add_outbox_event(session, "document.uploaded", {"document_id": n}, tenant_id=1)
+        session.commit()
+
+    class Peeking(RecordingTransport):
+        async def send_batch(self, events):
+            # No transaction is open: another connection sees the lease, and a second relay
+            # runs its own claim without waiting on ours and finds nothing to take
+            leased = [e.claimed_until is not None for e in pending_events()]
+            self.peeks.append((leased, await OutboxRelay(RecordingTransport()).relay_once()))
+            await super().send_batch(events)
+
+    transport = Peeking()
+    transport.peeks = []
+
+    async def scenario():
+        assert await OutboxRelay(transport).relay_once() == 2
+
+        with db_module.SessionLocal() as session:
+            add_outbox_event(session, "document.uploaded", {"document_id": 2}, tenant_id=1)
+            session.commit()
+        now = datetime.now(timezone.utc)
+        async with db_module.AsyncSessionLocal() as session:
+            async with session.begin():
+                await OutboxRelay(transport)._claim(session, now, now + timedelta(seconds=0.2))  # then the worker dies
+        assert await OutboxRelay(transport).relay_once() == 0
+        await asyncio.sleep(0.3)
+        assert await OutboxRelay(transport).relay_once() == 1  # the lease ran out
+
+    asyncio.run(scenario())
+    assert transport.peeks[0] == ([True, True], 0)
+    assert [e["document_id"] for batch in transport.batches for e in batch] == [0, 1, 2]
+    assert pending_events() == []
+
+
+def test_ingestion_client_reuses_the_pooled_client():
+    seen = []
+
+    def handler(request):
+        seen.append((request.url.path, json.loads(request.read())))
+        return httpx.Response(202)
+
+    async def scenario():
+        pooled = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        client = IngestionClient("http://ingestion", pooled)
+        await client.send_batch([{"type": "document.uploaded", "document_id": 1}])
+        await client.close()
+        assert not pooled.is_closed  # owned by the app, closed at shutdown
+        await pooled.aclose()
+
+    asyncio.run(scenario())
+    assert seen == [("/ingest/events/batch", {"events": [{"type": "document.uploaded", "document_id": 1}]})]
@@ -0,0 +1,97 @@
+"""On-demand profiling: admin gating, sampling switch, signed debug header, stack sampler."""
+import asyncio
+import time
+
+import jwt
+import pytest
+
+from app.core.profiling import ProfileSession, Profiler, _active
+from app.middleware.profiling import profiler
+from app.security.auth.jwt_handler import create_Ajwt
+
+
+@pytest.fixture(autouse=True)
+def fresh_profiler():
+    asyncio.run(profiler.disable())
+    profiler._results.clear()
+    yield
+    asyncio.run(profiler.disable())
+    profiler._results.clear()
+
+
+@pytest.fixture
+def admin_headers():
+    claims = jwt.decode(create_Ajwt(99, 1), options={"verify_signature": False})
+    token = jwt.encode({**claims, "role": "admin"}, "changeme", algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_admin_routes_require_admin_role(client, auth_headers, admin_headers):
+    assert client.get("/v1/admin/profiling").status_code == 401
+    assert client.get("/v1/admin/profiling", headers=auth_headers).status_code == 403
+    assert client.get("/v1/admin/profiling", headers=admin_headers).json()["active"] is False
+
+
+def test_sampling_targets_one_tenant_and_reports_phases(client, sqlite_db, auth_headers, admin_headers):
+    res = client.put("/v1/admin/profiling", headers=admin_headers,
+                     json={"sample_rate": 1.0, "tenant_id": 1, "route_prefix": "/v1/documents"})
+    assert res.status_code == 200 and res.json()["active"]
+
+    other_tenant = {"Authorization": f"Bearer {create_Ajwt(2, 2)}"}
+    assert "x-profile-id" not in client.get("/v1/documents/", headers=other_tenant).headers
+    listed = client.get("/v1/documents/", headers=auth_headers)
+    profile_id = listed.headers["x-profile-id"]
+
+    profile = client.get(f"/v1/admin/profiling/{profile_id}", headers=admin_headers).json()
+    assert profile["tenant_id"] == 1 and profile["route"] == "/v1/documents/" and profile["reason"] == "sampled"
+    phases = profile["phases_ms"]
+    assert {"middleware", "db", "serialization", "total"} <= set(phases)
+    assert phases["total"] >= phases["db"] > 0
+
+    summaries = client.get("/v1/admin/profiling?tenant_id=1", headers=admin_headers).json()["profiles"]
+    assert [p["id"] for p in summaries] == [profile_id] and "folded" not in summaries[0]
+
+    client.delete("/v1/admin/profiling", headers=admin_headers)
+    assert "x-profile-id" not in client.get("/v1/documents/", headers=auth_headers).headers
+
+
+def test_signed_debug_header_profiles_a_single_request(client, sqlite_db, auth_headers, admin_headers):
+    token = client.post("/v1/admin/profiling/debug-token", headers=admin_headers,
+                        json={"ttl_seconds": 60, "tenant_id": 1}).json()["value"]
+    profiled = client.get("/v1/documents/", headers={**auth_headers, "X-Debug-Profile": token})
+    assert "x-profile-id" in profiled.headers
+
+    forged = token[:-1] + ("0" if token[-1] != "0" else "1")
+    wrong_tenant = {"Authorization": f"Bearer {create_Ajwt(2, 2)}", "X-Debug-Profile": token}
+    assert "x-profile-id" not in client.get("/v1/documents/", headers={**auth_headers, "X-Debug-Profile": forged}).headers
+    assert "x-profile-id" not in client.get("/v1/documents/", headers=wrong_tenant).headers
+    assert not Profiler.verify_debug_token(Profiler.issue_debug_token(-1), None)  # expired
+
+
+def busy_handler(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_stack_sampler_attributes_samples_to_the_running_request():
+    session = ProfileSession("p1", "req-1", 1, "GET", "/x", "sampled")
+    bystander = ProfileSession("p2", "req-2", 2, "GET", "/y", "sampled")
+
+    async def profiled():
+        _active.set(session)
+        sampler = Profiler().sampler
+        sampler.attach(session, 0.001)
+        try:
+            busy_handler(0.1)
+            await asyncio.sleep(0)
+        finally:
+            sampler.detach(session)
+
+    async def main():
+        _active.set(bystander)  # only the task running the busy loop may collect its samples
+        await asyncio.create_task(profiled())
+
+    asyncio.run(main())
+    assert session.samples > 0 and bystander.samples == 0
+    assert any(stack.endswith("test_profiling:busy_handler") for stack in session.stacks)
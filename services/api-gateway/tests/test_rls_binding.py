@@ -0,0 +1,131 @@
+"""Tenant binding (app.core.rls) tracked per pooled connection."""
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from app.core import rls
+from app.middleware.context import get_request_context
+from app.middleware.rls_bind import RLSBindMiddleware
+
+
+@pytest.fixture
+def pooled(tmp_path, monkeypatch):
+    """One-connection pool, so every session reuses the same DBAPI connection."""
+    monkeypatch.setattr(rls, "RLS_DIALECTS", rls.RLS_DIALECTS | {"sqlite"})
+    engine = create_engine(f"sqlite:///{tmp_path / 'rls.db'}", poolclass=QueuePool, pool_size=1, max_overflow=0)
+    statements = []
+
+    @event.listens_for(engine, "connect")
+    def _functions(dbapi_connection, _):
+        dbapi_connection.create_function("set_config", 3, lambda name, value, local: value)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if "set_config" in statement:
+            statements.append(parameters)
+
+    yield engine, sessionmaker(bind=engine), statements
+    engine.dispose()
+
+
+def _pool_record_info(engine):
+    with engine.connect() as conn:
+        return dict(conn.info)
+
+
+def test_connection_reused_by_the_same_tenant_is_not_bound_again(pooled):
+    engine, Session, statements = pooled
+    with rls.tenant_scope(7), Session() as session:
+        session.execute(text("SELECT 1"))
+        session.execute(text("SELECT 2"))
+        connection = session.connection()
+        assert rls.bound_tenant(connection) == 7
+        assert rls.bind_tenant_to_session(connection, 7) is False
+        session.commit()
+        session.execute(text("SELECT 3"))  # new transaction, same connection: still bound
+    with rls.tenant_scope(7), Session() as session:
+        session.execute(text("SELECT 4"))  # next request of the tenant: no round-trip either
+    assert [tuple(params) for params in statements] == [("7",)]
+    assert _pool_record_info(engine)[rls.BOUND_TENANT_KEY] == 7
+
+
+def test_pooled_connection_never_carries_tenant_to_next_request(pooled):
+    engine, Session, statements = pooled
+    with rls.tenant_scope(1), Session() as session:
+        session.execute(text("SELECT 1"))
+        session.commit()
+
+    # A tenantless request on the same connection clears tenant 1 before its first query
+    with Session() as session:
+        session.execute(text("SELECT 1"))
+        assert rls.bound_tenant(session.connection()) is None
+    # Closing without commit rolled the clear back; the record says so, and the next user re-checks
+    assert _pool_record_info(engine)[rls.BOUND_TENANT_KEY] == 1
+
+    with rls.tenant_scope(2), Session() as session:
+        session.execute(text("SELECT 1"))
+        assert rls.bound_tenant(session.connection()) == 2
+        session.commit()
+    assert [tuple(params) for params in statements] == [("1",), ("",), ("2",)]
+
+    # A rollback undoes the set_config; the record follows it back to tenant 2
+    with pytest.raises(RuntimeError):
+        with rls.tenant_scope(3), Session() as session:
+            session.execute(text("SELECT 1"))
+            raise RuntimeError("boom")
+    assert _pool_record_info(engine)[rls.BOUND_TENANT_KEY] == 2
+
+
+def test_session_info_overrides_request_tenant(pooled):
+    engine, Session, statements = pooled
+    with rls.tenant_scope(1), Session(info={"tenant_id": 5}) as session:
+        session.execute(text("SELECT 1"))
+    assert [tuple(params) for params in statements] == [("5",)]
+
+
+def test_non_rls_dialect_issues_nothing(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plain.db'}")
+    with rls.tenant_scope(1), sessionmaker(bind=engine)() as session:
+        session.execute(text("SELECT 1"))
+        assert rls.bound_tenant(session.connection()) is None
+    engine.dispose()
+
+
+def test_middleware_scopes_tenant_to_the_request():
+    seen = []
+
+    async def downstream(scope, receive, send):
+        seen.append(rls.current_tenant())
+
+    async def run():
+        scope = {"type": "http", "headers": []}
+        get_request_context(scope).tenant_id = 42
+        await RLSBindMiddleware(downstream)(scope, None, None)
+        seen.append(rls.current_tenant())
+
+    asyncio.run(run())
+    assert seen == [42, None]
+
+
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+def test_postgres_setting_follows_the_connection_record():
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"], pool_size=1, max_overflow=0)
+    Session = sessionmaker(bind=engine)
+    query = text("SELECT current_setting('app.current_tenant', true)")
+    try:
+        with rls.tenant_scope(11), Session() as session:
+            assert session.execute(query).scalar() == "11"
+            session.commit()
+        with rls.tenant_scope(12), Session() as session:
+            assert session.execute(query).scalar() == "12"
+            session.rollback()
+        with rls.tenant_scope(11), Session() as session:
+            assert session.execute(query).scalar() == "11"  # skipped the bind: the rollback restored it
+        with Session() as session:
+            assert session.execute(query).scalar() in (None, "")
+    finally:
+        engine.dispose()
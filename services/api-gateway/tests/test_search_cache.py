@@ -0,0 +1,61 @@
+"""Search result cache: repeated queries skip embedding + scan; ingestion invalidates."""
+from app.core import db as db_module
+from app.models.chunk import Chunk
+from app.models.tenant import Tenant
+from app.routes.v1 import search as search_routes
+from app.search.cache import SearchResultCache, normalize_query, vector_bucket
+from app.search.vectors import pack_vector
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.calls = 0
+
+    async def embed(self, texts):
+        self.calls += 1
+        return [[1.0, 0.0, 0.0] for _ in texts]
+
+
+def add_chunk(session, chunk_id, vec, text):
+    blob, scale = pack_vector(vec)
+    session.add(Chunk(id=chunk_id, document_id=11, tenant_id=1, vector=blob, vector_dim=3, vector_scale=scale, text=text))
+
+
+def test_normalisation_and_version_invalidation():
+    assert normalize_query("  Lot 3   CPV 45223210-1 ? ") == normalize_query("lot 3 cpv 45223210-1")
+    assert vector_bucket([1, 0, 0]) == vector_bucket([2, 0.0001, 0]) != vector_bucket([0, 1, 0])
+
+    cache = SearchResultCache(max_entries=2)
+    cache.put(cache.key(1, 1, q="a"), ["old"])
+    cache.put(cache.key(2, 1, q="a"), ["other tenant"])
+    assert cache.get(cache.key(1, 1, q="a")) == ["old"]
+    assert cache.get(cache.key(1, 2, q="a")) is None  # tenant 1 moved on: its v1 entries are dropped
+    assert cache.get(cache.key(2, 1, q="a")) == ["other tenant"]
+    cache.put(cache.key(1, 1, q="late"), ["stale"])  # computed before the bump: refused
+    assert len(cache) == 1
+    assert cache.metrics.snapshot()["hits"] == 2 and cache.metrics.invalidations == 1
+
+
+def test_repeated_query_is_served_from_cache_until_corpus_changes(client, sqlite_db, auth_headers, search_service):
+    embedder = search_routes.embedding_client = CountingEmbedder()
+    with db_module.SessionLocal() as session:
+        session.add(Tenant(id=1, name="acme"))
+        session.flush()
+        add_chunk(session, 1, [1, 0, 0], "steel frame, lot 3")
+        session.commit()
+
+    body = {"query": "steel frame", "top_k": 5}
+    first = client.post("/v1/search/query", json=body, headers=auth_headers)
+    again = client.post("/v1/search/query", json={**body, "query": "  Steel   FRAME "}, headers=auth_headers)
+    assert (first.headers["x-search-cache"], again.headers["x-search-cache"]) == ("miss", "hit")
+    assert again.json() == first.json() and embedder.calls == 1
+
+    with db_module.SessionLocal() as session:
+        add_chunk(session, 2, [0.9, 0.1, 0], "steel frame, lot 4")
+        session.commit()
+        assert session.get(Tenant, 1).corpus_version == 2
+
+    fresh = client.post("/v1/search/query", json=body, headers=auth_headers)
+    assert fresh.headers["x-search-cache"] == "miss"
+    assert {r["chunk_id"] for r in fresh.json()["results"]} == {1, 2}
+    assert search_service.cache.metrics.snapshot()["hits"] == 1
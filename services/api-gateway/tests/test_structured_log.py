@@ -0,0 +1,82 @@
+"""Queue-backed structured logging: non-blocking drops, sampling, request correlation."""
+import io
+import json
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.bootstrap import MIDDLEWARE_STACK
+from app.core import structured_log
+from app.core.structured_log import QueueLogHandler, StructuredLogger
+from app.middleware.context import _current_context, RequestContext
+
+
+def records(stream: io.StringIO) -> list[dict]:
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_full_queue_drops_and_summarises_instead_of_blocking():
+    stream = io.StringIO()
+    log = StructuredLogger(stream=stream, max_queue=3, flush_interval=0.01)
+    accepted = [log.access({"route": "/v1/search", "status": 200, "latency_ms": 1.0, "n": n}) for n in range(5)]
+    assert accepted == [True, True, True, False, False]
+    log.start()
+    log.stop()
+
+    lines = records(stream)
+    assert [r["n"] for r in lines if "n" in r] == [0, 1, 2]
+    summary = next(r for r in lines if r.get("event") == "log.dropped")
+    assert summary["dropped"] == 2 and summary["by_route"] == {"/v1/search 2xx": 2}
+    assert log.metrics.snapshot()["written"] == 4
+
+
+def test_sampling_keeps_errors_and_slow_requests():
+    log = StructuredLogger(stream=io.StringIO(), sample_rates={"/healthz": 0.0}, slow_ms=100)
+    assert not log.access({"route": "/healthz", "status": 200, "latency_ms": 2.0})
+    assert log.access({"route": "/healthz", "status": 503, "latency_ms": 2.0})
+    assert log.access({"route": "/healthz", "status": 200, "latency_ms": 250.0})
+    assert log.access({"route": "/v1/search", "status": 200, "latency_ms": 2.0})
+    assert log.metrics.sampled_out == 1
+
+
+def test_stdlib_records_carry_request_context():
+    stream = io.StringIO()
+    log = StructuredLogger(stream=stream, flush_interval=0.01)
+    logger = logging.getLogger("tests.structured")
+    logger.addHandler(QueueLogHandler(log))
+    logger.setLevel(logging.INFO)
+    token = _current_context.set(RequestContext(request_id="req-7", tenant_id=3))
+    try:
+        logger.info("hello %s", "world")
+    finally:
+        _current_context.reset(token)
+        logger.handlers.clear()
+    log.start()
+    log.stop()
+    assert records(stream) == [{
+        "ts": records(stream)[0]["ts"], "level": "INFO", "logger": "tests.structured", "message": "hello world",
+        "request_id": "req-7", "tenant_id": 3,
+    }]
+
+
+def test_access_records_use_route_template_and_request_id(monkeypatch):
+    stream = io.StringIO()
+    log = StructuredLogger(stream=stream, flush_interval=0.01)
+    monkeypatch.setattr(structured_log, "_structured", log)
+    app = FastAPI()
+    for middleware in reversed(MIDDLEWARE_STACK):
+        app.add_middleware(middleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    res = TestClient(app).get("/items/42", headers={"X-Request-ID": "abc-123"})
+    assert res.status_code == 200
+    log.start()
+    log.stop()
+    (access,) = [r for r in records(stream) if r.get("event") == "http.access"]
+    assert access["request_id"] == "abc-123" and access["status"] == 200
+    assert access["route"] == "/items/{item_id}" and access["path"] == "/items/42"
+    assert access["latency_ms"] >= 0
@@ -0,0 +1,170 @@
+"""Bulk user import: row validation, batched creation, per-row results and resuming."""
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core import db as db_module
+from app.core.config import DEFAULT_SECRET
+from app.core.security import verify_password
+from app.main import settings
+from app.models.user import User
+from app.models.user_import import UserImportJob, UserImportRow
+from app.security.auth.jwt_handler import create_Ajwt
+from app.security.auth.user_import import UNUSABLE_PASSWORD, LeaseLost, UserImporter
+
+OWNER = {"Authorization": f"Bearer {create_Ajwt(1, 1, role='owner')}"}
+
+
+@pytest.fixture(autouse=True)
+def import_secret(monkeypatch):
+    monkeypatch.setattr(settings, "USER_IMPORT_SECRET", "test-import-secret")
+
+
+def csv_body(rows) -> bytes:
+    lines = ["email,First Name,last_name,role,password"] + [",".join(row) for row in rows]
+    return "\n".join(lines).encode()
+
+
+def seed_existing_user():
+    with db_module.SessionLocal() as session:
+        session.add(User(first_name="T", last_name="Aken", email="taken@acme.io", password_hash="x", tenant_id=2))
+        session.commit()
+
+
+def run_import(job_id, **options):
+    importer = UserImporter(executor_kind="thread", workers=2, **options)
+    try:
+        return asyncio.run(importer.process(job_id))
+    finally:
+        asyncio.run(importer.close())
+
+
+def test_import_validates_rows_and_creates_users_in_batches(client, sqlite_db):
+    seed_existing_user()
+    rows = [(f"u{i}@acme.io", f"U{i}", "Doe", "viewer" if i % 2 else "", "pw-%d" % i if i < 3 else "") for i in range(8)]
+    rows += [
+        ("not-an-email", "A", "B", "", ""),
+        ("U1@acme.io", "Again", "Doe", "", ""),      # same address as row 2, other case
+        ("nolast@acme.io", "No", "", "", ""),
+        ("root@acme.io", "Root", "Doe", "admin", ""),
+        ("Taken@ACME.io ", "Taken", "Doe", "", ""),   # registered in another tenant, other case
+    ]
+    res = client.post("/v1/users/import", content=csv_body(rows), headers={**OWNER, "Content-Type": "text/csv"})
+    assert res.status_code == 202
+    job = res.json()
+    assert (job["status"], job["total_rows"], job["failed"]) == ("pending", 13, 4)
+
+    assert run_import(job["id"], batch_size=3) is True
+    job = client.get(f"/v1/users/import/{job['id']}", headers=OWNER).json()
+    assert (job["status"], job["processed_rows"], job["created"], job["failed"]) == ("completed", 13, 8, 5)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"/v1/users/import/{job['id']}/rows", headers=OWNER, params=params).json()
+        seen += page["rows"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert [row["row"] for row in seen] == list(range(1, 14))
+    assert [(row["status"], row["error"]) for row in seen[8:]] == [
+        ("invalid", "Invalid email"), ("invalid", "Duplicate email in import"),
+        ("invalid", "first_name and last_name are required"), ("invalid", "Role 'admin' cannot be assigned"),
+        ("duplicate", "Email already registered"),
+    ]
+    failed = client.get(f"/v1/users/import/{job['id']}/rows", headers=OWNER, params={"status": "invalid"}).json()
+    assert len(failed["rows"]) == 4
+
+    with db_module.SessionLocal() as session:
+        users = {u.email: u for u in session.query(User).filter(User.tenant_id == 1)}
+        assert {seen[i]["user_id"] for i in range(8)} == {u.id for u in users.values()}
+        assert users["u1@acme.io"].role == "viewer" and users["u2@acme.io"].role == "user"
+        assert verify_password(users["u2@acme.io"].password_hash, "pw-2")
+        assert users["u5@acme.io"].password_hash == UNUSABLE_PASSWORD
+        assert session.query(UserImportRow).filter(UserImportRow.password.isnot(None)).count() == 0
+
+
+def test_import_formats_and_permissions(client, sqlite_db):
+    users = [{"email": "j@acme.io", "firstName": "J", "lastName": "Son"}, {"email": "k@acme.io", "first_name": "K", "last_name": "L"}]
+    res = client.post("/v1/users/import", content=json.dumps(users), headers={**OWNER, "Content-Type": "application/json"})
+    assert res.status_code == 202 and res.json()["failed"] == 0
+    ndjson = "\n".join(json.dumps(user) for user in users)
+    res = client.post("/v1/users/import", content=ndjson, headers={**OWNER, "Content-Type": "application/x-ndjson"})
+    assert res.status_code == 202 and res.json()["total_rows"] == 2
+
+    assert client.post("/v1/users/import", content="[1]", headers={**OWNER, "Content-Type": "application/json"}).status_code == 400
+    assert client.post("/v1/users/import", content=b"x", headers={**OWNER, "Content-Type": "text/plain"}).status_code == 415
+    member = {"Authorization": f"Bearer {create_Ajwt(2, 1)}", "Content-Type": "application/json"}
+    assert client.post("/v1/users/import", content=json.dumps(users), headers=member).status_code == 403
+    other_tenant = {"Authorization": f"Bearer {create_Ajwt(3, 2, role='owner')}"}
+    assert client.get(f"/v1/users/import/{res.json()['id']}", headers=other_tenant).status_code == 404
+
+
+def test_passwords_are_refused_while_the_secret_is_the_placeholder(client, sqlite_db, monkeypatch):
+    monkeypatch.setattr(settings, "USER_IMPORT_SECRET", "")
+    monkeypatch.setattr(settings, "SECRET_KEY", DEFAULT_SECRET)
+    headers = {**OWNER, "Content-Type": "text/csv"}
+    res = client.post("/v1/users/import", content=csv_body([("p@acme.io", "P", "Q", "", "secret")]), headers=headers)
+    assert res.status_code == 503
+    with db_module.SessionLocal() as session:
+        assert session.query(UserImportJob).count() == 0
+    res = client.post("/v1/users/import", content=csv_body([("p@acme.io", "P", "Q", "", "")]), headers=headers)
+    assert res.status_code == 202  # without passwords nothing needs sealing
+
+
+def test_failed_import_resumes_from_its_first_pending_row(client, sqlite_db, monkeypatch):
+    rows = [(f"r{i}@acme.io", "R", f"{i}", "", "") for i in range(10)]
+    job = client.post("/v1/users/import", content=csv_body(rows), headers={**OWNER, "Content-Type": "text/csv"}).json()
+
+    real_store, stored = UserImporter._store, []
+
+    async def crash_after_two_batches(self, *args):
+        if len(stored) == 2:
+            raise RuntimeError("worker lost")
+        stored.append(args)
+        await real_store(self, *args)
+
+    monkeypatch.setattr(UserImporter, "_store", crash_after_two_batches)
+
+    async def crash():
+        importer = UserImporter(executor_kind="thread", workers=2, batch_size=3)
+        await importer.submit(job["id"])
+        await importer.close()
+
+    asyncio.run(crash())
+    status = client.get(f"/v1/users/import/{job['id']}", headers=OWNER).json()
+    assert (status["status"], status["created"], status["error"]) == ("failed", 6, "worker lost")
+
+    monkeypatch.setattr(UserImporter, "_store", real_store)
+    assert client.post(f"/v1/users/import/{job['id']}/resume", headers=OWNER).json()["status"] == "pending"
+    assert run_import(job["id"], batch_size=3) is True
+    status = client.get(f"/v1/users/import/{job['id']}", headers=OWNER).json()
+    assert (status["status"], status["created"], status["failed"]) == ("completed", 10, 0)
+    assert client.post(f"/v1/users/import/{job['id']}/resume", headers=OWNER).status_code == 409
+    with db_module.SessionLocal() as session:
+        assert session.query(User).filter(User.tenant_id == 1).count() == 10
+
+
+def test_worker_that_lost_its_lease_stops_without_committing(client, sqlite_db, monkeypatch):
+    rows = [(f"l{i}@acme.io", "L", f"{i}", "", "") for i in range(6)]
+    job = client.post("/v1/users/import", content=csv_body(rows), headers={**OWNER, "Content-Type": "text/csv"}).json()
+    real_store, calls = UserImporter._store, []
+
+    async def taken_over_after_one_batch(self, claimed, *args):
+        calls.append(claimed["id"])
+        if len(calls) == 2:
+            # Our lease expired mid-batch and another worker claimed the job
+            with db_module.SessionLocal() as session:
+                session.query(UserImportJob).filter_by(id=claimed["id"]).update({"heartbeat_at": datetime.now(timezone.utc)})
+                session.commit()
+        await real_store(self, claimed, *args)
+
+    monkeypatch.setattr(UserImporter, "_store", taken_over_after_one_batch)
+    with pytest.raises(LeaseLost):
+        run_import(job["id"], batch_size=3)
+    status = client.get(f"/v1/users/import/{job['id']}", headers=OWNER).json()
+    assert (status["status"], status["processed_rows"], status["created"]) == ("running", 3, 3)
+    with db_module.SessionLocal() as session:
+        assert session.query(User).filter(User.tenant_id == 1).count() == 3
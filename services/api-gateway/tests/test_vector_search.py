@@ -0,0 +1,96 @@
+"""Binary vector codecs, vectorised top-k cosine search, BM25 and hybrid fusion."""
+import numpy as np
+
+from app.core import db as db_module
+from app.models.chunk import Chunk
+from app.search.engine import SearchHit, top_k_cosine
+from app.search.fusion import reciprocal_rank_fusion
+from app.search.lexical import BM25Index
+from app.search.vectors import normalize_rows, pack_vector, unpack_matrix, unpack_vector
+
+
+def test_float32_roundtrip_and_int8_quantization():
+    vec = np.random.default_rng(0).normal(size=384).astype(np.float32)
+    blob, scale = pack_vector(vec)
+    assert len(blob) == 384 * 4 and np.array_equal(unpack_vector(blob), vec)
+
+    qblob, qscale = pack_vector(vec, "int8")
+    assert len(qblob) == 384
+    restored = unpack_vector(qblob, "int8", qscale)
+    cosine = float(restored @ vec / (np.linalg.norm(restored) * np.linalg.norm(vec)))
+    assert cosine > 0.999
+    matrix = unpack_matrix([qblob, qblob], 384, "int8", [qscale, qscale])
+    assert matrix.shape == (2, 384) and np.allclose(matrix[0], restored)
+
+
+def test_top_k_matches_exhaustive_ranking():
+    rng = np.random.default_rng(1)
+    matrix = normalize_rows(rng.normal(size=(500, 32)).astype(np.float32))
+    queries = rng.normal(size=(3, 32)).astype(np.float32)
+    idx, scores = top_k_cosine(matrix, queries, 5)
+    expected = np.argsort(-(normalize_rows(queries) @ matrix.T), axis=1)[:, :5]
+    assert np.array_equal(idx, expected)
+    assert np.all(np.diff(scores, axis=1) <= 0)
+
+
+def test_search_route_is_tenant_scoped(client, sqlite_db, auth_headers):
+    with db_module.SessionLocal() as session:
+        for i, (tenant_id, vec) in enumerate([(1, [1, 0, 0]), (1, [0.9, 0.1, 0]), (2, [1, 0, 0]), (1, [0, 1, 0])]):
+            blob, scale = pack_vector(vec, "int8" if i % 2 else "float32")
+            session.add(Chunk(id=i + 1, document_id=10 + tenant_id, tenant_id=tenant_id, vector=blob,
+                              vector_dim=3, vector_dtype="int8" if i % 2 else "float32", vector_scale=scale))
+        session.commit()
+
+    res = client.post("/v1/search/query", json={"vector": [1, 0, 0], "top_k": 2}, headers=auth_headers)
+    assert res.status_code == 200, res.text
+    assert [r["chunk_id"] for r in res.json()["results"]] == [1, 2]
+    assert all(r["document_id"] == 11 for r in res.json()["results"])
+
+
+def test_bm25_keeps_identifiers_and_updates_incrementally():
+    index = BM25Index()
+    index.add([1, 2, 3], [10, 10, 20], [
+        "Lot 3: structural steel per EN 1090-2, CPV 45223210-1",
+        "Lot 4: roofing works, CPV 45261000-4",
+        "General conditions for all lots and steel works",
+    ])
+    assert [hit[0] for hit in index.search("45223210-1")] == [1]
+    assert [hit[0] for hit in index.search("EN 1090-2 steel")][0] == 1
+
+    index.add([4], [20], ["Addendum: EN 1090-2 execution class EXC2"])
+    assert {hit[0] for hit in index.search("1090-2")} == {1, 4}
+    index.remove([1])
+    assert [hit[0] for hit in index.search("1090-2")] == [4]
+    assert index.search("nothing-matches") == []
+
+
+def test_rrf_rewards_agreement_between_retrievers():
+    vector_hits = [SearchHit(1, 10, 0.9), SearchHit(2, 10, 0.8), SearchHit(3, 10, 0.7)]
+    lexical_hits = [(3, 10, 12.0), (4, 11, 8.0)]
+    fused = reciprocal_rank_fusion(vector_hits, lexical_hits, k=3)
+    assert [hit.chunk_id for hit in fused] == [3, 1, 2]
+    assert (fused[0].vector_rank, fused[0].lexical_rank) == (3, 1)
+
+
+def test_hybrid_route_fuses_lexical_and_vector(client, sqlite_db, auth_headers):
+    with db_module.SessionLocal() as session:
+        rows = [
+            (1, [1, 0, 0], "site preparation and earthworks"),
+            (2, [0.9, 0.1, 0], "excavation of foundations"),
+            (3, [0, 1, 0], "lot 7 welding per EN ISO 3834-2"),
+        ]
+        for chunk_id, vec, text in rows:
+            blob, scale = pack_vector(vec)
+            session.add(Chunk(id=chunk_id, document_id=11, tenant_id=1, vector=blob, vector_dim=3,
+                              vector_scale=scale, text=text))
+        session.commit()
+
+    body = {"query": "ISO 3834-2", "vector": [1, 0, 0], "top_k": 3}
+    res = client.post("/v1/search/query", json=body, headers=auth_headers)
+    assert res.status_code == 200, res.text
+    results = res.json()["results"]
+    assert {r["chunk_id"] for r in results} == {1, 2, 3}
+    assert next(r for r in results if r["chunk_id"] == 3)["lexical_rank"] == 1
+
+    res = client.post("/v1/search/query", json={**body, "mode": "lexical"}, headers=auth_headers)
+    assert [r["chunk_id"] for r in res.json()["results"]] == [3]